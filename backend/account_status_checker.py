@@ -108,7 +108,7 @@ class AccountStatusChecker:
             
             # Create stealth browser
             try:
-                stealth_manager = StealthBrowserManager(username)
+                stealth_manager = StealthBrowserManager(username, job_type='status_check')
                 browser, context = await stealth_manager.create_stealth_browser()
             except Exception as e:
                 result['status'] = 'failed'
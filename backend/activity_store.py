@@ -0,0 +1,175 @@
+"""
+Activity Log Store
+SQLite-backed user activity log with (user_id, time) and (action, time) indexes, keyset pagination and retention
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_LOG_DB = os.getenv('ACTIVITY_LOG_DB', os.path.join('logs', 'activity_logs.sqlite3'))
+
+# Retention: whichever bound is hit first; pruning runs every ACTIVITY_PRUNE_EVERY inserts
+ACTIVITY_RETENTION_DAYS = int(os.getenv('ACTIVITY_RETENTION_DAYS', '365'))
+ACTIVITY_MAX_ROWS = int(os.getenv('ACTIVITY_MAX_ROWS', '1000000'))
+ACTIVITY_PRUNE_EVERY = 1000
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+LOG_FIELDS = ['timestamp', 'user_id', 'action', 'details', 'ip_address', 'city', 'country', 'country_code']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS activity_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    user_id TEXT,
+    action TEXT,
+    details TEXT,
+    ip_address TEXT,
+    city TEXT,
+    country TEXT,
+    country_code TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_activity_ts ON activity_logs (ts, id);
+CREATE INDEX IF NOT EXISTS idx_activity_user_ts ON activity_logs (user_id, ts, id);
+CREATE INDEX IF NOT EXISTS idx_activity_action_ts ON activity_logs (action, ts, id);
+"""
+
+
+def _to_ts(timestamp: str) -> float:
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+class ActivityStore:
+    def __init__(self, db_path: str = ACTIVITY_LOG_DB):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.inserts_since_prune = 0
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def append(self, entry: Dict):
+        """Insert one activity entry (same fields as the legacy JSON log)"""
+        self.append_many([entry])
+
+    def append_many(self, entries: Iterable[Dict]) -> int:
+        rows = [(_to_ts(entry.get('timestamp')), entry.get('timestamp') or datetime.now().isoformat())
+                + tuple(entry.get(field) for field in LOG_FIELDS[1:]) for entry in entries]
+        if not rows:
+            return 0
+        with self.lock:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                f"INSERT INTO activity_logs (ts, {', '.join(LOG_FIELDS)}) VALUES ({', '.join('?' * (len(LOG_FIELDS) + 1))})",
+                rows)
+            self.conn.execute("COMMIT")
+            self.inserts_since_prune += len(rows)
+            due = self.inserts_since_prune >= ACTIVITY_PRUNE_EVERY
+        if due:
+            self.prune()
+        return len(rows)
+
+    def prune(self) -> int:
+        """Apply time- and size-based retention"""
+        cutoff = time.time() - ACTIVITY_RETENTION_DAYS * 86400
+        with self.lock:
+            self.inserts_since_prune = 0
+            removed = self.conn.execute("DELETE FROM activity_logs WHERE ts < ?", (cutoff,)).rowcount
+            max_id = self.conn.execute("SELECT MAX(id) FROM activity_logs").fetchone()[0] or 0
+            removed += self.conn.execute("DELETE FROM activity_logs WHERE id <= ?",
+                                         (max_id - ACTIVITY_MAX_ROWS,)).rowcount
+        if removed:
+            logger.info(f"Pruned {removed} activity log entries")
+        return removed
+
+    def query(self, user_id: Optional[str] = None, action: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Dict:
+        """Newest-first page of entries; pass next_cursor back to continue"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if user_id:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if action:
+            clauses.append("action = ?")
+            params.append(action)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if cursor:
+            cursor_ts, _, cursor_id = cursor.partition(':')
+            clauses.append("(ts, id) < (?, ?)")
+            params.extend([float(cursor_ts), int(cursor_id)])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM activity_logs {where} ORDER BY ts DESC, id DESC LIMIT ?",
+                params + [limit + 1]).fetchall()
+        page = rows[:limit]
+        return {
+            'logs': [{field: row[field] for field in LOG_FIELDS} for row in page],
+            'next_cursor': f"{page[-1]['ts']!r}:{page[-1]['id']}" if len(rows) > limit else None,
+        }
+
+    def missing_location(self) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, ip_address FROM activity_logs WHERE city IS NULL OR country IS NULL").fetchall()
+        return [{'id': row['id'], 'ip_address': row['ip_address']} for row in rows]
+
+    def set_location(self, entry_id: int, location: Dict):
+        with self.lock:
+            self.conn.execute("UPDATE activity_logs SET city = ?, country = ?, country_code = ? WHERE id = ?",
+                              (location['city'], location['country'], location['country_code'], entry_id))
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM activity_logs").fetchone()[0]
+
+    def import_json(self, path: str) -> int:
+        """One-time import of the legacy activity_logs.json into an empty store.
+
+        The non-empty store is what prevents a second import; the file is also renamed where possible,
+        which fails when it is bind-mounted as a single file (docker-compose does this).
+        """
+        if not os.path.exists(path) or self.count():
+            return 0
+        try:
+            with open(path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read legacy activity log {path}: {e}")
+            return 0
+        imported = self.append_many(entries)
+        if imported:
+            logger.info(f"Imported {imported} activity log entries from {path}")
+            try:
+                os.replace(path, f"{path}.migrated")
+            except OSError as e:
+                # EBUSY/EXDEV on a bind-mounted file; the store now has rows, so it won't be imported again
+                logger.info(f"Left {path} in place after import: {e}")
+        return imported
+
+
+# Global instance
+activity_store = ActivityStore()
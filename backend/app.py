@@ -5,21 +5,23 @@ Converted from Flask to FastAPI for better performance and async support
 
 from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Form, Request, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPBearer
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import os
 import json
+import heapq
 import uuid
 import logging
 import asyncio
 import threading
 import time as time_module
 import tempfile
+import hmac
 import atexit
+import importlib
 import traceback
-import pandas as pd
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
@@ -32,9 +34,22 @@ from auth import (
 )
 from instagram_accounts import instagram_accounts_manager
 from proxy_manager import proxy_manager
-from instagram_daily_post import run_daily_post_automation
-from instagram_dm_automation import run_dm_automation
-from instagram_warmup import run_warmup_automation
+from resource_policy import validate_overrides
+from bandwidth_tracker import bandwidth_tracker
+from metrics import metrics_registry, http_request_seconds, active_jobs, job_statuses
+from tracing import tracer
+from script_logging import script_log_hub, ScriptLogger, MAX_LOG_RECORDS
+from upload_utils import stream_upload_to_path, upload_too_large, UploadTooLargeError, MAX_FILE_SIZE, MAX_UPLOAD_REQUEST_SIZE
+from media_cache import media_cache, is_valid_sha256
+from media_preflight import media_preflight
+from recipient_ledger import recipient_ledger, normalize_username
+from dm_journal import dm_journal, RESPONSE_FIELDS, SEND_FIELDS
+from download_streams import negotiate_encoding, compress_chunks, batch_lines, file_chunks, csv_chunks
+from selector_registry import selector_registry
+from script_stats import script_stats, summarize_counts, summarize_bandwidth, SCRIPT_STATUSES, RECENT_SCRIPTS_LIMIT
+from coordination import coordinator, JOB_LEASE_SECONDS
+from job_lifecycle import job_lifecycle, RESUME_INTERRUPTED_JOBS, DRAIN_TIMEOUT
+from health_checks import readiness_checker
 
 # Load environment variables
 load_dotenv()
@@ -80,6 +95,33 @@ app.add_middleware(
     ],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Observe request latency per route template"""
+    start = time_module.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        http_request_seconds.observe(
+            time_module.perf_counter() - start,
+            method=request.method,
+            route=route_path,
+            status=str(status_code)
+        )
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse oversized multipart bodies from Content-Length before they are read and spooled"""
+    if upload_too_large(request.headers.get("content-type", ""), request.headers.get("content-length")):
+        return JSONResponse(status_code=413, content={"detail": {
+            "error": f"Upload exceeds maximum size of {MAX_UPLOAD_REQUEST_SIZE // (1024 * 1024)} MB"}})
+    return await call_next(request)
+
 # Configuration
 LOGS_FOLDER = 'logs'
 ALLOWED_EXTENSIONS = {
@@ -93,9 +135,11 @@ os.makedirs(LOGS_FOLDER, exist_ok=True)
 
 # Global variables to track running scripts
 active_scripts = {}
-script_logs = {}
 script_stop_flags = {}
 script_temp_files = {}
+script_accounts = {}  # script_id -> List[AccountRecord], kept out of the reportable config
+draining_scripts = set()  # scripts told to stop for a shutdown; they end as "interrupted"
+resumed_tasks = set()  # runs restarted from a checkpoint (not tied to a request, so shutdown awaits them)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -123,9 +167,16 @@ class UserUpdate(BaseModel):
 class StopScriptRequest(BaseModel):
     reason: str = "Script stopped by user"
 
+class SuppressionRequest(BaseModel):
+    usernames: List[str]
+    reason: str = ""
+
 # Utility Functions
 def cleanup_temp_files(script_id):
-    """Clean up temporary files for a specific script"""
+    """Clean up temporary files, cached media references and account records for a specific script"""
+    media_cache.release(script_id)
+    script_accounts.pop(script_id, None)
+    selector_registry.save_stats()
     if script_id in script_temp_files:
         for file_path in script_temp_files[script_id]:
             try:
@@ -144,62 +195,237 @@ def cleanup_all_temp_files():
 # Register cleanup function
 atexit.register(cleanup_all_temp_files)
 
-def save_temp_file(file: UploadFile, script_id: str, prefix: str = ""):
-    """Save uploaded file to temporary location and track it"""
+async def save_temp_file(file: UploadFile, script_id: str, prefix: str = "") -> Dict:
+    """Stream uploaded file to a temporary location in chunks and track it.
+    
+    Returns {'path', 'size', 'sha256'}; raises 413 if MAX_FILE_SIZE is exceeded mid-stream.
+    """
     if script_id not in script_temp_files:
         script_temp_files[script_id] = []
     
     # Create temporary file with appropriate extension
     file_extension = os.path.splitext(file.filename)[1] if file.filename else ''
     temp_fd, temp_path = tempfile.mkstemp(suffix=file_extension, prefix=f"{prefix}_{script_id}_")
+    os.close(temp_fd)
     
     try:
-        # Save file to temporary location
-        with os.fdopen(temp_fd, 'wb') as temp_file:
-            content = file.file.read()
-            temp_file.write(content)
-        
-        # Track the temporary file
-        script_temp_files[script_id].append(temp_path)
-        return temp_path
-    except Exception as e:
-        # Clean up on error
-        try:
-            os.close(temp_fd)
-            os.remove(temp_path)
-        except:
-            pass
-        raise e
+        upload_info = await stream_upload_to_path(file, temp_path, MAX_FILE_SIZE)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail={"error": str(e)})
+    
+    # Track the temporary file against the job for cleanup
+    script_temp_files[script_id].append(temp_path)
+    upload_info['path'] = temp_path
+    return upload_info
 
 def allowed_file(filename: str, file_type: str) -> bool:
     """Check if file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS.get(file_type, set())
 
+def parse_resource_policy(raw: str) -> Optional[Dict]:
+    """Parse optional per-job resource policy overrides (JSON form field)"""
+    if not raw:
+        return None
+    try:
+        overrides = json.loads(raw)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail={"error": "Invalid resource policy format"})
+    error = validate_overrides(overrides)
+    if error:
+        raise HTTPException(status_code=400, detail={"error": error})
+    return overrides
+
+def store_script_bandwidth(script_id: str):
+    """Copy the tracker's bandwidth counters for a script into its job record"""
+    if script_id not in active_scripts:
+        return
+    stats = bandwidth_tracker.get_job_stats(script_id)
+    if stats:
+        script_data = active_scripts[script_id]
+        script_data["bandwidth"] = stats
+        delta = script_stats.update_bandwidth(script_id, stats.get('totals'))
+        coordinator.add_bandwidth(script_data.get('user_id', 'system'), script_data.get('type', 'unknown'), delta)
+
+def set_script_status(script_id: str, status: str, **fields):
+    """Record a script's final status (and end time) and update the stats counters.
+    
+    A script drained for shutdown ends as "interrupted" whatever its engine reported, and keeps its checkpoint.
+    """
+    if script_id in draining_scripts:
+        status = "interrupted"
+        fields.setdefault("stop_reason", "Server restarting")
+    script_data = active_scripts[script_id]
+    script_data["status"] = status
+    script_data["end_time"] = datetime.now().isoformat()
+    script_data.update(fields)
+    script_stats.transition(script_id, status)
+    coordinator.update_job(script_id, script_data)
+    if status == "interrupted":
+        job_lifecycle.mark_interrupted(script_id, script_data)
+    else:
+        job_lifecycle.finish(script_id)
+
+def register_script(script_id: str):
+    """Count, publish and checkpoint a script that has just been added to active_scripts"""
+    script_stats.register(script_id, active_scripts[script_id])
+    coordinator.register_job(script_id, active_scripts[script_id])
+    job_lifecycle.track(script_id, active_scripts[script_id], coordinator.worker_id)
+    script_log_hub.start(script_id)
+
+def ensure_accepting_jobs():
+    """New jobs are refused while the server drains for a restart"""
+    if job_lifecycle.draining.is_set():
+        raise HTTPException(status_code=503, detail={"error": "Server is restarting, please try again shortly"})
+
+def pending_accounts(script_id: str) -> List:
+    """Accounts a script still has to process (a resumed script skips those it already completed)"""
+    completed = job_lifecycle.completed_accounts(script_id)
+    return [account for account in script_accounts.get(script_id, []) if account.username not in completed]
+
+def make_progress_callback(script_id: str):
+    """Engine progress hook: checkpoint each account's outcome as it finishes"""
+    def progress_callback(username: str, status: str):
+        job_lifecycle.record_progress(script_id, username, status)
+    return progress_callback
+
+def make_stop_callback(script_id: str):
+    """Engine stop check: the local flag, or a stop requested through any worker"""
+    def stop_callback():
+        if script_stop_flags.get(script_id, False):
+            return True
+        reason = coordinator.stop_reason(script_id)
+        if reason is None:
+            return False
+        script_stop_flags[script_id] = True
+        draining_scripts.discard(script_id)  # a user's stop wins over resuming after the restart
+        set_script_status(script_id, "stopped", stop_reason=reason)
+        log_script_message(script_id, reason, "WARNING")
+        return True
+    return stop_callback
+
+async def resolve_media(media_file: Optional[UploadFile], media_sha256: str = "") -> Dict:
+    """Return a media cache entry, either by hash (no upload) or by ingesting the upload"""
+    if media_sha256:
+        if not is_valid_sha256(media_sha256):
+            raise HTTPException(status_code=400, detail={"error": "Invalid media hash"})
+        cached = media_cache.lookup(media_sha256)
+        if cached:
+            return cached
+        if not media_file:
+            raise HTTPException(status_code=404, detail={"error": "Media not found in cache, please upload the file"})
+    
+    if not media_file or not media_file.filename:
+        raise HTTPException(status_code=400, detail={"error": "Media file is required"})
+    
+    if not (allowed_file(media_file.filename, 'images') or allowed_file(media_file.filename, 'videos')):
+        raise HTTPException(status_code=400, detail={"error": "Invalid media file format. Use supported image/video formats"})
+    
+    try:
+        cached = await media_cache.ingest_upload(media_file, media_file.filename)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail={"error": str(e)})
+    if not cached:
+        # Evicted by another worker before this request could reference it
+        raise HTTPException(status_code=409, detail={"error": "Media could not be kept in the cache, please upload it again"})
+    return cached
+
+async def preflight_media(cached_media: Dict) -> Dict:
+    """Header-level media checks, cached by content hash alongside the media cache entry"""
+    cached_result = cached_media.get('preflight')
+    result = await asyncio.to_thread(
+        media_preflight.check, cached_media['path'], cached_media.get('filename'),
+        cached_media['sha256'], cached_result
+    )
+    if result is not cached_result:
+        media_cache.set_metadata(cached_media['sha256'], preflight=result)
+    return result
+
+async def load_engine(module_name: str):
+    """Import an automation engine when its first job starts, off the event loop (it pulls in pandas and Playwright)"""
+    return await asyncio.to_thread(importlib.import_module, module_name)
+
 def generate_script_id() -> str:
     """Generate unique script ID"""
     return str(uuid.uuid4())
 
+def all_scripts() -> Dict[str, Dict]:
+    """This worker's scripts plus those other workers published to the shared registry"""
+    scripts = {script_id: script_data for script_id, script_data in coordinator.list_jobs().items()
+               if script_id not in active_scripts}
+    scripts.update(active_scripts)
+    return scripts
+
 def log_script_message(script_id: str, message: str, level: str = "INFO"):
-    """Log message for specific script"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = f"[{timestamp}] [{level}] {message}"
-    
-    if script_id not in script_logs:
-        script_logs[script_id] = []
-    
-    script_logs[script_id].append(log_entry)
-    
-    # Keep only last 1000 logs per script
-    if len(script_logs[script_id]) > 1000:
-        script_logs[script_id] = script_logs[script_id][-1000:]
+    """Log message for specific script (formatted once by the log hub)"""
+    script_log_hub.log(script_id, message, level)
+
+def collect_job_metrics():
+    """Refresh job gauges: running jobs from the shared registry, status counts from this worker's stats"""
+    running = {}
+    scripts = [script_data for script_id, script_data in coordinator.list_jobs(status='running').items()
+               if script_id not in active_scripts]
+    scripts += [script_data for script_data in active_scripts.values() if script_data.get('status') == 'running']
+    for script_data in scripts:
+        key = (script_data.get('type', 'unknown'),)
+        running[key] = running.get(key, 0) + 1
+    active_jobs.replace(running)
+    samples = {}
+    for script_type, counts in script_stats.get_counts()['by_type'].items():
+        for status in SCRIPT_STATUSES:
+            samples[(script_type, status)] = counts.get(status, 0)
+    job_statuses.replace(samples)
+
+metrics_registry.register_collector(collect_job_metrics)
+# A cached blob stays pinned while its job is running on any worker (or not yet published)
+media_cache.set_ref_check(lambda job_id: (coordinator.get_job(job_id) or {'status': 'running'}).get('status') == 'running')
+script_log_hub.add_sink(coordinator.publish_log)
+# Account and proxy labels stay on the admin-only /api/scripts/bandwidth/metrics
+metrics_registry.register_renderer(lambda: bandwidth_tracker.prometheus_lines(identities=False))
+
+# Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>"; without a token only loopback may scrape
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+LOOPBACK_HOSTS = ('127.0.0.1', '::1', 'localhost')
+
+def verify_metrics_access(request: Request):
+    """Gate /metrics behind the scrape token, or loopback when no token is configured"""
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get('authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip(), METRICS_TOKEN):
+            raise HTTPException(status_code=401, detail={"error": "Invalid metrics token"},
+                                headers={"WWW-Authenticate": "Bearer"})
+    elif request.client is None or request.client.host not in LOOPBACK_HOSTS:
+        raise HTTPException(status_code=403, detail={"error": "Set METRICS_TOKEN to scrape metrics remotely"})
 
 # Health and Debug Endpoints
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint(_: None = Depends(verify_metrics_access)):
+    """Prometheus metrics (served on the backend port only, not proxied by nginx)"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/api/health/live")
+async def liveness_check():
+    """Liveness: the process is up and its event loop answers; checks no dependencies"""
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+@app.get("/api/health/ready")
+async def readiness_check():
+    """Readiness: 503 while this instance shouldn't get new work (results cached for a few seconds)"""
+    report = await readiness_checker.check()
+    if not report["ready"]:
+        return JSONResponse(status_code=503, content=dict(report, status="not_ready"))
+    return dict(report, status="ready")
+
+@app.on_event("startup")
+async def start_readiness_checks():
+    readiness_checker.register_check("accepting_jobs", lambda: {"ok": not job_lifecycle.draining.is_set()})
+    readiness_checker.start_loop_monitor()
+
 @app.get("/api/debug")
 async def debug_endpoint(request: Request):
     """Debug endpoint to check server status"""
@@ -306,12 +532,15 @@ async def logout(current_user: dict = Depends(verify_token_dependency)):
 async def start_daily_post(
     background_tasks: BackgroundTasks,
     account_ids: str = Form(...),
-    media_file: UploadFile = File(...),
+    media_file: Optional[UploadFile] = File(None),
+    media_sha256: str = Form(""),
     caption: str = Form(""),
     auto_generate_caption: bool = Form(True),
+    resource_policy: str = Form(""),
     current_user: dict = Depends(verify_token_dependency)
 ):
     """Start Instagram Daily Post script"""
+    ensure_accepting_jobs()
     script_id = generate_script_id()
     
     try:
@@ -323,38 +552,31 @@ async def start_daily_post(
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail={"error": "Invalid account IDs format"})
         
+        resource_overrides = parse_resource_policy(resource_policy)
+        
         # Get selected accounts from the accounts manager
-        selected_accounts = instagram_accounts_manager.get_accounts_by_ids(account_ids_list)
+        selected_accounts = instagram_accounts_manager.get_account_records(account_ids_list)
         if len(selected_accounts) == 0:
             raise HTTPException(status_code=400, detail={"error": "No valid accounts found"})
         
-        # Check media file type
-        is_image = allowed_file(media_file.filename, 'images')
-        is_video = allowed_file(media_file.filename, 'videos')
+        # Resolve media from the content-addressed cache, uploading only if needed
+        cached_media = await resolve_media(media_file, media_sha256)
+        media_filename = cached_media.get('filename') or os.path.basename(cached_media['path'])
         
-        if not (is_image or is_video):
-            raise HTTPException(status_code=400, detail={"error": "Invalid media file format. Use supported image/video formats"})
-        
-        # Save uploaded media file to temporary location
-        media_path = save_temp_file(media_file, script_id, "media")
-        
-        # Create temporary accounts file with selected accounts
-        accounts_data = []
-        for account in selected_accounts:
-            accounts_data.append({
-                'Username': account['username'],
-                'Password': account['password']
+        # Reject unusable media now rather than after a browser has launched and logged in
+        preflight = await preflight_media(cached_media)
+        if not preflight['ok']:
+            raise HTTPException(status_code=400, detail={
+                "error": f"Media check failed: {'; '.join(preflight['errors'])}",
+                "preflight": preflight
             })
+        is_video = preflight['kind'] == 'video'
+        media_path = media_cache.acquire(cached_media['sha256'], script_id)
+        if not media_path:
+            raise HTTPException(status_code=400, detail={"error": "Cached media is no longer available, please re-upload"})
         
-        # Save accounts to temporary CSV file
-        accounts_df = pd.DataFrame(accounts_data)
-        accounts_path = f"temp_accounts_{script_id}.csv"
-        accounts_df.to_csv(accounts_path, index=False)
-        
-        # Track the temporary accounts file
-        if script_id not in script_temp_files:
-            script_temp_files[script_id] = []
-        script_temp_files[script_id].append(accounts_path)
+        # Engines receive the resolved records directly; no credentials are written to disk
+        script_accounts[script_id] = selected_accounts
         
         # Initialize script tracking
         active_scripts[script_id] = {
@@ -363,21 +585,31 @@ async def start_daily_post(
             "start_time": datetime.now().isoformat(),
             "user_id": current_user.get('user_id', 'system'),
             "config": {
-                "accounts_file": accounts_path,
+                "accounts": [account.username for account in selected_accounts],
                 "media_file": media_path,
                 "caption": caption,
                 "concurrent_accounts": len(selected_accounts),
                 "auto_generate_caption": auto_generate_caption,
                 "is_video": is_video,
-                "selected_account_ids": account_ids_list
+                "media_sha256": cached_media['sha256'],
+                "media_size": cached_media['size'],
+                "media_info": preflight,
+                "selected_account_ids": account_ids_list,
+                "resource_policy": resource_overrides
             }
         }
+        register_script(script_id)
         
         # Initialize stop flag
         script_stop_flags[script_id] = False
         
         log_script_message(script_id, f"Daily Post script started with {len(selected_accounts)} accounts")
-        log_script_message(script_id, f"Media file: {media_file.filename} ({'Video' if is_video else 'Image'})")
+        media_details = f"{preflight['width']}x{preflight['height']}"
+        if is_video and preflight.get('duration'):
+            media_details += f", {preflight['duration']:.1f}s, {preflight.get('codec')}"
+        log_script_message(script_id, f"Media file: {media_filename} ({'Video' if is_video else 'Image'}, {media_details})")
+        for warning in preflight['warnings']:
+            log_script_message(script_id, f"Media warning: {warning}", "WARNING")
         
         # Start the script in background
         background_tasks.add_task(run_daily_post_script, script_id)
@@ -389,8 +621,10 @@ async def start_daily_post(
         }
         
     except HTTPException:
+        cleanup_temp_files(script_id)
         raise
     except Exception as e:
+        cleanup_temp_files(script_id)
         logger.error(f"Error starting daily post script: {e}")
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
@@ -399,46 +633,44 @@ async def run_daily_post_script(script_id: str):
     try:
         config = active_scripts[script_id]["config"]
         
-        # Create log callback function
-        def log_callback(message, level="INFO"):
-            log_script_message(script_id, message, level)
+        # Structured log adapter, callable as log_callback(message, level)
+        log_callback = ScriptLogger(script_log_hub, script_id)
         
         # Create stop callback function
-        def stop_callback():
-            return script_stop_flags.get(script_id, False)
+        stop_callback = make_stop_callback(script_id)
         
         log_script_message(script_id, "Starting Instagram Daily Post automation...")
+        engine = await load_engine("instagram_daily_post")
         
         # Run the automation function
-        success = await run_daily_post_automation(
+        success = await engine.run_daily_post_automation(
             script_id=script_id,
-            accounts_file=config['accounts_file'],
+            accounts=pending_accounts(script_id),
             media_file=config['media_file'],
             concurrent_accounts=config['concurrent_accounts'],
             caption=config.get('caption', ''),
             auto_generate_caption=config.get('auto_generate_caption', True),
             log_callback=log_callback,
-            stop_callback=stop_callback
+            stop_callback=stop_callback,
+            resource_policy=config.get('resource_policy'),
+            progress_callback=make_progress_callback(script_id)
         )
         
         if success:
-            active_scripts[script_id]["status"] = "completed"
-            active_scripts[script_id]["end_time"] = datetime.now().isoformat()
+            set_script_status(script_id, "completed")
             log_script_message(script_id, "Daily post script completed successfully!", "SUCCESS")
         else:
-            active_scripts[script_id]["status"] = "error"
-            active_scripts[script_id]["end_time"] = datetime.now().isoformat()
-            active_scripts[script_id]["error"] = "Script execution failed"
+            set_script_status(script_id, "error", error="Script execution failed")
             log_script_message(script_id, "Daily post script failed", "ERROR")
         
     except Exception as e:
-        active_scripts[script_id]["status"] = "error"
-        active_scripts[script_id]["end_time"] = datetime.now().isoformat()
-        active_scripts[script_id]["error"] = str(e)
+        set_script_status(script_id, "error", error=str(e))
         log_script_message(script_id, f"Script error: {e}", "ERROR")
         traceback.print_exc()
     finally:
-        # Clean up temporary files
+        # Persist proxy bandwidth usage and clean up temporary files
+        store_script_bandwidth(script_id)
+        script_log_hub.close(script_id)
         cleanup_temp_files(script_id)
 
 # DM Automation Endpoints
@@ -458,7 +690,7 @@ async def generate_spintax_previews(
             raise HTTPException(status_code=400, detail={"error": "Prompt is required"})
         
         # Import spintax parser
-        from instagram_dm_automation import SpintaxParser
+        SpintaxParser = (await load_engine("instagram_dm_automation")).SpintaxParser
         
         # Generate 3 different variations
         previews = []
@@ -504,7 +736,7 @@ async def generate_ai_spintax_samples(
             raise HTTPException(status_code=400, detail={"error": "Prompt is required"})
         
         # Import required modules
-        from instagram_dm_automation import SpintaxParser
+        SpintaxParser = (await load_engine("instagram_dm_automation")).SpintaxParser
         
         # Generate template-based spintax variations (since AI is removed)
         samples = []
@@ -677,9 +909,11 @@ async def start_dm_automation(
     dm_prompt_file: Optional[UploadFile] = File(None),
     custom_prompt: str = Form(""),
     dms_per_account: int = Form(30),
+    resource_policy: str = Form(""),
     current_user: dict = Depends(verify_token_dependency)
 ):
     """Start Instagram DM Automation script"""
+    ensure_accepting_jobs()
     script_id = generate_script_id()
     
     try:
@@ -698,36 +932,23 @@ async def start_dm_automation(
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail={"error": "Invalid account IDs format"})
         
+        resource_overrides = parse_resource_policy(resource_policy)
+        
         # Get selected accounts from the accounts manager
-        selected_accounts = instagram_accounts_manager.get_accounts_by_ids(account_ids_list)
+        selected_accounts = instagram_accounts_manager.get_account_records(account_ids_list)
         if len(selected_accounts) == 0:
             raise HTTPException(status_code=400, detail={"error": "No valid accounts found"})
         
-        # Create temporary accounts file with selected accounts
-        accounts_data = []
-        for account in selected_accounts:
-            accounts_data.append({
-                'Username': account['username'],
-                'Password': account['password']
-            })
-        
-        # Save accounts to temporary CSV file
-        accounts_df = pd.DataFrame(accounts_data)
-        accounts_path = f"temp_dm_accounts_{script_id}.csv"
-        accounts_df.to_csv(accounts_path, index=False)
-        
-        # Track the temporary accounts file
-        if script_id not in script_temp_files:
-            script_temp_files[script_id] = []
-        script_temp_files[script_id].append(accounts_path)
+        # Engines receive the resolved records directly; no credentials are written to disk
+        script_accounts[script_id] = selected_accounts
         
         target_path = None
         if target_file:
-            target_path = save_temp_file(target_file, script_id, "targets")
+            target_path = (await save_temp_file(target_file, script_id, "targets"))['path']
         
         prompt_path = None
         if dm_prompt_file:
-            prompt_path = save_temp_file(dm_prompt_file, script_id, "prompt")
+            prompt_path = (await save_temp_file(dm_prompt_file, script_id, "prompt"))['path']
         
         # Initialize script tracking
         active_scripts[script_id] = {
@@ -736,14 +957,16 @@ async def start_dm_automation(
             "start_time": datetime.now().isoformat(),
             "user_id": current_user.get('user_id', 'system'),
             "config": {
-                "accounts_file": accounts_path,
+                "accounts": [account.username for account in selected_accounts],
                 "target_file": target_path,
                 "prompt_file": prompt_path,
                 "custom_prompt": custom_prompt,
                 "dms_per_account": dms_per_account,
-                "selected_account_ids": account_ids_list
+                "selected_account_ids": account_ids_list,
+                "resource_policy": resource_overrides
             }
         }
+        register_script(script_id)
         
         # Initialize stop flag
         script_stop_flags[script_id] = False
@@ -761,8 +984,10 @@ async def start_dm_automation(
         }
         
     except HTTPException:
+        cleanup_temp_files(script_id)
         raise
     except Exception as e:
+        cleanup_temp_files(script_id)
         logger.error(f"Error starting DM automation script: {e}")
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
@@ -774,46 +999,44 @@ async def run_dm_automation_script(script_id: str):
         # Initialize stop flag
         script_stop_flags[script_id] = False
         
-        # Create log callback function
-        def log_callback(message, level="INFO"):
-            log_script_message(script_id, message, level)
+        # Structured log adapter, callable as log_callback(message, level)
+        log_callback = ScriptLogger(script_log_hub, script_id)
         
         # Create stop callback function  
-        def stop_callback():
-            return script_stop_flags.get(script_id, False)
+        stop_callback = make_stop_callback(script_id)
         
         log_script_message(script_id, "Starting Instagram DM automation...")
+        engine = await load_engine("instagram_dm_automation")
         
         # Run the automation function
-        success = await run_dm_automation(
+        success = await engine.run_dm_automation(
             script_id=script_id,
-            accounts_file=config['accounts_file'],
+            accounts=pending_accounts(script_id),
             target_file=config.get('target_file'),
             prompt_file=config.get('prompt_file'),
             custom_prompt=config.get('custom_prompt', ''),
             dms_per_account=config.get('dms_per_account', 30),
             log_callback=log_callback,
-            stop_callback=stop_callback
+            stop_callback=stop_callback,
+            resource_policy=config.get('resource_policy'),
+            progress_callback=make_progress_callback(script_id)
         )
         
         if success:
-            active_scripts[script_id]["status"] = "completed"
-            active_scripts[script_id]["end_time"] = datetime.now().isoformat()
+            set_script_status(script_id, "completed")
             log_script_message(script_id, "DM automation completed successfully!", "SUCCESS")
         else:
-            active_scripts[script_id]["status"] = "error"
-            active_scripts[script_id]["end_time"] = datetime.now().isoformat()
-            active_scripts[script_id]["error"] = "Script execution failed"
+            set_script_status(script_id, "error", error="Script execution failed")
             log_script_message(script_id, "DM automation script failed", "ERROR")
         
     except Exception as e:
-        active_scripts[script_id]["status"] = "error"
-        active_scripts[script_id]["end_time"] = datetime.now().isoformat()
-        active_scripts[script_id]["error"] = str(e)
+        set_script_status(script_id, "error", error=str(e))
         log_script_message(script_id, f"Script error: {e}", "ERROR")
         traceback.print_exc()
     finally:
-        # Clean up temporary files
+        # Persist proxy bandwidth usage and clean up temporary files
+        store_script_bandwidth(script_id)
+        script_log_hub.close(script_id)
         cleanup_temp_files(script_id)
 
 # Warmup Endpoints
@@ -834,9 +1057,11 @@ async def start_warmup(
     activity_delay_max: int = Form(7),
     scroll_attempts_min: int = Form(5),
     scroll_attempts_max: int = Form(10),
+    resource_policy: str = Form(""),
     current_user: dict = Depends(verify_token_dependency)
 ):
     """Start Instagram Account Warmup script"""
+    ensure_accepting_jobs()
     script_id = generate_script_id()
     
     try:
@@ -848,28 +1073,15 @@ async def start_warmup(
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail={"error": "Invalid account IDs format"})
         
+        resource_overrides = parse_resource_policy(resource_policy)
+        
         # Get selected accounts from the accounts manager
-        selected_accounts = instagram_accounts_manager.get_accounts_by_ids(account_ids_list)
+        selected_accounts = instagram_accounts_manager.get_account_records(account_ids_list)
         if len(selected_accounts) == 0:
             raise HTTPException(status_code=400, detail={"error": "No valid accounts found"})
         
-        # Create temporary accounts file with selected accounts
-        accounts_data = []
-        for account in selected_accounts:
-            accounts_data.append({
-                'Username': account['username'],
-                'Password': account['password']
-            })
-        
-        # Save accounts to temporary CSV file
-        accounts_df = pd.DataFrame(accounts_data)
-        accounts_path = f"temp_warmup_accounts_{script_id}.csv"
-        accounts_df.to_csv(accounts_path, index=False)
-        
-        # Track the temporary accounts file
-        if script_id not in script_temp_files:
-            script_temp_files[script_id] = []
-        script_temp_files[script_id].append(accounts_path)
+        # Engines receive the resolved records directly; no credentials are written to disk
+        script_accounts[script_id] = selected_accounts
         
         # Initialize script tracking
         active_scripts[script_id] = {
@@ -878,7 +1090,7 @@ async def start_warmup(
             "start_time": datetime.now().isoformat(),
             "user_id": current_user.get('user_id', 'system'),
             "config": {
-                "accounts_file": accounts_path,
+                "accounts": [account.username for account in selected_accounts],
                 "warmup_duration_min": warmup_duration_min,
                 "warmup_duration_max": warmup_duration_max,
                 "scheduler_delay": scheduler_delay,
@@ -894,9 +1106,11 @@ async def start_warmup(
                 "timing": {
                     "activity_delay": (activity_delay_min, activity_delay_max),
                     "scroll_attempts": (scroll_attempts_min, scroll_attempts_max)
-                }
+                },
+                "resource_policy": resource_overrides
             }
         }
+        register_script(script_id)
         
         # Initialize stop flag
         script_stop_flags[script_id] = False
@@ -919,8 +1133,10 @@ async def start_warmup(
         }
         
     except HTTPException:
+        cleanup_temp_files(script_id)
         raise
     except Exception as e:
+        cleanup_temp_files(script_id)
         logger.error(f"Error starting warmup script: {e}")
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
@@ -929,13 +1145,11 @@ async def run_warmup_script(script_id: str):
     try:
         config = active_scripts[script_id]["config"]
         
-        # Create log callback function
-        def log_callback(message, level="INFO"):
-            log_script_message(script_id, message, level)
+        # Structured log adapter, callable as log_callback(message, level)
+        log_callback = ScriptLogger(script_log_hub, script_id)
         
         # Create stop callback function
-        def stop_callback():
-            return script_stop_flags.get(script_id, False)
+        stop_callback = make_stop_callback(script_id)
         
         # Get configuration
         scheduler_delay_hours = config.get('scheduler_delay', 0)
@@ -947,6 +1161,7 @@ async def run_warmup_script(script_id: str):
         session_count = 0
         
         log_script_message(script_id, f"Starting warmup automation...")
+        engine = await load_engine("instagram_warmup")
         log_script_message(script_id, f"Duration range: {duration_min}-{duration_max} minutes per session")
         
         if is_recurring:
@@ -959,8 +1174,7 @@ async def run_warmup_script(script_id: str):
         while True:
             if stop_callback():
                 log_script_message(script_id, "Script stopped by user", "INFO")
-                active_scripts[script_id]["status"] = "stopped"
-                active_scripts[script_id]["end_time"] = datetime.now().isoformat()
+                set_script_status(script_id, "stopped")
                 return
             
             session_count += 1
@@ -976,14 +1190,16 @@ async def run_warmup_script(script_id: str):
             log_script_message(script_id, f"⏰ Session started at: {session_start_time.strftime('%Y-%m-%d %H:%M:%S')}")
             
             # Run the automation function for this session
-            success = await run_warmup_automation(
+            success = await engine.run_warmup_automation(
                 script_id=script_id,
-                accounts_file=config['accounts_file'],
+                accounts=pending_accounts(script_id),
                 warmup_duration=random_duration,
                 activities=config['activities'],
                 timing=config['timing'],
                 log_callback=log_callback,
-                stop_callback=stop_callback
+                stop_callback=stop_callback,
+                resource_policy=config.get('resource_policy'),
+                progress_callback=make_progress_callback(script_id)
             )
             
             session_end_time = datetime.now()
@@ -995,21 +1211,23 @@ async def run_warmup_script(script_id: str):
             else:
                 log_script_message(script_id, f"❌ Session #{session_count} failed", "ERROR")
                 if not is_recurring:
-                    active_scripts[script_id]["status"] = "error"
-                    active_scripts[script_id]["end_time"] = datetime.now().isoformat()
-                    active_scripts[script_id]["error"] = "Session execution failed"
+                    set_script_status(script_id, "error", error="Session execution failed")
                     return
                 else:
                     log_script_message(script_id, f"🔄 Continuing to next session despite failure...", "WARNING")
             
+            # A session cut short by a stop ends the script through the check at the top of the loop
+            if stop_callback():
+                continue
+            
             # Check if this is a single run (no recurring)
             if not is_recurring:
-                active_scripts[script_id]["status"] = "completed"
-                active_scripts[script_id]["end_time"] = datetime.now().isoformat()
+                set_script_status(script_id, "completed")
                 log_script_message(script_id, "🎯 Single session warmup completed successfully!", "SUCCESS")
                 return
             
-            # For recurring mode, wait for the specified delay
+            # For recurring mode, wait for the specified delay; the next session covers every account again
+            job_lifecycle.reset_progress(script_id)
             if scheduler_delay_hours > 0:
                 delay_seconds = scheduler_delay_hours * 3600
                 next_session_time = datetime.now() + timedelta(hours=scheduler_delay_hours)
@@ -1024,8 +1242,7 @@ async def run_warmup_script(script_id: str):
                 while time_module.time() - start_wait_time < delay_seconds:
                     if stop_callback():
                         log_script_message(script_id, "Script stopped during delay period", "INFO")
-                        active_scripts[script_id]["status"] = "stopped"
-                        active_scripts[script_id]["end_time"] = datetime.now().isoformat()
+                        set_script_status(script_id, "stopped")
                         return
                     
                     # Log progress every 15 minutes during long waits
@@ -1040,21 +1257,151 @@ async def run_warmup_script(script_id: str):
                 log_script_message(script_id, f"✅ Delay period completed. Preparing for next session...")
         
     except Exception as e:
-        active_scripts[script_id]["status"] = "error"
-        active_scripts[script_id]["end_time"] = datetime.now().isoformat()
-        active_scripts[script_id]["error"] = str(e)
+        set_script_status(script_id, "error", error=str(e))
         log_script_message(script_id, f"Script error: {e}", "ERROR")
         traceback.print_exc()
     finally:
-        # Clean up temporary files
+        # Persist proxy bandwidth usage and clean up temporary files
+        store_script_bandwidth(script_id)
+        script_log_hub.close(script_id)
+        cleanup_temp_files(script_id)
+
+# Graceful drain and resume across restarts
+SCRIPT_RUNNERS = {
+    "daily_post": run_daily_post_script,
+    "dm_automation": run_dm_automation_script,
+    "warmup": run_warmup_script,
+}
+
+def drain_scripts():
+    """Shutdown: stop this worker's scripts at their next safe point, keeping them resumable"""
+    for script_id, script_data in list(active_scripts.items()):
+        if script_data.get("status") != "running":
+            continue
+        try:
+            script_data["config"] = job_lifecycle.preserve_inputs(script_id, script_data["config"])
+        except OSError as e:
+            logger.error(f"Could not preserve inputs of script {script_id}: {e}")
+        job_lifecycle.mark_draining(script_id, script_data, coordinator.worker_id)
+        draining_scripts.add(script_id)
+        script_stop_flags[script_id] = True
+        log_script_message(script_id, "Server restarting: stopping at the next safe point, the run will resume afterwards", "WARNING")
+
+def prepare_resume(script_id: str, script_data: Dict) -> Optional[str]:
+    """Re-acquire what a checkpointed script needs; returns why it can't resume, or None"""
+    if not RESUME_INTERRUPTED_JOBS:
+        return "resuming is disabled"
+    if script_data.get("type") not in SCRIPT_RUNNERS:
+        return "its script type is unknown"
+    config = script_data["config"]
+    # Credentials are never checkpointed; accounts are resolved again from their ids
+    accounts = instagram_accounts_manager.get_account_records(config.get("selected_account_ids", []))
+    if not accounts:
+        return "its accounts no longer exist"
+    if script_data["type"] == "daily_post":
+        media_path = media_cache.acquire(config.get("media_sha256", ""), script_id)
+        if not media_path:
+            return "its media is no longer cached"
+        config["media_file"] = media_path
+    elif script_data["type"] == "dm_automation":
+        for key in ("target_file", "prompt_file"):
+            if config.get(key) and not os.path.exists(config[key]):
+                return f"its uploaded {key.replace('_', ' ')} was not preserved"
+    script_accounts[script_id] = accounts
+    return None
+
+def resume_script(checkpoint: Dict):
+    """Restart a script from its checkpoint under the same id, or record it as interrupted"""
+    script_id, script_data = checkpoint["job_id"], checkpoint["record"]
+    if coordinator.stop_reason(script_id) is not None:
+        # Stopped by a user while no worker was running it
+        job_lifecycle.finish(script_id)
+        return
+    if not job_lifecycle.claim(script_id, coordinator.worker_id, checkpoint["owner"]):
+        return
+    
+    final = None
+    reason = prepare_resume(script_id, script_data)
+    if reason:
+        final = dict(status="interrupted", stop_reason=f"Server restarted; not resumed because {reason}")
+    elif not pending_accounts(script_id):
+        if script_data["config"].get("scheduler_delay", 0) > 0:
+            job_lifecycle.reset_progress(script_id)
+        else:
+            final = dict(status="completed")
+    
+    active_scripts[script_id] = script_data
+    if final:
+        script_data.update(final, end_time=script_data.get("end_time") or datetime.now().isoformat())
+        script_stats.register(script_id, script_data)
+        coordinator.update_job(script_id, script_data)
+        job_lifecycle.finish(script_id)
+        log_script_message(script_id, script_data.get("stop_reason") or "All accounts had completed before the restart",
+                           "WARNING" if reason else "SUCCESS")
+        script_log_hub.close(script_id)
         cleanup_temp_files(script_id)
+        return
+    
+    completed = len(script_accounts[script_id]) - len(pending_accounts(script_id))
+    script_data.update(status="running", resumed_at=datetime.now().isoformat(),
+                       resume_count=script_data.get("resume_count", 0) + 1)
+    for field in ("end_time", "stop_reason", "error"):
+        script_data.pop(field, None)
+    script_stop_flags[script_id] = False
+    register_script(script_id)
+    log_script_message(script_id, f"Resuming after a server restart ({completed} account(s) already completed)", "WARNING")
+    task = asyncio.create_task(SCRIPT_RUNNERS[script_data["type"]](script_id))
+    resumed_tasks.add(task)
+    task.add_done_callback(resumed_tasks.discard)
+
+async def resume_unfinished_scripts():
+    """Resume scripts a previous process left unfinished, once no live worker still owns them"""
+    deferred = []
+    for checkpoint in job_lifecycle.unfinished():
+        shared = coordinator.get_job(checkpoint["job_id"])
+        if shared and shared.get("worker_alive") and shared.get("worker") != coordinator.worker_id:
+            deferred.append(checkpoint)
+            continue
+        resume_script(checkpoint)
+    if not deferred:
+        return
+    # A crashed worker's lease lingers for up to JOB_LEASE_SECONDS; a live worker keeps renewing it
+    await asyncio.sleep(JOB_LEASE_SECONDS + 1)
+    for checkpoint in deferred:
+        if job_lifecycle.draining.is_set():
+            return
+        shared = coordinator.get_job(checkpoint["job_id"])
+        if not (shared and shared.get("worker_alive")):
+            resume_script(checkpoint)
+
+@app.on_event("startup")
+async def start_job_lifecycle():
+    job_lifecycle.on_drain(drain_scripts)
+    job_lifecycle.install_signal_handlers(asyncio.get_running_loop())
+    app.state.resume_task = asyncio.create_task(resume_unfinished_scripts())
+
+@app.on_event("shutdown")
+async def drain_job_lifecycle():
+    """Give draining scripts time to reach a safe point and checkpoint before the process exits"""
+    job_lifecycle.begin_drain("server shutdown")
+    app.state.resume_task.cancel()
+    if resumed_tasks:
+        await asyncio.wait(list(resumed_tasks), timeout=DRAIN_TIMEOUT)
 
 # Script Management Endpoints
 @app.get("/api/script/{script_id}/status")
 async def get_script_status(script_id: str, current_user: dict = Depends(verify_token_dependency)):
     """Get status of a running script"""
     if script_id not in active_scripts:
-        raise HTTPException(status_code=404, detail={"error": "Script not found"})
+        # Scripts run by another worker are served from the shared registry
+        script_data = coordinator.get_job(script_id)
+        if not script_data:
+            raise HTTPException(status_code=404, detail={"error": "Script not found"})
+        script_data["auto_stop"] = script_data.get("status") in ["completed", "error", "stopped"]
+        return script_data
+    
+    if active_scripts[script_id].get("status") == "running":
+        store_script_bandwidth(script_id)
     
     script_data = active_scripts[script_id].copy()
     
@@ -1067,8 +1414,58 @@ async def get_script_status(script_id: str, current_user: dict = Depends(verify_
 @app.get("/api/script/{script_id}/logs")
 async def get_script_logs(script_id: str, current_user: dict = Depends(verify_token_dependency)):
     """Get logs for a specific script"""
-    logs = script_logs.get(script_id, [])
-    return {"logs": logs}
+    if not script_log_hub.has_logs(script_id) and script_id not in active_scripts:
+        return {"logs": [record['line'] for _, record in coordinator.read_logs(script_id, limit=MAX_LOG_RECORDS)]}
+    return {"logs": script_log_hub.lines(script_id)}
+
+async def stream_shared_logs(script_id: str):
+    """SSE events for a script run by another worker, tailed from the shared log table"""
+    last_id = 0
+    idle = 0.0
+    while True:
+        entries = await asyncio.to_thread(coordinator.read_logs, script_id, last_id)
+        for last_id, record in entries:
+            yield f"data: {json.dumps(record)}\n\n"
+        if entries:
+            idle = 0.0
+            continue
+        await asyncio.sleep(1)
+        idle += 1
+        if idle >= 15:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+            job = await asyncio.to_thread(coordinator.get_job, script_id)
+            if not job or job.get("status") != "running":
+                break
+
+@app.get("/api/script/{script_id}/logs/stream")
+async def stream_script_logs(script_id: str, current_user: dict = Depends(verify_token_dependency)):
+    """Stream log records for a script as server-sent events"""
+    if script_id not in active_scripts and coordinator.get_job(script_id):
+        return StreamingResponse(stream_shared_logs(script_id), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    
+    queue = script_log_hub.subscribe(script_id)
+    backlog = script_log_hub.records(script_id)
+    
+    async def event_stream():
+        try:
+            for record in backlog:
+                yield f"data: {json.dumps(record.to_dict())}\n\n"
+            while True:
+                try:
+                    record = await asyncio.wait_for(queue.get(), timeout=15)
+                    yield f"data: {json.dumps(record.to_dict())}\n\n"
+                except asyncio.TimeoutError:
+                    # Keep-alive comment so proxies don't close idle streams
+                    yield ": keep-alive\n\n"
+                    if active_scripts.get(script_id, {}).get("status") != "running":
+                        break
+        finally:
+            script_log_hub.unsubscribe(script_id, queue)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/api/script/{script_id}/stop")
 async def stop_script(
@@ -1078,14 +1475,31 @@ async def stop_script(
 ):
     """Stop a running script"""
     if script_id not in active_scripts:
-        raise HTTPException(status_code=404, detail={"error": "Script not found"})
+        # Owned by another worker: leave a stop signal its stop_callback will pick up
+        script_data = coordinator.get_job(script_id)
+        if not script_data:
+            raise HTTPException(status_code=404, detail={"error": "Script not found"})
+        if script_data.get("status") not in ("running", "interrupted"):
+            return {"status": script_data.get("status"), "message": "Script not running"}
+        coordinator.request_stop(script_id, stop_request.reason)
+        if not script_data["worker_alive"]:
+            # Its worker is gone (or it awaits resume), so nothing will act on the signal; record the stop directly
+            script_data.update(status="stopped", end_time=datetime.now().isoformat(), stop_reason=stop_request.reason)
+            coordinator.update_job(script_id, {key: value for key, value in script_data.items()
+                                               if key not in ("worker", "worker_alive")})
+            job_lifecycle.finish(script_id)
+            return {"status": "stopped", "message": "Script stopped successfully", "reason": stop_request.reason}
+        return {
+            "status": "stopping",
+            "message": "Stop requested; the worker running the script will stop it",
+            "reason": stop_request.reason
+        }
     
     if active_scripts[script_id]["status"] == "running":
         # Set stop flag for the script
         script_stop_flags[script_id] = True
-        active_scripts[script_id]["status"] = "stopped"
-        active_scripts[script_id]["end_time"] = datetime.now().isoformat()
-        active_scripts[script_id]["stop_reason"] = stop_request.reason
+        draining_scripts.discard(script_id)
+        set_script_status(script_id, "stopped", stop_reason=stop_request.reason)
         
         # Log the stop reason
         log_script_message(script_id, stop_request.reason, "WARNING")
@@ -1109,13 +1523,15 @@ async def list_scripts(current_user: dict = Depends(verify_token_dependency)):
     user_id = current_user.get('user_id', 'system')
     user_role = current_user.get('role', 'va')
     
+    scripts = all_scripts()
+    
     # Admin can see all scripts, VAs only see their own
     if user_role == 'admin':
-        filtered_scripts = active_scripts
+        filtered_scripts = scripts
     else:
         filtered_scripts = {
             script_id: script_data 
-            for script_id, script_data in active_scripts.items() 
+            for script_id, script_data in scripts.items() 
             if script_data.get('user_id') == user_id
         }
     
@@ -1130,7 +1546,7 @@ async def list_running_scripts(current_user: dict = Depends(verify_token_depende
     # Filter running scripts first
     running_scripts = {
         script_id: script_data 
-        for script_id, script_data in active_scripts.items() 
+        for script_id, script_data in all_scripts().items() 
         if script_data.get('status') == 'running'
     }
     
@@ -1160,121 +1576,226 @@ async def get_script_stats(current_user: dict = Depends(verify_token_dependency)
     user_role = current_user.get('role', 'va')
     
     # Admin can see all scripts, VAs only see their own
-    if user_role == 'admin':
-        user_scripts = active_scripts
-    else:
-        user_scripts = {
-            script_id: script_data 
-            for script_id, script_data in active_scripts.items() 
-            if script_data.get('user_id') == user_id
-        }
+    stats_user = None if user_role == 'admin' else user_id
     
-    # Calculate statistics
-    total_scripts = len(user_scripts)
-    running_scripts = len([s for s in user_scripts.values() if s['status'] == 'running'])
-    completed_scripts = len([s for s in user_scripts.values() if s['status'] == 'completed'])
-    error_scripts = len([s for s in user_scripts.values() if s['status'] == 'error'])
-    stopped_scripts = len([s for s in user_scripts.values() if s['status'] == 'stopped'])
+    # Running scripts' proxy bandwidth is still accumulating; fold in the latest counters
+    for script_id in script_stats.running_scripts(stats_user):
+        store_script_bandwidth(script_id)
     
-    # Calculate per-script-type statistics
-    script_types = {}
-    for script_data in user_scripts.values():
-        script_type = script_data.get('type', 'unknown')
-        if script_type not in script_types:
-            script_types[script_type] = {
-                'total': 0,
-                'running': 0,
-                'completed': 0,
-                'error': 0,
-                'stopped': 0
-            }
-        
-        script_types[script_type]['total'] += 1
-        script_types[script_type][script_data['status']] += 1
+    # Counters across all workers are kept by the coordination store as jobs are published
+    counts = summarize_counts(coordinator.job_counts(stats_user))
+    totals = counts['totals']
+    recent = coordinator.recent_jobs(stats_user, RECENT_SCRIPTS_LIMIT)
     
     return {
         'user_id': user_id,
         'user_role': user_role,
-        'total_scripts': total_scripts,
-        'running_scripts': running_scripts,
-        'completed_scripts': completed_scripts,
-        'error_scripts': error_scripts,
-        'stopped_scripts': stopped_scripts,
-        'script_types': script_types,
-        'recent_scripts': sorted(
-            user_scripts.values(),
-            key=lambda x: x['start_time'],
-            reverse=True
-        )[:10]  # Last 10 scripts
+        'total_scripts': totals['total'],
+        'running_scripts': totals['running'],
+        'completed_scripts': totals['completed'],
+        'error_scripts': totals['error'],
+        'stopped_scripts': totals['stopped'],
+        'script_types': counts['by_type'],
+        'bandwidth': summarize_bandwidth(coordinator.job_bandwidth(stats_user)),
+        'recent_scripts': [
+            active_scripts.get(script_id, script_data)
+            for script_id, script_data in recent.items()
+        ]  # Last 10 scripts
     }
 
+@app.get("/api/script/{script_id}/trace")
+async def get_script_trace(script_id: str, current_user: dict = Depends(verify_token_dependency)):
+    """Get per-step p50/p95 durations for a script"""
+    summary = tracer.get_summary(script_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail={"error": "No trace data for this script"})
+    return summary
+
+@app.get("/api/script/{script_id}/trace/download")
+async def download_script_trace(script_id: str, current_user: dict = Depends(verify_token_dependency)):
+    """Download the full trace (summary and raw spans) for a script as JSON"""
+    trace = tracer.export(script_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail={"error": "No trace data for this script"})
+    return JSONResponse(
+        content=trace,
+        headers={"Content-Disposition": f"attachment; filename=script_{script_id}_trace.json"}
+    )
+
+@app.get("/api/scripts/bandwidth")
+async def get_bandwidth_stats(current_user: dict = Depends(admin_required_dependency)):
+    """Get proxy bandwidth totals by job type, account, proxy and page type"""
+    return bandwidth_tracker.get_summary()
+
+@app.get("/api/scripts/bandwidth/metrics", response_class=PlainTextResponse)
+async def get_bandwidth_metrics(current_user: dict = Depends(admin_required_dependency)):
+    """Proxy bandwidth counters in Prometheus text format"""
+    return PlainTextResponse("\n".join(bandwidth_tracker.prometheus_lines()) + "\n",
+                             media_type="text/plain; version=0.0.4")
+
+def streamed_download(request: Request, chunks, filename: str, media_type: str) -> StreamingResponse:
+    """Stream an attachment chunk by chunk, gzip- or zstd-compressed when the client accepts it"""
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(compress_chunks(chunks, encoding), media_type=media_type, headers=headers)
+
+def shared_log_lines(script_id: str):
+    """All lines another worker published for a script, read page by page"""
+    after_id = 0
+    while True:
+        entries = coordinator.read_logs(script_id, after_id)
+        if not entries:
+            return
+        for after_id, record in entries:
+            yield record['line']
+
+def script_log_chunks(script_id: str):
+    """A script's full log: its log file, else this worker's buffer, else the shared log table (None if unknown)"""
+    log_path = os.path.join(LOGS_FOLDER, f"script_{script_id}.log")
+    if os.path.isfile(log_path):
+        return file_chunks(log_path)
+    if script_log_hub.has_logs(script_id):
+        return batch_lines(record.line for record in script_log_hub.records(script_id))
+    if coordinator.get_job(script_id):
+        return batch_lines(shared_log_lines(script_id))
+    return None
+
 @app.get("/api/script/{script_id}/download-logs")
-async def download_script_logs(script_id: str):
-    """Download logs for a specific script as a text file"""
-    if script_id not in script_logs:
+async def download_script_logs(script_id: str, request: Request):
+    """Download logs for a specific script as a text file, streamed without a temp file"""
+    chunks = script_log_chunks(script_id)
+    if chunks is None:
         raise HTTPException(status_code=404, detail={"error": "Script logs not found"})
-    
-    logs = script_logs.get(script_id, [])
-    log_content = "\n".join(logs)
-    
-    # Create logs file
-    log_filename = f"script_{script_id}_logs.txt"
-    log_path = os.path.join(LOGS_FOLDER, log_filename)
-    
-    with open(log_path, 'w', encoding='utf-8') as f:
-        f.write(log_content)
-    
-    return FileResponse(log_path, filename=log_filename, media_type='text/plain')
+    return streamed_download(request, chunks, f"script_{script_id}_logs.txt", "text/plain; charset=utf-8")
 
 @app.post("/api/script/{script_id}/clear-logs")
 async def clear_script_logs(script_id: str):
     """Clear logs for a specific script"""
-    if script_id not in script_logs:
+    if not script_log_hub.has_logs(script_id):
         raise HTTPException(status_code=404, detail={"error": "Script logs not found"})
     
-    script_logs[script_id] = []
+    script_log_hub.clear(script_id)
     return {"message": "Logs cleared successfully"}
 
+def parse_since(since: str, name: str = 'since') -> Optional[float]:
+    """Parse an ISO-8601 datetime or epoch seconds query value"""
+    if not since:
+        return None
+    try:
+        return float(since)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(since.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail={"error": f"Invalid '{name}' value, use ISO-8601 or epoch seconds"})
+
+def ensure_responses_journaled(script_id: str):
+    """Runs from before the journal existed only have the JSON export; import it once"""
+    responses_file = os.path.join(LOGS_FOLDER, f'dm_responses_{script_id}.json')
+    if os.path.exists(responses_file) and not dm_journal.get_response_counts(script_id):
+        try:
+            dm_journal.import_responses_json(script_id, responses_file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not import legacy responses for {script_id}: {e}")
+
 @app.get("/api/script/{script_id}/responses")
-async def get_dm_responses(script_id: str, current_user: dict = Depends(verify_token_dependency)):
-    """Get positive responses for a completed DM automation script"""
+async def get_dm_responses(
+    script_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    account: Optional[str] = None,
+    since: Optional[str] = None,
+    contains: Optional[str] = None,
+    current_user: dict = Depends(verify_token_dependency)
+):
+    """Get a page of responses for a DM automation script, with per-account counts"""
     try:
-        # Check if responses file exists
-        responses_file = os.path.join(LOGS_FOLDER, f'dm_responses_{script_id}.json')
-        
-        if not os.path.exists(responses_file):
-            return {
-                "responses": [],
-                "message": f"No responses found for this script. Looking for: {responses_file}"
-            }
+        if cursor and not cursor.isdigit():
+            raise HTTPException(status_code=400, detail={"error": "Invalid cursor"})
+        since_ts = parse_since(since)
         
-        # Read and return responses
-        with open(responses_file, 'r', encoding='utf-8') as f:
-            responses = json.load(f)
-        
-        # Group responses by account for better organization
-        grouped_responses = {}
-        for response in responses:
-            account = response['account']
-            if account not in grouped_responses:
-                grouped_responses[account] = []
-            grouped_responses[account].append({
-                'responder': response['responder'],
-                'message': response['message'],
-                'timestamp': response['timestamp']
-            })
+        ensure_responses_journaled(script_id)
+        counts = dm_journal.get_response_counts(script_id)
+        page = dm_journal.query_responses(script_id, account=account, since=since_ts, contains=contains,
+                                          cursor=cursor, limit=limit)
         
         return {
-            "responses": responses,
-            "grouped_responses": grouped_responses,
-            "total_responses": len(responses),
-            "accounts_with_responses": len(grouped_responses)
+            "responses": page['responses'],
+            "next_cursor": page['next_cursor'],
+            "counts_by_account": counts,
+            "total_responses": sum(counts.values()),
+            "accounts_with_responses": len(counts)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching responses for script {script_id}: {e}")
         raise HTTPException(status_code=500, detail={"error": str(e)})
 
+@app.get("/api/script/{script_id}/responses/export")
+async def export_dm_responses(
+    script_id: str,
+    request: Request,
+    account: Optional[str] = None,
+    since: Optional[str] = None,
+    contains: Optional[str] = None,
+    current_user: dict = Depends(verify_token_dependency)
+):
+    """Stream responses as CSV straight from the journal"""
+    since_ts = parse_since(since)
+    ensure_responses_journaled(script_id)
+    rows = dm_journal.iter_responses(script_id, account=account, since=since_ts, contains=contains)
+    return streamed_download(request, csv_chunks(RESPONSE_FIELDS, rows), f"dm_responses_{script_id}.csv", "text/csv")
+
+@app.get("/api/script/{script_id}/results/export")
+async def export_dm_results(script_id: str, request: Request, current_user: dict = Depends(verify_token_dependency)):
+    """Stream every DM send attempt of a script as CSV straight from the journal"""
+    rows = dm_journal.iter_sends(script_id)
+    return streamed_download(request, csv_chunks(SEND_FIELDS, rows), f"dm_results_{script_id}.csv", "text/csv")
+
+# Recipient ledger / suppression list
+@app.get("/api/dm/ledger")
+async def get_recipient_ledger_stats(current_user: dict = Depends(verify_token_dependency)):
+    """Recipient ledger size and suppression count"""
+    return recipient_ledger.get_stats()
+
+@app.get("/api/dm/ledger/{username}")
+async def check_recipient(username: str, current_user: dict = Depends(verify_token_dependency)):
+    """Check whether a target was already messaged or is suppressed"""
+    return {
+        "username": normalize_username(username),
+        "contacted": recipient_ledger.was_contacted(username),
+        "suppressed": recipient_ledger.is_suppressed(username)
+    }
+
+@app.get("/api/dm/suppressions")
+async def get_suppressions(limit: int = 100, offset: int = 0, current_user: dict = Depends(admin_required_dependency)):
+    """List suppressed (opted-out) DM targets (admin only)"""
+    limit = max(1, min(limit, 1000))
+    return {
+        "suppressions": recipient_ledger.get_suppressions(limit, max(offset, 0)),
+        "total": recipient_ledger.get_stats()['suppressed']
+    }
+
+@app.post("/api/dm/suppressions")
+async def add_suppressions(request: SuppressionRequest, current_user: dict = Depends(admin_required_dependency)):
+    """Add usernames to the DM suppression list (admin only)"""
+    added = recipient_ledger.add_suppressions(request.usernames, request.reason, current_user.get('username', ''))
+    log_user_activity('dm_suppression_added', f"Suppressed {added} DM targets", current_user['user_id'])
+    return {"success": True, "added": added}
+
+@app.delete("/api/dm/suppressions/{username}")
+async def remove_suppression(username: str, current_user: dict = Depends(admin_required_dependency)):
+    """Remove a username from the DM suppression list (admin only)"""
+    if not recipient_ledger.remove_suppression(username):
+        raise HTTPException(status_code=404, detail={"error": "Username is not suppressed"})
+    log_user_activity('dm_suppression_removed', f"Unsuppressed DM target {normalize_username(username)}", current_user['user_id'])
+    return {"success": True}
+
 # Admin Endpoints
 @app.get("/api/admin/users")
 async def get_all_users(current_user: dict = Depends(admin_required_dependency)):
@@ -1378,11 +1899,24 @@ async def delete_user(user_id: str, current_user: dict = Depends(admin_required_
         raise HTTPException(status_code=500, detail={'success': False, 'message': 'Internal server error'})
 
 @app.get("/api/admin/activity-logs")
-async def get_activity_logs(current_user: dict = Depends(admin_required_dependency)):
-    """Get activity logs (admin only)"""
+async def get_activity_logs(
+    user_id: str = Query(None, description="Filter by user ID"),
+    action: str = Query(None, description="Filter by action"),
+    since: str = Query(None, description="Only entries at or after this time (ISO-8601 or epoch seconds)"),
+    until: str = Query(None, description="Only entries before this time (ISO-8601 or epoch seconds)"),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, description="Maximum number of entries to return"),
+    current_user: dict = Depends(admin_required_dependency)
+):
+    """Get activity logs, newest first (admin only)"""
+    since_ts = parse_since(since)
+    until_ts = parse_since(until, 'until')
     try:
-        logs = user_manager.get_activity_logs()
-        return {'success': True, 'logs': logs}
+        page = user_manager.query_activity_logs(user_id=user_id, action=action, since=since_ts, until=until_ts,
+                                                cursor=cursor, limit=limit)
+        return {'success': True, 'logs': page['logs'], 'next_cursor': page['next_cursor']}
+    except ValueError:
+        raise HTTPException(status_code=400, detail={'success': False, 'message': 'Invalid cursor'})
     except Exception as e:
         logger.error(f"Get activity logs error: {e}")
         raise HTTPException(status_code=500, detail={'success': False, 'message': 'Internal server error'})
@@ -1392,15 +1926,16 @@ async def get_admin_stats(current_user: dict = Depends(admin_required_dependency
     """Get admin dashboard statistics"""
     try:
         users = user_manager.get_all_users()
-        logs = user_manager.get_activity_logs(50)
+        logs = user_manager.get_activity_logs(limit=10)
+        script_totals = summarize_counts(coordinator.job_counts())['totals']
         
         stats = {
             'total_users': len(users),
             'active_users': len([u for u in users if u.get('is_active', True)]),
             'admin_users': len([u for u in users if u['role'] == 'admin']),
             'va_users': len([u for u in users if u['role'] == 'va']),
-            'total_scripts': len(active_scripts),
-            'running_scripts': len([s for s in active_scripts.values() if s['status'] == 'running']),
+            'total_scripts': script_totals['total'],
+            'running_scripts': script_totals['running'],
             'recent_activity': logs[:10]
         }
         
@@ -1409,54 +1944,87 @@ async def get_admin_stats(current_user: dict = Depends(admin_required_dependency
         logger.error(f"Get admin stats error: {e}")
         raise HTTPException(status_code=500, detail={'success': False, 'message': 'Internal server error'})
 
+@app.get("/api/admin/selectors")
+async def get_selector_stats(current_user: dict = Depends(admin_required_dependency)):
+    """Selector registry ranking and first-probe hit rates per logical element (admin only)"""
+    return {'success': True, 'elements': selector_registry.get_stats()}
+
+def _script_start_timestamp(script_data: Dict) -> float:
+    try:
+        return datetime.fromisoformat(script_data.get('start_time', '')).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
 @app.get("/api/admin/script-logs")
 async def get_admin_script_logs(
     user_id: str = Query(None, description="Filter by user ID"),
+    script_type: str = Query(None, description="Filter by script type"),
+    status: str = Query(None, description="Filter by status"),
+    since: str = Query(None, description="Only scripts started at or after this time (ISO-8601 or epoch seconds)"),
+    until: str = Query(None, description="Only scripts started before this time (ISO-8601 or epoch seconds)"),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
     limit: int = Query(100, description="Maximum number of logs to return"),
     current_user: dict = Depends(admin_required_dependency)
 ):
-    """Get script execution logs for admin dashboard"""
+    """Get script execution logs for admin dashboard, newest first"""
+    since_ts = parse_since(since)
+    until_ts = parse_since(until, 'until')
+    limit = max(1, min(limit, 500))
+    after = None
+    if cursor:
+        start_time, _, cursor_id = cursor.partition('|')
+        after = (start_time, cursor_id)
     try:
-        all_scripts = []
+        # Every worker's scripts, not just the ones started on the worker serving this request
+        scripts = all_scripts()
         
-        # Get all active/running scripts
-        if active_scripts:
-            for script_id, script_data in active_scripts.items():
-                try:
-                    # Get user details
-                    user_data = user_manager.get_user_by_id(script_data.get('user_id', 'system'))
-                    user_name = user_data.get('name', 'System') if user_data else 'System'
-                    user_username = user_data.get('username', 'system') if user_data else 'system'
-                    
-                    script_log = {
-                        'script_id': script_id,
-                        'user_id': script_data.get('user_id', 'system'),
-                        'user_name': user_name,
-                        'user_username': user_username,
-                        'script_type': script_data.get('type', 'unknown'),
-                        'status': script_data.get('status', 'unknown'),
-                        'start_time': script_data.get('start_time', ''),
-                        'end_time': script_data.get('end_time'),
-                        'error': script_data.get('error'),
-                        'stop_reason': script_data.get('stop_reason'),
-                        'config': script_data.get('config', {}),
-                        'logs_available': script_id in script_logs and len(script_logs[script_id]) > 0
-                    }
-                    
-                    # Filter by user_id if specified
-                    if not user_id or script_data.get('user_id') == user_id:
-                        all_scripts.append(script_log)
-                except Exception as script_error:
-                    logger.error(f"Error processing script {script_id}: {script_error}")
+        def matching():
+            for script_id, script_data in scripts.items():
+                key = (script_data.get('start_time', ''), script_id)
+                if after and key >= after:
                     continue
+                if user_id and script_data.get('user_id') != user_id:
+                    continue
+                if script_type and script_data.get('type') != script_type:
+                    continue
+                if status and script_data.get('status') != status:
+                    continue
+                if since_ts is not None or until_ts is not None:
+                    started = _script_start_timestamp(script_data)
+                    if since_ts is not None and started < since_ts:
+                        continue
+                    if until_ts is not None and started >= until_ts:
+                        continue
+                yield key
+        
+        # Top limit+1 by (start_time, script_id) without sorting the whole history
+        page_keys = heapq.nlargest(limit + 1, matching())
+        next_cursor = '|'.join(page_keys[limit - 1]) if len(page_keys) > limit else None
+        
+        # One users.json read for the whole page
+        user_map = user_manager.get_user_map()
+        script_logs = []
+        for _, script_id in page_keys[:limit]:
+            script_data = scripts[script_id]
+            user_data = user_map.get(script_data.get('user_id', 'system'))
+            script_logs.append({
+                'script_id': script_id,
+                'user_id': script_data.get('user_id', 'system'),
+                'user_name': user_data.get('name', 'System') if user_data else 'System',
+                'user_username': user_data.get('username', 'system') if user_data else 'system',
+                'script_type': script_data.get('type', 'unknown'),
+                'status': script_data.get('status', 'unknown'),
+                'start_time': script_data.get('start_time', ''),
+                'end_time': script_data.get('end_time'),
+                'error': script_data.get('error'),
+                'stop_reason': script_data.get('stop_reason'),
+                'config': script_data.get('config', {}),
+                # Other workers' logs are served from the shared log table
+                'logs_available': script_log_hub.count(script_id) > 0 or script_id not in active_scripts
+                                  or os.path.isfile(os.path.join(LOGS_FOLDER, f"script_{script_id}.log"))
+            })
         
-        # Sort by start_time (most recent first)
-        all_scripts.sort(key=lambda x: x.get('start_time', ''), reverse=True)
-        
-        # Apply limit
-        limited_scripts = all_scripts[:limit]
-        
-        return {'success': True, 'script_logs': limited_scripts}
+        return {'success': True, 'script_logs': script_logs, 'next_cursor': next_cursor}
     except Exception as e:
         logger.error(f"Get admin script logs error: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
@@ -1833,31 +2401,54 @@ async def remove_proxy_assignment(
         raise HTTPException(status_code=500, detail={'success': False, 'message': str(e)})
 
 # File validation endpoints
+@app.get("/api/media/{sha256}")
+async def check_cached_media(sha256: str, current_user: dict = Depends(verify_token_dependency)):
+    """Check whether media with this SHA-256 is already cached (so the upload can be skipped)"""
+    if not is_valid_sha256(sha256):
+        raise HTTPException(status_code=400, detail={"error": "Invalid media hash"})
+    cached = media_cache.lookup(sha256)
+    if not cached:
+        return {"exists": False, "sha256": sha256.lower()}
+    return {
+        "exists": True,
+        "sha256": cached['sha256'],
+        "size": cached['size'],
+        "filename": cached.get('filename'),
+        "media_type": "video" if allowed_file(cached.get('filename') or cached['path'], 'videos') else "image",
+        "preflight": cached.get('preflight')
+    }
+
 @app.post("/api/daily-post/validate")
 async def validate_daily_post_files(
-    media_file: UploadFile = File(...),
+    media_file: Optional[UploadFile] = File(None),
+    media_sha256: str = Form(""),
     current_user: dict = Depends(verify_token_dependency)
 ):
-    """Validate uploaded files before starting the script"""
+    """Validate media before starting the script; the upload is cached so /start can reuse it by hash"""
     try:
-        errors = []
-        
-        # Validate media file
-        if not media_file:
-            errors.append("Media file is required")
-        else:
-            is_image = allowed_file(media_file.filename, 'images')
-            is_video = allowed_file(media_file.filename, 'videos')
-            if not (is_image or is_video):
-                errors.append("Invalid media file format. Use supported image/video formats")
-        
-        if errors:
-            raise HTTPException(status_code=400, detail={"valid": False, "errors": errors})
+        try:
+            cached_media = await resolve_media(media_file, media_sha256)
+        except HTTPException as e:
+            if e.status_code == 400:
+                raise HTTPException(status_code=400, detail={"valid": False, "errors": [e.detail.get("error")]})
+            raise
+        
+        preflight = await preflight_media(cached_media)
+        if not preflight['ok']:
+            raise HTTPException(status_code=400, detail={
+                "valid": False,
+                "errors": preflight['errors'],
+                "media_sha256": cached_media['sha256'],
+                "preflight": preflight
+            })
         
         return {
             "valid": True, 
             "message": "Files validated successfully",
-            "media_type": "video" if is_video else "image"
+            "media_type": preflight['kind'],
+            "media_sha256": cached_media['sha256'],
+            "size": cached_media['size'],
+            "preflight": preflight
         }
         
     except HTTPException:
@@ -5,15 +5,15 @@ Handles admin and VA user authentication, user management, and session tracking
 
 import jwt
 import bcrypt
-import json
 import os
-import requests
 from datetime import datetime, timedelta
 from functools import wraps
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, Dict, Any
 import logging
+from json_store import JSONFileStore
+from activity_store import activity_store
 
 # For compatibility during migration, we'll handle both Flask and FastAPI
 try:
@@ -42,87 +42,63 @@ logger = logging.getLogger(__name__)
 class UserManager:
     def __init__(self):
         self.users_file = USERS_FILE
+        self.store = JSONFileStore(self.users_file, default_factory=list, name='users', cache=True)
         self.activity_log_file = ACTIVITY_LOG_FILE
+        self.activity_store = activity_store
         self.ensure_files_exist()
         self.ensure_admin_exists()
-        self.migrate_logs_if_needed()
+        # One-time migrations (legacy JSON import, location backfill) run from migrate_data.py, not at import
+        if os.path.exists(self.activity_log_file) and not self.activity_store.count():
+            logger.warning(f"{self.activity_log_file} has not been imported into the activity store; "
+                           f"run `python migrate_data.py`")
     
     def ensure_files_exist(self):
-        """Ensure users.json and activity_logs.json exist"""
-        if not os.path.exists(self.users_file):
-            with open(self.users_file, 'w') as f:
-                json.dump([], f)
-        
-        if not os.path.exists(self.activity_log_file):
-            with open(self.activity_log_file, 'w') as f:
-                json.dump([], f)
+        """Ensure users.json exists (activity logs live in the activity store)"""
+        self.store.ensure_exists()
     
     def migrate_logs_if_needed(self):
         """Add location data to existing logs that don't have it"""
         try:
-            logs = self.load_activity_logs()
-            modified = False
+            missing = self.activity_store.missing_location()
             
-            for log in logs:
-                if 'city' not in log or 'country' not in log:
-                    location = self.get_location_from_ip(log.get('ip_address', 'system'))
-                    log['city'] = location['city']
-                    log['country'] = location['country']
-                    log['country_code'] = location['country_code']
-                    modified = True
+            for log in missing:
+                location = self.get_location_from_ip(log.get('ip_address') or 'system')
+                self.activity_store.set_location(log['id'], location)
             
-            if modified:
-                self.save_activity_logs(logs)
+            if missing:
                 print("Migrated existing logs with location data")
         except Exception as e:
             print(f"Error migrating logs: {e}")
     
     def ensure_admin_exists(self):
         """Ensure default admin user exists"""
-        users = self.load_users()
-        admin_exists = any(user['role'] == 'admin' for user in users)
-        
-        if not admin_exists:
-            # Create default admin user
-            admin_user = {
-                'user_id': 'admin-001',
-                'id': 'admin-001',  # For frontend compatibility
-                'name': 'Administrator',
-                'username': 'admin',
-                'password': self.hash_password('admin123'),
-                'role': 'admin',
-                'created_at': datetime.now().isoformat(),
-                'is_active': True,
-                'last_login': None
-            }
-            users.append(admin_user)
-            self.save_users(users)
+        with self.store.lock():
+            users = self.load_users()
+            admin_exists = any(user['role'] == 'admin' for user in users)
+            
+            if not admin_exists:
+                # Create default admin user
+                admin_user = {
+                    'user_id': 'admin-001',
+                    'id': 'admin-001',  # For frontend compatibility
+                    'name': 'Administrator',
+                    'username': 'admin',
+                    'password': self.hash_password('admin123'),
+                    'role': 'admin',
+                    'created_at': datetime.now().isoformat(),
+                    'is_active': True,
+                    'last_login': None
+                }
+                users.append(admin_user)
+                self.save_users(users)
     
-    def load_users(self):
-        """Load users from JSON file"""
-        try:
-            with open(self.users_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+    def load_users(self, copy_result=True):
+        """Load users from JSON file (cached until the file changes); copy_result=False for read-only use"""
+        return self.store.read(copy_result)
     
     def save_users(self, users):
         """Save users to JSON file"""
-        with open(self.users_file, 'w') as f:
-            json.dump(users, f, indent=2)
-    
-    def load_activity_logs(self):
-        """Load activity logs from JSON file"""
-        try:
-            with open(self.activity_log_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-    
-    def save_activity_logs(self, logs):
-        """Save activity logs to JSON file"""
-        with open(self.activity_log_file, 'w') as f:
-            json.dump(logs, f, indent=2)
+        self.store.write(users)
     
     def hash_password(self, password):
         """Hash password using bcrypt"""
@@ -134,34 +110,35 @@ class UserManager:
     
     def create_user(self, name, username, password, role='va'):
         """Create new user"""
-        users = self.load_users()
-        
-        # Check if username already exists
-        if any(user['username'] == username for user in users):
-            return {'success': False, 'message': 'Username already exists'}
-        
-        # Generate user ID
-        user_id = f"{role}-{len(users) + 1:03d}"
-        
-        new_user = {
-            'user_id': user_id,
-            'id': user_id,  # For frontend compatibility
-            'name': name,
-            'username': username,
-            'password': self.hash_password(password),
-            'role': role,
-            'created_at': datetime.now().isoformat(),
-            'is_active': True,
-            'last_login': None
-        }
-        
-        users.append(new_user)
-        self.save_users(users)
-        
-        # Log activity
-        self.log_activity('system', 'user_created', f"User {username} created by admin")
-        
-        return {'success': True, 'message': 'User created successfully', 'user_id': user_id}
+        with self.store.lock():
+            users = self.load_users()
+            
+            # Check if username already exists
+            if any(user['username'] == username for user in users):
+                return {'success': False, 'message': 'Username already exists'}
+            
+            # Generate user ID
+            user_id = f"{role}-{len(users) + 1:03d}"
+            
+            new_user = {
+                'user_id': user_id,
+                'id': user_id,  # For frontend compatibility
+                'name': name,
+                'username': username,
+                'password': self.hash_password(password),
+                'role': role,
+                'created_at': datetime.now().isoformat(),
+                'is_active': True,
+                'last_login': None
+            }
+            
+            users.append(new_user)
+            self.save_users(users)
+            
+            # Log activity
+            self.log_activity('system', 'user_created', f"User {username} created by admin")
+            
+            return {'success': True, 'message': 'User created successfully', 'user_id': user_id}
     
     def authenticate_user(self, username, password):
         """Authenticate user credentials"""
@@ -174,8 +151,7 @@ class UserManager:
                     user_id = user.get('user_id', user.get('id', f"migrated_{username}"))
                     
                     # Update last login
-                    user['last_login'] = datetime.now().isoformat()
-                    self.save_users(users)
+                    self.record_login(user_id)
                     
                     # Log activity
                     self.log_activity(user_id, 'login', f"User {username} logged in")
@@ -197,6 +173,16 @@ class UserManager:
         
         return {'success': False, 'message': 'Invalid credentials'}
     
+    def record_login(self, user_id):
+        """Stamp last_login under the store lock (password checks stay outside it)"""
+        with self.store.lock():
+            users = self.load_users()
+            for user in users:
+                if user.get('user_id', user.get('id')) == user_id:
+                    user['last_login'] = datetime.now().isoformat()
+                    self.save_users(users)
+                    return
+    
     def generate_token(self, user, user_id=None):
         """Generate JWT token"""
         if user_id is None:
@@ -224,13 +210,13 @@ class UserManager:
     
     def get_all_users(self):
         """Get all users (admin only)"""
-        users = self.load_users()
+        users = self.load_users(copy_result=False)
         # Remove password field for security
         return [{k: v for k, v in user.items() if k != 'password'} for user in users]
     
     def get_user_by_id(self, user_id):
         """Get a user by their ID"""
-        users = self.load_users()
+        users = self.load_users(copy_result=False)
         for user in users:
             # Check both 'user_id' and 'id' fields for backward compatibility
             if user.get('user_id') == user_id or user.get('id') == user_id:
@@ -238,74 +224,87 @@ class UserManager:
                 return {k: v for k, v in user.items() if k != 'password'}
         return None
     
+    def get_user_map(self):
+        """Load users once and index them by both 'user_id' and legacy 'id' (passwords removed)"""
+        user_map = {}
+        for user in self.load_users(copy_result=False):
+            public_user = {k: v for k, v in user.items() if k != 'password'}
+            for key in (user.get('user_id'), user.get('id')):
+                if key:
+                    user_map.setdefault(key, public_user)
+        return user_map
+    
     def update_user(self, user_id, updates):
         """Update user information"""
-        users = self.load_users()
-        
-        for user in users:
-            # Check both 'user_id' and 'id' fields for backward compatibility
-            if user.get('user_id') == user_id or user.get('id') == user_id:
-                # Handle password update
-                if 'password' in updates:
-                    updates['password'] = self.hash_password(updates['password'])
-                
-                # Update fields
-                user.update(updates)
-                self.save_users(users)
-                
-                # Log activity
-                self.log_activity('admin', 'user_updated', f"User {user['username']} updated")
-                
-                return {'success': True, 'message': 'User updated successfully'}
-        
-        return {'success': False, 'message': 'User not found'}
+        with self.store.lock():
+            users = self.load_users()
+            
+            for user in users:
+                # Check both 'user_id' and 'id' fields for backward compatibility
+                if user.get('user_id') == user_id or user.get('id') == user_id:
+                    # Handle password update
+                    if 'password' in updates:
+                        updates['password'] = self.hash_password(updates['password'])
+                    
+                    # Update fields
+                    user.update(updates)
+                    self.save_users(users)
+                    
+                    # Log activity
+                    self.log_activity('admin', 'user_updated', f"User {user['username']} updated")
+                    
+                    return {'success': True, 'message': 'User updated successfully'}
+            
+            return {'success': False, 'message': 'User not found'}
     
     def deactivate_user(self, user_id):
         """Deactivate user"""
-        users = self.load_users()
-        
-        for user in users:
-            # Check both 'user_id' and 'id' fields for backward compatibility
-            if user.get('user_id') == user_id or user.get('id') == user_id:
-                user['is_active'] = False
-                self.save_users(users)
-                
-                # Log activity
-                self.log_activity('admin', 'user_deactivated', f"User {user['username']} deactivated")
-                
-                return {'success': True, 'message': 'User deactivated successfully'}
-        
-        return {'success': False, 'message': 'User not found'}
+        with self.store.lock():
+            users = self.load_users()
+            
+            for user in users:
+                # Check both 'user_id' and 'id' fields for backward compatibility
+                if user.get('user_id') == user_id or user.get('id') == user_id:
+                    user['is_active'] = False
+                    self.save_users(users)
+                    
+                    # Log activity
+                    self.log_activity('admin', 'user_deactivated', f"User {user['username']} deactivated")
+                    
+                    return {'success': True, 'message': 'User deactivated successfully'}
+            
+            return {'success': False, 'message': 'User not found'}
     
     def delete_user(self, user_id):
         """Delete user permanently"""
-        users = self.load_users()
-        
-        # Find user to delete
-        user_to_delete = None
-        for user in users:
-            # Check both 'user_id' and 'id' fields for backward compatibility
-            if user.get('user_id') == user_id or user.get('id') == user_id:
-                user_to_delete = user
-                break
-        
-        if not user_to_delete:
-            return {'success': False, 'message': 'User not found'}
-        
-        # Prevent deletion of the last admin
-        if user_to_delete['role'] == 'admin':
-            admin_count = sum(1 for u in users if u['role'] == 'admin')
-            if admin_count <= 1:
-                return {'success': False, 'message': 'Cannot delete the last admin user'}
-        
-        # Remove user from list
-        users = [user for user in users if user.get('user_id') != user_id and user.get('id') != user_id]
-        self.save_users(users)
-        
-        # Log activity
-        self.log_activity('admin', 'user_deleted', f"User {user_to_delete['username']} deleted permanently")
-        
-        return {'success': True, 'message': 'User deleted successfully'}
+        with self.store.lock():
+            users = self.load_users()
+            
+            # Find user to delete
+            user_to_delete = None
+            for user in users:
+                # Check both 'user_id' and 'id' fields for backward compatibility
+                if user.get('user_id') == user_id or user.get('id') == user_id:
+                    user_to_delete = user
+                    break
+            
+            if not user_to_delete:
+                return {'success': False, 'message': 'User not found'}
+            
+            # Prevent deletion of the last admin
+            if user_to_delete['role'] == 'admin':
+                admin_count = sum(1 for u in users if u['role'] == 'admin')
+                if admin_count <= 1:
+                    return {'success': False, 'message': 'Cannot delete the last admin user'}
+            
+            # Remove user from list
+            users = [user for user in users if user.get('user_id') != user_id and user.get('id') != user_id]
+            self.save_users(users)
+            
+            # Log activity
+            self.log_activity('admin', 'user_deleted', f"User {user_to_delete['username']} deleted permanently")
+            
+            return {'success': True, 'message': 'User deleted successfully'}
     
     def get_location_from_ip(self, ip_address):
         """Get location information from IP address using a free API"""
@@ -317,6 +316,8 @@ class UserManager:
             }
         
         try:
+            import requests
+            
             # Using ip-api.com free service (no API key required)
             response = requests.get(f'http://ip-api.com/json/{ip_address}', timeout=5)
             if response.status_code == 200:
@@ -339,7 +340,6 @@ class UserManager:
     def log_activity(self, user_id, action, details, ip_address='system'):
         """Log user activity"""
         try:
-            logs = self.load_activity_logs()
             location = self.get_location_from_ip(ip_address)
             
             log_entry = {
@@ -353,25 +353,19 @@ class UserManager:
                 'country_code': location['country_code']
             }
             
-            logs.append(log_entry)
-            
-            # Keep only last 1000 logs
-            if len(logs) > 1000:
-                logs = logs[-1000:]
-            
-            self.save_activity_logs(logs)
+            # Retention is applied by the store (time and size based)
+            self.activity_store.append(log_entry)
         except Exception as e:
             logger.error(f"Error logging activity: {e}")
     
     def get_activity_logs(self, user_id=None, limit=100):
-        """Get activity logs"""
-        logs = self.load_activity_logs()
-        
-        if user_id:
-            logs = [log for log in logs if log['user_id'] == user_id]
-        
-        # Return most recent logs first
-        return sorted(logs, key=lambda x: x['timestamp'], reverse=True)[:limit]
+        """Get activity logs, most recent first"""
+        return self.activity_store.query(user_id=user_id, limit=limit)['logs']
+    
+    def query_activity_logs(self, user_id=None, action=None, since=None, until=None, cursor=None, limit=100):
+        """One page of activity logs with filters; returns logs and next_cursor"""
+        return self.activity_store.query(user_id=user_id, action=action, since=since, until=until,
+                                         cursor=cursor, limit=limit)
 
 # Initialize user manager
 user_manager = UserManager()
@@ -397,7 +391,7 @@ if FASTAPI_AVAILABLE:
             )
         
         # Check if user still exists and is active
-        users = user_manager.load_users()
+        users = user_manager.load_users(copy_result=False)
         user_id = result['payload']['user_id']
         user = next((u for u in users if u.get('user_id', u.get('id')) == user_id), None)
         
@@ -0,0 +1,207 @@
+"""
+Proxy Bandwidth Tracker
+Aggregates Playwright request/response traffic per job, account, proxy and page type
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept in memory for per-job breakdowns
+MAX_TRACKED_JOBS = 200
+
+
+def _empty_counters() -> Dict:
+    return {
+        'requests': 0,
+        'failed': 0,
+        'bytes_in': 0,
+        'bytes_out': 0,
+        'time_ms': 0.0,
+    }
+
+
+def _add(counters: Dict, requests: int = 0, failed: int = 0, bytes_in: int = 0,
+         bytes_out: int = 0, time_ms: float = 0.0):
+    counters['requests'] += requests
+    counters['failed'] += failed
+    counters['bytes_in'] += bytes_in
+    counters['bytes_out'] += bytes_out
+    counters['time_ms'] += time_ms
+
+
+def classify_page(url: str) -> str:
+    """Map the URL of the page that issued a request to a coarse page type"""
+    try:
+        path = urlparse(url).path or '/'
+    except Exception:
+        return 'other'
+    if path.startswith('/direct'):
+        return 'inbox'
+    if path.startswith('/reels') or path.startswith('/reel/'):
+        return 'reels'
+    if path.startswith('/explore'):
+        return 'explore'
+    if path.startswith('/accounts') or path.startswith('/challenge') or 'two_factor' in path:
+        return 'login'
+    if path.startswith('/create'):
+        return 'post'
+    if path.startswith('/p/'):
+        return 'post_view'
+    if path == '/':
+        return 'feed'
+    return 'profile'
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class BandwidthTracker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # job_id -> {'job_type', 'started', 'totals', 'accounts', 'proxies', 'page_types'}
+        self.jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        # Monotonic process-wide counters for Prometheus, keyed by (job_type, account, proxy, page_type)
+        self.series: Dict[Tuple[str, str, str, str], Dict] = {}
+
+    def _job(self, job_id: str, job_type: str) -> Dict:
+        job = self.jobs.get(job_id)
+        if job is None:
+            job = {
+                'job_type': job_type,
+                'started': time.time(),
+                'totals': _empty_counters(),
+                'accounts': {},
+                'proxies': {},
+                'page_types': {},
+            }
+            self.jobs[job_id] = job
+            while len(self.jobs) > MAX_TRACKED_JOBS:
+                self.jobs.popitem(last=False)
+        return job
+
+    def record(self, job_id: str, job_type: str, account: str, proxy: str, page_type: str, **counts):
+        """Add one request's worth of counters to every aggregation level"""
+        with self.lock:
+            job = self._job(job_id, job_type)
+            _add(job['totals'], **counts)
+            _add(job['accounts'].setdefault(account, _empty_counters()), **counts)
+            _add(job['proxies'].setdefault(proxy, _empty_counters()), **counts)
+            _add(job['page_types'].setdefault(page_type, _empty_counters()), **counts)
+            _add(self.series.setdefault((job_type, account, proxy, page_type), _empty_counters()), **counts)
+
+    def attach(self, context, account: str, proxy: Optional[str] = None,
+               job_id: Optional[str] = None, job_type: Optional[str] = None):
+        """Hook request events on a BrowserContext"""
+        job_id = job_id or 'adhoc'
+        job_type = job_type or 'unknown'
+        proxy = proxy or 'direct'
+
+        def page_type_for(request) -> str:
+            try:
+                return classify_page(request.frame.url)
+            except Exception:
+                return 'other'
+
+        async def on_request_finished(request):
+            bytes_in = bytes_out = 0
+            time_ms = 0.0
+            try:
+                sizes = await request.sizes()
+                bytes_out = max(sizes.get('requestHeadersSize', 0), 0) + max(sizes.get('requestBodySize', 0), 0)
+                bytes_in = max(sizes.get('responseHeadersSize', 0), 0) + max(sizes.get('responseBodySize', 0), 0)
+            except Exception:
+                # Context closed or request fulfilled locally
+                pass
+            try:
+                timing = request.timing
+                if timing.get('responseEnd', -1) > 0:
+                    time_ms = timing['responseEnd']
+            except Exception:
+                pass
+            self.record(job_id, job_type, account, proxy, page_type_for(request),
+                        requests=1, bytes_in=bytes_in, bytes_out=bytes_out, time_ms=time_ms)
+
+        def on_request_failed(request):
+            self.record(job_id, job_type, account, proxy, page_type_for(request), requests=1, failed=1)
+
+        context.on("requestfinished", on_request_finished)
+        context.on("requestfailed", on_request_failed)
+
+    def get_job_stats(self, job_id: str) -> Optional[Dict]:
+        """Snapshot of one job's counters"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {
+                'job_type': job['job_type'],
+                'totals': dict(job['totals']),
+                'accounts': {k: dict(v) for k, v in job['accounts'].items()},
+                'proxies': {k: dict(v) for k, v in job['proxies'].items()},
+                'page_types': {k: dict(v) for k, v in job['page_types'].items()},
+            }
+
+    def get_summary(self) -> Dict:
+        """Process-wide totals broken down by job type, account, proxy and page type"""
+        summary = {
+            'totals': _empty_counters(),
+            'by_job_type': {},
+            'by_account': {},
+            'by_proxy': {},
+            'by_page_type': {},
+        }
+        with self.lock:
+            for (job_type, account, proxy, page_type), counters in self.series.items():
+                for bucket, key in (('by_job_type', job_type), ('by_account', account),
+                                    ('by_proxy', proxy), ('by_page_type', page_type)):
+                    _add(summary[bucket].setdefault(key, _empty_counters()), **counters)
+                _add(summary['totals'], **counters)
+        return summary
+
+    def prometheus_lines(self, identities: bool = True) -> List[str]:
+        """Render counters in Prometheus text exposition format.
+
+        identities=False sums over account and proxy, for exports that must not name either.
+        """
+        metrics = [
+            ('instagram_proxy_requests_total', 'requests', 'Requests sent through account proxies'),
+            ('instagram_proxy_request_failures_total', 'failed', 'Requests that failed or were blocked'),
+            ('instagram_proxy_bytes_in_total', 'bytes_in', 'Response bytes received through account proxies'),
+            ('instagram_proxy_bytes_out_total', 'bytes_out', 'Request bytes sent through account proxies'),
+            ('instagram_proxy_request_seconds_total', 'time_ms', 'Cumulative request time in seconds'),
+        ]
+        with self.lock:
+            if identities:
+                series = [(key, dict(counters)) for key, counters in self.series.items()]
+            else:
+                merged = {}
+                for (job_type, _, _, page_type), counters in self.series.items():
+                    _add(merged.setdefault((job_type, page_type), _empty_counters()), **counters)
+                series = list(merged.items())
+
+        lines = []
+        for name, field, help_text in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for key, counters in series:
+                value = counters[field] / 1000.0 if field == 'time_ms' else counters[field]
+                if identities:
+                    job_type, account, proxy, page_type = key
+                    labels = (f'job_type="{_escape_label(job_type)}",account="{_escape_label(account)}",'
+                              f'proxy="{_escape_label(proxy)}",page_type="{_escape_label(page_type)}"')
+                else:
+                    job_type, page_type = key
+                    labels = f'job_type="{_escape_label(job_type)}",page_type="{_escape_label(page_type)}"'
+                lines.append(f"{name}{{{labels}}} {value}")
+        return lines
+
+
+# Global instance
+bandwidth_tracker = BandwidthTracker()
@@ -0,0 +1,724 @@
+"""
+Coordination
+Shared job registry, stop signals, leased locks and log fan-out, so several API workers (or nodes) can cooperate
+"""
+
+import os
+import json
+import time
+import heapq
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+import atexit
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 'sqlite' shares state between every process that can reach COORDINATION_DB (all workers on a node, or
+# several nodes on a shared volume); 'local' keeps it in this process only (single worker, tests)
+COORDINATION_BACKEND = os.getenv('COORDINATION_BACKEND', 'sqlite').lower()
+COORDINATION_DB = os.getenv('COORDINATION_DB', os.path.join('logs', 'coordination.sqlite3'))
+
+# A worker owns a job while it keeps renewing the lease; a lapsed lease means the worker is gone
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '30'))
+HEARTBEAT_INTERVAL = max(1.0, JOB_LEASE_SECONDS / 3)
+LOCK_LEASE_SECONDS = 30
+LOCK_RETRY_INTERVAL = 0.05
+
+# Engines poll stop_callback often; the shared store is read at most this often per job (seconds)
+STOP_POLL_INTERVAL = 1.0
+
+# Log records are published in batches; the fan-out table keeps at most this many rows
+LOG_FLUSH_INTERVAL = 0.5
+LOG_MAX_ROWS = int(os.getenv('COORDINATION_LOG_MAX_ROWS', '200000'))
+LOG_PRUNE_EVERY = 1000
+
+# Finished jobs stay listed for this many days, and only the newest JOB_MAX_FINISHED of them are kept
+JOB_RETENTION_SECONDS = float(os.getenv('COORDINATION_JOB_RETENTION_DAYS', '30')) * 86400
+JOB_MAX_FINISHED = int(os.getenv('COORDINATION_MAX_FINISHED_JOBS', '5000'))
+JOB_PRUNE_EVERY = 100
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class CoordinationBackend:
+    """Storage interface for shared coordination state; every method must be safe to call from any thread"""
+
+    def put_job(self, job_id: str, record: Dict, owner: Optional[str], lease_expires: float):
+        """Create or replace a job; owner=None releases ownership"""
+        raise NotImplementedError
+
+    def renew_jobs(self, job_ids: List[str], owner: str, lease_expires: float, records: Dict[str, Dict]):
+        """Extend the lease on jobs still held by owner, refreshing their records where given"""
+        raise NotImplementedError
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """{'record', 'owner', 'lease_expires', 'stop_reason'} or None"""
+        raise NotImplementedError
+
+    def list_jobs(self, status: Optional[str] = None) -> Dict[str, Dict]:
+        """Every job, or only those whose record has the given status"""
+        raise NotImplementedError
+
+    def prune_jobs(self, older_than: float, keep: int) -> int:
+        """Drop jobs that are not running and were last updated before older_than, or beyond the newest keep"""
+        raise NotImplementedError
+
+    def job_counts(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """{type: {status: jobs}} over every job ever published (pruning does not lower it); user_id=None means all"""
+        raise NotImplementedError
+
+    def add_bandwidth(self, user_id: str, script_type: str, delta: Dict[str, int]):
+        """Add a job's bandwidth increase to its user's per-type totals"""
+        raise NotImplementedError
+
+    def job_bandwidth(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """{type: {field: total}}; user_id=None means all users"""
+        raise NotImplementedError
+
+    def recent_jobs(self, user_id: Optional[str] = None, limit: int = 10) -> List[Tuple[str, Dict]]:
+        """(job_id, job) of the most recently started jobs, newest first"""
+        raise NotImplementedError
+
+    def request_stop(self, job_id: str, reason: str) -> bool:
+        raise NotImplementedError
+
+    def stop_reason(self, job_id: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def acquire_lock(self, name: str, owner: str, lease_expires: float) -> bool:
+        """Take (or re-take) a named lock if it is free, expired or already ours"""
+        raise NotImplementedError
+
+    def release_lock(self, name: str, owner: str):
+        raise NotImplementedError
+
+    def append_logs(self, entries: List[Tuple[str, Dict]]):
+        """Publish (job_id, record dict) pairs in one write"""
+        raise NotImplementedError
+
+    def read_logs(self, job_id: str, after_id: int = 0, limit: int = 1000) -> List[Tuple[int, Dict]]:
+        """Log records of a job with id > after_id, oldest first"""
+        raise NotImplementedError
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    owner TEXT,
+    lease_expires REAL NOT NULL DEFAULT 0,
+    stop_reason TEXT,
+    updated REAL NOT NULL,
+    status TEXT,
+    user_id TEXT,
+    type TEXT,
+    start_time TEXT
+);
+CREATE TABLE IF NOT EXISTS locks (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    lease_expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_logs_job ON job_logs (job_id, id);
+"""
+
+# Columns added to jobs after the first release: name -> (type, backfill expression over the record JSON)
+_JOB_COLUMNS = {
+    'status': ('TEXT', "json_extract(record, '$.status')"),
+    'user_id': ('TEXT', "COALESCE(json_extract(record, '$.user_id'), 'system')"),
+    'type': ('TEXT', "COALESCE(json_extract(record, '$.type'), 'unknown')"),
+    'start_time': ('TEXT', "COALESCE(json_extract(record, '$.start_time'), '')"),
+}
+
+_JOB_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, updated)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_start ON jobs (start_time)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_user_start ON jobs (user_id, start_time)",
+)
+
+# Counters kept in the same transaction as job writes; created (and backfilled from jobs) on first use
+_COUNTER_TABLES = {
+    'job_counts': (
+        "CREATE TABLE job_counts (user_id TEXT NOT NULL, type TEXT NOT NULL, status TEXT NOT NULL, "
+        "count INTEGER NOT NULL, PRIMARY KEY (user_id, type, status))",
+        "INSERT INTO job_counts (user_id, type, status, count) SELECT user_id, type, status, COUNT(*) "
+        "FROM jobs WHERE status IS NOT NULL GROUP BY user_id, type, status",
+    ),
+    'job_bandwidth': (
+        "CREATE TABLE job_bandwidth (user_id TEXT NOT NULL, type TEXT NOT NULL, field TEXT NOT NULL, "
+        "value INTEGER NOT NULL, PRIMARY KEY (user_id, type, field))",
+        "INSERT INTO job_bandwidth (user_id, type, field, value) SELECT jobs.user_id, jobs.type, totals.key, "
+        "SUM(totals.value) FROM jobs, json_each(jobs.record, '$.bandwidth.totals') AS totals "
+        "GROUP BY jobs.user_id, jobs.type, totals.key",
+    ),
+}
+
+
+def _job_keys(record: Dict) -> Tuple[Optional[str], str, str, str]:
+    """(status, user_id, type, start_time) of a job record, with the defaults the API uses"""
+    return (record.get('status'), record.get('user_id', 'system'), record.get('type', 'unknown'),
+            record.get('start_time', ''))
+
+
+class SQLiteCoordinationBackend(CoordinationBackend):
+    def __init__(self, db_path: str = COORDINATION_DB):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.inserts_since_prune = 0
+        self.finished_since_prune = 0
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Other processes write the same file; wait for their transactions instead of failing
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._migrate()
+        self.prune_jobs(time.time() - JOB_RETENTION_SECONDS, JOB_MAX_FINISHED)
+
+    def _migrate(self):
+        """Add (and backfill) job columns and counter tables missing from a store created by an older release"""
+        with self.lock, self._transaction():
+            existing = {row['name'] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+            for column, (column_type, backfill) in _JOB_COLUMNS.items():
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+                    self.conn.execute(f"UPDATE jobs SET {column} = {backfill}")
+            for statement in _JOB_INDEXES:
+                self.conn.execute(statement)
+            tables = {row['name'] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table, (create, backfill) in _COUNTER_TABLES.items():
+                if table not in tables:
+                    self.conn.execute(create)
+                    self.conn.execute(backfill)
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that holds the database lock from the first read; callers hold self.lock"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    @staticmethod
+    def _job(row) -> Dict:
+        return {
+            'record': json.loads(row['record']),
+            'owner': row['owner'],
+            'lease_expires': row['lease_expires'],
+            'stop_reason': row['stop_reason'],
+        }
+
+    def put_job(self, job_id: str, record: Dict, owner: Optional[str], lease_expires: float):
+        status, user_id, script_type, start_time = _job_keys(record)
+        with self.lock:
+            with self._transaction():
+                previous = self.conn.execute("SELECT status, user_id, type FROM jobs WHERE job_id = ?",
+                                             (job_id,)).fetchone()
+                self.conn.execute(
+                    "INSERT INTO jobs (job_id, record, owner, lease_expires, updated, status, user_id, type, start_time) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(job_id) DO UPDATE SET record = excluded.record, "
+                    "owner = excluded.owner, lease_expires = excluded.lease_expires, updated = excluded.updated, "
+                    "status = excluded.status",
+                    (job_id, json.dumps(record), owner, lease_expires, time.time(), status, user_id, script_type,
+                     start_time))
+                # A job is counted once, under its latest status
+                if previous is not None and previous['status'] != status:
+                    self.conn.execute(
+                        "UPDATE job_counts SET count = count - 1 WHERE user_id = ? AND type = ? AND status = ?",
+                        (previous['user_id'], previous['type'], previous['status']))
+                if status is not None and (previous is None or previous['status'] != status):
+                    self.conn.execute(
+                        "INSERT INTO job_counts (user_id, type, status, count) VALUES (?, ?, ?, 1) "
+                        "ON CONFLICT(user_id, type, status) DO UPDATE SET count = count + 1",
+                        (user_id, script_type, status))
+            if status == 'running':
+                return
+            self.finished_since_prune += 1
+            if self.finished_since_prune < JOB_PRUNE_EVERY:
+                return
+        self.prune_jobs(time.time() - JOB_RETENTION_SECONDS, JOB_MAX_FINISHED)
+
+    def renew_jobs(self, job_ids: List[str], owner: str, lease_expires: float, records: Dict[str, Dict]):
+        now = time.time()
+        with self.lock, self._transaction():
+            for job_id in job_ids:
+                if job_id in records:
+                    self.conn.execute(
+                        "UPDATE jobs SET record = ?, lease_expires = ?, updated = ? WHERE job_id = ? AND owner = ?",
+                        (json.dumps(records[job_id]), lease_expires, now, job_id, owner))
+                else:
+                    self.conn.execute(
+                        "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND owner = ?",
+                        (lease_expires, job_id, owner))
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None) -> Dict[str, Dict]:
+        with self.lock:
+            if status is None:
+                rows = self.conn.execute("SELECT * FROM jobs").fetchall()
+            else:
+                rows = self.conn.execute("SELECT * FROM jobs WHERE status = ?", (status,)).fetchall()
+        return {row['job_id']: self._job(row) for row in rows}
+
+    def prune_jobs(self, older_than: float, keep: int) -> int:
+        with self.lock, self._transaction():
+            self.finished_since_prune = 0
+            removed = self.conn.execute(
+                "DELETE FROM jobs WHERE status != 'running' AND updated < ?", (older_than,)).rowcount
+            removed += self.conn.execute(
+                "DELETE FROM jobs WHERE job_id IN (SELECT job_id FROM jobs WHERE status != 'running' "
+                "ORDER BY updated DESC LIMIT -1 OFFSET ?)", (keep,)).rowcount
+        if removed:
+            logger.info(f"Pruned {removed} finished jobs from the shared registry")
+        return removed
+
+    def _totals(self, table: str, key: str, value: str, user_id: Optional[str]) -> Dict[str, Dict[str, int]]:
+        where, params = ("WHERE user_id = ?", (user_id,)) if user_id is not None else ("", ())
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT type, {key} AS key, SUM({value}) AS total FROM {table} {where} GROUP BY type, {key}",
+                params).fetchall()
+        totals: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            totals.setdefault(row['type'], {})[row['key']] = row['total']
+        return totals
+
+    def job_counts(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        return self._totals('job_counts', 'status', 'count', user_id)
+
+    def add_bandwidth(self, user_id: str, script_type: str, delta: Dict[str, int]):
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO job_bandwidth (user_id, type, field, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_id, type, field) DO UPDATE SET value = value + excluded.value",
+                [(user_id, script_type, field, value) for field, value in delta.items() if value])
+
+    def job_bandwidth(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        return self._totals('job_bandwidth', 'field', 'value', user_id)
+
+    def recent_jobs(self, user_id: Optional[str] = None, limit: int = 10) -> List[Tuple[str, Dict]]:
+        with self.lock:
+            if user_id is None:
+                rows = self.conn.execute("SELECT * FROM jobs ORDER BY start_time DESC LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = self.conn.execute("SELECT * FROM jobs WHERE user_id = ? ORDER BY start_time DESC LIMIT ?",
+                                         (user_id, limit)).fetchall()
+        return [(row['job_id'], self._job(row)) for row in rows]
+
+    def request_stop(self, job_id: str, reason: str) -> bool:
+        with self.lock:
+            return self.conn.execute("UPDATE jobs SET stop_reason = ? WHERE job_id = ?",
+                                     (reason, job_id)).rowcount > 0
+
+    def stop_reason(self, job_id: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT stop_reason FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row['stop_reason'] if row else None
+
+    def acquire_lock(self, name: str, owner: str, lease_expires: float) -> bool:
+        with self.lock:
+            return self.conn.execute(
+                "INSERT INTO locks (name, owner, lease_expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, lease_expires = excluded.lease_expires "
+                "WHERE locks.owner = excluded.owner OR locks.lease_expires < ?",
+                (name, owner, lease_expires, time.time())).rowcount > 0
+
+    def release_lock(self, name: str, owner: str):
+        with self.lock:
+            self.conn.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+    def append_logs(self, entries: List[Tuple[str, Dict]]):
+        if not entries:
+            return
+        with self.lock:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT INTO job_logs (job_id, record) VALUES (?, ?)",
+                                  [(job_id, json.dumps(record)) for job_id, record in entries])
+            self.conn.execute("COMMIT")
+            self.inserts_since_prune += len(entries)
+            if self.inserts_since_prune >= LOG_PRUNE_EVERY:
+                self.inserts_since_prune = 0
+                max_id = self.conn.execute("SELECT MAX(id) FROM job_logs").fetchone()[0] or 0
+                self.conn.execute("DELETE FROM job_logs WHERE id <= ?", (max_id - LOG_MAX_ROWS,))
+
+    def read_logs(self, job_id: str, after_id: int = 0, limit: int = 1000) -> List[Tuple[int, Dict]]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, record FROM job_logs WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (job_id, after_id, limit)).fetchall()
+        return [(row['id'], json.loads(row['record'])) for row in rows]
+
+
+class LocalCoordinationBackend(CoordinationBackend):
+    """In-process stand-in with the same semantics; nothing is shared with other processes"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs: Dict[str, Dict] = {}
+        self.locks: Dict[str, Tuple[str, float]] = {}
+        self.logs: Deque[Tuple[int, str, Dict]] = deque(maxlen=LOG_MAX_ROWS)
+        self.next_log_id = 1
+        self.finished_since_prune = 0
+        # (user_id, type, status) -> jobs; (user_id, type) -> {field: total}
+        self.counts: Dict[Tuple[str, str, str], int] = {}
+        self.bandwidth: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+    def put_job(self, job_id: str, record: Dict, owner: Optional[str], lease_expires: float):
+        status, user_id, script_type, start_time = _job_keys(record)
+        with self.lock:
+            previous = self.jobs.get(job_id)
+            if previous is not None and previous['status'] != status:
+                key = (user_id, script_type, previous['status'])
+                self.counts[key] = self.counts.get(key, 0) - 1
+            if status is not None and (previous is None or previous['status'] != status):
+                key = (user_id, script_type, status)
+                self.counts[key] = self.counts.get(key, 0) + 1
+            job = self.jobs.setdefault(job_id, {'stop_reason': None, 'user_id': user_id, 'start_time': start_time})
+            job.update(record=json.loads(json.dumps(record)), owner=owner, lease_expires=lease_expires,
+                       status=status, updated=time.time())
+            if status == 'running':
+                return
+            self.finished_since_prune += 1
+            if self.finished_since_prune < JOB_PRUNE_EVERY:
+                return
+        self.prune_jobs(time.time() - JOB_RETENTION_SECONDS, JOB_MAX_FINISHED)
+
+    def renew_jobs(self, job_ids: List[str], owner: str, lease_expires: float, records: Dict[str, Dict]):
+        with self.lock:
+            for job_id in job_ids:
+                job = self.jobs.get(job_id)
+                if job and job['owner'] == owner:
+                    job['lease_expires'] = lease_expires
+                    if job_id in records:
+                        job['record'] = json.loads(json.dumps(records[job_id]))
+                        job['updated'] = time.time()
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self, status: Optional[str] = None) -> Dict[str, Dict]:
+        with self.lock:
+            return {job_id: dict(job) for job_id, job in self.jobs.items()
+                    if status is None or job['status'] == status}
+
+    def prune_jobs(self, older_than: float, keep: int) -> int:
+        with self.lock:
+            self.finished_since_prune = 0
+            finished = sorted((job['updated'], job_id) for job_id, job in self.jobs.items() if job['status'] != 'running')
+            stale = [job_id for index, (updated, job_id) in enumerate(reversed(finished))
+                     if index >= keep or updated < older_than]
+            for job_id in stale:
+                del self.jobs[job_id]
+        return len(stale)
+
+    def job_counts(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        totals: Dict[str, Dict[str, int]] = {}
+        with self.lock:
+            for (job_user, script_type, status), count in self.counts.items():
+                if user_id is None or job_user == user_id:
+                    by_status = totals.setdefault(script_type, {})
+                    by_status[status] = by_status.get(status, 0) + count
+        return totals
+
+    def add_bandwidth(self, user_id: str, script_type: str, delta: Dict[str, int]):
+        with self.lock:
+            totals = self.bandwidth.setdefault((user_id, script_type), {})
+            for field, value in delta.items():
+                totals[field] = totals.get(field, 0) + value
+
+    def job_bandwidth(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        totals: Dict[str, Dict[str, int]] = {}
+        with self.lock:
+            for (job_user, script_type), fields in self.bandwidth.items():
+                if user_id is None or job_user == user_id:
+                    by_field = totals.setdefault(script_type, {})
+                    for field, value in fields.items():
+                        by_field[field] = by_field.get(field, 0) + value
+        return totals
+
+    def recent_jobs(self, user_id: Optional[str] = None, limit: int = 10) -> List[Tuple[str, Dict]]:
+        with self.lock:
+            jobs = [(job['start_time'], job_id, dict(job)) for job_id, job in self.jobs.items()
+                    if user_id is None or job['user_id'] == user_id]
+        return [(job_id, job) for _, job_id, job in heapq.nlargest(limit, jobs, key=lambda entry: entry[:2])]
+
+    def request_stop(self, job_id: str, reason: str) -> bool:
+        with self.lock:
+            if job_id not in self.jobs:
+                return False
+            self.jobs[job_id]['stop_reason'] = reason
+            return True
+
+    def stop_reason(self, job_id: str) -> Optional[str]:
+        with self.lock:
+            return self.jobs.get(job_id, {}).get('stop_reason')
+
+    def acquire_lock(self, name: str, owner: str, lease_expires: float) -> bool:
+        with self.lock:
+            holder = self.locks.get(name)
+            if holder and holder[0] != owner and holder[1] >= time.time():
+                return False
+            self.locks[name] = (owner, lease_expires)
+            return True
+
+    def release_lock(self, name: str, owner: str):
+        with self.lock:
+            if self.locks.get(name, (None,))[0] == owner:
+                del self.locks[name]
+
+    def append_logs(self, entries: List[Tuple[str, Dict]]):
+        with self.lock:
+            for job_id, record in entries:
+                self.logs.append((self.next_log_id, job_id, record))
+                self.next_log_id += 1
+
+    def read_logs(self, job_id: str, after_id: int = 0, limit: int = 1000) -> List[Tuple[int, Dict]]:
+        with self.lock:
+            matches = [(log_id, record) for log_id, log_job, record in self.logs
+                       if log_job == job_id and log_id > after_id]
+        return matches[:limit]
+
+
+def create_backend(kind: str = COORDINATION_BACKEND) -> CoordinationBackend:
+    if kind == 'local':
+        return LocalCoordinationBackend()
+    if kind == 'sqlite':
+        return SQLiteCoordinationBackend()
+    raise ValueError(f"Unknown coordination backend: {kind}")
+
+
+class CoordinationManager:
+    def __init__(self, backend: Optional[CoordinationBackend] = None, worker_id: Optional[str] = None,
+                 job_lease_seconds: float = JOB_LEASE_SECONDS):
+        self.backend = backend or create_backend()
+        self.worker_id = worker_id or make_worker_id()
+        self.job_lease_seconds = job_lease_seconds
+        self.lock = threading.Lock()
+        # Jobs this worker runs: job_id -> live record (the same dict the API mutates)
+        self.owned: Dict[str, Dict] = {}
+        self.pending_logs: List[Tuple[str, Dict]] = []
+        # job_id -> (monotonic time of last read, stop reason)
+        self.stop_checks: Dict[str, Tuple[float, Optional[str]]] = {}
+        self.local_locks: Dict[str, threading.Lock] = {}
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def _lease(self, seconds: Optional[float] = None) -> float:
+        return time.time() + (self.job_lease_seconds if seconds is None else seconds)
+
+    def _ensure_heartbeat(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._heartbeat_loop, name='coordination-heartbeat', daemon=True)
+            self.thread.start()
+
+    def _heartbeat_loop(self):
+        last_renewal = 0.0
+        while not self.stop_event.wait(LOG_FLUSH_INTERVAL):
+            self.flush_logs()
+            if time.monotonic() - last_renewal >= HEARTBEAT_INTERVAL:
+                last_renewal = time.monotonic()
+                self.renew_leases()
+
+    # Job registry
+
+    def register_job(self, job_id: str, record: Dict):
+        """Publish a new job owned by this worker; the record is re-published with every lease renewal"""
+        with self.lock:
+            self.owned[job_id] = record
+        self.backend.put_job(job_id, record, self.worker_id, self._lease())
+        self._ensure_heartbeat()
+
+    def update_job(self, job_id: str, record: Dict):
+        """Publish a job's new state; a job that is no longer running gives up its lease"""
+        running = record.get('status') == 'running'
+        with self.lock:
+            if running:
+                self.owned[job_id] = record
+            else:
+                self.owned.pop(job_id, None)
+                self.stop_checks.pop(job_id, None)
+        try:
+            self.backend.put_job(job_id, record, self.worker_id if running else None,
+                                 self._lease() if running else 0)
+        except Exception as e:
+            logger.error(f"Could not publish job {job_id}: {e}")
+
+    def renew_leases(self):
+        with self.lock:
+            owned = dict(self.owned)
+        if not owned:
+            return
+        records = {}
+        for job_id, record in owned.items():
+            try:
+                records[job_id] = json.loads(json.dumps(record))
+            except (TypeError, ValueError, RuntimeError):
+                # Record changed mid-serialisation; the lease is still renewed and the record goes next time
+                continue
+        try:
+            self.backend.renew_jobs(list(owned), self.worker_id, self._lease(), records)
+        except Exception as e:
+            logger.error(f"Could not renew job leases: {e}")
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """A job's last published record plus 'worker' and 'worker_alive' (is its lease current)"""
+        job = self.backend.get_job(job_id)
+        return self._view(job) if job else None
+
+    def list_jobs(self, status: Optional[str] = None) -> Dict[str, Dict]:
+        """Published jobs (optionally only those with a given status), viewed as in get_job"""
+        return {job_id: self._view(job) for job_id, job in self.backend.list_jobs(status).items()}
+
+    def recent_jobs(self, user_id: Optional[str] = None, limit: int = 10) -> Dict[str, Dict]:
+        """Most recently started jobs, newest first"""
+        return {job_id: self._view(job) for job_id, job in self.backend.recent_jobs(user_id, limit)}
+
+    def job_counts(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """{type: {status: jobs}} across every worker, kept up to date by register_job/update_job"""
+        return self.backend.job_counts(user_id)
+
+    def add_bandwidth(self, user_id: str, script_type: str, delta: Optional[Dict[str, int]]):
+        if not delta:
+            return
+        try:
+            self.backend.add_bandwidth(user_id, script_type, delta)
+        except Exception as e:
+            logger.error(f"Could not publish bandwidth totals: {e}")
+
+    def job_bandwidth(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        return self.backend.job_bandwidth(user_id)
+
+    @staticmethod
+    def _view(job: Dict) -> Dict:
+        record = dict(job['record'])
+        record['worker'] = job['owner']
+        record['worker_alive'] = bool(job['owner']) and job['lease_expires'] >= time.time()
+        return record
+
+    def is_owned(self, job_id: str) -> bool:
+        with self.lock:
+            return job_id in self.owned
+
+    # Stop signals
+
+    def request_stop(self, job_id: str, reason: str) -> bool:
+        """Ask whichever worker owns the job to stop it"""
+        return self.backend.request_stop(job_id, reason)
+
+    def stop_reason(self, job_id: str) -> Optional[str]:
+        """Reason a stop was requested through any worker, or None; the store is read at most once a second"""
+        now = time.monotonic()
+        with self.lock:
+            checked = self.stop_checks.get(job_id)
+        if checked and now - checked[0] < STOP_POLL_INTERVAL:
+            return checked[1]
+        try:
+            reason = self.backend.stop_reason(job_id)
+        except Exception as e:
+            logger.warning(f"Could not read stop signal for {job_id}: {e}")
+            reason = checked[1] if checked else None
+        with self.lock:
+            self.stop_checks[job_id] = (now, reason)
+        return reason
+
+    # Locks
+
+    @contextmanager
+    def locked(self, name: str, timeout: float = 30, lease_seconds: float = LOCK_LEASE_SECONDS):
+        """Hold a named lock across threads, workers and nodes; the lease frees it if the holder dies"""
+        with self.lock:
+            local = self.local_locks.setdefault(name, threading.Lock())
+        if not local.acquire(timeout=timeout):
+            raise TimeoutError(f"Timed out waiting for lock {name}")
+        try:
+            deadline = time.monotonic() + timeout
+            while not self.backend.acquire_lock(name, self.worker_id, self._lease(lease_seconds)):
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for lock {name}")
+                time.sleep(LOCK_RETRY_INTERVAL)
+            try:
+                yield
+            finally:
+                self.backend.release_lock(name, self.worker_id)
+        finally:
+            local.release()
+
+    def lock_for(self, name: str, timeout: float = 30) -> "SharedLock":
+        """Reusable lock object for `with manager.lock:` call sites"""
+        return SharedLock(self, name, timeout)
+
+    # Log fan-out
+
+    def publish_log(self, record):
+        """ScriptLogHub sink: queue a record for the shared log table"""
+        with self.lock:
+            self.pending_logs.append((record.job, record.to_dict()))
+
+    def flush_logs(self):
+        with self.lock:
+            entries, self.pending_logs = self.pending_logs, []
+        if not entries:
+            return
+        try:
+            self.backend.append_logs(entries)
+        except Exception as e:
+            logger.error(f"Could not publish {len(entries)} log records: {e}")
+
+    def read_logs(self, job_id: str, after_id: int = 0, limit: int = 1000) -> List[Tuple[int, Dict]]:
+        return self.backend.read_logs(job_id, after_id, limit)
+
+    def shutdown(self):
+        self.stop_event.set()
+        self.flush_logs()
+
+
+class SharedLock:
+    """Context manager wrapping CoordinationManager.locked so it can stand in for a threading.Lock attribute"""
+
+    def __init__(self, manager: CoordinationManager, name: str, timeout: float = 30):
+        self.manager = manager
+        self.name = name
+        self.timeout = timeout
+        self.holders = threading.local()
+
+    def __enter__(self):
+        context = self.manager.locked(self.name, self.timeout)
+        context.__enter__()
+        self.holders.context = context
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        context, self.holders.context = self.holders.context, None
+        return context.__exit__(exc_type, exc, tb)
+
+
+# Global instance
+coordinator = CoordinationManager()
+atexit.register(coordinator.shutdown)
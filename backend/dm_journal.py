@@ -0,0 +1,310 @@
+"""
+DM Results Journal
+Append-only SQLite journal of DM send attempts and responses, written as they happen with batched fsyncs
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from download_streams import csv_chunks, json_array_chunks
+
+logger = logging.getLogger(__name__)
+
+DM_JOURNAL_PATH = os.getenv('DM_JOURNAL_PATH', os.path.join('logs', 'dm_journal.sqlite3'))
+
+# Pending rows are committed (one fsync) once either bound is reached
+JOURNAL_BATCH_SIZE = 50
+JOURNAL_FLUSH_INTERVAL = 1.0
+
+SEND_FIELDS = ['timestamp', 'bot_account', 'target_username', 'message', 'status']
+RESPONSE_FIELDS = ['account', 'responder', 'message', 'timestamp']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dm_sends (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    script_id TEXT NOT NULL,
+    account TEXT NOT NULL,
+    target TEXT NOT NULL,
+    message TEXT,
+    status TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dm_sends_script ON dm_sends (script_id, id);
+CREATE TABLE IF NOT EXISTS dm_responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    script_id TEXT NOT NULL,
+    account TEXT NOT NULL,
+    responder TEXT,
+    message TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dm_responses_script ON dm_responses (script_id, id);
+CREATE INDEX IF NOT EXISTS idx_dm_responses_account ON dm_responses (script_id, account, id);
+CREATE INDEX IF NOT EXISTS idx_dm_responses_created ON dm_responses (script_id, created);
+CREATE TABLE IF NOT EXISTS dm_response_counts (
+    script_id TEXT NOT NULL,
+    account TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (script_id, account)
+) WITHOUT ROWID;
+"""
+
+# Page size bounds for the responses API
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def _iso(created: float) -> str:
+    return datetime.fromtimestamp(created).isoformat()
+
+
+class DMJournal:
+    def __init__(self, db_path: str = DM_JOURNAL_PATH):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.pending_sends: List[tuple] = []
+        self.pending_responses: List[tuple] = []
+        self.first_pending_at: Optional[float] = None
+        self.flush_timer: Optional[threading.Timer] = None
+        self.conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        # WAL appends are sequential; FULL sync makes each batch commit durable
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.executescript(_SCHEMA)
+        # Backfill per-account counts for journals written before the counts table existed
+        if conn.execute("SELECT 1 FROM dm_response_counts LIMIT 1").fetchone() is None:
+            conn.execute("INSERT INTO dm_response_counts (script_id, account, count) "
+                         "SELECT script_id, account, COUNT(*) FROM dm_responses GROUP BY script_id, account")
+        return conn
+
+    def record_send(self, script_id: str, account: str, target: str, message: str, status: str):
+        """Journal one send attempt (status is 'sent' or the failure code)"""
+        self._append(self.pending_sends, (script_id, account, target, message, status, time.time()))
+
+    def record_response(self, script_id: str, account: str, responder: str, message: str):
+        self._append(self.pending_responses, (script_id, account, responder, message, time.time()))
+
+    def _append(self, pending: List[tuple], row: tuple):
+        with self.lock:
+            pending.append(row)
+            if self.first_pending_at is None:
+                self.first_pending_at = time.monotonic()
+            size = len(self.pending_sends) + len(self.pending_responses)
+            if size >= JOURNAL_BATCH_SIZE or time.monotonic() - self.first_pending_at >= JOURNAL_FLUSH_INTERVAL:
+                self.flush()
+            elif self.flush_timer is None:
+                # Bound how long a quiet run can leave rows uncommitted
+                self.flush_timer = threading.Timer(JOURNAL_FLUSH_INTERVAL, self.flush)
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
+
+    def flush(self):
+        """Commit all pending rows in one transaction"""
+        with self.lock:
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+            if not self.pending_sends and not self.pending_responses:
+                return
+            sends, self.pending_sends = self.pending_sends, []
+            responses, self.pending_responses = self.pending_responses, []
+            self.first_pending_at = None
+            try:
+                self.conn.execute("BEGIN")
+                if sends:
+                    self.conn.executemany(
+                        "INSERT INTO dm_sends (script_id, account, target, message, status, created) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", sends)
+                if responses:
+                    self.conn.executemany(
+                        "INSERT INTO dm_responses (script_id, account, responder, message, created) "
+                        "VALUES (?, ?, ?, ?, ?)", responses)
+                    # Keep per-account counts current so the API never has to aggregate
+                    batch_counts: Dict[tuple, int] = {}
+                    for row in responses:
+                        batch_counts[row[:2]] = batch_counts.get(row[:2], 0) + 1
+                    self.conn.executemany(
+                        "INSERT INTO dm_response_counts (script_id, account, count) VALUES (?, ?, ?) "
+                        "ON CONFLICT (script_id, account) DO UPDATE SET count = count + excluded.count",
+                        [(script_id, account, count) for (script_id, account), count in batch_counts.items()])
+                self.conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                try:
+                    self.conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                # Keep the rows so the next flush retries them
+                self.pending_sends = sends + self.pending_sends
+                self.pending_responses = responses + self.pending_responses
+                self.first_pending_at = time.monotonic()
+                logger.error(f"Error writing DM journal: {e}")
+
+    def _query(self, sql: str, params: tuple = ()) -> Iterator[sqlite3.Row]:
+        """Iterate rows on a private connection so long exports don't hold the write lock.
+
+        Streamed downloads resume the iteration from whichever threadpool thread is free, hence
+        check_same_thread=False; the connection is still only used by one thread at a time.
+        """
+        self.flush()
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield from conn.execute(sql, params)
+        finally:
+            conn.close()
+
+    def iter_sends(self, script_id: str) -> Iterator[Dict]:
+        for row in self._query("SELECT * FROM dm_sends WHERE script_id = ? ORDER BY id", (script_id,)):
+            yield {
+                'timestamp': _iso(row['created']),
+                'bot_account': row['account'],
+                'target_username': row['target'],
+                'message': row['message'],
+                'status': row['status'],
+            }
+
+    def _response_filter(self, script_id: str, account: Optional[str] = None, since: Optional[float] = None,
+                         contains: Optional[str] = None, after_id: int = 0):
+        clauses = ["script_id = ?", "id > ?"]
+        params: List = [script_id, after_id]
+        if account:
+            clauses.append("account = ?")
+            params.append(account)
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since)
+        if contains:
+            escaped = contains.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("message LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        return " AND ".join(clauses), tuple(params)
+
+    def iter_responses(self, script_id: str, account: Optional[str] = None, since: Optional[float] = None,
+                       contains: Optional[str] = None) -> Iterator[Dict]:
+        where, params = self._response_filter(script_id, account, since, contains)
+        for row in self._query(f"SELECT * FROM dm_responses WHERE {where} ORDER BY id", params):
+            yield {
+                'account': row['account'],
+                'responder': row['responder'],
+                'message': row['message'],
+                'timestamp': _iso(row['created']),
+            }
+
+    def query_responses(self, script_id: str, account: Optional[str] = None, since: Optional[float] = None,
+                        contains: Optional[str] = None, cursor: Optional[str] = None,
+                        limit: int = DEFAULT_PAGE_SIZE) -> Dict:
+        """One page of responses in journal order; pass next_cursor back to continue"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after_id = int(cursor) if cursor else 0
+        where, params = self._response_filter(script_id, account, since, contains, after_id)
+        rows = list(self._query(f"SELECT * FROM dm_responses WHERE {where} ORDER BY id LIMIT ?", params + (limit + 1,)))
+        page = rows[:limit]
+        return {
+            'responses': [{
+                'id': row['id'],
+                'account': row['account'],
+                'responder': row['responder'],
+                'message': row['message'],
+                'timestamp': _iso(row['created']),
+            } for row in page],
+            'next_cursor': str(page[-1]['id']) if len(rows) > limit else None,
+        }
+
+    def get_response_counts(self, script_id: str) -> Dict[str, int]:
+        """Per-account response counts, maintained on write"""
+        return {row['account']: row['count'] for row in self._query(
+            "SELECT account, count FROM dm_response_counts WHERE script_id = ? ORDER BY account", (script_id,))}
+
+    def get_sent_counts(self, script_id: str) -> Dict[str, int]:
+        """Per-account successful sends, so a resumed run only tops accounts up to their limit"""
+        return {row['account']: row['sent'] for row in self._query(
+            "SELECT account, COUNT(*) AS sent FROM dm_sends WHERE script_id = ? AND status = 'sent' "
+            "GROUP BY account", (script_id,))}
+
+    def import_responses_json(self, script_id: str, path: str) -> int:
+        """Load a pre-journal dm_responses_<id>.json into the journal (one-time, for older runs)"""
+        if self.get_response_counts(script_id):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            responses = json.load(f)
+        rows = []
+        for response in responses:
+            try:
+                created = datetime.fromisoformat(response.get('timestamp', '')).timestamp()
+            except (TypeError, ValueError):
+                created = time.time()
+            rows.append((script_id, response.get('account', ''), response.get('responder'),
+                         response.get('message'), created))
+        with self.lock:
+            self.pending_responses.extend(rows)
+            self.flush()
+        return len(responses)
+
+    def get_counts(self, script_id: str) -> Dict:
+        sent = attempts = responses = 0
+        for row in self._query(
+                "SELECT COUNT(*) AS attempts, COALESCE(SUM(status = 'sent'), 0) AS sent "
+                "FROM dm_sends WHERE script_id = ?", (script_id,)):
+            attempts, sent = row['attempts'], row['sent']
+        for row in self._query("SELECT COUNT(*) AS responses FROM dm_responses WHERE script_id = ?", (script_id,)):
+            responses = row['responses']
+        return {'attempts': attempts, 'sent': sent, 'responses': responses}
+
+    def export_sends_csv(self, script_id: str, path: str) -> int:
+        """Materialize a script's send attempts as CSV, streaming from the journal"""
+        return self._write_csv(path, SEND_FIELDS, self.iter_sends(script_id))
+
+    def export_responses_csv(self, script_id: str, path: str) -> int:
+        return self._write_csv(path, RESPONSE_FIELDS, self.iter_responses(script_id))
+
+    def export_responses_json(self, script_id: str, path: str) -> int:
+        """Write responses as a JSON array one item at a time"""
+        counter = _Counter(self.iter_responses(script_id))
+        self._write_chunks(path, json_array_chunks(counter))
+        return counter.count
+
+    def _write_csv(self, path: str, fieldnames: List[str], rows: Iterator[Dict]) -> int:
+        counter = _Counter(rows)
+        self._write_chunks(path, csv_chunks(fieldnames, counter))
+        return counter.count
+
+    @staticmethod
+    def _write_chunks(path: str, chunks: Iterator[str]):
+        """Same chunk generators as the streamed downloads, written to a file that appears atomically"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+
+
+class _Counter:
+    """Iterator wrapper counting the items that pass through"""
+
+    def __init__(self, items: Iterator):
+        self.items = iter(items)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self.items)
+        self.count += 1
+        return item
+
+
+# Global instance
+dm_journal = DMJournal()
@@ -0,0 +1,120 @@
+"""
+Download Streams
+Chunked text, CSV and JSON generators for downloads and exports, with gzip/zstd content negotiation
+"""
+
+import io
+import csv
+import json
+import zlib
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd is offered only when the package is installed
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Chunks are flushed to the client (and compressor) at about this size
+STREAM_CHUNK_SIZE = 64 * 1024
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def supported_encodings() -> List[str]:
+    """Content codings we can produce, in order of preference"""
+    return (['zstd'] if zstandard is not None else []) + ['gzip']
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick a coding from an Accept-Encoding header; None means send the body as-is"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_chunks(chunks: Iterable, encoding: Optional[str]) -> Iterator[bytes]:
+    """Encode str chunks as UTF-8 and compress them incrementally"""
+    encoded = (chunk.encode('utf-8') if isinstance(chunk, str) else chunk for chunk in chunks)
+    if encoding is None:
+        yield from (chunk for chunk in encoded if chunk)
+        return
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        compress, flush = compressor.compress, compressor.flush
+    elif encoding == 'zstd' and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        compress, flush = compressor.compress, compressor.flush
+    else:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+    for chunk in encoded:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield flush()
+
+
+def batch_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Join lines into chunks of about STREAM_CHUNK_SIZE"""
+    batch, size = [], 0
+    for line in lines:
+        batch.append(line)
+        batch.append("\n")
+        size += len(line) + 1
+        if size >= STREAM_CHUNK_SIZE:
+            yield "".join(batch)
+            batch, size = [], 0
+    if batch:
+        yield "".join(batch)
+
+
+def file_chunks(path: str) -> Iterator[bytes]:
+    """Read a file in chunks; bytes appended while streaming are included up to EOF"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def csv_chunks(fieldnames: List[str], rows: Iterable[Dict]) -> Iterator[str]:
+    """CSV with header, emitted in chunks as rows arrive"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= STREAM_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def json_array_chunks(items: Iterable) -> Iterator[str]:
+    """A JSON array written one item at a time"""
+    count = 0
+    for item in items:
+        yield (',\n  ' if count else '[\n  ') + json.dumps(item, ensure_ascii=False)
+        count += 1
+    yield '\n]\n' if count else '[]\n'
@@ -16,6 +16,8 @@ import pyotp
 from instagram_cookie_manager import cookie_manager
 from instagram_accounts import get_account_details
 from proxy_manager import proxy_manager
+from selector_race import wait_for_any, query_any
+from selector_registry import selector_registry
 
 logger = logging.getLogger(__name__)
 
@@ -697,17 +699,6 @@ class EnhancedInstagramAuth:
             # Wait longer for Instagram's dynamic content to load
             await self._human_delay(5000, 8000)
             
-            login_form_selectors = [
-                'input[name="username"]',
-                'input[aria-label="email_Password number, username, or email"]',
-                'input[aria-label="email_Password number, username or email address"]',
-                '#loginForm input[name="username"]',
-                'form input[name="username"]',
-                'input[placeholder*="username"]',
-                'input[placeholder*="email"]',
-                'input[type="text"]',  # More generic fallback
-                'form input[type="text"]:first-child'  # Very generic fallback
-            ]
             
             form_found = False
             working_selector = None
@@ -715,29 +706,29 @@ class EnhancedInstagramAuth:
             # First try to wait a bit and see if the page stabilizes
             await self._human_delay(3000, 5000)
             
-            for i, selector in enumerate(login_form_selectors, 1):
+            # Race the registry candidates; matches that aren't a username field are excluded and the rest re-raced
+            tried = []
+            while not form_found:
+                element, selector = await selector_registry.wait_for(page, 'login_username', timeout=8000, exclude=tried)
+                if not element:
+                    break
+                tried.append(selector)
                 try:
-                    log(f"🎯 Trying login form selector {i}/{len(login_form_selectors)}: {selector}")
-                    await page.wait_for_selector(selector, state='visible', timeout=8000)
-                    
                     # Double check the element is actually a username field
-                    element = await page.query_selector(selector)
-                    if element:
-                        element_attrs = await element.evaluate('el => ({name: el.name, placeholder: el.placeholder, type: el.type, ariaLabel: el.ariaLabel})')
-                        log(f"✅ Found element with attributes: {element_attrs}")
-                        
-                        # Verify it's likely a username field
-                        attrs_str = str(element_attrs).lower()
-                        if any(keyword in attrs_str for keyword in ['username', 'email', 'email_Password']):
-                            log(f"✅ Login form detected with selector {i}")
-                            working_selector = selector
-                            form_found = True
-                            break
-                        else:
-                            log(f"⚠️ Element found but doesn't seem like username field: {element_attrs}")
+                    element_attrs = await element.evaluate('el => ({name: el.name, placeholder: el.placeholder, type: el.type, ariaLabel: el.ariaLabel})')
+                    log(f"✅ Found element with attributes: {element_attrs}")
+                    
+                    # Verify it's likely a username field
+                    attrs_str = str(element_attrs).lower()
+                    if any(keyword in attrs_str for keyword in ['username', 'email', 'email_Password']):
+                        log(f"✅ Login form detected with selector: {selector}")
+                        working_selector = selector
+                        form_found = True
+                    else:
+                        log(f"⚠️ Element found but doesn't seem like username field: {element_attrs}")
                     
                 except Exception as e:
-                    log(f"⚠️ Form selector {i} failed: {str(e)[:100]}")
+                    log(f"⚠️ Form selector {selector} failed: {str(e)[:100]}")
                     continue
             
             if not form_found:
@@ -1100,28 +1091,12 @@ class EnhancedInstagramAuth:
             # Wait a bit for dialog to appear
             await self._human_delay(1000, 2000)
             
-            # Look for Save info button selectors
-            save_info_selectors = [
-                'button:has-text("Save Info")',
-                'button:has-text("Save info")', 
-                'button:has-text("Save")',
-                'div[role="button"]:has-text("Save Info")',
-                'div[role="button"]:has-text("Save info")',
-                'div[role="button"]:has-text("Save")',
-                'button._acan._acap._acas._aj1-._ap30',  # Instagram's CSS classes
-                '//button[contains(text(), "Save")]'
-            ]
-            
-            for selector in save_info_selectors:
-                try:
-                    save_button = await page.wait_for_selector(selector, timeout=2000)
-                    if save_button and await save_button.is_visible():
-                        await save_button.click()
-                        await self._human_delay(2000, 3000)
-                        return  # Successfully clicked, exit
-                except:
-                    continue
-                    
+            # Look for Save info button
+            save_button, _ = await selector_registry.wait_for(page, 'save_login_info', timeout=2000)
+            if save_button:
+                await save_button.click()
+                await self._human_delay(2000, 3000)
+
         except Exception:
             # Dialog might not be present, which is fine
             pass
@@ -1145,11 +1120,8 @@ class EnhancedInstagramAuth:
                 'input[type="text"][maxlength="6"]'
             ]
             
-            for selector in totp_selectors:
-                if await page.query_selector(selector):
-                    return True
-            
-            return False
+            element, _ = await query_any(page, totp_selectors)
+            return element is not None
             
         except Exception:
             return False
@@ -1177,11 +1149,8 @@ class EnhancedInstagramAuth:
                 'p:has-text("incorrect")'
             ]
             
-            for selector in error_selectors:
-                if await page.query_selector(selector):
-                    return True
-            
-            return False
+            element, _ = await query_any(page, error_selectors)
+            return element is not None
             
         except Exception:
             return False
@@ -1198,41 +1167,11 @@ class EnhancedInstagramAuth:
             
             await self._human_delay(1000, 2000)
             
-            # Find 2FA input field with more comprehensive selectors
-            totp_selectors = [
-                'input[name="verificationCode"]',
-                'input[name="security_code"]',
-                'input[aria-label*="security code"]',
-                'input[aria-label*="Security code"]',
-                'input[aria-label*="verification code"]',
-                'input[aria-label*="Verification code"]',
-                'input[placeholder*="security code"]',
-                'input[placeholder*="Security code"]',
-                'input[placeholder*="verification code"]',
-                'input[placeholder*="Verification code"]',
-                'input[placeholder*="6-digit code"]',
-                'input[placeholder*="Enter the 6-digit code"]',
-                'input[type="text"][maxlength="6"]',
-                'input[type="text"][pattern="[0-9]*"]',
-                'input[autocomplete="one-time-code"]',
-                'input[data-testid="confirmation-code-input"]',
-                'form input[type="text"]:only-of-type',
-                '#react-root input[type="text"]'
-            ]
             
-            totp_input = None
-            for i, selector in enumerate(totp_selectors, 1):
-                try:
-                    log(f"🎯 Trying 2FA selector {i}/{len(totp_selectors)}: {selector}")
-                    totp_input = await page.wait_for_selector(selector, timeout=8000)
-                    if totp_input and await totp_input.is_visible():
-                        log(f"📱 Found 2FA input field with selector {i}")
-                        break
-                    else:
-                        totp_input = None
-                except Exception as e:
-                    log(f"⚠️ 2FA selector {i} failed: {str(e)[:80]}")
-                    continue
+            # Find 2FA input field
+            totp_input, selector = await selector_registry.wait_for(page, 'totp_input', timeout=8000)
+            if totp_input:
+                log(f"📱 Found 2FA input field with selector: {selector}")
             
             if not totp_input:
                 log("❌ Could not find 2FA input field after trying all selectors")
@@ -1260,25 +1199,15 @@ class EnhancedInstagramAuth:
             await self._human_delay(1500, 2500)
             
             # Submit 2FA form
-            submit_selectors = [
-                'button[type="submit"]',
-                'button:has-text("Confirm")',
-                'button:has-text("Continue")',
-                'button:has-text("Submit")',
-                'button:has-text("Verify")'
-            ]
-            
             submitted = False
-            for selector in submit_selectors:
+            submit_button, _ = await selector_registry.wait_for(page, 'totp_submit', timeout=3000)
+            if submit_button:
                 try:
-                    submit_button = await page.wait_for_selector(selector, timeout=3000)
-                    if submit_button:
-                        await submit_button.click()
-                        log("🚀 Clicked 2FA submit button")
-                        submitted = True
-                        break
+                    await submit_button.click()
+                    log("🚀 Clicked 2FA submit button")
+                    submitted = True
                 except:
-                    continue
+                    pass
             
             if not submitted:
                 await page.keyboard.press('Enter')
@@ -1422,18 +1351,18 @@ class EnhancedInstagramAuth:
             ]
             
             dismissed_count = 0
-            for selector in blocking_selectors:
+            remaining = list(blocking_selectors)
+            # Don't try to dismiss too many elements
+            while remaining and dismissed_count < 3:
+                element, hit = await wait_for_any(page, remaining, timeout=2000)
+                if not element:
+                    break
+                selector = remaining.pop(hit)
                 try:
-                    element = await page.wait_for_selector(selector, timeout=2000)
-                    if element and await element.is_visible():
-                        await element.click()
-                        log(f"✅ Dismissed blocking element: {selector}")
-                        dismissed_count += 1
-                        await self._human_delay(1500, 2500)
-                        
-                        # Don't try to dismiss too many elements
-                        if dismissed_count >= 3:
-                            break
+                    await element.click()
+                    log(f"✅ Dismissed blocking element: {selector}")
+                    dismissed_count += 1
+                    await self._human_delay(1500, 2500)
                 except:
                     continue
             
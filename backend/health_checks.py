@@ -0,0 +1,177 @@
+"""
+Health Checks
+Cheap liveness plus cached readiness checks: event-loop lag, job store writability, free disk,
+browser count and Playwright driver availability
+"""
+
+import os
+import glob
+import time
+import shutil
+import asyncio
+import sqlite3
+import logging
+import tempfile
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from metrics import BROWSER_PROCESS_NAMES
+from upload_utils import parse_size
+from coordination import COORDINATION_BACKEND, COORDINATION_DB
+from job_lifecycle import JOB_CHECKPOINT_DB
+
+logger = logging.getLogger(__name__)
+
+# Probes are answered from the last result for this long
+READINESS_CACHE_SECONDS = float(os.getenv('READINESS_CACHE_SECONDS', '5'))
+READINESS_MAX_LOOP_LAG = float(os.getenv('READINESS_MAX_LOOP_LAG', '1.0'))
+READINESS_MIN_FREE_DISK = parse_size(os.getenv('READINESS_MIN_FREE_DISK', '1GB'), 1024 ** 3)
+MAX_BROWSERS = int(os.getenv('MAX_BROWSERS', '10'))
+
+LOOP_LAG_INTERVAL = 0.5
+LOOP_LAG_SAMPLES = 20  # ~10 s of history; the worst sample counts
+
+# Directories that must have free space, and SQLite stores jobs can't run without
+DISK_PATHS = ('browser_profiles', 'logs')
+JOB_STORE_PATHS = (COORDINATION_DB, JOB_CHECKPOINT_DB) if COORDINATION_BACKEND == 'sqlite' else (JOB_CHECKPOINT_DB,)
+
+
+def count_browser_instances() -> Optional[int]:
+    """Browser main processes (helpers carry --type=); None where /proc isn't available"""
+    if not os.path.isdir('/proc'):
+        return None
+    count = 0
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/comm', 'r') as f:
+                name = f.read().strip().lower()
+            if not any(browser in name for browser in BROWSER_PROCESS_NAMES):
+                continue
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                if b'--type=' not in f.read():
+                    count += 1
+        except OSError:
+            # Process exited while scanning
+            continue
+    return count
+
+
+class ReadinessChecker:
+    def __init__(self):
+        self.lag_samples = deque(maxlen=LOOP_LAG_SAMPLES)
+        self.monitor_task = None
+        self.cached: Optional[Dict] = None
+        self.cached_at = 0.0
+        self.lock = None
+        # Cheap checks evaluated on every probe rather than cached, e.g. whether the server is draining
+        self.live_checks: Dict[str, Callable[[], Dict]] = {}
+
+    def register_check(self, name: str, check: Callable[[], Dict]):
+        self.live_checks[name] = check
+
+    def start_loop_monitor(self):
+        """Sample event-loop lag in the background (call from the running loop)"""
+        if self.monitor_task is None or self.monitor_task.done():
+            self.monitor_task = asyncio.get_running_loop().create_task(self._monitor_loop_lag())
+
+    async def _monitor_loop_lag(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self.lag_samples.append(max(0.0, time.monotonic() - started - LOOP_LAG_INTERVAL))
+
+    def check_loop_lag(self) -> Dict:
+        if not self.lag_samples:
+            return {'ok': True, 'lag_seconds': None}
+        worst = max(self.lag_samples)
+        return {'ok': worst <= READINESS_MAX_LOOP_LAG, 'lag_seconds': round(worst, 3),
+                'limit_seconds': READINESS_MAX_LOOP_LAG}
+
+    @staticmethod
+    def check_job_stores() -> Dict:
+        """Each store must take a write lock promptly, and its directory must accept new files"""
+        errors = []
+        for path in JOB_STORE_PATHS:
+            directory = os.path.dirname(path) or '.'
+            try:
+                with tempfile.NamedTemporaryFile(dir=directory, prefix='.ready-'):
+                    pass
+                conn = sqlite3.connect(path, timeout=1)
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute("ROLLBACK")
+                finally:
+                    conn.close()
+            except (OSError, sqlite3.Error) as e:
+                errors.append(f"{path}: {e}")
+        return {'ok': not errors, 'errors': errors}
+
+    @staticmethod
+    def check_disk() -> Dict:
+        free = {}
+        for path in DISK_PATHS:
+            try:
+                free[path] = shutil.disk_usage(path if os.path.exists(path) else '.').free
+            except OSError as e:
+                logger.warning(f"Could not read disk usage for {path}: {e}")
+        return {'ok': all(value >= READINESS_MIN_FREE_DISK for value in free.values()),
+                'free_bytes': free, 'min_free_bytes': READINESS_MIN_FREE_DISK}
+
+    @staticmethod
+    def check_browsers() -> Dict:
+        count = count_browser_instances()
+        return {'ok': count is None or count < MAX_BROWSERS, 'running': count, 'limit': MAX_BROWSERS}
+
+    @staticmethod
+    def check_playwright() -> Dict:
+        """The driver ships with the package; browsers are installed separately by `playwright install`"""
+        try:
+            from playwright._impl._driver import compute_driver_executable
+        except ImportError as e:
+            return {'ok': False, 'error': f"Playwright is not installed: {e}"}
+        driver = compute_driver_executable()
+        driver_paths: List[str] = [str(path) for path in (driver if isinstance(driver, tuple) else (driver,))]
+        missing = [path for path in driver_paths if not os.path.exists(path)]
+        if missing:
+            return {'ok': False, 'error': f"Playwright driver missing: {', '.join(missing)}"}
+        browsers_path = os.getenv('PLAYWRIGHT_BROWSERS_PATH') or os.path.expanduser(os.path.join('~', '.cache', 'ms-playwright'))
+        if browsers_path != '0' and not glob.glob(os.path.join(browsers_path, 'chromium*')):
+            return {'ok': False, 'error': f"No Chromium build under {browsers_path}"}
+        return {'ok': True}
+
+    def _run_blocking_checks(self) -> Dict:
+        return {
+            'job_stores': self.check_job_stores(),
+            'disk': self.check_disk(),
+            'browsers': self.check_browsers(),
+            'playwright': self.check_playwright(),
+        }
+
+    async def check(self) -> Dict:
+        """Readiness report, recomputed at most every READINESS_CACHE_SECONDS; concurrent probes share one run"""
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if self.cached is None or time.monotonic() - self.cached_at >= READINESS_CACHE_SECONDS:
+                checks = await asyncio.to_thread(self._run_blocking_checks)
+                checks['event_loop'] = self.check_loop_lag()
+                self.cached = {
+                    'ready': all(check['ok'] for check in checks.values()),
+                    'checks': checks,
+                    'checked_at': time.time(),
+                }
+                self.cached_at = time.monotonic()
+                if not self.cached['ready']:
+                    failed = [name for name, check in checks.items() if not check['ok']]
+                    logger.warning(f"Readiness checks failing: {', '.join(failed)}")
+            report = self.cached
+        if not self.live_checks:
+            return report
+        checks = dict(report['checks'], **{name: check() for name, check in self.live_checks.items()})
+        return dict(report, ready=all(check['ok'] for check in checks.values()), checks=checks)
+
+
+# Global instance
+readiness_checker = ReadinessChecker()
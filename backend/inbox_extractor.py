@@ -0,0 +1,97 @@
+"""
+Inbox Extraction
+Reads the DM conversation list (and, when needed, a thread's latest message) with one in-page evaluation each
+"""
+
+import re
+import logging
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Rows are deduplicated by containment: a list item wrapping a thread link counts once
+_INBOX_ROWS_JS = """
+({unreadSelectors, maxRows}) => {
+    const rowSelector = "a[href*='/direct/t/'], div[role='listitem'], div[role='row']";
+    const picked = [];
+    for (const node of document.querySelectorAll(rowSelector)) {
+        if (picked.some(parent => parent.contains(node))) continue;
+        picked.push(node);
+        if (picked.length >= maxRows) break;
+    }
+    return picked.map((node, index) => {
+        const link = node.matches("a[href*='/direct/t/']") ? node : node.querySelector("a[href*='/direct/t/']");
+        const match = link ? (link.getAttribute('href') || '').match(/\\/direct\\/t\\/([^/?#]+)/) : null;
+        const lines = (node.innerText || '').split('\\n').map(line => line.trim()).filter(Boolean);
+        let unreadSelector = -1;
+        unreadSelectors.forEach((selector, i) => {
+            if (unreadSelector >= 0) return;
+            try {
+                if (node.matches(selector) || node.querySelector(selector)) unreadSelector = i;
+            } catch (e) {}
+        });
+        const ariaUnread = /unread/i.test(node.getAttribute('aria-label') || '')
+            || !!node.querySelector("[aria-label*='nread']");
+        return {
+            index,
+            thread_id: match ? match[1] : null,
+            title: lines[0] || '',
+            preview: lines.slice(1).join(' ').trim(),
+            unread_selector: unreadSelector,
+            unread: unreadSelector >= 0 || ariaUnread,
+        };
+    });
+}
+"""
+
+_THREAD_LATEST_JS = """
+(messageSelectors) => {
+    for (const selector of messageSelectors) {
+        let nodes;
+        try { nodes = document.querySelectorAll(selector); } catch (e) { continue; }
+        for (let i = nodes.length - 1; i >= 0; i--) {
+            const text = (nodes[i].innerText || '').trim();
+            if (text) return text;
+        }
+    }
+    return '';
+}
+"""
+
+THREAD_MESSAGE_SELECTORS = [
+    "div[data-testid='message-text']",
+    "div[class*='message'] span",
+    "div[role='row'] div span",
+]
+
+# Trailing relative timestamp on a preview line, e.g. "see you soon · 3h"
+_PREVIEW_AGE = re.compile(r'\s*·\s*(\d+\s*[smhdwy]\w*|now|yesterday)\s*$', re.IGNORECASE)
+# Previews that say something happened rather than what was said
+_STATUS_PREVIEW = re.compile(
+    r'^(seen|seen by .*|active( now| \d+\s*\w+ ago)?|typing\.*|.* liked a message|reacted .* to your message)$',
+    re.IGNORECASE)
+
+
+def parse_preview(preview: str) -> Dict:
+    """Split a conversation preview into text, whether we sent it, and whether it is usable as-is"""
+    text = _PREVIEW_AGE.sub('', preview or '').strip()
+    from_self = text.startswith('You:') or text.lower().startswith('you sent')
+    if text.startswith('You:'):
+        text = text[4:].strip()
+    truncated = text.endswith('…') or text.endswith('...')
+    sufficient = bool(text) and not truncated and not _STATUS_PREVIEW.match(text)
+    return {'text': text, 'from_self': from_self, 'truncated': truncated, 'sufficient': sufficient}
+
+
+async def extract_inbox_rows(page, unread_selectors: Sequence[str], max_rows: int = 50) -> List[Dict]:
+    """One evaluate: thread id, title, preview, unread flag and parsed preview for each visible conversation"""
+    rows = await page.evaluate(_INBOX_ROWS_JS, {'unreadSelectors': list(unread_selectors), 'maxRows': max_rows})
+    for row in rows:
+        row.update(parse_preview(row.get('preview', '')))
+    return rows
+
+
+async def read_thread_latest(page, message_selectors: Sequence[str] = THREAD_MESSAGE_SELECTORS) -> Optional[str]:
+    """Latest message text of the currently open thread, in one evaluate"""
+    text = await page.evaluate(_THREAD_LATEST_JS, list(message_selectors))
+    return text or None
@@ -3,39 +3,56 @@ Instagram Accounts Management Module
 Handles CRUD operations for Instagram accounts storage and retrieval
 """
 
-import json
-import os
 import uuid
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Dict, Optional
 from proxy_manager import proxy_manager
+from json_store import JSONFileStore
 
 ACCOUNTS_FILE = 'instagram_accounts.json'
 
+
+@dataclass(frozen=True)
+class AccountRecord:
+    """Credentials an automation engine needs for one account, resolved once at job submission"""
+    username: str
+    password: str = field(repr=False)
+    totp_secret: str = field(default='', repr=False)
+    email: str = ''
+    phone: str = ''
+    account_id: Optional[str] = None
+
+    @classmethod
+    def from_account(cls, account: Dict, password: Optional[str] = None) -> "AccountRecord":
+        return cls(
+            username=str(account.get('username', '')).strip(),
+            password=str(password if password is not None else account.get('password', '')).strip(),
+            totp_secret=(account.get('totp_secret') or '').strip(),
+            email=account.get('email') or '',
+            phone=account.get('phone') or '',
+            account_id=account.get('id'),
+        )
+
+
 class InstagramAccountsManager:
     def __init__(self):
         self.accounts_file = ACCOUNTS_FILE
+        self.store = JSONFileStore(self.accounts_file, default_factory=list, name='instagram_accounts', cache=True)
         self.ensure_file_exists()
     
     def ensure_file_exists(self):
         """Ensure instagram_accounts.json exists"""
-        if not os.path.exists(self.accounts_file):
-            with open(self.accounts_file, 'w') as f:
-                json.dump([], f)
+        self.store.ensure_exists()
     
-    def load_accounts(self) -> List[Dict]:
-        """Load all Instagram accounts"""
-        try:
-            with open(self.accounts_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+    def load_accounts(self, copy_result: bool = True) -> List[Dict]:
+        """Load all Instagram accounts (cached until the file changes); copy_result=False for read-only use"""
+        return self.store.read(copy_result)
     
     def save_accounts(self, accounts: List[Dict]) -> bool:
         """Save accounts to file"""
         try:
-            with open(self.accounts_file, 'w') as f:
-                json.dump(accounts, f, indent=2)
+            self.store.write(accounts)
             return True
         except Exception:
             return False
@@ -66,72 +83,75 @@ class InstagramAccountsManager:
     def add_account(self, username: str, password: str, email: str = '', 
                    email_Password: str = '', notes: str = '', totp_secret: str = '') -> Dict:
         """Add a new Instagram account"""
-        accounts = self.load_accounts()
-        
-        # Check if username already exists
-        if any(acc['username'].lower() == username.lower() for acc in accounts):
-            raise ValueError(f"Account with username '{username}' already exists")
-        
-        new_account = {
-            'id': str(uuid.uuid4()),
-            'username': username,
-            'password': password,
-            'email': email,
-            'email_Password': email_Password,  # Use email_Password instead of phone
-            'notes': notes,
-            'totp_secret': totp_secret,  # Added TOTP secret field
-            'is_active': True,
-            'created_at': datetime.now().isoformat(),
-            'updated_at': datetime.now().isoformat(),
-            'last_used': None
-        }
-        
-        accounts.append(new_account)
-        
-        if self.save_accounts(accounts):
-            return new_account
-        else:
-            raise Exception("Failed to save account")
+        with self.store.lock():
+            accounts = self.load_accounts()
+            
+            # Check if username already exists
+            if any(acc['username'].lower() == username.lower() for acc in accounts):
+                raise ValueError(f"Account with username '{username}' already exists")
+            
+            new_account = {
+                'id': str(uuid.uuid4()),
+                'username': username,
+                'password': password,
+                'email': email,
+                'email_Password': email_Password,  # Use email_Password instead of phone
+                'notes': notes,
+                'totp_secret': totp_secret,  # Added TOTP secret field
+                'is_active': True,
+                'created_at': datetime.now().isoformat(),
+                'updated_at': datetime.now().isoformat(),
+                'last_used': None
+            }
+            
+            accounts.append(new_account)
+            
+            if self.save_accounts(accounts):
+                return new_account
+            else:
+                raise Exception("Failed to save account")
     
     def update_account(self, account_id: str, updates: Dict) -> bool:
         """Update an existing Instagram account"""
-        accounts = self.load_accounts()
-        
-        for i, account in enumerate(accounts):
-            if account['id'] == account_id:
-                # Update fields
-                if 'username' in updates:
-                    # Check if new username already exists in other accounts
-                    if any(acc['username'].lower() == updates['username'].lower() 
-                          and acc['id'] != account_id for acc in accounts):
-                        raise ValueError(f"Account with username '{updates['username']}' already exists")
-                    account['username'] = updates['username']
-                
-                if 'password' in updates:
-                    account['password'] = updates['password']
-                if 'email' in updates:
-                    account['email'] = updates['email']
-                if 'phone' in updates:
-                    account['phone'] = updates['phone']
-                if 'notes' in updates:
-                    account['notes'] = updates['notes']
-                if 'totp_secret' in updates:
-                    account['totp_secret'] = updates['totp_secret']
-                if 'is_active' in updates:
-                    account['is_active'] = updates['is_active']
-                
-                account['updated_at'] = datetime.now().isoformat()
-                accounts[i] = account
-                
-                return self.save_accounts(accounts)
-        
-        return False
+        with self.store.lock():
+            accounts = self.load_accounts()
+            
+            for i, account in enumerate(accounts):
+                if account['id'] == account_id:
+                    # Update fields
+                    if 'username' in updates:
+                        # Check if new username already exists in other accounts
+                        if any(acc['username'].lower() == updates['username'].lower() 
+                              and acc['id'] != account_id for acc in accounts):
+                            raise ValueError(f"Account with username '{updates['username']}' already exists")
+                        account['username'] = updates['username']
+                    
+                    if 'password' in updates:
+                        account['password'] = updates['password']
+                    if 'email' in updates:
+                        account['email'] = updates['email']
+                    if 'phone' in updates:
+                        account['phone'] = updates['phone']
+                    if 'notes' in updates:
+                        account['notes'] = updates['notes']
+                    if 'totp_secret' in updates:
+                        account['totp_secret'] = updates['totp_secret']
+                    if 'is_active' in updates:
+                        account['is_active'] = updates['is_active']
+                    
+                    account['updated_at'] = datetime.now().isoformat()
+                    accounts[i] = account
+                    
+                    return self.save_accounts(accounts)
+            
+            return False
     
     def delete_account(self, account_id: str) -> bool:
         """Delete an Instagram account"""
-        accounts = self.load_accounts()
-        accounts = [acc for acc in accounts if acc['id'] != account_id]
-        return self.save_accounts(accounts)
+        with self.store.lock():
+            accounts = self.load_accounts()
+            accounts = [acc for acc in accounts if acc['id'] != account_id]
+            return self.save_accounts(accounts)
     
     def get_account_by_id(self, account_id: str) -> Optional[Dict]:
         """Get account by ID with proxy information"""
@@ -156,6 +176,22 @@ class InstagramAccountsManager:
         
         return selected_accounts
     
+    def get_account_records(self, account_ids: List[str]) -> List[AccountRecord]:
+        """Resolve active accounts into engine-ready records with a single store read"""
+        wanted = set(account_ids)
+        return [AccountRecord.from_account(acc) for acc in self.load_accounts(copy_result=False)
+                if acc.get('id') in wanted and acc.get('is_active', True)]
+    
+    def resolve_account_records(self, credentials: List[Dict]) -> List[AccountRecord]:
+        """Build records for username/password pairs (e.g. from an uploaded file), adding stored 2FA details"""
+        stored = {acc.get('username', '').lower(): acc for acc in self.load_accounts(copy_result=False)}
+        records = []
+        for cred in credentials:
+            username = str(cred.get('username', '')).strip()
+            account = stored.get(username.lower(), {'username': username})
+            records.append(AccountRecord.from_account(account, password=cred.get('password', '')))
+        return records
+    
     def update_last_used(self, account_id: str) -> bool:
         """Update the last_used timestamp for an account"""
         return self.update_account(account_id, {'last_used': datetime.now().isoformat()})
@@ -181,56 +217,57 @@ class InstagramAccountsManager:
             # Clean and validate data
             df = df.dropna(subset=required_columns)
             
-            accounts = self.load_accounts()
-            existing_usernames = {acc['username'].lower() for acc in accounts}
-            
-            added_accounts = []
-            skipped_accounts = []
-            
-            for _, row in df.iterrows():
-                username = str(row['username']).strip()
-                password = str(row['password']).strip()
-                
-                if not username or not password:
-                    skipped_accounts.append({'username': username, 'reason': 'Empty username or password'})
-                    continue
+            with self.store.lock():
+                accounts = self.load_accounts()
+                existing_usernames = {acc['username'].lower() for acc in accounts}
                 
-                if username.lower() in existing_usernames:
-                    skipped_accounts.append({'username': username, 'reason': 'Username already exists'})
-                    continue
+                added_accounts = []
+                skipped_accounts = []
                 
-                try:
-                    new_account = {
-                        'id': str(uuid.uuid4()),
-                        'username': username,
-                        'password': password,
-                        'email': str(row.get('email', '')).strip(),
-                        'phone': str(row.get('phone', '')).strip(),
-                        'notes': str(row.get('notes', '')).strip(),
-                        'totp_secret': str(row.get('totp_secret', '')).strip(),  # Added TOTP secret support
-                        'is_active': True,
-                        'created_at': datetime.now().isoformat(),
-                        'updated_at': datetime.now().isoformat(),
-                        'last_used': None
-                    }
+                for _, row in df.iterrows():
+                    username = str(row['username']).strip()
+                    password = str(row['password']).strip()
                     
-                    accounts.append(new_account)
-                    added_accounts.append(new_account)
-                    existing_usernames.add(username.lower())
+                    if not username or not password:
+                        skipped_accounts.append({'username': username, 'reason': 'Empty username or password'})
+                        continue
                     
-                except Exception as e:
-                    skipped_accounts.append({'username': username, 'reason': str(e)})
-            
-            if self.save_accounts(accounts):
-                return {
-                    'success': True,
-                    'added_count': len(added_accounts),
-                    'skipped_count': len(skipped_accounts),
-                    'added_accounts': added_accounts,
-                    'skipped_accounts': skipped_accounts
-                }
-            else:
-                raise Exception("Failed to save accounts")
+                    if username.lower() in existing_usernames:
+                        skipped_accounts.append({'username': username, 'reason': 'Username already exists'})
+                        continue
+                    
+                    try:
+                        new_account = {
+                            'id': str(uuid.uuid4()),
+                            'username': username,
+                            'password': password,
+                            'email': str(row.get('email', '')).strip(),
+                            'phone': str(row.get('phone', '')).strip(),
+                            'notes': str(row.get('notes', '')).strip(),
+                            'totp_secret': str(row.get('totp_secret', '')).strip(),  # Added TOTP secret support
+                            'is_active': True,
+                            'created_at': datetime.now().isoformat(),
+                            'updated_at': datetime.now().isoformat(),
+                            'last_used': None
+                        }
+                        
+                        accounts.append(new_account)
+                        added_accounts.append(new_account)
+                        existing_usernames.add(username.lower())
+                        
+                    except Exception as e:
+                        skipped_accounts.append({'username': username, 'reason': str(e)})
+                
+                if self.save_accounts(accounts):
+                    return {
+                        'success': True,
+                        'added_count': len(added_accounts),
+                        'skipped_count': len(skipped_accounts),
+                        'added_accounts': added_accounts,
+                        'skipped_accounts': skipped_accounts
+                    }
+                else:
+                    raise Exception("Failed to save accounts")
                 
         except Exception as e:
             return {
@@ -335,5 +372,5 @@ def get_account_details(username: str) -> Optional[Dict]:
 
 def get_all_account_usernames() -> List[str]:
     """Get all account usernames"""
-    accounts = instagram_accounts_manager.load_accounts()
+    accounts = instagram_accounts_manager.load_accounts(copy_result=False)
     return [account.get('username', '') for account in accounts if account.get('username')]
@@ -13,6 +13,8 @@ from typing import Dict, List, Optional, Any
 from pathlib import Path
 import hashlib
 import logging
+from metrics import cookie_store_lookups_total, time_json_store
+from json_store import atomic_write_json
 
 logger = logging.getLogger(__name__)
 
@@ -82,15 +84,14 @@ class InstagramCookieManager:
             if not encrypted_data:
                 return False
             
-            with open(cookie_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'encrypted_data': encrypted_data,
-                    'metadata': {
-                        'username': username.lower(),
-                        'created_at': datetime.now().isoformat(),
-                        'version': '1.0'
-                    }
-                }, f, indent=2)
+            atomic_write_json(str(cookie_file), {
+                'encrypted_data': encrypted_data,
+                'metadata': {
+                    'username': username.lower(),
+                    'created_at': datetime.now().isoformat(),
+                    'version': '1.0'
+                }
+            }, 'cookies')
             
             logger.info(f"Cookies saved for {username}")
             return True
@@ -114,10 +115,11 @@ class InstagramCookieManager:
             
             if not cookie_file.exists():
                 logger.info(f"No cookie file found for {username}")
+                cookie_store_lookups_total.inc(result='miss')
                 return None
             
             # Load encrypted data
-            with open(cookie_file, 'r', encoding='utf-8') as f:
+            with time_json_store('cookies', 'read'), open(cookie_file, 'r', encoding='utf-8') as f:
                 file_data = json.load(f)
             
             encrypted_data = file_data.get('encrypted_data')
@@ -135,6 +137,7 @@ class InstagramCookieManager:
             expires_at = datetime.fromisoformat(cookie_data.get('expires_at', ''))
             if datetime.now() > expires_at:
                 logger.info(f"Cookies expired for {username}")
+                cookie_store_lookups_total.inc(result='expired')
                 self.delete_cookies(username)
                 return None
             
@@ -145,23 +148,24 @@ class InstagramCookieManager:
             try:
                 encrypted_data = self._encrypt_cookie_data(cookie_data)
                 if encrypted_data:
-                    with open(cookie_file, 'w', encoding='utf-8') as f:
-                        json.dump({
-                            'encrypted_data': encrypted_data,
-                            'metadata': {
-                                'username': username.lower(),
-                                'created_at': datetime.now().isoformat(),
-                                'version': '1.0'
-                            }
-                        }, f, indent=2)
+                    atomic_write_json(str(cookie_file), {
+                        'encrypted_data': encrypted_data,
+                        'metadata': {
+                            'username': username.lower(),
+                            'created_at': datetime.now().isoformat(),
+                            'version': '1.0'
+                        }
+                    }, 'cookies')
             except Exception as e:
                 logger.error(f"Error updating last used timestamp for {username}: {e}")
             
             logger.info(f"Cookies loaded for {username}")
+            cookie_store_lookups_total.inc(result='hit')
             return cookie_data
             
         except Exception as e:
             logger.error(f"Error loading cookies for {username}: {e}")
+            cookie_store_lookups_total.inc(result='error')
             return None
     
     def are_cookies_valid(self, username: str) -> bool:
@@ -1260,7 +1260,6 @@
 
 
 import asyncio
-import pandas as pd
 from playwright.async_api import async_playwright, TimeoutError
 import os
 import glob
@@ -1272,15 +1271,19 @@ import pyotp
 import re
 import datetime
 import traceback
-from instagram_accounts import get_account_details
 from proxy_manager import proxy_manager
 from simple_instagram_auth_enhanced import enhanced_simple_auth, HumanLikeTyping
 from instagram_cookie_manager import cookie_manager
 from stealth_browser_manager import StealthBrowserManager, ensure_proxy_assignment
+from resource_policy import install_resource_policy, resource_step
+from tracing import tracer
+from script_logging import is_level_enabled
+from selector_registry import selector_registry
 
 class InstagramDailyPostAutomation:
-    def __init__(self, script_id, log_callback=None, stop_flag_callback=None):
+    def __init__(self, script_id, log_callback=None, stop_flag_callback=None, resource_policy=None):
         self.script_id = script_id
+        self.resource_policy = resource_policy
         self.log_callback = log_callback or self.default_log
         self.stop_flag_callback = stop_flag_callback or (lambda: False)
         self.supported_image_formats = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
@@ -1296,11 +1299,12 @@ class InstagramDailyPostAutomation:
         print(formatted_message, flush=True)
         
     def log(self, message, level="INFO", account_id=None):
-        """Logs a message with an optional account ID."""
-        prefix = f"[{self.script_id}]"
+        """Logs a message with an optional account ID (the sink adds timestamp and job)."""
+        if not is_level_enabled(level):
+            return
         if account_id:
-            prefix = f"[{account_id}]"
-        self.log_callback(f"{prefix} {message}", level)
+            message = f"[{account_id}] {message}"
+        self.log_callback(message, level)
 
     async def _perform_robust_click(self, page, selector, timeout=30000, account_id=None):
         """
@@ -1362,6 +1366,7 @@ class InstagramDailyPostAutomation:
             self.log(f"[{username}] ❌ Error generating TOTP code: {e}", "ERROR")
             return None
 
+    @tracer.traced('2fa')
     async def handle_2fa_verification(self, page, username, totp_secret):
         """Handle Instagram 2FA verification using TOTP."""
         try:
@@ -1376,31 +1381,9 @@ class InstagramDailyPostAutomation:
             await self.human_delay(1000, 2000)
 
             # Look for 2FA input field
-            totp_selectors = [
-                'input[name="verificationCode"]',
-                'input[name="security_code"]',
-                'input[aria-label*="security code"]',
-                'input[placeholder*="security code"]',
-                'input[placeholder*="verification code"]',
-                '[data-testid="2fa-input"]',
-                'input[type="text"][maxlength="6"]',
-                'input[autocomplete="one-time-code"]',
-                'input[aria-label="Security Code"]',
-                'input[aria-describedby="verificationCodeDescription"]',
-                'input[type="tel"][maxlength="8"]',
-                'input[autocomplete="off"][maxlength="8"]',
-                'input[class*="aa4b"][type="tel"]'
-            ]
-            
-            totp_input = None
-            for selector in totp_selectors:
-                try:
-                    totp_input = await page.wait_for_selector(selector, timeout=5000)
-                    if totp_input:
-                        self.log(f"[{username}] 📱 Found 2FA input field with selector: {selector}")
-                        break
-                except:
-                    continue
+            totp_input, selector = await selector_registry.wait_for(page, 'totp_input', timeout=5000)
+            if totp_input:
+                self.log(f"[{username}] 📱 Found 2FA input field with selector: {selector}")
             
             if not totp_input:
                 self.log(f"[{username}] ❌ Could not find 2FA input field.")
@@ -1414,27 +1397,7 @@ class InstagramDailyPostAutomation:
             await self.human_delay(1500, 2500)
             
             # Look for submit button
-            submit_selectors = [
-                'button[type="submit"]',
-                'button:has-text("Confirm")',
-                'div[role="button"]:has-text("Confirm")',
-                'button:has-text("Continue")',
-                '[role="button"]:has-text("Continue")',
-                'button:has-text("Submit")',
-                'div[role="button"]:has-text("Submit")',
-                'button:has-text("Verify")',
-                'button._aswp._aswr._aswu._asw_._asx2',
-                'button[class*="_aswp"][class*="_aswr"][class*="_aswu"][class*="_asw_"][class*="_asx2"]'
-            ]
-            
-            submit_button = None
-            for selector in submit_selectors:
-                try:
-                    submit_button = await page.wait_for_selector(selector, timeout=3000)
-                    if submit_button:
-                        break
-                except:
-                    continue
+            submit_button, _ = await selector_registry.wait_for(page, 'totp_submit', timeout=3000)
             
             if submit_button:
                 await submit_button.click()
@@ -1461,7 +1424,8 @@ class InstagramDailyPostAutomation:
         """Check if the script should stop"""
         return self.stop_flag_callback()
 
-    async def login_instagram_with_cookies_and_2fa(self, page, context, username, password, account_number):
+    @tracer.traced('login', failed_if=lambda result: not result[0])
+    async def login_instagram_with_cookies_and_2fa(self, page, context, username, password, account_number, totp_secret=None):
         """Enhanced login with cookie management and automatic 2FA handling
         
         Returns:
@@ -1476,10 +1440,6 @@ class InstagramDailyPostAutomation:
             def auth_log_callback(message):
                 self.log(f"[Account {account_number}] {message}")
             
-            # Get account details including TOTP secret
-            account_data = get_account_details(username)
-            totp_secret = account_data.get('totp_secret') if account_data else None
-            
             # Get proxy info
             proxy_string = proxy_manager.get_account_proxy(username)
             proxy_info = proxy_manager.parse_proxy(proxy_string) if proxy_string else None
@@ -1520,46 +1480,6 @@ class InstagramDailyPostAutomation:
             self.log(f"[Account {account_number}] ❌ Login error: {e}", "ERROR")
             return False, {'authentication_method': 'unknown', 'errors': [str(e)]}
 
-    def load_accounts_from_file(self, file_path):
-        """Load Instagram credentials from Excel or CSV file."""
-        try:
-            # Determine file type and read accordingly
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
-            
-            if df.empty:
-                self.log("Error: Accounts file is empty.", "ERROR")
-                return []
-            
-            # Check for required columns (case-insensitive)
-            df.columns = df.columns.str.strip().str.title()
-            required_columns = ["Username", "Password"]
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                self.log(f"Error: Missing columns in accounts file: {missing_columns}.", "ERROR")
-                self.log(f"Available columns: {list(df.columns)}", "ERROR")
-                return []
-            
-            # Load accounts
-            accounts = []
-            for i in range(len(df)):
-                username = df.loc[i, "Username"]
-                password = df.loc[i, "Password"]
-                if pd.notna(username) and pd.notna(password):
-                    accounts.append((str(username).strip(), str(password).strip()))
-            
-            self.log(f"Loaded {len(accounts)} account(s) from file.")
-            return accounts
-            
-        except FileNotFoundError:
-            self.log(f"Error: File {file_path} not found.", "ERROR")
-            return []
-        except Exception as e:
-            self.log(f"Error loading accounts: {e}", "ERROR")
-            return []
-
     def set_media_file(self, media_path):
         """Set the media file and determine if it's a video"""
         self.media_file = media_path
@@ -1591,6 +1511,7 @@ class InstagramDailyPostAutomation:
             return
         await asyncio.sleep(random.randint(min_ms, max_ms) / 1000)
 
+    @tracer.traced('login_dialog')
     async def handle_login_info_save_dialog(self, page, account_number, username=None):
         """Handle the 'Save your login info?' dialog by clicking 'Save info' only"""
         try:
@@ -1614,63 +1535,46 @@ class InstagramDailyPostAutomation:
             self.log(f"[Account {account_number}] 🔧 On save login info page - looking for 'Save info' button...")
             self.log(f"[Account {account_number}] 📊 Page title: {await page.title()}")
             
-            # Strategy 1: Try selectors for "Save info" button only
-            simple_selectors = [
-                # Save info button (only option now)
-                'button.aswp._aswr._aswu._asw_._asx2:has-text("Save info")',
-                'button:has-text("Save info")',
-                ':text-is("Save info")',
-                'text="Save info"',
-                'button[type="button"]:has-text("Save info")',
-                'div[role="button"]:has-text("Save info")',
-                '[role="button"]:has-text("Save info")',
-                'div:has-text("Save info")',
-                '*:has-text("Save info")'
-            ]
-            
+            # Strategy 1: Try registry selectors for "Save info" button only
             # Add timeout to prevent infinite loops - max 30 seconds total
             start_time = time.time()
             max_duration = 30  # seconds
             
-            for i, selector in enumerate(simple_selectors):
-                if time.time() - start_time > max_duration:
+            # Race the remaining candidates; a match that doesn't leave the page is dropped and the rest re-raced
+            tried = []
+            while True:
+                time_left = max_duration - (time.time() - start_time)
+                if time_left <= 0:
                     self.log(f"[Account {account_number}] ⏰ Timeout reached after {max_duration} seconds", "WARNING")
                     break
                     
                 try:
-                    self.log(f"[Account {account_number}] 🎯 Trying selector {i+1}/{len(simple_selectors)}: {selector}")
+                    element, selector = await selector_registry.wait_for(
+                        page, 'save_login_info', timeout=int(min(time_left, 5) * 1000), exclude=tried)
+                    if not element:
+                        self.log(f"[Account {account_number}] ⚠️ No element found with any remaining selector")
+                        break
+                    tried.append(selector)
+                    self.log(f"[Account {account_number}] 🎯 Matched selector: {selector}")
                     
-                    # Try to find and click the element
-                    element = await page.wait_for_selector(selector, timeout=5000)
-                    if element:
-                        # Verify element is visible
-                        is_visible = await element.is_visible()
-                        if is_visible:
-                            # Get the actual text of the clicked element
-                            element_text = await element.text_content()
-                            await element.click()
-                            self.log(f"[Account {account_number}] ✅ Clicked '{element_text}' button with selector {i+1}")
-                            
-                            # Wait and verify we moved away from the page
-                            await self.human_delay(3000, 4000)
-                            
-                            new_url = page.url
-                            if "accounts/onetap" not in new_url:
-                                self.log(f"[Account {account_number}] ✅ Successfully saved login info!")
-                                self.log(f"[Account {account_number}] 📊 New URL: {new_url}")
-                                return True
-                            else:
-                                self.log(f"[Account {account_number}] ⚠️ Still on save login page after click, trying next selector...")
-                                continue
-                        else:
-                            self.log(f"[Account {account_number}] ⚠️ Element found but not visible with selector {i+1}")
-                            continue
+                    # Get the actual text of the clicked element
+                    element_text = await element.text_content()
+                    await element.click()
+                    self.log(f"[Account {account_number}] ✅ Clicked '{element_text}' button")
+                    
+                    # Wait and verify we moved away from the page
+                    await self.human_delay(3000, 4000)
+                    
+                    new_url = page.url
+                    if "accounts/onetap" not in new_url:
+                        self.log(f"[Account {account_number}] ✅ Successfully saved login info!")
+                        self.log(f"[Account {account_number}] 📊 New URL: {new_url}")
+                        return True
                     else:
-                        self.log(f"[Account {account_number}] ⚠️ No element found with selector {i+1}")
-                        continue
+                        self.log(f"[Account {account_number}] ⚠️ Still on save login page after click, trying next selector...")
                         
                 except Exception as e:
-                    self.log(f"[Account {account_number}] ⚠️ Selector {i+1} failed: {str(e)[:100]}")
+                    self.log(f"[Account {account_number}] ⚠️ Selector attempt failed: {str(e)[:100]}")
                     continue
             
             # Strategy 2: Use modern Playwright locators with timeout
@@ -1773,7 +1677,7 @@ class InstagramDailyPostAutomation:
                 return True
         return False
 
-    async def instagram_post_script(self, username, password, account_number, caption):
+    async def instagram_post_script(self, username, password, account_number, caption, totp_secret=None):
         """Main Instagram posting function for a single account."""
         self.log(f"[Account {account_number}] 🚀 Starting automation for {username}")
         self.log(f"[Account {account_number}] 📊 Script ID: {self.script_id}")
@@ -1791,6 +1695,7 @@ class InstagramDailyPostAutomation:
             self.log(f"[Account {account_number}] ❌ Media file not found: {self.media_file}", "ERROR")
             return False
 
+        trace_tokens = tracer.start_context(self.script_id, username)
         try:
             # Ensure account has a proxy assigned (strict one-to-one binding)
             if not ensure_proxy_assignment(username):
@@ -1804,8 +1709,10 @@ class InstagramDailyPostAutomation:
             self.log(f"[Account {account_number}] 🚀 Launching stealth browser with full anti-detection...")
             
             # Create stealth browser with comprehensive anti-detection
-            stealth_manager = StealthBrowserManager(username)
-            browser, context = await stealth_manager.create_stealth_browser()
+            with tracer.span('browser_launch'):
+                stealth_manager = StealthBrowserManager(username, job_id=self.script_id, job_type='daily_post')
+                browser, context = await stealth_manager.create_stealth_browser()
+                resource_filter = await install_resource_policy(context, self.resource_policy)
             
             self.log(f"[Account {account_number}] ✅ Stealth browser launched with full profile persistence and fingerprint spoofing")
             
@@ -1820,13 +1727,13 @@ class InstagramDailyPostAutomation:
                 self.log(f"[Account {account_number}] ✅ Page created")
                 
                 # Log in
-                login_success, auth_info = await self.login_instagram_with_cookies_and_2fa(page, context, username, password, account_number)
+                with resource_step(context, 'login'):
+                    login_success, auth_info = await self.login_instagram_with_cookies_and_2fa(page, context, username, password, account_number, totp_secret)
                 
                 if not login_success:
                     self.log(f"[Account {account_number}] ❌ Login failed for {username}", "ERROR")
                     # Try to handle 2FA if it's the reason for failure
                     if auth_info.get('requires_2fa'):
-                        totp_secret = get_account_details(username).get('totp_secret')
                         if totp_secret:
                             self.log(f"[Account {account_number}] 🔄 Retrying login with 2FA handling...")
                             if await self.handle_2fa_verification(page, username, totp_secret):
@@ -1853,455 +1760,380 @@ class InstagramDailyPostAutomation:
                 traceback.print_exc()
                 return False
             finally:
+                if resource_filter.installed:
+                    self.log(f"[Account {account_number}] {resource_filter.summary()}")
                 await self.human_delay(1500, 2500)
                 self.log(f"[Account {account_number}] 🚪 Closing browser...")
-                if browser:
-                    await browser.close()
+                with tracer.span('teardown'):
+                    if browser:
+                        await browser.close()
                 self.log(f"[Account {account_number}] ✅ Browser closed")
                     
         except Exception as e:
             self.log(f"[Account {account_number}] ❌ Unhandled error: {e}", "ERROR")
             traceback.print_exc()
             return False
+        finally:
+            tracer.end_context(trace_tokens)
 
+    @tracer.traced('post')
     async def post_to_instagram(self, page, username, caption=""):
         """Navigate to the posting page and upload the media."""
-        self.log(f"[{username}] 🎨 Starting post process...")
-        try:
-            # Check for stop flag
-            if self.should_stop():
-                self.log(f"[{username}] ⚠️ Stop flag detected before posting - terminating", "WARNING")
-                return False
+        # Uploads and the crop preview need media; fonts and telemetry are still dropped
+        with resource_step(page, 'post'):
+            self.log(f"[{username}] 🎨 Starting post process...")
+            try:
+                # Check for stop flag
+                if self.should_stop():
+                    self.log(f"[{username}] ⚠️ Stop flag detected before posting - terminating", "WARNING")
+                    return False
                 
-            await self.human_delay(2000, 3000)
+                await self.human_delay(2000, 3000)
             
-            # Click the 'Create' button (plus icon)
-            self.log(f"[{username}] ➕ Looking for 'Create' button...")
-            
-            # UPDATED SELECTORS FOR 'Create' button
-            create_button_selectors = [
-                '[aria-label="New post"]',
-                '[aria-label="Create"]',
-                'div[role="button"]:has-text("Create")',
-                'svg[aria-label="New post"]',
-                'svg[aria-label="Create"]',
-                'div[role="button"] > svg[aria-label="New post"]',
-                '[data-testid="creation-tab"]',
-                'div[role="button"][class*="x1i10h51"][class*="x6umtig"][class*="x1b1mb9l"]'
-            ]
-            
-            create_button = None
-            for selector in create_button_selectors:
-                try:
-                    self.log(f"[{username}] 🎯 Trying create button selector: {selector}")
-                    create_button = await page.wait_for_selector(selector, timeout=5000)
-                    if create_button:
-                        await create_button.click()
-                        self.log(f"[{username}] ✅ Clicked 'Create' button with selector: {selector}")
-                        break
-                except Exception as e:
-                    self.log(f"[{username}] ⚠️ Selector failed: {selector} - {str(e)[:100]}")
-                    continue
+                # Click the 'Create' button (plus icon)
+                self.log(f"[{username}] ➕ Looking for 'Create' button...")
             
-            if not create_button:
-                self.log(f"[{username}] ❌ Could not find 'Create' button after all attempts. Aborting post.", "ERROR")
-                return False
+                create_button, selector = await selector_registry.wait_for(page, 'create_button', timeout=5000)
+                if create_button:
+                    await create_button.click()
+                    self.log(f"[{username}] ✅ Clicked 'Create' button with selector: {selector}")
+                else:
+                    self.log(f"[{username}] ❌ Could not find 'Create' button after all attempts. Aborting post.", "ERROR")
+                    return False
                 
-            await self.human_delay(3000, 5000)
-            
-            # Select the "Select from computer" button
-            self.log(f"[{username}] 🖥️ Looking for 'Select from computer' button...")
-            select_from_computer_button_selectors = [
-                'text="Select from computer"',
-                'button:has-text("Select from computer")',
-                'div[role="button"]:has-text("Select from computer")',
-                '[role="button"]:has-text("Select from computer")',
-                'div:has-text("Select from computer")'
-            ]
-            
-            select_button = None
-            for selector in select_from_computer_button_selectors:
-                try:
-                    select_button = await page.wait_for_selector(selector, timeout=5000)
-                    if select_button:
-                        self.log(f"[{username}] ✅ Found 'Select from computer' button with selector: {selector}")
-                        break
-                except:
-                    continue
+                await self.human_delay(3000, 5000)
             
-            if not select_button:
-                self.log(f"[{username}] ❌ Could not find 'Select from computer' button. Aborting post.", "ERROR")
-                return False
+                # Select the "Select from computer" button
+                self.log(f"[{username}] 🖥️ Looking for 'Select from computer' button...")
+                select_button, selector = await selector_registry.wait_for(page, 'select_from_computer', timeout=5000)
+                if select_button:
+                    self.log(f"[{username}] ✅ Found 'Select from computer' button with selector: {selector}")
+                else:
+                    self.log(f"[{username}] ❌ Could not find 'Select from computer' button. Aborting post.", "ERROR")
+                    return False
                 
-            # Get the file chooser for the input element
-            async with page.expect_file_chooser() as fc_info:
-                await select_button.click()
-            file_chooser = await fc_info.value
-            
-            # Upload the media file
-            self.log(f"[{username}] 📤 Uploading media file: {self.media_file}")
-            await file_chooser.set_files(self.media_file)
-            self.log(f"[{username}] ✅ Media file uploaded successfully")
-            
-            # Wait for file to load
-            await self.human_delay(5000, 7000)
-            
-            # -----------------------------------------------------------
-            # REVISED LOGIC FOR CLICKING 'NEXT' BUTTON
-            # -----------------------------------------------------------
-            next_button_selectors = [
-                'button:has-text("Next")',
-                'div[role="button"]:has-text("Next")',
-                'div[aria-label="Next"]',
-                'svg[aria-label="Next"]',
-                '[data-testid="next-button"]',
-                'button[class*="x1q0g3np"][type="button"]',
-                'button[class*="_aswp"][class*="_aswr"]'
-            ]
-            
-            next_clicked = True
-            start_time = time.time()
-            max_duration = 60 # seconds to wait for all 'Next' steps
-            
-            while next_clicked and time.time() - start_time < max_duration:
-                next_clicked = False
-                for i, selector in enumerate(next_button_selectors):
+                # Get the file chooser for the input element
+                async with page.expect_file_chooser() as fc_info:
+                    await select_button.click()
+                file_chooser = await fc_info.value
+            
+                # Upload the media file
+                self.log(f"[{username}] 📤 Uploading media file: {self.media_file}")
+                await file_chooser.set_files(self.media_file)
+                self.log(f"[{username}] ✅ Media file uploaded successfully")
+            
+                # Wait for file to load
+                await self.human_delay(5000, 7000)
+            
+                # -----------------------------------------------------------
+                # REVISED LOGIC FOR CLICKING 'NEXT' BUTTON
+                # -----------------------------------------------------------
+                next_clicked = True
+                start_time = time.time()
+                max_duration = 60 # seconds to wait for all 'Next' steps
+            
+                # Each step races every candidate once; no 'Next' within the timeout means the steps are done
+                step = 0
+                while next_clicked and time.time() - start_time < max_duration:
+                    next_clicked = False
+                    step += 1
+                    self.log(f"[{username}] ➡️ Looking for 'Next' button (step {step})...")
                     try:
-                        self.log(f"[{username}] ➡️ Looking for 'Next' button (attempt {i+1})...")
-                        next_button = await page.wait_for_selector(selector, timeout=5000)
-                        if next_button and await next_button.is_visible():
+                        next_button, selector = await selector_registry.wait_for(page, 'next_button', timeout=5000)
+                        if next_button:
                             await next_button.click()
                             self.log(f"[{username}] 🚀 Clicked 'Next' button with selector: {selector}")
                             next_clicked = True
                             await self.human_delay(2000, 3000)
-                            break # Break the inner loop and check again for another 'Next' button
-                    except TimeoutError:
-                        continue # Selector not found, try the next one
                     except Exception as e:
-                        self.log(f"[{username}] ⚠️ Selector for 'Next' failed: {selector} - {str(e)[:100]}")
+                        self.log(f"[{username}] ⚠️ Clicking 'Next' failed: {str(e)[:100]}")
                         
-            if next_clicked: # If the loop exited because `next_clicked` was still true, it means a button was found and clicked on the last pass. Wait a bit more.
-                await self.human_delay(2000, 3000)
-            
-            self.log(f"[{username}] ✅ All 'Next' buttons have been handled. Proceeding to caption step.")
-            # -----------------------------------------------------------
-            # END OF REVISED LOGIC
-            # -----------------------------------------------------------
-            
-            # Add caption
-            if caption:
-                self.log(f"[{username}] 📝 Adding caption...")
-                caption_input_selectors = [
-                    'textarea[aria-label="Write a caption..."]',
-                    'textarea[placeholder="Write a caption..."]',
-                    '[data-testid="caption-input"]',
-                    'div[role="textbox"]',
-                    'div[contenteditable="true"]',
-                    'div[class*="x1i10h51"][class*="x1ejq31s"][class*="x1d50bp1"]' # Broad class match for caption div
-                ]
-                
-                caption_input = None
-                for selector in caption_input_selectors:
-                    try:
-                        self.log(f"[{username}] 🎯 Trying caption input selector: {selector}")
-                        caption_input = await page.wait_for_selector(selector, timeout=5000)
-                        if caption_input:
-                            await caption_input.click()
-                            self.log(f"[{username}] ✅ Found caption input with selector: {selector}")
-                            break
-                    except:
-                        continue
-                
-                if caption_input:
-                    await self.human_type(page, selector, caption, delay_range=(10, 50))
-                    self.log(f"[{username}] ✅ Caption entered successfully")
+                if next_clicked: # If the loop exited because `next_clicked` was still true, it means a button was found and clicked on the last pass. Wait a bit more.
+                    await self.human_delay(2000, 3000)
+            
+                self.log(f"[{username}] ✅ All 'Next' buttons have been handled. Proceeding to caption step.")
+                # -----------------------------------------------------------
+                # END OF REVISED LOGIC
+                # -----------------------------------------------------------
+            
+                # Add caption
+                if caption:
+                    self.log(f"[{username}] 📝 Adding caption...")
+                    caption_input, selector = await selector_registry.wait_for(page, 'caption_input', timeout=5000)
+                    if caption_input:
+                        await caption_input.click()
+                        self.log(f"[{username}] ✅ Found caption input with selector: {selector}")
+                        await self.human_type(page, selector, caption, delay_range=(10, 50))
+                        self.log(f"[{username}] ✅ Caption entered successfully")
+                    else:
+                        self.log(f"[{username}] ❌ Could not find caption input. Skipping caption.", "ERROR")
                 else:
-                    self.log(f"[{username}] ❌ Could not find caption input. Skipping caption.", "ERROR")
-            else:
-                self.log(f"[{username}] ℹ️ No caption provided. Skipping.")
+                    self.log(f"[{username}] ℹ️ No caption provided. Skipping.")
                 
-            await self.human_delay(2000, 3000)
+                await self.human_delay(2000, 3000)
             
-            # -----------------------------------------------------------
-            # IMPROVED LOGIC FOR CLICKING 'SHARE' AND CONFIRMING SUCCESS
-            # -----------------------------------------------------------
-            try:
-                self.log(f"[{username}] 📤 Attempting to find and click the 'Share' button...")
+                # -----------------------------------------------------------
+                # IMPROVED LOGIC FOR CLICKING 'SHARE' AND CONFIRMING SUCCESS
+                # -----------------------------------------------------------
+                try:
+                    self.log(f"[{username}] 📤 Attempting to find and click the 'Share' button...")
                 
-                # Wait for the page to be fully loaded before looking for Share button
-                await self.human_delay(3000, 5000)
+                    # Wait for the page to be fully loaded before looking for Share button
+                    await self.human_delay(3000, 5000)
                 
-                # More comprehensive Share button selectors based on Instagram's current structure
-                share_button_selectors = [
-                    # Primary selectors - most likely to work
-                    'div[role="button"]:has-text("Share")',
-                    'button:has-text("Share")',
-                    'div[role="button"]:has-text("Publish")',
-                    'button:has-text("Publish")',
+                    # More comprehensive Share button selectors based on Instagram's current structure
+                    share_button_selectors = [
+                        # Primary selectors - most likely to work
+                        'div[role="button"]:has-text("Share")',
+                        'button:has-text("Share")',
+                        'div[role="button"]:has-text("Publish")',
+                        'button:has-text("Publish")',
                     
-                    # Instagram-specific class combinations (updated for current UI)
-                    'div._acan._acao._acas._aj1-._ap30[role="button"]',
-                    'div.x1i10hfl.xjqpnuy.xa49m3k.xqeqjp1.x2hbi6w.x13fuv20.xu3j5b3.x1q0q8m5.x26u7qi.x972fbf.xcfux6l.x1qhh985.xm0m39n.x9f619.x1ypdohk.xdl72j9.xe8uvvx.xdj266r.x11i5rnm.xat24cr.x1mh8g0r.x2lwn1j.xeuugli.x16tdsg8.xggy1nq.x1ja2u2z.x1t137rt.x6s0dn4.x1ejq31n.xd10rxx.x1sy0etr.x17r0tee.x3nfvp2[role="button"]',
-                    'div.x1n2onr6:has-text("Share")',
-                    'div.x1n2onr6:has-text("Publish")',
+                        # Instagram-specific class combinations (updated for current UI)
+                        'div._acan._acao._acas._aj1-._ap30[role="button"]',
+                        'div.x1i10hfl.xjqpnuy.xa49m3k.xqeqjp1.x2hbi6w.x13fuv20.xu3j5b3.x1q0q8m5.x26u7qi.x972fbf.xcfux6l.x1qhh985.xm0m39n.x9f619.x1ypdohk.xdl72j9.xe8uvvx.xdj266r.x11i5rnm.xat24cr.x1mh8g0r.x2lwn1j.xeuugli.x16tdsg8.xggy1nq.x1ja2u2z.x1t137rt.x6s0dn4.x1ejq31n.xd10rxx.x1sy0etr.x17r0tee.x3nfvp2[role="button"]',
+                        'div.x1n2onr6:has-text("Share")',
+                        'div.x1n2onr6:has-text("Publish")',
                     
-                    # Aria-label based selectors
-                    '[aria-label="Share"]',
-                    '[aria-label="Publish"]',
-                    '[aria-label="Share post"]',
-                    '[aria-label="Publish post"]',
+                        # Aria-label based selectors
+                        '[aria-label="Share"]',
+                        '[aria-label="Publish"]',
+                        '[aria-label="Share post"]',
+                        '[aria-label="Publish post"]',
                     
-                    # Data attributes
-                    '[data-testid="share-button"]',
-                    '[data-testid="publish-button"]',
-                    '[data-testid="post-button"]',
+                        # Data attributes
+                        '[data-testid="share-button"]',
+                        '[data-testid="publish-button"]',
+                        '[data-testid="post-button"]',
                     
-                    # Text-based selectors with exact match
-                    'text="Share"',
-                    'text="Publish"',
-                    ':text-is("Share")',
-                    ':text-is("Publish")',
+                        # Text-based selectors with exact match
+                        'text="Share"',
+                        'text="Publish"',
+                        ':text-is("Share")',
+                        ':text-is("Publish")',
                     
-                    # Broader selectors for fallback
-                    'div[role="button"]:visible:has-text("Share")',
-                    'button:visible:has-text("Share")',
-                    'div[role="button"]:visible:has-text("Publish")',
-                    'button:visible:has-text("Publish")',
+                        # Broader selectors for fallback
+                        'div[role="button"]:visible:has-text("Share")',
+                        'button:visible:has-text("Share")',
+                        'div[role="button"]:visible:has-text("Publish")',
+                        'button:visible:has-text("Publish")',
                     
-                    # XPath selectors as last resort
-                    '//div[@role="button" and contains(text(), "Share")]',
-                    '//button[contains(text(), "Share")]',
-                    '//div[@role="button" and contains(text(), "Publish")]',
-                    '//button[contains(text(), "Publish")]',
+                        # XPath selectors as last resort
+                        '//div[@role="button" and contains(text(), "Share")]',
+                        '//button[contains(text(), "Share")]',
+                        '//div[@role="button" and contains(text(), "Publish")]',
+                        '//button[contains(text(), "Publish")]',
                     
-                    # Generic button selectors (very last resort)
-                    'div[role="button"]:last-child',
-                    'button[type="button"]:last-child'
-                ]
+                        # Generic button selectors (very last resort)
+                        'div[role="button"]:last-child',
+                        'button[type="button"]:last-child'
+                    ]
                 
-                # First attempt: Try each selector with a short timeout
-                share_button_found = False
-                for i, selector in enumerate(share_button_selectors):
-                    if self.should_stop():
-                        return False
+                    # First attempt: Try each selector with a short timeout
+                    share_button_found = False
+                    for i, selector in enumerate(share_button_selectors):
+                        if self.should_stop():
+                            return False
                         
-                    try:
-                        self.log(f"[{username}] 🎯 Trying Share button selector {i+1}/{len(share_button_selectors)}: {selector[:50]}...")
+                        try:
+                            self.log(f"[{username}] 🎯 Trying Share button selector {i+1}/{len(share_button_selectors)}: {selector[:50]}...")
                         
-                        # Wait for element to be visible
-                        element = await page.wait_for_selector(selector, state='visible', timeout=8000)
+                            # Wait for element to be visible
+                            element = await page.wait_for_selector(selector, state='visible', timeout=8000)
                         
-                        if element:
-                            # Verify it's actually clickable and visible
-                            is_visible = await element.is_visible()
-                            is_enabled = await element.is_enabled()
+                            if element:
+                                # Verify it's actually clickable and visible
+                                is_visible = await element.is_visible()
+                                is_enabled = await element.is_enabled()
                             
-                            if is_visible and is_enabled:
-                                # Get element text to confirm it's the right button
-                                element_text = await element.text_content()
-                                element_text = element_text.strip() if element_text else ""
+                                if is_visible and is_enabled:
+                                    # Get element text to confirm it's the right button
+                                    element_text = await element.text_content()
+                                    element_text = element_text.strip() if element_text else ""
                                 
-                                # Check if it contains Share/Publish text or if it's the last button in the sequence
-                                if any(keyword in element_text.lower() for keyword in ['share', 'publish']) or i >= len(share_button_selectors) - 2:
-                                    self.log(f"[{username}] ✅ Found Share button with text: '{element_text}' using selector {i+1}")
+                                    # Check if it contains Share/Publish text or if it's the last button in the sequence
+                                    if any(keyword in element_text.lower() for keyword in ['share', 'publish']) or i >= len(share_button_selectors) - 2:
+                                        self.log(f"[{username}] ✅ Found Share button with text: '{element_text}' using selector {i+1}")
                                     
-                                    # Scroll element into view if needed
-                                    await element.scroll_into_view_if_needed()
-                                    await self.human_delay(500, 1000)
+                                        # Scroll element into view if needed
+                                        await element.scroll_into_view_if_needed()
+                                        await self.human_delay(500, 1000)
                                     
-                                    # Click the button
-                                    await element.click()
-                                    self.log(f"[{username}] 🚀 Successfully clicked Share button!")
-                                    share_button_found = True
-                                    break
+                                        # Click the button
+                                        await element.click()
+                                        self.log(f"[{username}] 🚀 Successfully clicked Share button!")
+                                        share_button_found = True
+                                        break
+                                    else:
+                                        self.log(f"[{username}] ⚠️ Button found but text doesn't match: '{element_text}'")
+                                        continue
                                 else:
-                                    self.log(f"[{username}] ⚠️ Button found but text doesn't match: '{element_text}'")
+                                    self.log(f"[{username}] ⚠️ Element found but not visible/enabled")
                                     continue
-                            else:
-                                self.log(f"[{username}] ⚠️ Element found but not visible/enabled")
-                                continue
                         
-                    except TimeoutError:
-                        self.log(f"[{username}] ⚠️ Share button selector {i+1} timed out")
-                        continue
-                    except Exception as e:
-                        self.log(f"[{username}] ⚠️ Share button selector {i+1} failed: {str(e)[:100]}")
-                        continue
+                        except TimeoutError:
+                            self.log(f"[{username}] ⚠️ Share button selector {i+1} timed out")
+                            continue
+                        except Exception as e:
+                            self.log(f"[{username}] ⚠️ Share button selector {i+1} failed: {str(e)[:100]}")
+                            continue
                 
-                # Second attempt: Use Playwright's modern locators if first attempt failed
-                if not share_button_found:
-                    self.log(f"[{username}] 🔄 Trying modern Playwright locators for Share button...")
+                    # Second attempt: Use Playwright's modern locators if first attempt failed
+                    if not share_button_found:
+                        self.log(f"[{username}] 🔄 Trying modern Playwright locators for Share button...")
                     
-                    try:
-                        # Try get_by_text with exact match
-                        share_locator = page.get_by_text("Share", exact=True)
-                        if await share_locator.count() > 0:
-                            await share_locator.click(timeout=10000)
-                            self.log(f"[{username}] ✅ Clicked Share button with get_by_text locator")
-                            share_button_found = True
-                        else:
-                            # Try with "Publish" text
-                            publish_locator = page.get_by_text("Publish", exact=True)
-                            if await publish_locator.count() > 0:
-                                await publish_locator.click(timeout=10000)
-                                self.log(f"[{username}] ✅ Clicked Publish button with get_by_text locator")
+                        try:
+                            # Try get_by_text with exact match
+                            share_locator = page.get_by_text("Share", exact=True)
+                            if await share_locator.count() > 0:
+                                await share_locator.click(timeout=10000)
+                                self.log(f"[{username}] ✅ Clicked Share button with get_by_text locator")
                                 share_button_found = True
-                    except Exception as e:
-                        self.log(f"[{username}] ⚠️ Modern locators failed: {str(e)[:100]}")
+                            else:
+                                # Try with "Publish" text
+                                publish_locator = page.get_by_text("Publish", exact=True)
+                                if await publish_locator.count() > 0:
+                                    await publish_locator.click(timeout=10000)
+                                    self.log(f"[{username}] ✅ Clicked Publish button with get_by_text locator")
+                                    share_button_found = True
+                        except Exception as e:
+                            self.log(f"[{username}] ⚠️ Modern locators failed: {str(e)[:100]}")
                 
-                # Third attempt: Use get_by_role if still not found
-                if not share_button_found:
-                    self.log(f"[{username}] 🔄 Trying get_by_role locator for Share button...")
+                    # Third attempt: Use get_by_role if still not found
+                    if not share_button_found:
+                        self.log(f"[{username}] 🔄 Trying get_by_role locator for Share button...")
                     
-                    try:
-                        # Try get_by_role for button with Share text
-                        share_role = page.get_by_role("button", name=re.compile("share|publish", re.IGNORECASE))
-                        if await share_role.count() > 0:
-                            await share_role.click(timeout=10000)
-                            self.log(f"[{username}] ✅ Clicked Share button with get_by_role locator")
-                            share_button_found = True
-                    except Exception as e:
-                        self.log(f"[{username}] ⚠️ get_by_role locator failed: {str(e)[:100]}")
+                        try:
+                            # Try get_by_role for button with Share text
+                            share_role = page.get_by_role("button", name=re.compile("share|publish", re.IGNORECASE))
+                            if await share_role.count() > 0:
+                                await share_role.click(timeout=10000)
+                                self.log(f"[{username}] ✅ Clicked Share button with get_by_role locator")
+                                share_button_found = True
+                        except Exception as e:
+                            self.log(f"[{username}] ⚠️ get_by_role locator failed: {str(e)[:100]}")
                 
-                # Fourth attempt: Look for any button in the footer/action area
-                if not share_button_found:
-                    self.log(f"[{username}] 🔄 Looking for any action button in footer area...")
+                    # Fourth attempt: Look for any button in the footer/action area
+                    if not share_button_found:
+                        self.log(f"[{username}] 🔄 Looking for any action button in footer area...")
                     
-                    try:
-                        # Look for buttons in common footer/action areas
-                        footer_button_selectors = [
-                            'div[role="dialog"] div:last-child button',
-                            'div[role="dialog"] div:last-child div[role="button"]',
-                            'form button[type="button"]:last-child',
-                            'div[data-testid*="footer"] button',
-                            'div[data-testid*="action"] button'
-                        ]
+                        try:
+                            # Look for buttons in common footer/action areas
+                            footer_button_selectors = [
+                                'div[role="dialog"] div:last-child button',
+                                'div[role="dialog"] div:last-child div[role="button"]',
+                                'form button[type="button"]:last-child',
+                                'div[data-testid*="footer"] button',
+                                'div[data-testid*="action"] button'
+                            ]
                         
-                        for selector in footer_button_selectors:
-                            try:
-                                buttons = await page.query_selector_all(selector)
-                                if buttons:
-                                    # Click the last button (usually the primary action)
-                                    last_button = buttons[-1]
-                                    if await last_button.is_visible() and await last_button.is_enabled():
-                                        button_text = await last_button.text_content()
-                                        await last_button.click()
-                                        self.log(f"[{username}] ✅ Clicked footer button with text: '{button_text}'")
-                                        share_button_found = True
-                                        break
-                            except:
-                                continue
+                            for selector in footer_button_selectors:
+                                try:
+                                    buttons = await page.query_selector_all(selector)
+                                    if buttons:
+                                        # Click the last button (usually the primary action)
+                                        last_button = buttons[-1]
+                                        if await last_button.is_visible() and await last_button.is_enabled():
+                                            button_text = await last_button.text_content()
+                                            await last_button.click()
+                                            self.log(f"[{username}] ✅ Clicked footer button with text: '{button_text}'")
+                                            share_button_found = True
+                                            break
+                                except:
+                                    continue
                                 
-                    except Exception as e:
-                        self.log(f"[{username}] ⚠️ Footer button search failed: {str(e)[:100]}")
+                        except Exception as e:
+                            self.log(f"[{username}] ⚠️ Footer button search failed: {str(e)[:100]}")
                 
-                if not share_button_found:
-                    self.log(f"[{username}] ❌ Could not find Share button after all attempts. Aborting post.", "ERROR")
-                    return False
+                    if not share_button_found:
+                        self.log(f"[{username}] ❌ Could not find Share button after all attempts. Aborting post.", "ERROR")
+                        return False
 
-                # Wait for upload to complete
-                self.log(f"[{username}] ⏳ Waiting for post to upload...")
-                await self.human_delay(5000, 8000)
-
-                # Check for success with improved detection
-                success_message_selectors = [
-                    'text="Your post has been shared."',
-                    'text="Your post was shared."',
-                    'text="Post shared"',
-                    'text="Post published"',
-                    'text="Your post is now live"',
-                    'text="Posted"',
-                    'div:has-text("shared")',
-                    'div:has-text("published")',
-                    'div:has-text("posted")'
-                ]
+                    # Wait for upload to complete
+                    self.log(f"[{username}] ⏳ Waiting for post to upload...")
+                    await self.human_delay(5000, 8000)
+
+                    # Check for success with improved detection
+                    success_message_selectors = [
+                        'text="Your post has been shared."',
+                        'text="Your post was shared."',
+                        'text="Post shared"',
+                        'text="Post published"',
+                        'text="Your post is now live"',
+                        'text="Posted"',
+                        'div:has-text("shared")',
+                        'div:has-text("published")',
+                        'div:has-text("posted")'
+                    ]
                 
-                post_successful = False
-                for selector in success_message_selectors:
-                    try:
-                        await page.wait_for_selector(selector, state='attached', timeout=30000)
-                        self.log(f"[{username}] 🎉 Post uploaded successfully! Success message found.")
-                        post_successful = True
-                        break
-                    except TimeoutError:
-                        continue
+                    post_successful = False
+                    for selector in success_message_selectors:
+                        try:
+                            await page.wait_for_selector(selector, state='attached', timeout=30000)
+                            self.log(f"[{username}] 🎉 Post uploaded successfully! Success message found.")
+                            post_successful = True
+                            break
+                        except TimeoutError:
+                            continue
                 
-                # Alternative success check: URL change or modal disappearance
-                if not post_successful:
-                    self.log(f"[{username}] 🔄 Checking alternative success indicators...")
+                    # Alternative success check: URL change or modal disappearance
+                    if not post_successful:
+                        self.log(f"[{username}] 🔄 Checking alternative success indicators...")
                     
-                    try:
-                        # Check if we're redirected to home or profile
-                        current_url = page.url
-                        if any(indicator in current_url for indicator in ['/instagram.com/', '/instagram.com/p/', f'/instagram.com/{username}/']):
-                            self.log(f"[{username}] ✅ URL changed to: {current_url} - Post likely successful")
-                            post_successful = True
-                        else:
-                            # Check if create post modal is gone
-                            modal_selectors = [
-                                '[aria-label="Create new post"]',
-                                '[role="dialog"]',
-                                'div[role="dialog"]:has-text("Create")'
-                            ]
-                            
-                            modal_gone = True
-                            for modal_selector in modal_selectors:
-                                try:
-                                    modal = await page.query_selector(modal_selector)
-                                    if modal and await modal.is_visible():
-                                        modal_gone = False
-                                        break
-                                except:
-                                    continue
-                            
-                            if modal_gone:
-                                self.log(f"[{username}] ✅ Create post modal disappeared - Post likely successful")
+                        try:
+                            # Check if we're redirected to home or profile
+                            current_url = page.url
+                            if any(indicator in current_url for indicator in ['/instagram.com/', '/instagram.com/p/', f'/instagram.com/{username}/']):
+                                self.log(f"[{username}] ✅ URL changed to: {current_url} - Post likely successful")
                                 post_successful = True
                             else:
-                                self.log(f"[{username}] ❌ Post creation modal still visible - Post may have failed")
+                                # Check if create post modal is gone
+                                modal_selectors = [
+                                    '[aria-label="Create new post"]',
+                                    '[role="dialog"]',
+                                    'div[role="dialog"]:has-text("Create")'
+                                ]
+                            
+                                modal_gone = True
+                                for modal_selector in modal_selectors:
+                                    try:
+                                        modal = await page.query_selector(modal_selector)
+                                        if modal and await modal.is_visible():
+                                            modal_gone = False
+                                            break
+                                    except:
+                                        continue
+                            
+                                if modal_gone:
+                                    self.log(f"[{username}] ✅ Create post modal disappeared - Post likely successful")
+                                    post_successful = True
+                                else:
+                                    self.log(f"[{username}] ❌ Post creation modal still visible - Post may have failed")
                     
-                    except Exception as e:
-                        self.log(f"[{username}] ⚠️ Alternative success check failed: {e}")
+                        except Exception as e:
+                            self.log(f"[{username}] ⚠️ Alternative success check failed: {e}")
                 
-                return post_successful
+                    return post_successful
                 
+                except Exception as e:
+                    self.log(f"[{username}] ❌ An error occurred during the final share step: {e}", "ERROR")
+                    traceback.print_exc()
+                    return False
+                # -----------------------------------------------------------
+                # END OF IMPROVED LOGIC
+                # -----------------------------------------------------------
+            
             except Exception as e:
-                self.log(f"[{username}] ❌ An error occurred during the final share step: {e}", "ERROR")
+                self.log(f"[{username}] ❌ An error occurred during the posting process: {e}", "ERROR")
                 traceback.print_exc()
                 return False
-            # -----------------------------------------------------------
-            # END OF IMPROVED LOGIC
-            # -----------------------------------------------------------
-            
-        except Exception as e:
-            self.log(f"[{username}] ❌ An error occurred during the posting process: {e}", "ERROR")
-            traceback.print_exc()
-            return False
 
-    async def run_individual_post(self, account_details, media_file, caption, script_id, log_callback, stop_callback, lock):
-        """Run the posting script for a single account within a concurrent setup."""
-        username = account_details.get("username")
-        password = account_details.get("password")
-        
-        # Instantiate a new automation object for each account
-        automation = InstagramDailyPostAutomation(script_id, log_callback, stop_callback)
-        automation.set_media_file(media_file)
-        
-        async with lock:
-            if automation.should_stop():
-                automation.log(f"[{username}] ⚠️ Stop flag detected before starting account process. Skipping.")
-                return False
-        
-        try:
-            success = await automation.instagram_post_script(username, password, account_details.get("account_number", "N/A"), caption)
-            return success
-        except Exception as e:
-            automation.log(f"[{username}] ❌ An error occurred during run_individual_post: {e}", "ERROR")
-            traceback.print_exc()
-            return False
+    async def run_automation(self, accounts, media_file, concurrent_accounts=1, caption="", auto_generate_caption=True,
+                             progress_callback=None):
+        """Main function to run the automation for all accounts (AccountRecord list) with individual browser instances.
 
-    async def run_automation(self, accounts_file, media_file, concurrent_accounts=1, caption="", auto_generate_caption=True):
-        """Main function to run the automation for all accounts with individual browser instances."""
+        progress_callback(username, status) is told each account's outcome unless the run is being stopped.
+        """
         self.log("🏁 Starting Instagram Daily Post Automation...")
 
         if self.should_stop():
@@ -2311,10 +2143,8 @@ class InstagramDailyPostAutomation:
         # Set the media file for the entire automation run
         self.set_media_file(media_file)
 
-        # Load accounts from file
-        accounts = self.load_accounts_from_file(accounts_file)
         if not accounts:
-            self.log("❌ No accounts loaded. Automation stopped.", "ERROR")
+            self.log("❌ No accounts provided. Automation stopped.", "ERROR")
             return False
             
         self.log(f"⚙️ Running automation for {len(accounts)} accounts sequentially (1 browser per account)")
@@ -2323,35 +2153,35 @@ class InstagramDailyPostAutomation:
         successful_count = 0
         failed_count = 0
         
-        for i, (username, password) in enumerate(accounts):
+        for i, account in enumerate(accounts):
             if self.should_stop():
                 self.log("⚠️ Stop flag detected. Stopping automation.", "WARNING")
                 break
                 
-            account_details = {
-                "username": username,
-                "password": password,
-                "account_number": i + 1,
-                "totp_secret": get_account_details(username).get('totp_secret') if get_account_details(username) else None
-            }
+            username = account.username
             
             self.log(f"[Account {i+1}/{len(accounts)}] 🚀 Processing {username}...")
             
             try:
                 # Create a new automation instance for each account to ensure clean state
-                account_automation = InstagramDailyPostAutomation(self.script_id, self.log_callback, self.stop_flag_callback)
+                account_automation = InstagramDailyPostAutomation(self.script_id, self.log_callback, self.stop_flag_callback,
+                                                                  resource_policy=self.resource_policy)
                 account_automation.set_media_file(media_file)
                 
                 success = await account_automation.instagram_post_script(
-                    username, password, account_details["account_number"], caption
+                    username, account.password, i + 1, caption, account.totp_secret or None
                 )
                 
                 if success:
                     successful_count += 1
                     self.log(f"[Account {i+1}] ✅ Successfully completed for {username}")
+                    if progress_callback:
+                        progress_callback(username, 'completed')
                 else:
                     failed_count += 1
                     self.log(f"[Account {i+1}] ❌ Failed for {username}")
+                    if progress_callback and not self.should_stop():
+                        progress_callback(username, 'failed')
                     
             except Exception as e:
                 failed_count += 1
@@ -2440,19 +2270,21 @@ class InstagramDailyPostAutomation:
             return False
 
 # Async function to run the automation (to be called from Flask)
-async def run_daily_post_automation(script_id, accounts_file, media_file, concurrent_accounts=5, 
+async def run_daily_post_automation(script_id, accounts, media_file, concurrent_accounts=5, 
                                    caption="", auto_generate_caption=True,
-                                   log_callback=None, stop_callback=None):
+                                   log_callback=None, stop_callback=None, resource_policy=None,
+                                   progress_callback=None):
     """Main function to run the automation"""
-    automation = InstagramDailyPostAutomation(script_id, log_callback, stop_callback)
+    automation = InstagramDailyPostAutomation(script_id, log_callback, stop_callback, resource_policy)
     
     try:
         success = await automation.run_automation(
-            accounts_file=accounts_file,
+            accounts=accounts,
             media_file=media_file,
             concurrent_accounts=concurrent_accounts,
             caption=caption,
-            auto_generate_caption=auto_generate_caption
+            auto_generate_caption=auto_generate_caption,
+            progress_callback=progress_callback
         )
         return success
     except Exception as e:
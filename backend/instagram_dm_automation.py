@@ -1,9 +1,7 @@
 import os
 import sys
-import csv
 import json
 import random
-import threading
 import asyncio
 import logging
 import pandas as pd
@@ -17,13 +15,19 @@ from proxy_manager import proxy_manager
 from simple_instagram_auth_enhanced import enhanced_simple_auth, HumanLikeTyping
 from instagram_cookie_manager import cookie_manager
 from stealth_browser_manager import StealthBrowserManager, ensure_proxy_assignment
+from resource_policy import install_resource_policy, get_resource_filter, resource_step
+from tracing import tracer
+from script_logging import is_level_enabled
+from dm_journal import dm_journal
+from recipient_ledger import recipient_ledger
+from selector_registry import selector_registry
+from inbox_extractor import extract_inbox_rows, read_thread_latest, THREAD_MESSAGE_SELECTORS
 
 # Configuration constants
 INSTAGRAM_URL = "https://www.instagram.com/"
 MAX_PARALLEL_ACCOUNTS = 10
 
 # Global locks and variables
-csv_lock = threading.Lock()
 used_proxies = set()
 
 class SpintaxParser:
@@ -367,13 +371,15 @@ class MessageTemplateEngine:
         return enhanced_message
 
 class DMAutomationEngine:
-    def __init__(self, log_callback=None, stop_callback=None, enable_ai=False):
+    def __init__(self, log_callback=None, stop_callback=None, enable_ai=False, resource_policy=None, script_id=None):
+        self.script_id = script_id
         self.log_callback = log_callback or print
         self.stop_callback = stop_callback or (lambda: False)
+        self.resource_policy = resource_policy
         self.enable_ai = False  # Always disabled since OpenAI is removed
         self.client = None
-        self.sent_dms = []
-        self.positive_responses = []
+        # Sends and responses go straight to the journal so memory stays flat and crashes lose nothing
+        self.journal = dm_journal
         self.typing_behavior = HumanLikeTyping()  # Initialize human-like typing
         
         # Initialize enhanced message template engine
@@ -381,10 +387,16 @@ class DMAutomationEngine:
         self.log("🚀 Enhanced DM Template Engine initialized with spintax and dynamic placeholders", "INFO")
         
     def log(self, message, level="INFO"):
-        """Log message with timestamp"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] [{level}] {message}"
-        self.log_callback(formatted_message, level)
+        """Log message"""
+        if not is_level_enabled(level):
+            return
+        self.log_callback(message, level)
+
+    def debug(self, message, *args):
+        """Debug log; %-style args are only formatted if DEBUG is enabled"""
+        if not is_level_enabled("DEBUG"):
+            return
+        self.log_callback(message % args if args else message, "DEBUG")
 
     async def update_visual_status(self, page, status_text, account_number, step=None):
         """Visual status updates disabled for VPS deployment"""
@@ -398,6 +410,7 @@ class DMAutomationEngine:
         """Parse proxy string into components"""
         return proxy_manager.parse_proxy(proxy_string)
     
+    @tracer.traced('browser_launch')
     async def setup_browser(self, account_username=None, account_number=1):
         """Set up stealth browser with comprehensive anti-detection for account"""
         try:
@@ -409,7 +422,7 @@ class DMAutomationEngine:
             if account_username:
                 self.log(f"🚀 Setting up stealth browser for {account_username}")
                 # Create stealth browser with comprehensive anti-detection
-                stealth_manager = StealthBrowserManager(account_username)
+                stealth_manager = StealthBrowserManager(account_username, job_id=self.script_id, job_type='dm_automation')
                 browser, context = await stealth_manager.create_stealth_browser()
                 
                 self.log(f"✅ Stealth browser created with full profile persistence and fingerprint spoofing")
@@ -427,64 +440,15 @@ class DMAutomationEngine:
             context.set_default_timeout(120000)  # 2 minutes
             context.set_default_navigation_timeout(120000)
             
+            # Block resources the DM steps don't need to save proxy bandwidth
+            await install_resource_policy(context, self.resource_policy)
+            
             return playwright if not account_username else None, browser, context
         
         except Exception as e:
             self.log(f"Browser setup failed: {e}", "ERROR")
             raise
     
-    def load_accounts(self, accounts_file):
-        """Load bot accounts from file"""
-        try:
-            if accounts_file.endswith('.csv'):
-                accounts_df = pd.read_csv(accounts_file)
-            else:
-                accounts_df = pd.read_excel(accounts_file)
-            
-            # Standardize column names
-            accounts_df.columns = accounts_df.columns.str.strip().str.title()
-            
-            if 'Username' not in accounts_df.columns or 'Password' not in accounts_df.columns:
-                raise ValueError("Accounts file must contain 'Username' and 'Password' columns")
-            
-            accounts = []
-            for _, row in accounts_df.iterrows():
-                if pd.notna(row['Username']) and pd.notna(row['Password']):
-                    username = str(row['Username']).strip()
-                    password = str(row['Password']).strip()
-                    
-                    # Get full account details including TOTP secret from database
-                    from instagram_accounts import get_account_details
-                    account_details = get_account_details(username)
-                    
-                    if account_details:
-                        # Use account details from database which includes TOTP secret
-                        accounts.append({
-                            'username': username,
-                            'password': password,
-                            'totp_secret': account_details.get('totp_secret', ''),
-                            'email': account_details.get('email', ''),
-                            'phone': account_details.get('phone', '')
-                        })
-                        self.log(f"✅ Account {username} loaded with full details from database")
-                    else:
-                        # Fallback to CSV data only
-                        accounts.append({
-                            'username': username,
-                            'password': password,
-                            'totp_secret': '',
-                            'email': '',
-                            'phone': ''
-                        })
-                        self.log(f"⚠️ Account {username} loaded from CSV only (no database entry found)")
-            
-            self.log(f"Loaded {len(accounts)} bot accounts")
-            return accounts
-            
-        except Exception as e:
-            self.log(f"Error loading accounts: {e}", "ERROR")
-            raise
-    
     def load_target_users(self, target_file=None):
         """Load target users from file - no defaults allowed"""
         if not target_file:
@@ -556,6 +520,14 @@ class DMAutomationEngine:
                 else:
                     self.log(f"⚠️ Skipping row with empty username", "WARNING")
             
+            # Drop repeats within the file, suppressed users and anyone messaged by an earlier run
+            filtered = recipient_ledger.filter_targets(valid_users)
+            valid_users = filtered['users']
+            ledger_stats = filtered['stats']
+            if ledger_stats['duplicates'] or ledger_stats['suppressed'] or ledger_stats['already_contacted']:
+                self.log(f"🧹 Removed {ledger_stats['duplicates']} duplicates, {ledger_stats['suppressed']} suppressed "
+                         f"and {ledger_stats['already_contacted']} previously messaged targets")
+            
             self.log(f"✅ Loaded {len(valid_users)} valid target users (filtered from {total_rows} rows)")
             
             if len(valid_users) == 0:
@@ -606,13 +578,13 @@ Make it feel personal and not like spam."""
             first_name = user_data.get('first_name', user_data.get('username', 'there'))
             username = user_data.get('username', 'user')
             
-            self.log(f"🔄 Generating message for {first_name} ({username}) in {city}", "DEBUG")
+            self.debug("🔄 Generating message for %s (%s) in %s", first_name, username, city)
             
             # Use enhanced template engine with spintax and dynamic placeholders
-            self.log(f"🎨 Using enhanced template engine for {first_name}", "DEBUG")
+            self.debug("🎨 Using enhanced template engine for %s", first_name)
             enhanced_message = self.template_engine.generate_enhanced_message(user_data)
             
-            self.log(f"✅ Enhanced template message for {first_name}: {enhanced_message[:50]}...", "DEBUG")
+            self.debug("✅ Enhanced template message for %s: %s...", first_name, enhanced_message[:50])
             return enhanced_message
             
         except Exception as e:
@@ -656,84 +628,36 @@ Make it feel personal and not like spam."""
                 self.log(f"[{username}] Not on save login info page, current URL: {current_url}")
                 return False
             
-            # Updated selectors based on latest Instagram DOM structure (August 2025)
-            not_now_selectors = [
-                # Latest Instagram "Not now" button selectors with exact class chain
-                'div.x1i10hfl.xjqpnuy.xc5r6h4.xqeqjp1.x1phubyo.xdl72j9.x2lah0s.xe8uvvx.xdj266r.x14z9mp.xat24cr.x1lziwak.x2lwn1j.xeuugli.x1hl2dhg.xggy1nq.x1ja2u2z.x1t137rt.x1q0g3np.x1a2a7pz.x6s0dn4.xjyslct.x1ejq31n.x18oe1m7.x1sy0etr.xstzfhl.x9f619.x1ypdohk.x1f6kntn.xl56j7k.x17ydfre.x2b8uid.xlyipyv.x87ps6o.x14atkfc.x5c86q.x18br7mf.x1i0vuye.xl0gqc1.xr5sc7.xlal1re.x14jxsvd.xt0b8zv.xjbqb8w.xr9e8f9.x1e4oeot.x1ui04y5.x6en5u8.x972fbf.x10w94by.x1qhh985.x14e42zd.xt0psk2.xt7dq6l.xexx8yu.xyri2b.x18d9i69.x1c1uobl.x1n2onr6.x1n5bzlp[role="button"]:has-text("Not now")',
-                
-                # Partial class match selectors
-                'div[class*="x1i10hfl"][class*="xjqpnuy"][class*="xc5r6h4"][role="button"]:has-text("Not now")',
-                'div[class*="x1i10hfl"][class*="xjqpnuy"][role="button"]:has-text("Not now")',
-                'div[class*="x1i10hfl"][role="button"]:has-text("Not now")',
-                
-                # Previous working selectors
-                'button:has-text("Not now")',
-                'button:has-text("Not Now")', 
-                'div[role="button"]:has-text("Not now")',
-                'div[role="button"]:has-text("Not Now")',
-                
-                # XPath selectors with latest class targeting
-                '//div[contains(@class, "x1i10hfl") and contains(@class, "xjqpnuy") and contains(@class, "xc5r6h4") and @role="button" and contains(text(), "Not now")]',
-                '//div[contains(@class, "x1i10hfl") and contains(@class, "xjqpnuy") and @role="button" and contains(text(), "Not now")]',
-                '//div[contains(@class, "x1i10hfl") and @role="button" and contains(text(), "Not now")]',
-                
-                # Generic XPath selectors
-                '//button[contains(text(), "Not now")]',
-                '//button[contains(text(), "Not Now")]',
-                '//div[@role="button" and contains(text(), "Not now")]',
-                '//div[@role="button" and contains(text(), "Not Now")]',
-                
-                # Generic role-based selectors
-                '[role="button"]:has-text("Not now")',
-                '[role="button"]:has-text("Not Now")',
-                
-                # Instagram button classes (legacy)
-                'button._acan._acap._acas._aj1-',
-                'div[role="button"]._acan._acap._acas._aj1-',
-                
-                # Fallback selectors
-                '*:has-text("Not now"):visible',
-                '*:has-text("Not Now"):visible'
-            ]
-            
-            for i, selector in enumerate(not_now_selectors):
+            # Race the remaining candidates; a match that doesn't dismiss the dialog is dropped and the rest re-raced
+            tried = []
+            while True:
                 try:
-                    self.log(f"[{username}] Trying selector {i+1}: {selector[:100]}{'...' if len(selector) > 100 else ''}")
-                    
-                    if selector.startswith('//'):
-                        # XPath selector
-                        element = await page.wait_for_selector(f'xpath={selector}', timeout=3000)
-                    else:
-                        # CSS selector
-                        element = await page.wait_for_selector(selector, timeout=3000)
+                    element, selector = await selector_registry.wait_for(page, 'save_login_not_now', timeout=3000,
+                                                                         exclude=tried)
+                    if not element:
+                        self.log(f"[{username}] No remaining 'Not now' selector matched")
+                        break
+                    tried.append(selector)
                     
-                    if element:
-                        # Check if element is visible and clickable
-                        is_visible = await element.is_visible()
-                        if is_visible:
-                            # Verify the element actually contains "Not now" text
-                            element_text = await element.text_content()
-                            if element_text and ("Not now" in element_text or "Not Now" in element_text):
-                                await element.click()
-                                self.log(f"[{username}] ✅ Clicked 'Not now' button using selector {i+1}")
-                                await asyncio.sleep(random.uniform(2, 3))
-                                
-                                # Verify we've moved away from the save login page
-                                await asyncio.sleep(1)
-                                new_url = page.url
-                                if "accounts/onetap" not in new_url:
-                                    self.log(f"[{username}] ✅ Successfully moved away from save login page")
-                                    return True
-                                else:
-                                    self.log(f"[{username}] Still on save login page after click, trying next selector...")
-                                    continue
-                            else:
-                                self.log(f"[{username}] Element found but text doesn't match: '{element_text}'")
-                                continue
+                    # Verify the element actually contains "Not now" text
+                    element_text = await element.text_content()
+                    if element_text and ("Not now" in element_text or "Not Now" in element_text):
+                        await element.click()
+                        self.log(f"[{username}] ✅ Clicked 'Not now' button using selector: {selector}")
+                        await asyncio.sleep(random.uniform(2, 3))
+                        
+                        # Verify we've moved away from the save login page
+                        await asyncio.sleep(1)
+                        new_url = page.url
+                        if "accounts/onetap" not in new_url:
+                            self.log(f"[{username}] ✅ Successfully moved away from save login page")
+                            return True
                         else:
-                            self.log(f"[{username}] Element found but not visible with selector {i+1}")
+                            self.log(f"[{username}] Still on save login page after click, trying next selector...")
+                    else:
+                        self.log(f"[{username}] Element found but text doesn't match: '{element_text}'")
                 except Exception as e:
-                    self.log(f"[{username}] Selector {i+1} failed: {e}")
+                    self.log(f"[{username}] 'Not now' attempt failed: {e}")
                     continue
             
             # Final fallback - try to click anywhere that says "Not now"
@@ -803,6 +727,7 @@ Make it feel personal and not like spam."""
                 
         return False
 
+    @tracer.traced('safe_goto')
     async def safe_goto(self, page, url, retries=3):
         """Safely navigate to URL with retries"""
         for attempt in range(retries):
@@ -1215,6 +1140,7 @@ Make it feel personal and not like spam."""
             self.log(f"[{username}] TOTP generation failed: {e}", "ERROR")
             return None
     
+    @tracer.traced('2fa')
     async def handle_2fa_verification(self, page, username, totp_secret, account_number=1, retry_attempt=0):
         """Handle Instagram 2FA verification automatically with improved timing."""
         try:
@@ -1233,39 +1159,12 @@ Make it feel personal and not like spam."""
             # Human-like delay before interacting with the page
             await asyncio.sleep(random.uniform(3, 5))
 
-            # Enhanced verification selectors with more options
-            verification_selectors = [
-                'input[name="verificationCode"]',
-                'input[aria-label="Security Code"]',
-                'input[aria-describedby="verificationCodeDescription"]',
-                'input[type="tel"][maxlength="8"]',
-                'input[autocomplete="off"][maxlength="8"]',
-                'input[class*="aa4b"][type="tel"]',
-                'input[placeholder*="code"]',
-                'input[placeholder*="Code"]',
-                'input[data-testid="2fa-input"]',
-                'input[type="text"][maxlength="6"]',
-                'input[type="text"][maxlength="8"]',
-                'input[class*="verification"]',
-                'input[id*="verificationCode"]'
-            ]
-            
-            verification_input = None
-            # Try each selector with extended timeout for retry attempts
+            # All selectors share one deadline, extended for retry attempts
             timeout = 20000 if retry_attempt > 0 else 15000
             
-            for i, selector in enumerate(verification_selectors):
-                try:
-                    self.log(f"[{username}] Trying verification selector {i+1}: {selector}")
-                    verification_input = await page.wait_for_selector(selector, timeout=timeout)
-                    if verification_input and await verification_input.is_visible():
-                        self.log(f"[{username}] Found verification input field with selector: {selector}")
-                        break
-                    else:
-                        verification_input = None
-                except Exception as e:
-                    self.log(f"[{username}] Selector {i+1} failed: {str(e)[:100]}")
-                    continue
+            verification_input, selector = await selector_registry.wait_for(page, 'totp_input', timeout=timeout)
+            if verification_input:
+                self.log(f"[{username}] Found verification input field with selector: {selector}")
             
             if not verification_input:
                 # Final attempt - check if we're still on a 2FA page
@@ -1305,38 +1204,23 @@ Make it feel personal and not like spam."""
             await asyncio.sleep(random.uniform(1.5, 2.5))
             self.log(f"[{username}] Entered TOTP code")
             
-            submit_selectors = [
-                'button:has-text("Confirm")',
-                'button[type="submit"]',
-                'div[role="button"]:has-text("Confirm")',
-                'button:has-text("Submit")',
-                'div[role="button"]:has-text("Submit")',
-                'button._aswp._aswr._aswu._asw_._asx2',
-                'button[class*="_aswp"][class*="_aswr"][class*="_aswu"][class*="_asw_"][class*="_asx2"]',
-                '[role="button"]:has-text("Confirm")',
-                '[role="button"]:has-text("Submit")'
-            ]
-            
-            submit_button = None
-            for selector in submit_selectors:
+            submit_button, selector = await selector_registry.query(page, 'totp_submit')
+            if submit_button:
                 try:
-                    submit_button = await page.query_selector(selector)
-                    if submit_button and await submit_button.is_visible():
-                        await submit_button.click()
-                        self.log(f"[{username}] Submitted 2FA code with selector: {selector}")
-                        # Longer wait to let Instagram process the verification
-                        await asyncio.sleep(random.uniform(8, 12))
-                        
-                        if not await self.is_verification_required(page):
-                            self.log(f"[{username}] ✅ 2FA verification successful!")
-                            return True
-                        else:
-                            self.log(f"[{username}] ❌ 2FA verification failed.")
-                            return False
-                        break
+                    await submit_button.click()
+                    self.log(f"[{username}] Submitted 2FA code with selector: {selector}")
+                    # Longer wait to let Instagram process the verification
+                    await asyncio.sleep(random.uniform(8, 12))
+                    
+                    if not await self.is_verification_required(page):
+                        self.log(f"[{username}] ✅ 2FA verification successful!")
+                        return True
+                    else:
+                        self.log(f"[{username}] ❌ 2FA verification failed.")
+                        return False
                 except Exception as e:
                     self.log(f"[{username}] Error with submit selector {selector}: {e}")
-                    continue
+                    submit_button = None
             
             # Fallback if button not found or clicked
             if not submit_button:
@@ -1354,6 +1238,7 @@ Make it feel personal and not like spam."""
             self.log(f"[{username}] Error during 2FA: {e}", "ERROR")
             return False
     
+    @tracer.traced('login')
     async def login_instagram_with_cookies_and_2fa(self, context, username, password, totp_secret='', account_number=1):
         """Enhanced login with cookie management and automatic 2FA handling"""
         try:
@@ -1364,11 +1249,6 @@ Make it feel personal and not like spam."""
             def auth_log_callback(message):
                 self.log(f"[{username}] {message}")
             
-            # Get account details including TOTP secret
-            from instagram_accounts import get_account_details
-            account_data = get_account_details(username)
-            totp_secret = account_data.get('totp_secret') if account_data else None
-            
             # Get proxy info
             proxy_string = proxy_manager.get_account_proxy(username)
             proxy_info = proxy_manager.parse_proxy(proxy_string) if proxy_string else None
@@ -1378,7 +1258,7 @@ Make it feel personal and not like spam."""
                 context=context,
                 username=username,
                 password=password,
-                totp_secret=totp_secret,
+                totp_secret=totp_secret or None,
                 proxy_info=proxy_info,
                 log_callback=auth_log_callback
             )
@@ -1400,6 +1280,7 @@ Make it feel personal and not like spam."""
             self.log(f"[{username}] ❌ Login error: {e}", "ERROR")
             return False
     
+    @tracer.traced('send_dm', failed_if=lambda result: result is not True)
     async def send_dm(self, page, username, message):
         """Send DM to user with retry logic and enhanced logging"""
         max_retries = 3
@@ -1413,7 +1294,7 @@ Make it feel personal and not like spam."""
                 
                 # Navigate to profile
                 profile_url = f"{INSTAGRAM_URL}{username}/"
-                self.log(f"🌐 Navigating to profile: {profile_url}", "DEBUG")
+                self.debug("🌐 Navigating to profile: %s", profile_url)
                 
                 if not await self.safe_goto(page, profile_url):
                     self.log(f"❌ Failed to navigate to @{username} profile", "ERROR")
@@ -1425,10 +1306,10 @@ Make it feel personal and not like spam."""
                     return "USER_NOT_FOUND"
                 
                 # Wait for profile to load
-                self.log(f"⏳ Waiting for @{username} profile to load...", "DEBUG")
+                self.debug("⏳ Waiting for @%s profile to load...", username)
                 try:
                     await page.wait_for_selector("header, main, article", timeout=20000)
-                    self.log(f"✅ Profile @{username} loaded successfully", "DEBUG")
+                    self.debug("✅ Profile @%s loaded successfully", username)
                 except:
                     self.log(f"⏰ Profile @{username} load timeout", "WARNING")
                     return "PROFILE_LOAD_TIMEOUT"
@@ -1436,33 +1317,17 @@ Make it feel personal and not like spam."""
                 # Find and click message button
                 message_clicked = False
                 
-                message_button_selectors = [
-                    "button:has-text('Message')",
-                    "div[role='button']:has-text('Message')", 
-                    "[aria-label='Message']",
-                    "a:has-text('Message')",
-                    "button:has-text('Send message')",
-                    "div[role='button']:has-text('Send message')",
-                    # Additional selectors for message button
-                    "a[href*='/direct/']",
-                    "button[class*='_acan'][class*='_acao']"  # Instagram button classes
-                ]
-                
-                self.log(f"🔍 Looking for Message button on @{username} profile...", "DEBUG")
+                self.debug("🔍 Looking for Message button on @%s profile...", username)
                 
-                for i, selector in enumerate(message_button_selectors):
-                    try:
-                        self.log(f"🔍 Trying message button selector {i+1}: {selector}", "DEBUG")
-                        element = await page.wait_for_selector(selector, timeout=5000)
-                        if element:
-                            await element.click()
-                            message_clicked = True
-                            await asyncio.sleep(2)
-                            self.log(f"✅ Clicked message button for @{username} with selector {i+1}", "DEBUG")
-                            break
-                    except Exception as selector_error:
-                        self.log(f"❌ Message button selector {i+1} failed: {str(selector_error)[:100]}", "DEBUG")
-                        continue
+                try:
+                    element, selector = await selector_registry.wait_for(page, 'profile_message_button', timeout=5000)
+                    if element:
+                        await element.click()
+                        message_clicked = True
+                        await asyncio.sleep(2)
+                        self.debug("✅ Clicked message button for @%s with selector %s", username, selector)
+                except Exception as selector_error:
+                    self.debug("❌ Message button click failed: %s", str(selector_error)[:100])
                 
                 if not message_clicked:
                     if attempt < max_retries - 1:
@@ -1473,47 +1338,14 @@ Make it feel personal and not like spam."""
                     return "MESSAGE_BUTTON_NOT_FOUND"
                 
                 # Wait for DM interface to load
-                self.log(f"⏳ Waiting for DM interface to load for @{username}...", "DEBUG")
+                self.debug("⏳ Waiting for DM interface to load for @%s...", username)
                 await asyncio.sleep(3)
                 
-                # Find message input with updated selectors based on the provided element
-                input_selectors = [
-                    # New selectors based on the provided element
-                    'div[aria-label="Message"][contenteditable="true"][role="textbox"]',
-                    'div[aria-describedby="Message"][contenteditable="true"]',
-                    'div[class*="xzsf02u"][contenteditable="true"][role="textbox"]',
-                    'div[data-lexical-editor="true"][contenteditable="true"]',
-                    'div[aria-placeholder="Message..."][contenteditable="true"]',
-                    # Original selectors as fallback
-                    "div[role='textbox']",
-                    "div[contenteditable='true']",
-                    "textarea[placeholder*='Message']",
-                    "textarea[placeholder*='message']",
-                    # Additional Instagram-specific selectors
-                    'div[role="textbox"][contenteditable="true"]',
-                    'div[contenteditable="true"][spellcheck="true"]',
-                    'div[class*="notranslate"][contenteditable="true"]'
-                ]
-                
-                message_input = None
-                self.log(f"🔍 Looking for message input field for @{username}...", "DEBUG")
-                
-                for i, selector in enumerate(input_selectors):
-                    try:
-                        self.log(f"🔍 Trying message input selector {i+1}: {selector}", "DEBUG")
-                        message_input = await page.wait_for_selector(selector, timeout=5000)
-                        if message_input:
-                            # Verify the element is visible and interactable
-                            is_visible = await message_input.is_visible()
-                            if is_visible:
-                                self.log(f"✅ Found message input field for @{username} with selector {i+1}", "DEBUG")
-                                break
-                            else:
-                                self.log(f"⚠️ Message input found but not visible with selector {i+1}", "DEBUG")
-                                message_input = None
-                    except Exception as e:
-                        self.log(f"❌ Message input selector {i+1} failed: {str(e)[:100]}", "DEBUG")
-                        continue
+                # Find message input
+                self.debug("🔍 Looking for message input field for @%s...", username)
+                message_input, selector = await selector_registry.wait_for(page, 'message_input', timeout=5000)
+                if message_input:
+                    self.debug("✅ Found message input field for @%s with selector %s", username, selector)
                 
                 if not message_input:
                     if attempt < max_retries - 1:
@@ -1536,27 +1368,27 @@ Make it feel personal and not like spam."""
                     await asyncio.sleep(0.3)
                     
                     # Type the message with human-like behavior
-                    self.log(f"✏️ Typing message to @{username} with human-like behavior...", "DEBUG")
+                    self.debug("✏️ Typing message to @%s with human-like behavior...", username)
                     await self.typing_behavior.human_type(
                         page, 
                         'textarea[placeholder*="Message"], div[contenteditable="true"]', 
                         message,
                         self.log
                     )
-                    self.log(f"✅ Message typed to @{username} with human-like timing", "DEBUG")
+                    self.debug("✅ Message typed to @%s with human-like timing", username)
                     
                     # Human-like pause before sending
                     pause_time = random.uniform(1, 3)
-                    self.log(f"⏳ Human-like pause {pause_time:.1f}s before sending message to @{username}...", "DEBUG")
+                    self.debug("⏳ Human-like pause %.1fs before sending message to @%s...", pause_time, username)
                     await asyncio.sleep(pause_time)
                     
                     # Send the message with human-like behavior
-                    self.log(f"📤 Sending message with human-like behavior...", "DEBUG")
+                    self.log("📤 Sending message with human-like behavior...", "DEBUG")
                     
                     # Sometimes click send button instead of pressing Enter (more human-like)
                     if random.random() < 0.7:  # 70% chance to use Enter key
                         await page.keyboard.press("Enter")
-                        self.log(f"⌨️ Sent message using Enter key", "DEBUG")
+                        self.log("⌨️ Sent message using Enter key", "DEBUG")
                     else:
                         # Try to find and click send button
                         try:
@@ -1569,14 +1401,14 @@ Make it feel personal and not like spam."""
                             for selector in send_selectors:
                                 try:
                                     await self.typing_behavior.human_click(page, selector, self.log)
-                                    self.log(f"🖱️ Sent message using send button", "DEBUG")
+                                    self.log("🖱️ Sent message using send button", "DEBUG")
                                     break
                                 except:
                                     continue
                         except:
                             # Fallback to Enter key
                             await page.keyboard.press("Enter")
-                            self.log(f"⌨️ Sent message using Enter key (fallback)", "DEBUG")
+                            self.log("⌨️ Sent message using Enter key (fallback)", "DEBUG")
                     
                     await asyncio.sleep(2)
                     
@@ -1595,7 +1427,7 @@ Make it feel personal and not like spam."""
                 self.log(f"❌ DM send error for @{username} (attempt {attempt + 1}): {str(e)}", "ERROR")
                 if attempt < max_retries - 1:
                     retry_delay = random.uniform(3, 5)
-                    self.log(f"⏳ Waiting {retry_delay:.1f}s before retry...", "DEBUG")
+                    self.debug("⏳ Waiting %.1fs before retry...", retry_delay)
                     await asyncio.sleep(retry_delay)
                     continue
                 return f"GENERAL_ERROR: {str(e)[:100]}"
@@ -1603,138 +1435,97 @@ Make it feel personal and not like spam."""
         self.log(f"❌ Max retries ({max_retries}) exceeded for @{username}", "ERROR")
         return "MAX_RETRIES_EXCEEDED"
     
+    @tracer.traced('check_responses')
     async def check_dm_responses(self, page, account_username):
         """Check for unread messages in DM inbox (simple and fast)"""
-        try:
-            self.log(f"[{account_username}] Checking for unread messages...")
-            
-            # Navigate to direct messages
-            if not await self.safe_goto(page, f"{INSTAGRAM_URL}direct/inbox/"):
-                self.log(f"[{account_username}] Failed to navigate to DM inbox", "WARNING")
-                return []
-            
-            await asyncio.sleep(3)
-            
-            # Handle "Turn On Notifications" popup if it appears
-            await self.handle_notifications_popup(page, account_username)
-            
-            # Wait for inbox to load
+        # The inbox only needs text - stub avatars and drop media previews
+        with resource_step(page, 'inbox'):
             try:
-                await page.wait_for_selector("div[role='main'], div[role='grid']", timeout=15000)
-            except:
-                self.log(f"[{account_username}] Inbox load timeout", "WARNING")
-                return []
+                self.log(f"[{account_username}] Checking for unread messages...")
             
-            responses = []
+                # Navigate to direct messages
+                if not await self.safe_goto(page, f"{INSTAGRAM_URL}direct/inbox/"):
+                    self.log(f"[{account_username}] Failed to navigate to DM inbox", "WARNING")
+                    return []
             
-            # Look for unread message indicators (Instagram shows unread conversations differently)
-            unread_selectors = [
-                "div[role='listitem']:has(div[class*='unread'])",  # Conversations with unread indicators
-                "div[role='listitem']:has(span[class*='badge'])",   # Conversations with notification badges  
-                "div[role='listitem']:has(div[style*='font-weight: bold'])", # Bold text indicates unread
-                "a[href*='/direct/t/']:has(div[class*='unread'])", # Direct links with unread markers
-            ]
+                await asyncio.sleep(3)
             
-            unread_conversations = []
-            for selector in unread_selectors:
-                try:
-                    elements = await page.query_selector_all(selector)
-                    if elements:
-                        unread_conversations.extend(elements)
-                except:
-                    continue
+                # Handle "Turn On Notifications" popup if it appears
+                await self.handle_notifications_popup(page, account_username)
             
-            # If no specific unread indicators found, check first few conversations
-            if not unread_conversations:
+                # Wait for inbox to load
                 try:
-                    all_conversations = await page.query_selector_all("div[role='listitem']")
-                    unread_conversations = all_conversations[:5]  # Check first 5 conversations
+                    await page.wait_for_selector("div[role='main'], div[role='grid']", timeout=15000)
                 except:
-                    pass
+                    self.log(f"[{account_username}] Inbox load timeout", "WARNING")
+                    return []
             
-            if not unread_conversations:
-                self.log(f"[{account_username}] No conversations found in inbox", "INFO")
-                return []
-            
-            self.log(f"[{account_username}] Found {len(unread_conversations)} potential unread conversations")
+                responses = []
             
-            # Check each unread conversation
-            for i, conversation in enumerate(unread_conversations[:10]):  # Limit to 10 for speed
+                # Read the visible conversation list in one round trip
+                unread_candidates = selector_registry.candidates('unread_indicator')
                 try:
-                    # Click on conversation
-                    await conversation.click()
-                    await asyncio.sleep(1)  # Reduced wait time
-                    
-                    # Get username from conversation header
-                    username_selectors = [
-                        "header h1", "header span", 
-                        "div[role='button'] span", 
-                        "a[role='link'] span"
-                    ]
-                    
-                    conversation_username = "Unknown"
-                    for selector in username_selectors:
-                        try:
-                            username_element = await page.query_selector(selector)
-                            if username_element:
-                                username_text = await username_element.inner_text()
-                                if username_text and len(username_text.strip()) > 0:
-                                    conversation_username = username_text.strip()
-                                    break
-                        except:
-                            continue
-                    
-                    # Get the latest message (assume it's unread)
-                    message_selectors = [
-                        "div[data-testid='message-text']",
-                        "div[class*='message'] span",
-                        "div[role='row'] div span"
-                    ]
-                    
-                    latest_message = ""
-                    for selector in message_selectors:
+                    rows = await extract_inbox_rows(page, unread_candidates)
+                except Exception as e:
+                    self.log(f"[{account_username}] Could not read conversation list: {e}", "WARNING")
+                    return []
+                matched = {row['unread_selector'] for row in rows}
+                unread_hit = next((selector for i, selector in enumerate(unread_candidates) if i in matched), None)
+                selector_registry.record('unread_indicator', unread_hit, unread_candidates)
+            
+                # If no specific unread indicators found, check first few conversations
+                conversations = [row for row in rows if row['unread']] or rows[:5]
+            
+                if not conversations:
+                    self.log(f"[{account_username}] No conversations found in inbox", "INFO")
+                    return []
+            
+                conversations = conversations[:10]  # Limit to 10 for speed
+                to_open = sum(1 for row in conversations if not row['sufficient'] and not row['from_self'])
+                self.log(f"[{account_username}] Found {len(conversations)} potential unread conversations "
+                         f"({to_open} need the thread opened)")
+            
+                for row in conversations:
+                    if row['from_self']:
+                        # Latest message in the thread is ours - nothing to collect
+                        continue
+                    conversation_username = row['title'] or "Unknown"
+                    latest_message = row['text'] if row['sufficient'] else None
+                
+                    # Only open threads whose preview is truncated, empty or just a status line
+                    if not latest_message and row['thread_id']:
                         try:
-                            elements = await page.query_selector_all(selector)
-                            if elements:
-                                # Get the last message
-                                last_element = elements[-1]
-                                latest_message = await last_element.inner_text()
-                                if latest_message and len(latest_message.strip()) > 0:
-                                    break
-                        except:
-                            continue
-                    
+                            await page.goto(f"{INSTAGRAM_URL}direct/t/{row['thread_id']}/",
+                                            wait_until="domcontentloaded", timeout=30000)
+                            try:
+                                await page.wait_for_selector(", ".join(THREAD_MESSAGE_SELECTORS), timeout=5000)
+                            except:
+                                pass
+                            latest_message = await read_thread_latest(page)
+                        except Exception as e:
+                            self.log(f"[{account_username}] Error opening conversation with {conversation_username}: {e}", "WARNING")
+                    # A truncated preview still beats nothing; a bare status line ("Seen") is not a reply
+                    latest_message = (latest_message or (row['text'] if row['truncated'] else '')).strip()
+                
                     # Store any message found (we're not filtering, just collecting)
-                    if latest_message and len(latest_message.strip()) > 0:
+                    if latest_message:
                         response_data = {
                             'account': account_username,
                             'responder': conversation_username,
-                            'message': latest_message.strip(),
+                            'message': latest_message,
                             'timestamp': datetime.now().isoformat()
                         }
                         responses.append(response_data)
+                        self.journal.record_response(self.script_id, account_username,
+                                                     conversation_username, response_data['message'])
                         self.log(f"[{account_username}] 📩 Response from {conversation_username}: {latest_message[:50]}...", "INFO")
-                    
-                    # Go back to inbox quickly
-                    await page.go_back()
-                    await asyncio.sleep(0.5)  # Reduced wait time
-                    
-                except Exception as e:
-                    self.log(f"[{account_username}] Error checking conversation {i+1}: {e}", "WARNING")
-                    # Try to go back to inbox if we're stuck
-                    try:
-                        await page.go_back()
-                        await asyncio.sleep(0.5)
-                    except:
-                        break
-                    continue
             
-            self.log(f"[{account_username}] Collected {len(responses)} responses")
-            return responses
+                self.log(f"[{account_username}] Collected {len(responses)} responses")
+                return responses
             
-        except Exception as e:
-            self.log(f"[{account_username}] Error checking responses: {e}", "ERROR")
-            return []
+            except Exception as e:
+                self.log(f"[{account_username}] Error checking responses: {e}", "ERROR")
+                return []
     
     def distribute_users(self, users, num_accounts):
         """Distribute users across accounts"""
@@ -1745,12 +1536,13 @@ Make it feel personal and not like spam."""
     
     async def process_account(self, account_data, assigned_users, prompt_template, dm_limit, account_number=1):
         """Process DMs for single account with enhanced error handling"""
-        username = account_data.get('username')
-        password = account_data.get('password')
+        username = account_data.username
+        password = account_data.password
         
         playwright = None
         browser = None
         context = None
+        trace_tokens = tracer.start_context(self.script_id, username)
         
         try:
             # Get the assigned proxy for this account
@@ -1769,8 +1561,10 @@ Make it feel personal and not like spam."""
             page = await context.new_page()
             
             # Login with enhanced cookie management and 2FA support
-            totp_secret = account_data.get('totp_secret', '')
-            if not await self.login_instagram_with_cookies_and_2fa(context, username, password, totp_secret, account_number):
+            totp_secret = account_data.totp_secret
+            with resource_step(context, 'login'):
+                login_success = await self.login_instagram_with_cookies_and_2fa(context, username, password, totp_secret, account_number)
+            if not login_success:
                 self.log(f"[{username}] Login failed", "ERROR")
                 return {"account": username, "sent": 0, "processed": 0, "error": "Login failed"}
             
@@ -1809,6 +1603,11 @@ Make it feel personal and not like spam."""
                 
                 target_username = target_username.strip()
                 
+                # Reserve the recipient across all jobs and accounts before spending browser time on it
+                if not recipient_ledger.claim(target_username, self.script_id, username):
+                    self.log(f"[{username}] ⏭️ Skipping @{target_username} - already messaged or suppressed")
+                    continue
+                
                 self.log(f"[{username}] 🎯 Processing target {processed_count}/{len(users_to_process)}: @{target_username}", "INFO")
                 
                 # Log target user details for context
@@ -1832,21 +1631,17 @@ Make it feel personal and not like spam."""
                 self.log(f"[{username}] 💬 Message preview: {message[:100]}{'...' if len(message) > 100 else ''}", "INFO")
                 
                 # Send DM
-                result = await self.send_dm(page, target_username, message)
+                with resource_step(page, 'dm'):
+                    result = await self.send_dm(page, target_username, message)
+                
+                self.journal.record_send(self.script_id, username, target_username, message,
+                                         'sent' if result is True else str(result))
+                if result is not True:
+                    recipient_ledger.release(target_username, self.script_id)
                 
                 if result is True:
                     sent_count += 1
                     self.log(f"[{username}] ✅ DM sent to @{target_username} ({sent_count}/{dm_limit})", "SUCCESS")
-                    
-                    # Save to sent DMs log
-                    with csv_lock:
-                        self.sent_dms.append({
-                            'timestamp': datetime.now().isoformat(),
-                            'bot_account': username,
-                            'target_username': target_username,
-                            'message': message,
-                            'status': 'sent'
-                        })
                 elif result == "USER_NOT_FOUND":
                     self.log(f"[{username}] ❌ Profile @{target_username} not found or not accessible", "WARNING")
                 elif result == "MESSAGE_BUTTON_NOT_FOUND":
@@ -1880,9 +1675,8 @@ Make it feel personal and not like spam."""
             
             responses = await self.check_dm_responses(page, username)
             
-            # Store responses globally
+            self.journal.flush()
             if responses:
-                self.positive_responses.extend(responses)
                 self.log(f"[{username}] Collected {len(responses)} positive responses!")
             
             return {
@@ -1898,28 +1692,40 @@ Make it feel personal and not like spam."""
             return {"account": username, "sent": 0, "processed": 0, "error": str(e)}
             
         finally:
+            resource_filter = get_resource_filter(context) if context else None
+            if resource_filter:
+                self.log(f"[{username}] {resource_filter.summary()}")
+            
             # Cleanup browser (no need to release proxy since it's permanently assigned)
-            try:
-                if browser:
-                    await browser.close()
-                if playwright:
-                    await playwright.stop()
-            except:
-                pass
+            with tracer.span('teardown'):
+                try:
+                    if browser:
+                        await browser.close()
+                    if playwright:
+                        await playwright.stop()
+                except:
+                    pass
+            tracer.end_context(trace_tokens)
 
 async def run_dm_automation(
     script_id,
-    accounts_file,
+    accounts,
     target_file=None,
     prompt_file=None,
     custom_prompt=None,
     dms_per_account=30,
     log_callback=None,
-    stop_callback=None
+    stop_callback=None,
+    resource_policy=None,
+    progress_callback=None
 ):
-    """Main function to run DM automation"""
+    """Main function to run DM automation.
+
+    progress_callback(username, status) is told when an account finishes its share; a resumed run
+    (same script_id) only tops each account up to dms_per_account.
+    """
     
-    engine = DMAutomationEngine(log_callback, stop_callback)
+    engine = DMAutomationEngine(log_callback, stop_callback, resource_policy=resource_policy, script_id=script_id)
     
     try:
         engine.log("=== Instagram DM Automation Started ===")
@@ -1955,16 +1761,14 @@ async def run_dm_automation(
         
         engine.log("✅ Using enhanced template-based message generation (OpenAI removed for simplicity)", "INFO")
         
-        # Load data
-        engine.log("Loading bot accounts...")
-        bot_accounts = engine.load_accounts(accounts_file)
+        # Accounts arrive as AccountRecords resolved at job submission
+        bot_accounts = list(accounts or [])
         
         if not bot_accounts:
             engine.log("No valid bot accounts found", "ERROR")
             return False
         
-        # Use all accounts from the file dynamically
-        engine.log(f"Using {len(bot_accounts)} bot accounts (all accounts from file)")
+        engine.log(f"Using {len(bot_accounts)} bot accounts")
 
         engine.log("Loading target users...")
         target_users = engine.load_target_users(target_file)
@@ -1987,12 +1791,23 @@ async def run_dm_automation(
         
         engine.log("Starting parallel DM campaigns...")
         
+        # Sends already journaled under this script id (non-empty only when resuming)
+        already_sent = engine.journal.get_sent_counts(script_id)
+        
+        async def run_account(account, assigned_users, dm_limit, account_number):
+            result = await engine.process_account(account, assigned_users, prompt_template, dm_limit, account_number)
+            if progress_callback and isinstance(result, dict) and not engine.stop_callback():
+                progress_callback(account.username, 'failed' if result.get('error') else 'completed')
+            return result
+        
         # Create tasks for parallel processing
         tasks = []
         for i, (account, assigned_users) in enumerate(zip(bot_accounts, user_distribution), 1):
-            if assigned_users:
-                task = engine.process_account(account, assigned_users, prompt_template, dms_per_account, i)
-                tasks.append(task)
+            dm_limit = dms_per_account - already_sent.get(account.username, 0)
+            if already_sent.get(account.username):
+                engine.log(f"[{account.username}] Resuming: {already_sent[account.username]} DMs already sent, {max(dm_limit, 0)} to go")
+            if assigned_users and dm_limit > 0:
+                tasks.append(run_account(account, assigned_users, dm_limit, i))
         
         # Run parallel processing
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -2046,45 +1861,23 @@ async def run_dm_automation(
         engine.log(f"- Success rate: {(total_sent/total_processed)*100:.1f}%" if total_processed > 0 else "0%")
         engine.log(f"- Successful accounts: {successful_accounts}/{len(bot_accounts)}")
         
-        # Save results
-        if engine.sent_dms:
-            try:
-                import os
+        # Materialize the final exports from the journal
+        try:
+            os.makedirs('logs', exist_ok=True)
+            counts = dm_journal.get_counts(script_id)
+            if counts['attempts']:
                 results_file = os.path.join('logs', f'dm_results_{script_id}.csv')
-                os.makedirs('logs', exist_ok=True)
-                
-                with open(results_file, 'w', newline='', encoding='utf-8') as f:
-                    if engine.sent_dms:
-                        fieldnames = engine.sent_dms[0].keys()
-                        writer = csv.DictWriter(f, fieldnames=fieldnames)
-                        writer.writeheader()
-                        writer.writerows(engine.sent_dms)
-                
+                dm_journal.export_sends_csv(script_id, results_file)
                 engine.log(f"Results saved to: {results_file}")
-            except Exception as e:
-                engine.log(f"Failed to save results: {e}", "WARNING")
-        
-        # Save positive responses
-        if engine.positive_responses:
-            try:
-                import os
+            if counts['responses']:
                 responses_file = os.path.join('logs', f'dm_responses_{script_id}.csv')
-                
-                with open(responses_file, 'w', newline='', encoding='utf-8') as f:
-                    fieldnames = engine.positive_responses[0].keys()
-                    writer = csv.DictWriter(f, fieldnames=fieldnames)
-                    writer.writeheader()
-                    writer.writerows(engine.positive_responses)
-                
+                dm_journal.export_responses_csv(script_id, responses_file)
                 engine.log(f"Positive responses saved to: {responses_file}")
                 
                 # Also save as JSON for API access
-                responses_json_file = os.path.join('logs', f'dm_responses_{script_id}.json')
-                with open(responses_json_file, 'w', encoding='utf-8') as f:
-                    json.dump(engine.positive_responses, f, indent=2, ensure_ascii=False)
-                
-            except Exception as e:
-                engine.log(f"Failed to save positive responses: {e}", "WARNING")
+                dm_journal.export_responses_json(script_id, os.path.join('logs', f'dm_responses_{script_id}.json'))
+        except Exception as e:
+            engine.log(f"Failed to save results: {e}", "WARNING")
         
         engine.log("=== DM Automation Completed ===")
         return total_sent > 0
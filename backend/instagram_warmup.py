@@ -9,11 +9,15 @@ import pyotp
 import re
 import datetime
 import traceback
-from instagram_accounts import get_account_details
+from instagram_accounts import instagram_accounts_manager
 from proxy_manager import proxy_manager
 from simple_instagram_auth_enhanced import EnhancedSimpleAuth, HumanLikeTyping
 from instagram_cookie_manager import cookie_manager
 from stealth_browser_manager import StealthBrowserManager, ensure_proxy_assignment
+from resource_policy import install_resource_policy, resource_step
+from tracing import tracer
+from selector_race import query_any
+from selector_registry import selector_registry
 
 # Default Configuration
 DEFAULT_WARMUP_DURATION_MINUTES = 300
@@ -74,6 +78,7 @@ async def generate_totp_code(username, totp_secret):
         logging.error(f"[{username}] Error generating TOTP code: {e}")
         return None
 
+@tracer.traced('2fa')
 async def handle_2fa_verification(page, username, totp_secret, log_callback=None):
     """Handle Instagram 2FA verification using TOTP."""
     try:
@@ -90,27 +95,9 @@ async def handle_2fa_verification(page, username, totp_secret, log_callback=None
         await human_like_delay((1, 2))
 
         # Look for 2FA input field
-        totp_selectors = [
-            'input[name="verificationCode"]',
-            'input[name="security_code"]',
-            'input[aria-label*="security code"]',
-            'input[placeholder*="security code"]',
-            'input[placeholder*="verification code"]',
-            '[data-testid="2fa-input"]',
-            'input[type="text"][maxlength="6"]',
-            'input[autocomplete="one-time-code"]'
-        ]
-        
-        totp_input = None
-        for selector in totp_selectors:
-            try:
-                totp_input = await page.wait_for_selector(selector, timeout=5000)
-                if totp_input:
-                    if log_callback:
-                        log_callback(f"[{username}] 📱 Found 2FA input field with selector: {selector}")
-                    break
-            except:
-                continue
+        totp_input, selector = await selector_registry.wait_for(page, 'totp_input', timeout=5000)
+        if totp_input and log_callback:
+            log_callback(f"[{username}] 📱 Found 2FA input field with selector: {selector}")
         
         if not totp_input:
             if log_callback:
@@ -128,26 +115,7 @@ async def handle_2fa_verification(page, username, totp_secret, log_callback=None
         await human_like_delay((1.5, 2.5))
         
         # Look for submit button
-        submit_selectors = [
-            'button[type="submit"]',
-            'button:has-text("Confirm")',
-            'button:has-text("Continue")',
-            'button:has-text("Submit")',
-            'button:has-text("Verify")',
-            '[role="button"]:has-text("Confirm")',
-            '[role="button"]:has-text("Continue")',
-            'button._aswp._aswr._aswu._asw_._asx2',
-            'button[class*="_aswp"][class*="_aswr"][class*="_aswu"][class*="_asw_"][class*="_asx2"]'
-        ]
-        
-        submit_button = None
-        for selector in submit_selectors:
-            try:
-                submit_button = await page.wait_for_selector(selector, timeout=3000)
-                if submit_button:
-                    break
-            except:
-                continue
+        submit_button, _ = await selector_registry.wait_for(page, 'totp_submit', timeout=3000)
         
         if submit_button:
             await submit_button.click()
@@ -236,11 +204,8 @@ async def is_verification_required(page):
         "text=Two-factor authentication"
     ]
     
-    for selector in verification_selectors:
-        if await page.query_selector(selector):
-            return True
-            
-    return False
+    element, _ = await query_any(page, verification_selectors)
+    return element is not None
 
 async def handle_login_info_save_dialog(page, username, log_callback=None):
     """Handle the 'Save your login info?' dialog by clicking 'Save info' or 'Not now'"""
@@ -251,46 +216,28 @@ async def handle_login_info_save_dialog(page, username, log_callback=None):
         await human_like_delay((2, 3))
         
         # Save Info button (preferred to maintain session)
-        save_info_selectors = [
-            'button:has-text("Save Info")',
-            'button:has-text("Save info")', 
-            'button:has-text("Save")',
-            'div[role="button"]:has-text("Save Info")',
-            'div[role="button"]:has-text("Save info")',
-            'div[role="button"]:has-text("Save")'
-        ]
-        
-        for selector in save_info_selectors:
+        save_button, _ = await selector_registry.wait_for(page, 'save_login_info', timeout=3000)
+        if save_button:
             try:
-                save_button = await page.wait_for_selector(selector, timeout=3000)
-                if save_button and await save_button.is_visible():
-                    await save_button.click()
-                    if log_callback:
-                        log_callback(f"{username}: Clicked 'Save Info' button")
-                    await human_like_delay((2, 3))
-                    return True
-            except:
-                continue
+                await save_button.click()
+                if log_callback:
+                    log_callback(f"{username}: Clicked 'Save Info' button")
+                await human_like_delay((2, 3))
+                return True
+            except Exception:
+                pass
         
         # Fallback to "Not Now" if save info not found
-        not_now_selectors = [
-            'button:has-text("Not Now")',
-            'button:has-text("Not now")',
-            'div[role="button"]:has-text("Not Now")',
-            'div[role="button"]:has-text("Not now")'
-        ]
-        
-        for selector in not_now_selectors:
+        not_now_button, _ = await selector_registry.wait_for(page, 'save_login_not_now', timeout=2000)
+        if not_now_button:
             try:
-                not_now_button = await page.wait_for_selector(selector, timeout=2000)
-                if not_now_button and await not_now_button.is_visible():
-                    await not_now_button.click()
-                    if log_callback:
-                        log_callback(f"{username}: Clicked 'Not Now' button")
-                    await human_like_delay((2, 3))
-                    return True
-            except:
-                continue
+                await not_now_button.click()
+                if log_callback:
+                    log_callback(f"{username}: Clicked 'Not Now' button")
+                await human_like_delay((2, 3))
+                return True
+            except Exception:
+                pass
                 
         if log_callback:
             log_callback(f"{username}: No save login info dialog found")
@@ -301,6 +248,7 @@ async def handle_login_info_save_dialog(page, username, log_callback=None):
             log_callback(f"{username}: Error handling save login dialog: {e}")
         return False
 
+@tracer.traced('login')
 async def login_instagram_with_cookies_and_2fa(context: BrowserContext, username, password, totp_secret=None, log_callback=None):
     """
     Enhanced login function with cookie management and automatic 2FA handling
@@ -314,10 +262,6 @@ async def login_instagram_with_cookies_and_2fa(context: BrowserContext, username
             if log_callback:
                 log_callback(f"[{username}] {message}")
         
-        # Get account details including TOTP secret
-        account_data = get_account_details(username)
-        totp_secret = account_data.get('totp_secret') if account_data else None
-        
         # Get proxy info
         proxy_string = proxy_manager.get_account_proxy(username)
         proxy_info = proxy_manager.parse_proxy(proxy_string) if proxy_string else None
@@ -330,7 +274,7 @@ async def login_instagram_with_cookies_and_2fa(context: BrowserContext, username
             context=context,
             username=username,
             password=password,
-            totp_secret=totp_secret,
+            totp_secret=totp_secret or None,
             proxy_info=proxy_info,
             log_callback=auth_log_callback
         )
@@ -355,15 +299,13 @@ async def login_instagram_with_cookies_and_2fa(context: BrowserContext, username
             log_callback(f"[{username}] ❌ Login error: {e}")
         return False
 
-async def login(context: BrowserContext, username, password, log_callback=None):
+async def login(context: BrowserContext, username, password, totp_secret=None, log_callback=None):
     """
-    Simple login wrapper for backward compatibility - uses enhanced auth
+    Simple login wrapper for backward compatibility - uses enhanced auth with the caller's account record fields
     """
-    account_details = get_account_details(username)
-    totp_secret = account_details.get('totp_secret') if account_details else None
-    
     return await login_instagram_with_cookies_and_2fa(context, username, password, totp_secret, log_callback)
 
+@tracer.traced('activities')
 async def perform_activities(page, username, duration_minutes, activities, timing, log_callback=None, stop_callback=None):
     """
     Performs a series of human-like activities on Instagram for a given duration.
@@ -378,55 +320,58 @@ async def perform_activities(page, username, duration_minutes, activities, timin
     activity_delay = timing.get('activity_delay', DEFAULT_ACTIVITY_DELAY_SECONDS)
     scroll_attempts = timing.get('scroll_attempts', DEFAULT_SCROLL_ATTEMPTS)
 
-    while time.time() < end_time:
-        # Check if stop was requested
-        if stop_callback and stop_callback():
-            if log_callback:
-                log_callback(f"{username}: Stopping activities due to user request.")
-            break
+    # Feed and reels only need layout, not pixels - stub images and drop video
+    with resource_step(page, 'warmup'):
+        while time.time() < end_time:
+            # Check if stop was requested
+            if stop_callback and stop_callback():
+                if log_callback:
+                    log_callback(f"{username}: Stopping activities due to user request.")
+                break
             
-        # Build activity choices based on enabled activities
-        activity_choices = []
-        if activities.get('feed_scroll', True):
-            activity_choices.append("feed_scroll")
-        if activities.get('watch_reels', True):
-            activity_choices.append("watch_reel")
-        if activities.get('like_reels', True):
-            activity_choices.append("like_reel")
-        if activities.get('like_posts', True):
-            activity_choices.append("like_feed_post")
-        if activities.get('explore_page', True):
-            activity_choices.append("explore_scroll")
-        if activities.get('random_visits', True):
-            activity_choices.append("random_page_scroll")
-        
-        if not activity_choices:
-            if log_callback:
-                log_callback(f"{username}: No activities enabled, ending warmup")
-            break
+            # Build activity choices based on enabled activities
+            activity_choices = []
+            if activities.get('feed_scroll', True):
+                activity_choices.append("feed_scroll")
+            if activities.get('watch_reels', True):
+                activity_choices.append("watch_reel")
+            if activities.get('like_reels', True):
+                activity_choices.append("like_reel")
+            if activities.get('like_posts', True):
+                activity_choices.append("like_feed_post")
+            if activities.get('explore_page', True):
+                activity_choices.append("explore_scroll")
+            if activities.get('random_visits', True):
+                activity_choices.append("random_page_scroll")
+        
+            if not activity_choices:
+                if log_callback:
+                    log_callback(f"{username}: No activities enabled, ending warmup")
+                break
 
-        activity = random.choice(activity_choices)
+            activity = random.choice(activity_choices)
         
-        try:
-            if activity == "feed_scroll":
-                await scroll_feed(page, random.randint(*scroll_attempts), log_callback, username, stop_callback)
-            elif activity == "watch_reel":
-                await watch_reel(page, log_callback, username, stop_callback)
-            elif activity == "like_reel":
-                await like_reel(page, log_callback, username, stop_callback)
-            elif activity == "like_feed_post":
-                await like_feed_post(page, log_callback, username, stop_callback)
-            elif activity == "explore_scroll":
-                await explore_scroll(page, random.randint(*scroll_attempts), log_callback, username, stop_callback)
-            elif activity == "random_page_scroll":
-                await random_page_scroll(page, random.randint(*scroll_attempts), log_callback, username, stop_callback)
+            try:
+                with tracer.span(f"activity:{activity}"):
+                    if activity == "feed_scroll":
+                        await scroll_feed(page, random.randint(*scroll_attempts), log_callback, username, stop_callback)
+                    elif activity == "watch_reel":
+                        await watch_reel(page, log_callback, username, stop_callback)
+                    elif activity == "like_reel":
+                        await like_reel(page, log_callback, username, stop_callback)
+                    elif activity == "like_feed_post":
+                        await like_feed_post(page, log_callback, username, stop_callback)
+                    elif activity == "explore_scroll":
+                        await explore_scroll(page, random.randint(*scroll_attempts), log_callback, username, stop_callback)
+                    elif activity == "random_page_scroll":
+                        await random_page_scroll(page, random.randint(*scroll_attempts), log_callback, username, stop_callback)
                 
-        except Exception as e:
-            if log_callback:
-                log_callback(f"{username}: Error during {activity}: {e}")
+            except Exception as e:
+                if log_callback:
+                    log_callback(f"{username}: Error during {activity}: {e}")
         
-        # Random delay between activities
-        await human_like_delay(activity_delay, stop_callback)
+            # Random delay between activities
+            await human_like_delay(activity_delay, stop_callback)
 
     if log_callback:
         log_callback(f"Activities completed for {username}")
@@ -486,24 +431,12 @@ async def like_reel(page, log_callback=None, username="User", stop_callback=None
             await human_like_delay((2, 4), stop_callback)
         
         # Try to find and click like button
-        like_selectors = [
-            'button[aria-label*="Like"]',
-            'svg[aria-label="Like"]',
-            'span[class*="heart"]',
-            'button:has(svg[aria-label="Like"])'
-        ]
-        
-        for selector in like_selectors:
-            try:
-                like_button = await page.wait_for_selector(selector, timeout=3000)
-                if like_button:
-                    # Use human-like clicking behavior
-                    await typing_behavior.human_click(page, selector, log_callback)
-                    if log_callback:
-                        log_callback(f"{username}: Liked a reel with human-like behavior")
-                    break
-            except:
-                continue
+        like_button, selector = await selector_registry.wait_for(page, 'like_button', timeout=3000)
+        if like_button:
+            # Use human-like clicking behavior
+            await typing_behavior.human_click(page, selector, log_callback)
+            if log_callback:
+                log_callback(f"{username}: Liked a reel with human-like behavior")
                 
     except Exception as e:
         if log_callback:
@@ -603,9 +536,10 @@ async def warmup_worker(accounts, config, semaphore, log_callback=None, stop_cal
                     log_callback("Worker stopping due to user request.")
                 break
             
-            username = account['username']
-            password = account['password']
+            username = account.username
+            password = account.password
             current_username = f"{username[:8]}..." if len(username) > 8 else username
+            trace_tokens = tracer.start_context(config.get('script_id'), username)
             
             if log_callback:
                 log_callback(f"Starting warmup for {current_username}")
@@ -614,6 +548,7 @@ async def warmup_worker(accounts, config, semaphore, log_callback=None, stop_cal
             if not ensure_proxy_assignment(username):
                 if log_callback:
                     log_callback(f"Failed to ensure proxy assignment for {current_username}", "ERROR")
+                tracer.end_context(trace_tokens)
                 continue
             
             if log_callback:
@@ -621,8 +556,10 @@ async def warmup_worker(accounts, config, semaphore, log_callback=None, stop_cal
             
             try:
                 # Create stealth browser with comprehensive anti-detection
-                stealth_manager = StealthBrowserManager(username)
-                browser, context = await stealth_manager.create_stealth_browser()
+                with tracer.span('browser_launch'):
+                    stealth_manager = StealthBrowserManager(username, job_id=config.get('script_id'), job_type='warmup')
+                    browser, context = await stealth_manager.create_stealth_browser()
+                    resource_filter = await install_resource_policy(context, config.get('resource_policy'))
                 
                 if log_callback:
                     log_callback(f"Stealth browser launched for {current_username} with full profile persistence")
@@ -631,11 +568,13 @@ async def warmup_worker(accounts, config, semaphore, log_callback=None, stop_cal
                 if log_callback:
                     log_callback(f"Failed to launch stealth browser for {current_username}: {str(e)}")
                     log_callback(f"⚠️ Browser setup issue - skipping {current_username}")
+                tracer.end_context(trace_tokens)
                 continue
 
             try:
                 # Use enhanced authentication with cookies and proxy
-                login_success = await login_instagram_with_cookies_and_2fa(context, username, password, None, log_callback)
+                with resource_step(context, 'login'):
+                    login_success = await login_instagram_with_cookies_and_2fa(context, username, password, account.totp_secret, log_callback)
                 if login_success:
                     # Create a page for activities after successful login
                     page = await context.new_page()
@@ -661,6 +600,9 @@ async def warmup_worker(accounts, config, semaphore, log_callback=None, stop_cal
                     
                     if log_callback:
                         log_callback(f"Warmup completed for {current_username}")
+                    # A warmup cut short by a stop isn't finished; a resumed run repeats it
+                    if config.get('progress_callback') and not (stop_callback and stop_callback()):
+                        config['progress_callback'](username, 'completed')
                 else:
                     if log_callback:
                         log_callback(f"Login failed for {current_username}")
@@ -671,12 +613,16 @@ async def warmup_worker(accounts, config, semaphore, log_callback=None, stop_cal
                     log_callback(f"Error during warmup for {current_username}: {str(e)}")
                     log_callback(f"⚠️ Warmup error for {current_username} - continuing with other accounts")
             finally:
-                try:
-                    await context.close()
-                    await browser.close()
-                except Exception as e:
-                    if log_callback:
-                        log_callback(f"Error closing resources for {current_username}: {str(e)}")
+                if log_callback and resource_filter.installed:
+                    log_callback(f"{current_username}: {resource_filter.summary()}")
+                with tracer.span('teardown'):
+                    try:
+                        await context.close()
+                        await browser.close()
+                    except Exception as e:
+                        if log_callback:
+                            log_callback(f"Error closing resources for {current_username}: {str(e)}")
+                tracer.end_context(trace_tokens)
 
 def load_accounts_from_file(file_path):
     """Load accounts from CSV or Excel file."""
@@ -712,18 +658,20 @@ def load_accounts_from_file(file_path):
         logging.error(f"Error loading accounts: {e}")
         return []
 
-async def run_warmup_automation(script_id, accounts_file, warmup_duration, activities, timing, log_callback=None, stop_callback=None):
+async def run_warmup_automation(script_id, accounts, warmup_duration, activities, timing, log_callback=None, stop_callback=None, resource_policy=None, progress_callback=None):
     """
     Main function to run Instagram warmup automation - compatible with app.py interface.
     
     Args:
         script_id: Unique identifier for this script run
-        accounts_file: Path to accounts CSV/Excel file
+        accounts: List of AccountRecord resolved at job submission
         warmup_duration: Duration in minutes for warmup
         activities: Dictionary of enabled activities
         timing: Dictionary of timing settings
         log_callback: Function to call for logging
         stop_callback: Function to check if execution should stop
+        resource_policy: Optional per-step resource policy overrides
+        progress_callback: Called as progress_callback(username, 'completed') when an account's warmup finishes
     """
     try:
         # Create config from parameters to match new interface
@@ -731,17 +679,18 @@ async def run_warmup_automation(script_id, accounts_file, warmup_duration, activ
             'warmup_duration': warmup_duration,
             'activities': activities,
             'timing': timing,
-            'max_concurrent_browsers': DEFAULT_MAX_CONCURRENT_BROWSERS
+            'max_concurrent_browsers': DEFAULT_MAX_CONCURRENT_BROWSERS,
+            'resource_policy': resource_policy,
+            'script_id': script_id,
+            'progress_callback': progress_callback
         }
         
         if log_callback:
             log_callback(f"[Script {script_id}] Starting warmup automation...")
         
-        # Load accounts
-        accounts = load_accounts_from_file(accounts_file)
         if not accounts:
             if log_callback:
-                log_callback("No valid accounts found in file")
+                log_callback("No valid accounts provided")
             return False
         
         if log_callback:
@@ -790,9 +739,10 @@ async def run_warmup(accounts_file, config, log_callback=None, stop_callback=Non
         log_callback: Function to call for logging
         stop_callback: Function to check if execution should stop
     """
+    accounts = instagram_accounts_manager.resolve_account_records(load_accounts_from_file(accounts_file))
     return await run_warmup_automation(
         script_id="legacy",
-        accounts_file=accounts_file,
+        accounts=accounts,
         warmup_duration=config.get('warmup_duration', DEFAULT_WARMUP_DURATION_MINUTES),
         activities=config.get('activities', {}),
         timing=config.get('timing', {}),
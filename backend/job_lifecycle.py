@@ -0,0 +1,190 @@
+"""
+Job Lifecycle
+Graceful drain on SIGTERM, per-account job checkpoints, and resume (or interrupted marking) of unfinished jobs at startup
+"""
+
+import os
+import json
+import time
+import shutil
+import signal
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+JOB_CHECKPOINT_DB = os.getenv('JOB_CHECKPOINT_DB', os.path.join('logs', 'job_checkpoints.sqlite3'))
+# Uploaded job inputs (DM target/prompt files) are copied here on drain; the temp originals are cleaned up
+JOB_INPUTS_DIR = os.getenv('JOB_INPUTS_DIR', os.path.join('logs', 'job_inputs'))
+
+RESUME_INTERRUPTED_JOBS = os.getenv('RESUME_INTERRUPTED_JOBS', 'true').lower() == 'true'
+# How long shutdown waits for draining jobs; keep it below the container's stop_grace_period
+DRAIN_TIMEOUT = float(os.getenv('DRAIN_TIMEOUT', '90'))
+DRAIN_SIGNALS = (signal.SIGTERM,)
+
+# Checkpoint states; finished jobs are deleted rather than kept in a final state
+UNFINISHED_STATES = ('running', 'draining', 'interrupted')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    job_id TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    state TEXT NOT NULL,
+    owner TEXT,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS account_progress (
+    job_id TEXT NOT NULL,
+    account TEXT NOT NULL,
+    status TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job_id, account)
+) WITHOUT ROWID;
+"""
+
+
+class JobLifecycleManager:
+    """Checkpoints jobs (record plus per-account outcomes) and coordinates a graceful drain.
+
+    Only accounts recorded as 'completed' are skipped when a job resumes; failed or interrupted
+    accounts are retried.
+    """
+
+    def __init__(self, db_path: str = JOB_CHECKPOINT_DB, inputs_dir: str = JOB_INPUTS_DIR):
+        self.db_path = db_path
+        self.inputs_dir = inputs_dir
+        self.lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.draining = threading.Event()
+        self.drain_callbacks: List[Callable[[], None]] = []
+        self.previous_handlers: Dict[int, object] = {}
+        self.loop = None
+
+    # Checkpoints
+
+    def track(self, job_id: str, record: Dict, owner: str):
+        """Checkpoint a job that has just started (or resumed) on this worker"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO job_checkpoints (job_id, record, state, owner, updated) "
+                "VALUES (?, ?, 'running', ?, ?)", (job_id, json.dumps(record), owner, time.time()))
+
+    def _set_state(self, job_id: str, record: Dict, state: str, owner: Optional[str]):
+        with self.lock:
+            self.conn.execute("UPDATE job_checkpoints SET record = ?, state = ?, owner = ?, updated = ? WHERE job_id = ?",
+                              (json.dumps(record), state, owner, time.time(), job_id))
+
+    def mark_draining(self, job_id: str, record: Dict, owner: str):
+        self._set_state(job_id, record, 'draining', owner)
+
+    def mark_interrupted(self, job_id: str, record: Dict):
+        """The job stopped at a safe point; whichever worker starts next may resume it"""
+        self._set_state(job_id, record, 'interrupted', None)
+
+    def finish(self, job_id: str):
+        """Drop a finished job's checkpoint, progress and preserved inputs"""
+        with self.lock:
+            self.conn.execute("DELETE FROM job_checkpoints WHERE job_id = ?", (job_id,))
+            self.conn.execute("DELETE FROM account_progress WHERE job_id = ?", (job_id,))
+        shutil.rmtree(os.path.join(self.inputs_dir, job_id), ignore_errors=True)
+
+    def claim(self, job_id: str, owner: str, expected_owner: Optional[str]) -> bool:
+        """Take over an unfinished job; only one worker wins if several start at once"""
+        with self.lock:
+            cursor = self.conn.execute(
+                f"UPDATE job_checkpoints SET state = 'resuming', owner = ?, updated = ? "
+                f"WHERE job_id = ? AND owner IS ? AND state IN ({', '.join('?' * len(UNFINISHED_STATES))})",
+                (owner, time.time(), job_id, expected_owner) + UNFINISHED_STATES)
+            return cursor.rowcount == 1
+
+    def unfinished(self) -> List[Dict]:
+        """Checkpointed jobs that never reached a final status, oldest first"""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM job_checkpoints WHERE state IN ({', '.join('?' * len(UNFINISHED_STATES))}) "
+                f"ORDER BY updated", UNFINISHED_STATES).fetchall()
+        return [{'job_id': row['job_id'], 'record': json.loads(row['record']), 'state': row['state'],
+                 'owner': row['owner'], 'updated': row['updated']} for row in rows]
+
+    def record_progress(self, job_id: str, account: str, status: str):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO account_progress (job_id, account, status, updated) VALUES (?, ?, ?, ?)",
+                (job_id, account, status, time.time()))
+
+    def completed_accounts(self, job_id: str) -> Set[str]:
+        with self.lock:
+            rows = self.conn.execute("SELECT account FROM account_progress WHERE job_id = ? AND status = 'completed'",
+                                     (job_id,)).fetchall()
+        return {row['account'] for row in rows}
+
+    def reset_progress(self, job_id: str):
+        """Start a new pass over all accounts (recurring warmup sessions)"""
+        with self.lock:
+            self.conn.execute("DELETE FROM account_progress WHERE job_id = ?", (job_id,))
+
+    def preserve_inputs(self, job_id: str, config: Dict, keys=('target_file', 'prompt_file')) -> Dict:
+        """Copy a job's uploaded input files somewhere that outlives temp cleanup; returns the updated config"""
+        config = dict(config)
+        for key in keys:
+            path = config.get(key)
+            if not path or not os.path.exists(path):
+                continue
+            target_dir = os.path.join(self.inputs_dir, job_id)
+            if os.path.dirname(os.path.abspath(path)) == os.path.abspath(target_dir):
+                continue
+            os.makedirs(target_dir, exist_ok=True)
+            preserved = os.path.join(target_dir, f"{key}{os.path.splitext(path)[1]}")
+            shutil.copyfile(path, preserved)
+            config[key] = preserved
+        return config
+
+    # Drain
+
+    def on_drain(self, callback: Callable[[], None]):
+        self.drain_callbacks.append(callback)
+
+    def begin_drain(self, reason: str = "shutdown"):
+        """Refuse new jobs and tell running ones to stop at their next safe point (idempotent)"""
+        if self.draining.is_set():
+            return
+        self.draining.set()
+        logger.warning(f"Draining jobs: {reason}")
+        for callback in self.drain_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Drain callback failed: {e}")
+
+    def install_signal_handlers(self, loop):
+        """Chain a drain in front of the server's own SIGTERM handler, which still shuts the server down
+        (must run on the main thread, after the server installed its handlers)"""
+        self.loop = loop
+        for signum in DRAIN_SIGNALS:
+            previous = signal.getsignal(signum)
+            if previous is self._handle_signal:
+                continue
+            self.previous_handlers[signum] = previous
+            signal.signal(signum, self._handle_signal)
+
+    def _handle_signal(self, signum, frame):
+        # Only schedule the drain here: the interrupted frame may hold a lock the drain needs
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.begin_drain, signal.Signals(signum).name)
+        else:
+            self.draining.set()
+        previous = self.previous_handlers.get(signum)
+        if callable(previous):
+            previous(signum, frame)
+
+
+# Global instance
+job_lifecycle = JobLifecycleManager()
@@ -0,0 +1,189 @@
+"""
+JSON File Store
+Cross-process locked, atomically replaced JSON files with an optional read-mostly cache
+"""
+
+import os
+import copy
+import errno
+import json
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from metrics import time_json_store
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Compact form: no indentation or spaces after separators
+JSON_SEPARATORS = (',', ':')
+
+
+def dump_json(data: Any) -> str:
+    return json.dumps(data, separators=JSON_SEPARATORS, ensure_ascii=False)
+
+
+def atomic_write_json(path: str, data: Any, store: Optional[str] = None):
+    """Write to a temp file in the same directory, fsync, then rename over the target.
+
+    Readers see either the old or the new file, never a partial one. A file that can't be renamed
+    over (a single-file bind mount, as in docker-compose.yml) is rewritten in place instead, so
+    callers should hold the store lock.
+    """
+    payload = dump_json(data)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with time_json_store(store or os.path.basename(path), 'write'):
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.replace(tmp_path, path)
+            except OSError as e:
+                if e.errno not in (errno.EBUSY, errno.EXDEV):
+                    raise
+                os.remove(tmp_path)
+                _write_in_place(path, payload)
+        _fsync_directory(directory)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write_in_place(path: str, payload: str):
+    with open(path, 'r+' if os.path.exists(path) else 'w', encoding='utf-8') as f:
+        f.write(payload)
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _fsync_directory(directory: str):
+    """Persist the rename itself (POSIX only)"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def read_json(path: str, default: Any = None, store: Optional[str] = None) -> Any:
+    """Read a JSON file; missing or unreadable files give default"""
+    try:
+        with time_json_store(store or os.path.basename(path), 'read'), open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Could not read {path}: {e}")
+        return default
+
+
+class JSONFileStore:
+    """One JSON document on disk, shared safely between threads, workers and CLI tools.
+
+    Writers hold an exclusive fcntl lock on a sidecar `<path>.lock` file (the data file itself is
+    replaced on every write, so it can't carry the lock). Use `with store.lock():` around a
+    read-modify-write; read() and write() inside it don't re-lock.
+    """
+
+    def __init__(self, path: str, default_factory: Callable[[], Any] = dict, name: Optional[str] = None,
+                 cache: bool = False):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.default_factory = default_factory
+        self.name = name or os.path.basename(path)
+        self.cache = cache
+        self.thread_lock = threading.RLock()
+        self.holder = threading.local()
+        # ((st_mtime_ns, st_size, st_ino), value) for the file version the value was parsed from
+        self.cached = (None, None)
+
+    def signature(self):
+        """Identity of the file version on disk (None if missing)"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    @contextmanager
+    def lock(self, shared: bool = False):
+        """Hold the store's file lock; re-entrant within a thread"""
+        depth = getattr(self.holder, 'depth', 0)
+        if depth:
+            self.holder.depth = depth + 1
+            try:
+                yield
+            finally:
+                self.holder.depth -= 1
+            return
+
+        with self.thread_lock:
+            handle = None
+            if fcntl is not None:
+                directory = os.path.dirname(os.path.abspath(self.lock_path))
+                os.makedirs(directory, exist_ok=True)
+                handle = open(self.lock_path, 'a')
+                fcntl.flock(handle.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            self.holder.depth = 1
+            try:
+                yield
+            finally:
+                self.holder.depth = 0
+                if handle is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                    handle.close()
+
+    def ensure_exists(self):
+        """Create the file with the default value if it is missing"""
+        if os.path.exists(self.path):
+            return
+        with self.lock():
+            if not os.path.exists(self.path):
+                self.write(self.default_factory())
+
+    def read(self, copy_result: bool = True) -> Any:
+        """Current document; pass copy_result=False only if the caller never mutates the result"""
+        if self.cache:
+            signature = self.signature()
+            cached_signature, value = self.cached
+            if signature is not None and signature == cached_signature:
+                return copy.deepcopy(value) if copy_result else value
+
+        with self.lock(shared=True):
+            signature = self.signature()
+            value = read_json(self.path, None, self.name)
+        if value is None:
+            return self.default_factory()
+        if self.cache:
+            self.cached = (signature, value)
+            return copy.deepcopy(value) if copy_result else value
+        return value
+
+    def write(self, data: Any):
+        """Atomically replace the document"""
+        with self.lock():
+            atomic_write_json(self.path, data, self.name)
+            if self.cache:
+                self.cached = (self.signature(), copy.deepcopy(data))
@@ -43,25 +43,20 @@ def auto_assign_missing_proxies():
     print("🔄 Auto-assigning proxies to accounts without assignments...")
     
     try:
-        all_accounts = get_all_account_usernames()
-        assigned_count = 0
+        # One locked pass and a single write for all accounts
+        result = proxy_manager.bulk_assign(get_all_account_usernames(), allow_partial=True)
+        assigned_count = len(result['assigned'])
         
-        for username in all_accounts:
-            try:
-                existing_proxy = proxy_manager.get_account_proxy(username)
-                if not existing_proxy:
-                    proxy = proxy_manager.assign_proxy_to_account(username)
-                    if proxy:
-                        proxy_info = proxy_manager.parse_proxy(proxy)
-                        print(f"✅ Assigned proxy {proxy_info['host']}:{proxy_info['port']} to {username}")
-                        assigned_count += 1
-                    else:
-                        print(f"❌ Failed to assign proxy to {username}")
-                else:
-                    proxy_info = proxy_manager.parse_proxy(existing_proxy)
-                    print(f"✓ {username} already has proxy {proxy_info['host']}:{proxy_info['port']}")
-            except Exception as e:
-                print(f"❌ Error processing {username}: {e}")
+        for username, existing_proxy in result['already_assigned'].items():
+            proxy_info = proxy_manager.parse_proxy(existing_proxy)
+            print(f"✓ {username} already has proxy {proxy_info['host']}:{proxy_info['port']}")
+        
+        for username, proxy in result['assigned'].items():
+            proxy_info = proxy_manager.parse_proxy(proxy)
+            print(f"✅ Assigned proxy {proxy_info['host']}:{proxy_info['port']} to {username}")
+        
+        for username in result['unassigned']:
+            print(f"❌ Failed to assign proxy to {username}: no available proxies left")
         
         print(f"\n📊 Auto-assigned {assigned_count} new proxies")
         return assigned_count > 0
@@ -0,0 +1,202 @@
+"""
+Content-Addressed Media Cache
+Stores uploaded media once per SHA-256 with per-job references and LRU eviction under a disk quota
+"""
+
+import os
+import uuid
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from upload_utils import parse_size, stream_upload_to_path, MAX_FILE_SIZE
+from json_store import JSONFileStore
+
+logger = logging.getLogger(__name__)
+
+MEDIA_CACHE_DIR = 'media_cache'
+MEDIA_CACHE_QUOTA = parse_size(os.getenv('MEDIA_CACHE_QUOTA', '2GB'), 2 * 1024 ** 3)
+
+
+def is_valid_sha256(value: str) -> bool:
+    return bool(value) and len(value) == 64 and all(c in '0123456789abcdef' for c in value.lower())
+
+
+class MediaCacheManager:
+    """Blob files plus a shared index.json of {sha256: entry}.
+
+    Every worker and CLI tool uses the same index, so each change is a read-modify-write under the
+    index's file lock and a job's references are visible to every worker's eviction.
+    """
+
+    def __init__(self, cache_dir: str = MEDIA_CACHE_DIR, quota_bytes: int = MEDIA_CACHE_QUOTA):
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self.quota_bytes = quota_bytes
+        self.store = JSONFileStore(self.index_file, dict, 'media_cache', cache=True)
+        # Whether a referencing job can still use its blob; refs of jobs that died with their worker are ignored
+        self.ref_is_live: Callable[[str], bool] = lambda job_id: True
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._drop_missing_blobs()
+
+    def set_ref_check(self, check: Callable[[str], bool]):
+        self.ref_is_live = check
+
+    def load_index(self) -> Dict[str, Dict]:
+        """Load cache index from file"""
+        return self.store.read()
+
+    def _blob_path(self, sha256: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, f"{sha256}{ext}")
+
+    def _drop_missing_blobs(self):
+        with self.store.lock():
+            entries = self.store.read()
+            missing = [sha for sha, entry in entries.items()
+                       if not os.path.exists(self._blob_path(sha, entry.get('ext', '')))]
+            for sha in missing:
+                del entries[sha]
+            if missing:
+                self.store.write(entries)
+
+    def lookup(self, sha256: str) -> Optional[Dict]:
+        """Return cache entry metadata (with path) for a hash, or None"""
+        sha256 = (sha256 or '').lower()
+        entry = self.store.read(copy_result=False).get(sha256)
+        if not entry:
+            return None
+        path = self._blob_path(sha256, entry.get('ext', ''))
+        if not os.path.exists(path):
+            self._drop_missing_blobs()
+            return None
+        return dict(entry, sha256=sha256, path=path, refs=list(entry.get('refs', [])))
+
+    async def ingest_upload(self, upload, filename: str) -> Optional[Dict]:
+        """Stream an upload into the cache, deduplicating by content hash.
+
+        Raises UploadTooLargeError for a file that could never fit in the quota.
+        """
+        ext = os.path.splitext(filename or '')[1].lower()
+        tmp_path = os.path.join(self.cache_dir, f".incoming_{uuid.uuid4().hex}{ext}")
+        info = await stream_upload_to_path(upload, tmp_path, min(MAX_FILE_SIZE, self.quota_bytes))
+        sha256 = info['sha256']
+        now = datetime.now().isoformat()
+
+        with self.store.lock():
+            entries = self.store.read()
+            entry = entries.get(sha256)
+            if entry and os.path.exists(self._blob_path(sha256, entry.get('ext', ''))):
+                # Identical content already cached - keep the existing blob
+                os.remove(tmp_path)
+                entry['last_used'] = now
+            else:
+                os.replace(tmp_path, self._blob_path(sha256, ext))
+                entries[sha256] = {
+                    'size': info['size'],
+                    'ext': ext,
+                    'filename': filename,
+                    'created': now,
+                    'last_used': now,
+                    'refs': [],
+                }
+            self.store.write(entries)
+
+        # The new blob has no refs until its job acquires it; make room around it instead of evicting it
+        self.evict(keep=(sha256,))
+        return self.lookup(sha256)
+
+    def acquire(self, sha256: str, job_id: str) -> Optional[str]:
+        """Reference a cached blob for a job; returns its path or None if missing"""
+        sha256 = (sha256 or '').lower()
+        with self.store.lock():
+            entries = self.store.read()
+            entry = entries.get(sha256)
+            if not entry:
+                return None
+            path = self._blob_path(sha256, entry.get('ext', ''))
+            if not os.path.exists(path):
+                return None
+            refs = entry.setdefault('refs', [])
+            if job_id not in refs:
+                refs.append(job_id)
+            entry['last_used'] = datetime.now().isoformat()
+            self.store.write(entries)
+            return path
+
+    def set_metadata(self, sha256: str, **fields):
+        """Attach derived metadata (e.g. preflight results) to a cache entry"""
+        sha256 = (sha256 or '').lower()
+        with self.store.lock():
+            entries = self.store.read()
+            entry = entries.get(sha256)
+            if not entry:
+                return
+            entry.update(fields)
+            self.store.write(entries)
+
+    def release(self, job_id: str):
+        """Drop all references held by a job and evict if over quota"""
+        changed = False
+        with self.store.lock():
+            entries = self.store.read()
+            for entry in entries.values():
+                if job_id in entry.get('refs', []):
+                    entry['refs'].remove(job_id)
+                    changed = True
+            if changed:
+                self.store.write(entries)
+        if changed:
+            self.evict()
+
+    def total_size(self) -> int:
+        return sum(entry.get('size', 0) for entry in self.store.read(copy_result=False).values())
+
+    def evict(self, keep: Sequence[str] = ()) -> List[str]:
+        """Remove least recently used unreferenced blobs (other than keep) until under quota"""
+        evicted = []
+        with self.store.lock():
+            entries = self.store.read()
+            total = sum(entry.get('size', 0) for entry in entries.values())
+            if total <= self.quota_bytes:
+                return evicted
+            stale = False
+            candidates = []
+            for sha256, entry in entries.items():
+                live_refs = [job_id for job_id in entry.get('refs', []) if self.ref_is_live(job_id)]
+                if len(live_refs) != len(entry.get('refs', [])):
+                    entry['refs'] = live_refs
+                    stale = True
+                if not live_refs and sha256 not in keep:
+                    candidates.append((sha256, entry))
+            candidates.sort(key=lambda item: item[1].get('last_used', ''))
+            for sha256, entry in candidates:
+                if total <= self.quota_bytes:
+                    break
+                try:
+                    os.remove(self._blob_path(sha256, entry.get('ext', '')))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not evict cached media {sha256}: {e}")
+                    continue
+                total -= entry.get('size', 0)
+                del entries[sha256]
+                evicted.append(sha256)
+            if evicted or stale:
+                self.store.write(entries)
+        for sha256 in evicted:
+            logger.info(f"Evicted cached media {sha256}")
+        return evicted
+
+    def get_stats(self) -> Dict:
+        entries = self.store.read(copy_result=False)
+        return {
+            'entries': len(entries),
+            'total_bytes': sum(entry.get('size', 0) for entry in entries.values()),
+            'quota_bytes': self.quota_bytes,
+            'referenced': sum(1 for entry in entries.values() if entry.get('refs')),
+        }
+
+
+# Global instance
+media_cache = MediaCacheManager()
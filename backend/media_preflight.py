@@ -0,0 +1,480 @@
+"""
+Media Preflight
+Pure-Python header parsing for images and video containers, so unusable media fails before a browser launches
+"""
+
+import os
+import struct
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever parsing rules change so persisted results are recomputed
+PREFLIGHT_VERSION = 1
+
+# Instagram feed limits; aspect ratio outside the range is cropped rather than rejected
+MIN_ASPECT_RATIO = 0.8
+MAX_ASPECT_RATIO = 1.91
+MIN_RECOMMENDED_WIDTH = 320
+MIN_VIDEO_DURATION = float(os.getenv('MIN_VIDEO_DURATION', '3'))
+MAX_VIDEO_DURATION = float(os.getenv('MAX_VIDEO_DURATION', '900'))
+SUPPORTED_VIDEO_CODECS = {'h264', 'hevc'}
+
+# Upper bounds on how much of a file is read while looking for metadata
+MAX_MOOV_BYTES = 16 * 1024 * 1024
+EBML_SCAN_BYTES = 1024 * 1024
+JPEG_MAX_SEGMENTS = 512
+
+MAX_CACHED_RESULTS = 512
+
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.m4v', '.avi', '.mkv', '.webm'}
+
+FOURCC_CODECS = {
+    'avc1': 'h264', 'avc3': 'h264', 'h264': 'h264', 'x264': 'h264',
+    'hvc1': 'hevc', 'hev1': 'hevc', 'hevc': 'hevc',
+    'mp4v': 'mpeg4', 'xvid': 'mpeg4', 'divx': 'mpeg4', 'dx50': 'mpeg4', 'fmp4': 'mpeg4',
+    'av01': 'av1', 'vp08': 'vp8', 'vp09': 'vp9', 'mjpg': 'mjpeg', 'jpeg': 'mjpeg',
+    'apch': 'prores', 'apcn': 'prores', 'apcs': 'prores', 'apco': 'prores', 'ap4h': 'prores',
+    'mp4a': 'aac', 'ac-3': 'ac3', 'ec-3': 'eac3', 'opus': 'opus', '.mp3': 'mp3', 'sowt': 'pcm', 'twos': 'pcm',
+}
+
+MATROSKA_CODECS = {
+    'V_MPEG4/ISO/AVC': 'h264', 'V_MPEGH/ISO/HEVC': 'hevc', 'V_VP8': 'vp8', 'V_VP9': 'vp9',
+    'V_AV1': 'av1', 'V_MPEG4/ISO/ASP': 'mpeg4', 'V_MJPEG': 'mjpeg',
+    'A_AAC': 'aac', 'A_OPUS': 'opus', 'A_VORBIS': 'vorbis', 'A_MPEG/L3': 'mp3', 'A_AC3': 'ac3',
+}
+
+
+class MediaFormatError(Exception):
+    """Raised when a file's headers are missing, truncated or not a supported format"""
+
+
+def _read_exact(f, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) < size:
+        raise MediaFormatError("File is truncated")
+    return data
+
+
+# --- Images ---
+
+def _parse_png(f, head: bytes) -> Dict:
+    if len(head) < 24 or head[12:16] != b'IHDR':
+        raise MediaFormatError("PNG is missing its IHDR header")
+    width, height = struct.unpack('>II', head[16:24])
+    return {'container': 'png', 'codec': 'png', 'width': width, 'height': height}
+
+
+def _parse_gif(f, head: bytes) -> Dict:
+    if len(head) < 10:
+        raise MediaFormatError("GIF header is truncated")
+    width, height = struct.unpack('<HH', head[6:10])
+    return {'container': 'gif', 'codec': 'gif', 'width': width, 'height': height}
+
+
+def _parse_bmp(f, head: bytes) -> Dict:
+    if len(head) < 26:
+        raise MediaFormatError("BMP header is truncated")
+    dib_size = struct.unpack('<I', head[14:18])[0]
+    if dib_size == 12:
+        width, height = struct.unpack('<HH', head[18:22])
+    else:
+        width, height = struct.unpack('<ii', head[18:26])
+    return {'container': 'bmp', 'codec': 'bmp', 'width': abs(width), 'height': abs(height)}
+
+
+def _parse_webp(f, head: bytes) -> Dict:
+    if len(head) < 30:
+        raise MediaFormatError("WebP header is truncated")
+    chunk = head[12:16]
+    if chunk == b'VP8 ':
+        if head[23:26] != b'\x9d\x01\x2a':
+            raise MediaFormatError("WebP VP8 frame header is invalid")
+        width, height = struct.unpack('<HH', head[26:30])
+        width, height = width & 0x3FFF, height & 0x3FFF
+    elif chunk == b'VP8L':
+        if head[20] != 0x2F:
+            raise MediaFormatError("WebP lossless signature is invalid")
+        bits = struct.unpack('<I', head[21:25])[0]
+        width, height = (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    elif chunk == b'VP8X':
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+    else:
+        raise MediaFormatError("Unknown WebP chunk")
+    return {'container': 'webp', 'codec': 'webp', 'width': width, 'height': height}
+
+
+# SOF markers carry frame dimensions; C4 (DHT), C8 (JPG) and CC (DAC) share the range but don't
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _parse_jpeg(f, head: bytes) -> Dict:
+    f.seek(2)
+    for _ in range(JPEG_MAX_SEGMENTS):
+        byte = _read_exact(f, 1)
+        if byte != b'\xff':
+            raise MediaFormatError("JPEG marker stream is corrupt")
+        marker = _read_exact(f, 1)[0]
+        while marker == 0xFF:
+            marker = _read_exact(f, 1)[0]
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue
+        if marker in (0xD9, 0xDA):
+            break
+        length = struct.unpack('>H', _read_exact(f, 2))[0]
+        if length < 2:
+            raise MediaFormatError("JPEG segment length is invalid")
+        if marker in _JPEG_SOF_MARKERS:
+            _, height, width = struct.unpack('>BHH', _read_exact(f, 5))
+            return {'container': 'jpeg', 'codec': 'jpeg', 'width': width, 'height': height}
+        f.seek(length - 2, os.SEEK_CUR)
+    raise MediaFormatError("JPEG has no frame header")
+
+
+# --- ISO base media (mp4/mov/m4v) ---
+
+_BMFF_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts'}
+
+
+def _iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack('>I4s', data[pos:pos + 8])
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack('>Q', data[pos + 8:pos + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise MediaFormatError(f"Box '{box_type.decode('latin-1')}' is truncated")
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _read_moov(f, file_size: int) -> Tuple[bytes, str]:
+    """Walk top-level boxes by seeking and return the moov payload and major brand"""
+    brand = ''
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        size, box_type = struct.unpack('>I4s', _read_exact(f, 8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', _read_exact(f, 8))[0]
+            header = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header:
+            raise MediaFormatError("Container box size is invalid")
+        if box_type == b'ftyp':
+            brand = _read_exact(f, 4).decode('latin-1').strip()
+        elif box_type == b'moov':
+            if size > MAX_MOOV_BYTES:
+                raise MediaFormatError("Movie header is unreasonably large")
+            return _read_exact(f, size - header), brand
+        pos += size
+    raise MediaFormatError("Video has no movie header (moov box); file may be incomplete")
+
+
+def _parse_bmff(f, head: bytes) -> Dict:
+    f.seek(0, os.SEEK_END)
+    moov, brand = _read_moov(f, f.tell())
+    info = {'container': 'mov' if brand == 'qt' else 'mp4', 'codec': None, 'audio_codec': None,
+            'width': 0, 'height': 0, 'duration': None, 'rotation': 0}
+
+    for box_type, start, end in _iter_boxes(moov):
+        if box_type == b'mvhd':
+            version = moov[start]
+            if version == 1:
+                timescale, duration = struct.unpack('>IQ', moov[start + 20:start + 32])
+            else:
+                timescale, duration = struct.unpack('>II', moov[start + 12:start + 20])
+            if timescale:
+                info['duration'] = duration / timescale
+        elif box_type == b'trak':
+            _parse_trak(moov, start, end, info)
+    return info
+
+
+def _parse_trak(data: bytes, start: int, end: int, info: Dict):
+    track = {}
+    stack = [(start, end)]
+    while stack:
+        box_start, box_end = stack.pop()
+        for box_type, child_start, child_end in _iter_boxes(data, box_start, box_end):
+            if box_type in _BMFF_CONTAINERS:
+                stack.append((child_start, child_end))
+            elif box_type == b'tkhd':
+                offset = child_start + (88 if data[child_start] == 1 else 76)
+                matrix_offset = offset - 36
+                a, b = struct.unpack('>ii', data[matrix_offset:matrix_offset + 8])
+                width, height = struct.unpack('>II', data[offset:offset + 8])
+                track['width'], track['height'] = width >> 16, height >> 16
+                if a == 0 and b != 0:
+                    track['rotation'] = 90 if b > 0 else 270
+                elif a < 0:
+                    track['rotation'] = 180
+            elif box_type == b'hdlr':
+                track['handler'] = data[child_start + 8:child_start + 12]
+            elif box_type == b'stsd' and child_end - child_start >= 16:
+                entry_start = child_start + 8
+                track['fourcc'] = data[entry_start + 4:entry_start + 8].decode('latin-1')
+                if entry_start + 36 <= child_end:
+                    track['entry_size'] = struct.unpack('>HH', data[entry_start + 32:entry_start + 36])
+
+    fourcc = track.get('fourcc', '')
+    codec = FOURCC_CODECS.get(fourcc.lower(), fourcc.strip() or None)
+    if track.get('handler') == b'vide' and not info['codec']:
+        info['codec'] = codec
+        width, height = track.get('width', 0), track.get('height', 0)
+        if not (width and height) and 'entry_size' in track:
+            width, height = track['entry_size']
+        info['width'], info['height'] = width, height
+        info['rotation'] = track.get('rotation', 0)
+    elif track.get('handler') == b'soun' and not info['audio_codec']:
+        info['audio_codec'] = codec
+
+
+# --- AVI (RIFF) ---
+
+def _parse_avi(f, head: bytes) -> Dict:
+    f.seek(0)
+    data = f.read(EBML_SCAN_BYTES)
+    info = {'container': 'avi', 'codec': None, 'audio_codec': None, 'width': 0, 'height': 0, 'duration': None}
+    avih = data.find(b'avih')
+    if avih < 0 or avih + 48 > len(data):
+        raise MediaFormatError("AVI main header is missing")
+    us_per_frame, _, _, _, total_frames = struct.unpack('<5I', data[avih + 8:avih + 28])
+    info['width'], info['height'] = struct.unpack('<II', data[avih + 40:avih + 48])
+    if us_per_frame and total_frames:
+        info['duration'] = total_frames * us_per_frame / 1_000_000
+
+    pos = data.find(b'strh')
+    while 0 <= pos and pos + 16 <= len(data):
+        stream_type, handler = data[pos + 8:pos + 12], data[pos + 12:pos + 16].decode('latin-1')
+        strf = data.find(b'strf', pos)
+        if stream_type == b'vids' and not info['codec']:
+            fourcc = handler
+            if 0 <= strf and strf + 28 <= len(data):
+                fourcc = data[strf + 24:strf + 28].decode('latin-1') or handler
+            info['codec'] = FOURCC_CODECS.get(fourcc.lower(), fourcc.strip() or None)
+        elif stream_type == b'auds' and not info['audio_codec'] and 0 <= strf:
+            format_tag = struct.unpack('<H', data[strf + 8:strf + 10])[0]
+            info['audio_codec'] = {0x55: 'mp3', 0xFF: 'aac', 0x2000: 'ac3', 0x1: 'pcm'}.get(format_tag, hex(format_tag))
+        pos = data.find(b'strh', pos + 4)
+    return info
+
+
+# --- Matroska / WebM (EBML) ---
+
+_EBML_MASTERS = {0x1A45DFA3, 0x18538067, 0x1549A966, 0x1654AE6B, 0xAE, 0xE0}
+_EBML_CLUSTER = 0x1F43B675
+
+
+class _EndOfHeaders(Exception):
+    """Raised at the first cluster; everything needed precedes it"""
+
+
+def _read_vint(data: bytes, pos: int, keep_marker: bool) -> Tuple[int, int]:
+    if pos >= len(data):
+        raise MediaFormatError("EBML element is truncated")
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or pos + length > len(data):
+        raise MediaFormatError("EBML variable-length integer is invalid")
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return (-1 if unknown else value), pos + length
+
+
+def _parse_ebml(f, head: bytes) -> Dict:
+    f.seek(0)
+    data = f.read(EBML_SCAN_BYTES)
+    info = {'container': 'matroska', 'codec': None, 'audio_codec': None, 'width': 0, 'height': 0, 'duration': None}
+    timecode_scale = 1_000_000
+    raw_duration = None
+    track = {}
+
+    def walk(pos: int, end: int):
+        nonlocal timecode_scale, raw_duration, track
+        while pos < end:
+            element_id, pos = _read_vint(data, pos, keep_marker=True)
+            size, pos = _read_vint(data, pos, keep_marker=False)
+            if element_id == _EBML_CLUSTER:
+                raise _EndOfHeaders
+            element_end = end if size < 0 else min(pos + size, end)
+            if element_id in _EBML_MASTERS:
+                if element_id == 0xAE:
+                    track = {}
+                walk(pos, element_end)
+                if element_id == 0xAE:
+                    _finish_matroska_track(track, info)
+            elif element_id == 0x4282:
+                info['container'] = data[pos:element_end].decode('latin-1').rstrip('\x00')
+            elif element_id == 0x2AD7B1:
+                timecode_scale = int.from_bytes(data[pos:element_end], 'big')
+            elif element_id == 0x4489:
+                raw_duration = struct.unpack('>f' if size == 4 else '>d', data[pos:element_end])[0]
+            elif element_id == 0x83:
+                track['type'] = int.from_bytes(data[pos:element_end], 'big')
+            elif element_id == 0x86:
+                track['codec_id'] = data[pos:element_end].decode('latin-1').rstrip('\x00')
+            elif element_id == 0xB0:
+                track['width'] = int.from_bytes(data[pos:element_end], 'big')
+            elif element_id == 0xBA:
+                track['height'] = int.from_bytes(data[pos:element_end], 'big')
+            pos = element_end
+
+    try:
+        walk(0, len(data))
+    except _EndOfHeaders:
+        pass
+    except (MediaFormatError, struct.error):
+        # A truncated element at the edge of the scan window is fine once the tracks were read
+        if not info['codec']:
+            raise MediaFormatError("Matroska headers are corrupt")
+    if raw_duration is not None:
+        info['duration'] = raw_duration * timecode_scale / 1_000_000_000
+    return info
+
+
+def _finish_matroska_track(track: Dict, info: Dict):
+    codec = MATROSKA_CODECS.get(track.get('codec_id', ''), track.get('codec_id'))
+    if track.get('type') == 1 and not info['codec']:
+        info['codec'] = codec
+        info['width'], info['height'] = track.get('width', 0), track.get('height', 0)
+    elif track.get('type') == 2 and not info['audio_codec']:
+        info['audio_codec'] = codec
+
+
+def _sniff(head: bytes):
+    """Pick a parser from magic bytes; returns (kind, parser) or (None, None)"""
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image', _parse_png
+    if head.startswith(b'\xff\xd8'):
+        return 'image', _parse_jpeg
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image', _parse_gif
+    if head.startswith(b'BM'):
+        return 'image', _parse_bmp
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image', _parse_webp
+    if head[:4] == b'RIFF' and head[8:12] == b'AVI ':
+        return 'video', _parse_avi
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return 'video', _parse_ebml
+    if head[4:8] in (b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip'):
+        return 'video', _parse_bmff
+    return None, None
+
+
+def analyze_media(path: str, filename: Optional[str] = None) -> Dict:
+    """Parse media headers without decoding frames and check them against posting limits"""
+    filename = filename or os.path.basename(path)
+    ext = os.path.splitext(filename)[1].lower()
+    result = {
+        'version': PREFLIGHT_VERSION, 'ok': False, 'kind': None, 'container': None, 'codec': None,
+        'audio_codec': None, 'width': None, 'height': None, 'aspect_ratio': None, 'duration': None,
+        'size': None, 'errors': [], 'warnings': [],
+    }
+    try:
+        result['size'] = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            head = f.read(64)
+            kind, parser = _sniff(head)
+            if not parser:
+                raise MediaFormatError("Unrecognized or corrupt media file")
+            result['kind'] = kind
+            info = parser(f, head)
+    except MediaFormatError as e:
+        result['errors'].append(str(e))
+        return result
+    except (OSError, struct.error, IndexError, UnicodeDecodeError) as e:
+        result['errors'].append(f"Could not read media headers: {e}")
+        return result
+
+    rotation = info.pop('rotation', 0)
+    result.update(info)
+    width, height = result['width'] or 0, result['height'] or 0
+    if rotation in (90, 270):
+        width, height = height, width
+        result['width'], result['height'] = width, height
+
+    if (kind == 'video') != (ext in VIDEO_EXTENSIONS):
+        result['warnings'].append(f"File extension '{ext}' does not match its {kind} content")
+
+    if kind == 'video':
+        if not result['codec']:
+            result['errors'].append("Video has no video track")
+        elif result['codec'] not in SUPPORTED_VIDEO_CODECS:
+            result['warnings'].append(f"Video codec '{result['codec']}' may be rejected; H.264 or HEVC is recommended")
+        duration = result['duration']
+        if duration is None:
+            result['warnings'].append("Could not determine video duration")
+        elif duration < MIN_VIDEO_DURATION:
+            result['errors'].append(f"Video is {duration:.1f}s; minimum is {MIN_VIDEO_DURATION:g}s")
+        elif duration > MAX_VIDEO_DURATION:
+            result['errors'].append(f"Video is {duration:.0f}s; maximum is {MAX_VIDEO_DURATION:g}s")
+
+    if not (width and height):
+        if kind == 'image' or result['codec']:
+            result['errors'].append("Media has no usable dimensions")
+    else:
+        aspect = width / height
+        result['aspect_ratio'] = round(aspect, 3)
+        if not MIN_ASPECT_RATIO <= aspect <= MAX_ASPECT_RATIO:
+            result['warnings'].append(
+                f"Aspect ratio {aspect:.2f} is outside {MIN_ASPECT_RATIO}-{MAX_ASPECT_RATIO} and will be cropped")
+        if width < MIN_RECOMMENDED_WIDTH:
+            result['warnings'].append(f"Width {width}px is below {MIN_RECOMMENDED_WIDTH}px and will be upscaled")
+
+    result['ok'] = not result['errors']
+    return result
+
+
+class MediaPreflightManager:
+    def __init__(self, max_cached: int = MAX_CACHED_RESULTS):
+        self.max_cached = max_cached
+        self.lock = threading.Lock()
+        self.results: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def check(self, path: str, filename: Optional[str] = None, sha256: Optional[str] = None,
+              cached: Optional[Dict] = None) -> Dict:
+        """Analyze media, reusing a result cached for the same content hash"""
+        if cached and cached.get('version') == PREFLIGHT_VERSION:
+            return cached
+        if sha256:
+            with self.lock:
+                result = self.results.get(sha256)
+                if result is not None:
+                    self.results.move_to_end(sha256)
+                    return result
+
+        result = analyze_media(path, filename)
+        if not result['ok']:
+            logger.info(f"Media preflight rejected {filename or path}: {'; '.join(result['errors'])}")
+
+        if sha256:
+            with self.lock:
+                self.results[sha256] = result
+                while len(self.results) > self.max_cached:
+                    self.results.popitem(last=False)
+        return result
+
+
+# Global instance
+media_preflight = MediaPreflightManager()
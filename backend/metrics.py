@@ -0,0 +1,246 @@
+"""
+Metrics Registry
+Minimal Prometheus text-format counters, gauges and histograms for capacity planning
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from fast JSON reads to slow page loads
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Process names counted as browser processes
+BROWSER_PROCESS_NAMES = ('chrome', 'chromium', 'headless_shell')
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric:
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+
+
+class Counter(_Metric):
+    metric_type = 'counter'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = list(self.values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in values]
+
+
+class Gauge(_Metric):
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def replace(self, samples: Dict[Tuple, float]):
+        """Swap in a full set of samples (used by scrape-time collectors)"""
+        with self.lock:
+            self.values = dict(samples)
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = list(self.values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in values]
+
+
+class Histogram(_Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., sum, count]
+        self.values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = [0] * len(self.buckets) + [0.0, 0]
+                self.values[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = [(key, list(series)) for key, series in self.values.items()]
+        lines = self.header()
+        for key, series in values:
+            for i, bound in enumerate(self.buckets):
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {series[i]}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], None]] = []
+        self.extra_renderers: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        metric = Gauge(name, help_text, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], None]):
+        """Register a callback that refreshes gauges right before each scrape"""
+        self.collectors.append(collector)
+
+    def register_renderer(self, renderer: Callable[[], List[str]]):
+        """Register a callback that contributes pre-rendered exposition lines"""
+        self.extra_renderers.append(renderer)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for renderer in self.extra_renderers:
+            try:
+                lines.extend(renderer())
+            except Exception as e:
+                logger.warning(f"Metrics renderer failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+# Global instance
+metrics_registry = MetricsRegistry()
+
+http_request_seconds = metrics_registry.histogram(
+    'http_request_duration_seconds', 'API request latency by route', ('method', 'route', 'status'))
+active_jobs = metrics_registry.gauge(
+    'automation_jobs', 'Automation jobs currently running, across workers', ('type',))
+job_statuses = metrics_registry.gauge(
+    'automation_job_statuses', 'Jobs started by this worker since it booted, by type and current status',
+    ('type', 'status'))
+browser_processes = metrics_registry.gauge(
+    'browser_processes', 'Running browser processes')
+browser_rss_bytes = metrics_registry.gauge(
+    'browser_rss_bytes', 'Resident memory of all browser processes')
+log_lines_total = metrics_registry.counter(
+    'script_log_lines_total', 'Script log lines written, by level', ('level',))
+json_store_seconds = metrics_registry.histogram(
+    'json_store_operation_seconds', 'JSON store read/write latency', ('store', 'operation'))
+cookie_store_lookups_total = metrics_registry.counter(
+    'cookie_store_lookups_total', 'Cookie store lookups by result', ('result',))
+proxy_probe_seconds = metrics_registry.histogram(
+    'proxy_probe_duration_seconds', 'Proxy connectivity probe latency', ('status',))
+selector_lookups_total = metrics_registry.counter(
+    'selector_lookups_total', 'Selector registry lookups by element and result (first, fallback, miss)',
+    ('element', 'result'))
+
+
+def time_json_store(store: str, operation: str):
+    """Context manager timing a JSON store read or write"""
+    return json_store_seconds.time(store=store, operation=operation)
+
+
+def read_browser_processes() -> Tuple[int, int]:
+    """Count browser processes and their total RSS in bytes (Linux /proc only)"""
+    count = 0
+    rss_bytes = 0
+    if not os.path.isdir('/proc'):
+        return count, rss_bytes
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/comm', 'r') as f:
+                name = f.read().strip().lower()
+            if not any(browser in name for browser in BROWSER_PROCESS_NAMES):
+                continue
+            count += 1
+            with open(f'/proc/{pid}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        rss_bytes += int(line.split()[1]) * 1024
+                        break
+        except (OSError, ValueError, IndexError):
+            # Process exited while scanning
+            continue
+    return count, rss_bytes
+
+
+def collect_browser_processes():
+    count, rss_bytes = read_browser_processes()
+    browser_processes.set(count)
+    browser_rss_bytes.set(rss_bytes)
+
+
+metrics_registry.register_collector(collect_browser_processes)
@@ -0,0 +1,26 @@
+"""
+Data Migrations
+One-time migrations that used to run on every app import: legacy activity log import and location backfill
+"""
+
+from auth import user_manager, ACTIVITY_LOG_FILE
+
+
+def main():
+    """Run all one-time data migrations (safe to re-run)"""
+    print("🛠️ Instagram Automation - Data Migrations")
+    print("=" * 60)
+    
+    imported = user_manager.activity_store.import_json(ACTIVITY_LOG_FILE)
+    print(f"📥 Imported {imported} legacy activity log entries from {ACTIVITY_LOG_FILE}")
+    
+    # Location lookups call an external geolocation API, one request per entry missing a location
+    missing = len(user_manager.activity_store.missing_location())
+    print(f"🌍 Backfilling location data for {missing} activity log entries...")
+    user_manager.migrate_logs_if_needed()
+    
+    print("\n✅ Migrations complete")
+
+
+if __name__ == "__main__":
+    main()
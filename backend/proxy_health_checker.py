@@ -12,6 +12,7 @@ from datetime import datetime
 
 from proxy_manager import proxy_manager, PROXIES
 from instagram_accounts import get_all_accounts
+from metrics import proxy_probe_seconds
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
@@ -25,6 +26,7 @@ class ProxyHealthChecker:
     
     async def test_proxy_connectivity(self, proxy_string: str, timeout: int = 10) -> Dict:
         """Test a single proxy's connectivity and response time"""
+        start_time = None
         result = {
             'proxy': proxy_string,
             'status': 'unknown',
@@ -69,6 +71,9 @@ class ProxyHealthChecker:
             result['status'] = 'failed'
             result['error'] = str(e)
         
+        if start_time is not None:
+            proxy_probe_seconds.observe(time.time() - start_time, status=result['status'])
+        
         return result
     
     async def test_all_proxies(self, log_callback=None) -> Dict:
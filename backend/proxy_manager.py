@@ -3,11 +3,11 @@ Proxy Management Module
 Handles proxy assignment and management for Instagram accounts
 """
 
-import json
-import os
-import threading
-from typing import List, Dict, Optional
+import heapq
+from typing import Iterable, List, Dict, Optional
 from datetime import datetime
+from json_store import JSONFileStore
+from coordination import coordinator
 
 # Proxy list - centralized proxy configuration
 PROXIES = [
@@ -34,36 +34,86 @@ PROXIES = [
 ]
 
 PROXY_ASSIGNMENTS_FILE = 'proxy_assignments.json'
+PROXY_INDEX = {proxy: index for index, proxy in enumerate(PROXIES)}
+
+
+class ProxyFreeList:
+    """Unassigned proxy indices: a min-heap for "next free" plus a set for membership (lazy deletion)"""
+
+    def __init__(self, free_indices: Iterable[int]):
+        self.free = set(free_indices)
+        self.heap = sorted(self.free)
+
+    def __contains__(self, index: int) -> bool:
+        return index in self.free
+
+    def __len__(self) -> int:
+        return len(self.free)
+
+    def take(self, index: Optional[int] = None) -> int:
+        """Claim a specific index, or the lowest free one"""
+        if index is None:
+            while self.heap:
+                candidate = heapq.heappop(self.heap)
+                if candidate in self.free:
+                    index = candidate
+                    break
+            else:
+                raise IndexError("No free proxy")
+        self.free.remove(index)
+        return index
+
+    def release(self, index: int):
+        if index not in self.free:
+            self.free.add(index)
+            heapq.heappush(self.heap, index)
+
+    def indices(self) -> List[int]:
+        return sorted(self.free)
+
 
 class ProxyManager:
     def __init__(self):
         self.assignments_file = PROXY_ASSIGNMENTS_FILE
-        self.lock = threading.Lock()
+        self.store = JSONFileStore(self.assignments_file, default_factory=dict, name='proxy_assignments', cache=True)
+        # Shared across workers so two processes can never bind the same proxy
+        self.lock = coordinator.lock_for('proxy_assignments')
+        # Free list and the file version it reflects; rebuilt only when another process changed the file
+        self.free_list: Optional[ProxyFreeList] = None
+        self.free_list_signature = None
         self.ensure_file_exists()
     
     def ensure_file_exists(self):
         """Ensure proxy_assignments.json exists"""
-        if not os.path.exists(self.assignments_file):
-            with open(self.assignments_file, 'w') as f:
-                json.dump({}, f)
+        self.store.ensure_exists()
     
-    def load_assignments(self) -> Dict:
-        """Load proxy assignments from file"""
-        try:
-            with open(self.assignments_file, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
+    def load_assignments(self, copy_result: bool = True) -> Dict:
+        """Load proxy assignments from file (cached until the file changes); copy_result=False for read-only use"""
+        return self.store.read(copy_result)
     
-    def save_assignments(self, assignments: Dict) -> bool:
-        """Save proxy assignments to file"""
+    def save_assignments(self, assignments: Dict, free_list_updated: bool = False) -> bool:
+        """Save proxy assignments to file; pass free_list_updated=True if the caller kept the free list in step"""
         try:
-            with open(self.assignments_file, 'w') as f:
-                json.dump(assignments, f, indent=2)
+            self.store.write(assignments)
+            if free_list_updated:
+                self.free_list_signature = self.store.signature()
+            else:
+                self.free_list = None
             return True
         except Exception:
+            # The free list may already reflect the unsaved change
+            self.free_list = None
             return False
     
+    def _get_free_list(self, assignments: Dict) -> ProxyFreeList:
+        """Free list for the current file (call with the lock held, after loading assignments)"""
+        signature = self.store.signature()
+        if self.free_list is None or signature != self.free_list_signature:
+            assigned = set(assignments.values())
+            self.free_list = ProxyFreeList(index for index, proxy in enumerate(PROXIES) if proxy not in assigned)
+            self.free_list_signature = signature
+        return self.free_list
+    
     def get_all_proxies(self) -> List[str]:
         """Get all available proxies"""
         return PROXIES.copy()
@@ -129,7 +179,7 @@ class ProxyManager:
         
         STRICT RULE: One proxy per account, one account per proxy (NO EXCEPTIONS)
         """
-        with self.lock:
+        with self.lock, self.store.lock():
             assignments = self.load_assignments()
             
             # Check if account already has a proxy assigned
@@ -137,14 +187,15 @@ class ProxyManager:
                 current_proxy = assignments[account_username]
                 raise ValueError(f"Account {account_username} already has a proxy assigned: {current_proxy}. Use reassign_proxy() to change it.")
             
+            free_list = self._get_free_list(assignments)
+            
             # If specific proxy index requested
             if proxy_index is not None:
                 if 0 <= proxy_index < len(PROXIES):
                     proxy = PROXIES[proxy_index]
                     
                     # STRICT CHECK: Ensure this proxy is not assigned to ANY other account
-                    assigned_proxies = set(assignments.values())
-                    if proxy in assigned_proxies:
+                    if proxy_index not in free_list:
                         # Find which account has this proxy
                         assigned_account = next(
                             (acc for acc, prx in assignments.items() if prx == proxy), 
@@ -153,9 +204,10 @@ class ProxyManager:
                         raise ValueError(f"STRICT BINDING VIOLATION: Proxy {proxy_index + 1} is already assigned to account: {assigned_account}")
                     
                     # Assign the proxy with strict binding
+                    free_list.take(proxy_index)
                     assignments[account_username] = proxy
                     
-                    if self.save_assignments(assignments):
+                    if self.save_assignments(assignments, free_list_updated=True):
                         return proxy
                     else:
                         raise Exception("Failed to save proxy assignment")
@@ -163,40 +215,77 @@ class ProxyManager:
                     raise ValueError(f"Invalid proxy index: {proxy_index} (available: 0-{len(PROXIES)-1})")
             
             # Auto-assign next available proxy with strict one-to-one binding
-            assigned_proxies = set(assignments.values())
-            available_proxies = [p for p in PROXIES if p not in assigned_proxies]
-            
-            if not available_proxies:
+            if not free_list:
                 raise Exception("No available proxies left for assignment. All proxies are bound to accounts.")
             
             # Assign the first available proxy with strict binding
-            proxy = available_proxies[0]
+            proxy = PROXIES[free_list.take()]
             assignments[account_username] = proxy
             
-            if self.save_assignments(assignments):
+            if self.save_assignments(assignments, free_list_updated=True):
                 return proxy
             else:
                 raise Exception("Failed to save proxy assignment")
     
+    def bulk_assign(self, usernames: List[str], allow_partial: bool = False) -> Dict:
+        """
+        Bind the lowest free proxies to every listed account without one, in one pass under one lock
+        and with a single write. All-or-nothing unless allow_partial, in which case accounts beyond
+        the free capacity are reported as unassigned.
+        
+        Returns {'assigned': {username: proxy}, 'already_assigned': {username: proxy}, 'unassigned': [username]}
+        """
+        with self.lock, self.store.lock():
+            assignments = self.load_assignments()
+            already_assigned = {}
+            missing = []
+            for username in dict.fromkeys(usernames):
+                if username in assignments:
+                    already_assigned[username] = assignments[username]
+                else:
+                    missing.append(username)
+            
+            free_list = self._get_free_list(assignments)
+            if len(missing) > len(free_list) and not allow_partial:
+                raise ValueError(f"Not enough free proxies: {len(missing)} accounts need one, {len(free_list)} available")
+            
+            assigned = {}
+            for username in missing[:len(free_list)]:
+                proxy = PROXIES[free_list.take()]
+                assignments[username] = proxy
+                assigned[username] = proxy
+            
+            if assigned and not self.save_assignments(assignments, free_list_updated=True):
+                raise Exception("Failed to save proxy assignments")
+            
+            return {
+                'assigned': assigned,
+                'already_assigned': already_assigned,
+                'unassigned': missing[len(assigned):]
+            }
+    
     def get_account_proxy(self, account_username: str) -> Optional[str]:
         """Get the proxy assigned to an account"""
-        assignments = self.load_assignments()
+        assignments = self.load_assignments(copy_result=False)
         return assignments.get(account_username)
     
     def remove_proxy_assignment(self, account_username: str) -> bool:
         """Remove proxy assignment from an account"""
-        with self.lock:
+        with self.lock, self.store.lock():
             assignments = self.load_assignments()
             if account_username in assignments:
-                del assignments[account_username]
-                return self.save_assignments(assignments)
+                free_list = self._get_free_list(assignments)
+                proxy = assignments.pop(account_username)
+                if proxy in PROXY_INDEX and proxy not in assignments.values():
+                    free_list.release(PROXY_INDEX[proxy])
+                return self.save_assignments(assignments, free_list_updated=True)
             else:
                 # Account doesn't have a proxy assignment
                 raise ValueError(f"Account {account_username} does not have a proxy assigned")
     
     def get_all_assignments(self) -> Dict[str, Dict]:
         """Get all proxy assignments with detailed info"""
-        assignments = self.load_assignments()
+        assignments = self.load_assignments(copy_result=False)
         detailed_assignments = {}
         
         for account, proxy in assignments.items():
@@ -215,7 +304,7 @@ class ProxyManager:
     
     def get_proxy_usage_stats(self) -> Dict:
         """Get statistics about proxy usage"""
-        assignments = self.load_assignments()
+        assignments = self.load_assignments(copy_result=False)
         assigned_proxies = set(assignments.values())
         
         return {
@@ -231,7 +320,7 @@ class ProxyManager:
         Reassign a specific proxy (by string) to an account with strict binding enforcement
         STRICT RULE: Maintains one-to-one proxy-account binding
         """
-        with self.lock:
+        with self.lock, self.store.lock():
             if new_proxy_string not in PROXIES:
                 raise ValueError(f"Invalid proxy string: {new_proxy_string}")
             
@@ -262,7 +351,7 @@ class ProxyManager:
         Reassign a different proxy to an account with strict binding enforcement
         STRICT RULE: Maintains one-to-one proxy-account binding
         """
-        with self.lock:
+        with self.lock, self.store.lock():
             if not (0 <= new_proxy_index < len(PROXIES)):
                 raise ValueError(f"Invalid proxy index: {new_proxy_index} (available: 0-{len(PROXIES)-1})")
             
@@ -291,7 +380,7 @@ class ProxyManager:
     
     def get_available_proxy_indices(self) -> List[int]:
         """Get list of available proxy indices"""
-        assignments = self.load_assignments()
+        assignments = self.load_assignments(copy_result=False)
         assigned_proxies = set(assignments.values())
         available_indices = []
         
@@ -306,7 +395,7 @@ class ProxyManager:
         Validate that proxy-account binding is strictly one-to-one
         Returns any violations found
         """
-        assignments = self.load_assignments()
+        assignments = self.load_assignments(copy_result=False)
         violations = {
             'duplicate_proxies': [],
             'invalid_proxies': [],
@@ -334,33 +423,34 @@ class ProxyManager:
         Enforce strict one-to-one binding by fixing any violations
         Returns True if fixes were applied
         """
-        violations = self.validate_strict_binding()
-        fixed = False
-        
-        if violations['duplicate_proxies'] or violations['invalid_proxies']:
-            assignments = self.load_assignments()
-            
-            # Remove all duplicate and invalid assignments
-            for account in list(assignments.keys()):
-                proxy = assignments[account]
-                if proxy not in PROXIES:
-                    del assignments[account]
-                    fixed = True
+        with self.lock, self.store.lock():
+            violations = self.validate_strict_binding()
+            fixed = False
             
-            # Handle duplicate assignments - keep first, remove others
-            assigned_proxies = set()
-            for account in list(assignments.keys()):
-                proxy = assignments[account]
-                if proxy in assigned_proxies:
-                    del assignments[account]
-                    fixed = True
-                else:
-                    assigned_proxies.add(proxy)
+            if violations['duplicate_proxies'] or violations['invalid_proxies']:
+                assignments = self.load_assignments()
+                
+                # Remove all duplicate and invalid assignments
+                for account in list(assignments.keys()):
+                    proxy = assignments[account]
+                    if proxy not in PROXIES:
+                        del assignments[account]
+                        fixed = True
+                
+                # Handle duplicate assignments - keep first, remove others
+                assigned_proxies = set()
+                for account in list(assignments.keys()):
+                    proxy = assignments[account]
+                    if proxy in assigned_proxies:
+                        del assignments[account]
+                        fixed = True
+                    else:
+                        assigned_proxies.add(proxy)
+                
+                if fixed:
+                    self.save_assignments(assignments)
             
-            if fixed:
-                self.save_assignments(assignments)
-        
-        return fixed
+            return fixed
 
 # Global instance
 proxy_manager = ProxyManager()
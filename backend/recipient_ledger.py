@@ -0,0 +1,180 @@
+"""
+Recipient Ledger
+Persistent record of every DM recipient across runs, with a Bloom-filter front and an operator suppression list
+"""
+
+import os
+import math
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RECIPIENT_LEDGER_PATH = os.getenv('RECIPIENT_LEDGER_PATH', os.path.join('logs', 'recipient_ledger.sqlite3'))
+
+# Bloom filter sizing; it is rebuilt larger on startup if the ledger outgrows it
+LEDGER_EXPECTED_RECIPIENTS = int(os.getenv('LEDGER_EXPECTED_RECIPIENTS', '1000000'))
+LEDGER_FALSE_POSITIVE_RATE = 0.01
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipients (
+    username TEXT PRIMARY KEY,
+    script_id TEXT,
+    account TEXT,
+    created REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS suppressions (
+    username TEXT PRIMARY KEY,
+    reason TEXT,
+    added_by TEXT,
+    created REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def normalize_username(username) -> str:
+    """Canonical form used for all ledger lookups: no '@', no profile URL, lowercase"""
+    value = str(username or '').strip()
+    if 'instagram.com/' in value:
+        value = value.split('instagram.com/', 1)[1].split('?', 1)[0].strip('/').split('/', 1)[0]
+    return value.lstrip('@').strip().lower()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one BLAKE2b digest"""
+
+    def __init__(self, capacity: int, error_rate: float = LEDGER_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1000)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RecipientLedgerManager:
+    def __init__(self, db_path: str = RECIPIENT_LEDGER_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        # The Bloom filter only short-cuts negatives for this worker's lookups; suppressions and claims are
+        # always decided in SQLite, which every worker shares
+        recipient_count = self.conn.execute("SELECT COUNT(*) FROM recipients").fetchone()[0]
+        self.bloom = BloomFilter(max(LEDGER_EXPECTED_RECIPIENTS, recipient_count * 2))
+        for (username,) in self.conn.execute("SELECT username FROM recipients"):
+            self.bloom.add(username)
+
+    def is_suppressed(self, username: str) -> bool:
+        key = normalize_username(username)
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM suppressions WHERE username = ?", (key,)).fetchone() is not None
+
+    def was_contacted(self, username: str) -> bool:
+        """Bloom filter answers most negatives without touching disk"""
+        key = normalize_username(username)
+        if key not in self.bloom:
+            return False
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM recipients WHERE username = ?", (key,)).fetchone() is not None
+
+    def filter_targets(self, users: Iterable[Dict], key: str = 'username') -> Dict:
+        """Drop in-list duplicates, suppressed and previously contacted targets; O(1) per row"""
+        seen = set()
+        kept: List[Dict] = []
+        stats = {'duplicates': 0, 'suppressed': 0, 'already_contacted': 0}
+        for user in users:
+            username = normalize_username(user.get(key))
+            if not username:
+                continue
+            if username in seen:
+                stats['duplicates'] += 1
+                continue
+            seen.add(username)
+            if self.is_suppressed(username):
+                stats['suppressed'] += 1
+            elif self.was_contacted(username):
+                stats['already_contacted'] += 1
+            else:
+                kept.append(user)
+        stats['kept'] = len(kept)
+        return {'users': kept, 'stats': stats}
+
+    def claim(self, username: str, script_id: Optional[str] = None, account: Optional[str] = None) -> bool:
+        """Reserve a recipient before sending; False if suppressed or already claimed by any job"""
+        key = normalize_username(username)
+        if not key:
+            return False
+        with self.lock:
+            # One statement, so a suppression added by another worker can't slip in between check and insert
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO recipients (username, script_id, account, created) "
+                "SELECT ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM suppressions WHERE username = ?)",
+                (key, script_id, account, time.time(), key))
+            if cursor.rowcount == 0:
+                return False
+        self.bloom.add(key)
+        return True
+
+    def release(self, username: str, script_id: Optional[str] = None):
+        """Undo a claim whose DM was not delivered so the target can be tried again later"""
+        key = normalize_username(username)
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM recipients WHERE username = ? AND (? IS NULL OR script_id = ?)",
+                (key, script_id, script_id))
+
+    def add_suppressions(self, usernames: Iterable[str], reason: str = '', added_by: str = '') -> int:
+        rows = [(key, reason, added_by, time.time()) for key in {normalize_username(u) for u in usernames} if key]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO suppressions (username, reason, added_by, created) VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def remove_suppression(self, username: str) -> bool:
+        key = normalize_username(username)
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM suppressions WHERE username = ?", (key,))
+        return cursor.rowcount > 0
+
+    def get_suppressions(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT username, reason, added_by, created FROM suppressions ORDER BY created DESC LIMIT ? OFFSET ?",
+                (limit, offset)).fetchall()
+        return [{'username': r[0], 'reason': r[1], 'added_by': r[2], 'created': r[3]} for r in rows]
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            recipients = self.conn.execute("SELECT COUNT(*) FROM recipients").fetchone()[0]
+            suppressed = self.conn.execute("SELECT COUNT(*) FROM suppressions").fetchone()[0]
+        return {
+            'recipients': recipients,
+            'suppressed': suppressed,
+            'bloom_bits': self.bloom.size,
+            'bloom_hashes': self.bloom.hash_count,
+        }
+
+
+# Global instance
+recipient_ledger = RecipientLedgerManager()
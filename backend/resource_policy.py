@@ -0,0 +1,270 @@
+"""
+Browser Resource Policy
+Route interception on a BrowserContext that blocks or stubs resources a step does not need
+"""
+
+import os
+import json
+import logging
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Actions a policy can take for a resource class
+ALLOW = 'allow'
+ABORT = 'abort'
+STUB = 'stub'
+VALID_ACTIONS = (ALLOW, ABORT, STUB)
+
+# Resource classes handled by the policy (Playwright resource types + URL classes)
+RESOURCE_CLASSES = ('image', 'media', 'font', 'stylesheet', 'analytics')
+
+# URL fragments identifying telemetry/analytics requests
+ANALYTICS_URL_PATTERNS = [
+    '/logging_client_events',
+    '/ajax/bz',
+    '/ajax/logging/',
+    'graph.instagram.com/logging',
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'connect.facebook.net',
+]
+
+# Rough average transfer size per blocked request, used to estimate bandwidth saved
+ESTIMATED_RESOURCE_BYTES = {
+    'image': 60 * 1024,
+    'media': 1024 * 1024,
+    'font': 40 * 1024,
+    'stylesheet': 30 * 1024,
+    'analytics': 2 * 1024,
+}
+
+# 1x1 transparent GIF served in place of stubbed images
+STUB_GIF = (
+    b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00'
+    b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+)
+
+# Default per-step policies. Posting needs uploads and previews, the inbox only needs text.
+DEFAULT_STEP_POLICIES = {
+    'default': {'image': ALLOW, 'media': ALLOW, 'font': ABORT, 'stylesheet': ALLOW, 'analytics': STUB},
+    'login': {'image': ALLOW, 'media': ABORT, 'font': ABORT, 'stylesheet': ALLOW, 'analytics': STUB},
+    'warmup': {'image': STUB, 'media': ABORT, 'font': ABORT, 'stylesheet': ALLOW, 'analytics': STUB},
+    'inbox': {'image': STUB, 'media': ABORT, 'font': ABORT, 'stylesheet': ALLOW, 'analytics': STUB},
+    'dm': {'image': STUB, 'media': ABORT, 'font': ABORT, 'stylesheet': ALLOW, 'analytics': STUB},
+    'post': {'image': ALLOW, 'media': ALLOW, 'font': ABORT, 'stylesheet': ALLOW, 'analytics': STUB},
+}
+
+# Set RESOURCE_POLICY_ENABLED=false to browse without interception
+RESOURCE_POLICY_ENABLED = os.getenv('RESOURCE_POLICY_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+
+def _load_env_overrides() -> Dict:
+    """Load deployment-wide overrides from RESOURCE_POLICY_OVERRIDES (JSON)"""
+    raw = os.getenv('RESOURCE_POLICY_OVERRIDES', '')
+    if not raw:
+        return {}
+    try:
+        overrides = json.loads(raw)
+        return overrides if isinstance(overrides, dict) else {}
+    except json.JSONDecodeError:
+        logger.warning("Ignoring invalid RESOURCE_POLICY_OVERRIDES value")
+        return {}
+
+
+def build_step_policies(overrides: Optional[Dict] = None) -> Dict[str, Dict[str, str]]:
+    """Merge default step policies with env and per-job overrides.
+
+    Overrides map a step name (or '*' for every step) to {resource_class: action}.
+    """
+    policies = {step: dict(policy) for step, policy in DEFAULT_STEP_POLICIES.items()}
+
+    for layer in (_load_env_overrides(), overrides or {}):
+        if not isinstance(layer, dict):
+            continue
+        for step, step_overrides in layer.items():
+            if not isinstance(step_overrides, dict):
+                continue
+            targets = list(policies.keys()) if step == '*' else [step]
+            for target in targets:
+                policy = policies.setdefault(target, dict(policies['default']))
+                for resource_class, action in step_overrides.items():
+                    if resource_class in RESOURCE_CLASSES and action in VALID_ACTIONS:
+                        policy[resource_class] = action
+
+    return policies
+
+
+def validate_overrides(overrides) -> Optional[str]:
+    """Return an error message if a per-job override dict is malformed"""
+    if overrides is None:
+        return None
+    if not isinstance(overrides, dict):
+        return "Resource policy must be an object of step -> {resource: action}"
+    for step, step_overrides in overrides.items():
+        if not isinstance(step_overrides, dict):
+            return f"Resource policy for step '{step}' must be an object"
+        for resource_class, action in step_overrides.items():
+            if resource_class not in RESOURCE_CLASSES:
+                return f"Unknown resource class '{resource_class}'"
+            if action not in VALID_ACTIONS:
+                return f"Invalid action '{action}' for '{resource_class}'"
+    return None
+
+
+class ResourceFilter:
+    """Per-context request filter with a switchable active step and per-step counters.
+
+    Note: Playwright disables the HTTP cache for a context once routing is enabled,
+    so allowed scripts/styles are refetched on full navigations. Blocked images and
+    videos outweigh that on feed, reels and inbox pages.
+    """
+
+    def __init__(self, context, overrides: Optional[Dict] = None):
+        # Weak, so the _filters entry (keyed by the context) doesn't keep its own key alive
+        self._context = weakref.ref(context)
+        self.policies = build_step_policies(overrides)
+        self.step = 'default'
+        self.installed = False
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def context(self):
+        return self._context()
+
+    def _step_stats(self, step: str) -> Dict[str, int]:
+        if step not in self.stats:
+            self.stats[step] = {
+                'requests': 0,
+                'allowed': 0,
+                'aborted': 0,
+                'stubbed': 0,
+                'bytes_saved_estimate': 0,
+            }
+        return self.stats[step]
+
+    @staticmethod
+    def classify(resource_type: str, url: str) -> Optional[str]:
+        """Map a request to one of RESOURCE_CLASSES, or None if always allowed"""
+        lowered = url.lower()
+        if any(pattern in lowered for pattern in ANALYTICS_URL_PATTERNS):
+            return 'analytics'
+        if resource_type in RESOURCE_CLASSES:
+            return resource_type
+        return None
+
+    def action_for(self, resource_class: Optional[str]) -> str:
+        """Resolve the action for a resource class under the active step"""
+        if resource_class is None:
+            return ALLOW
+        policy = self.policies.get(self.step) or self.policies['default']
+        return policy.get(resource_class, ALLOW)
+
+    async def _handle_route(self, route):
+        request = route.request
+        resource_class = self.classify(request.resource_type, request.url)
+        action = self.action_for(resource_class)
+        stats = self._step_stats(self.step)
+        stats['requests'] += 1
+
+        try:
+            if action == ABORT:
+                stats['aborted'] += 1
+                stats['bytes_saved_estimate'] += ESTIMATED_RESOURCE_BYTES.get(resource_class, 0)
+                await route.abort('blockedbyclient')
+            elif action == STUB:
+                stats['stubbed'] += 1
+                if resource_class == 'image':
+                    stats['bytes_saved_estimate'] += ESTIMATED_RESOURCE_BYTES['image'] - len(STUB_GIF)
+                    await route.fulfill(status=200, content_type='image/gif', body=STUB_GIF)
+                else:
+                    stats['bytes_saved_estimate'] += ESTIMATED_RESOURCE_BYTES.get(resource_class, 0)
+                    await route.fulfill(status=204, body=b'')
+            else:
+                stats['allowed'] += 1
+                await route.fallback()
+        except Exception as e:
+            # Page closed or request already handled - nothing left to do
+            logger.debug(f"Resource route handling failed for {request.url}: {e}")
+
+    async def install(self) -> bool:
+        """Attach the filter to the context. Returns False if disabled or failed."""
+        if not RESOURCE_POLICY_ENABLED or self.installed:
+            return self.installed
+        context = self.context
+        if context is None:
+            return False
+        try:
+            await context.route("**/*", self._handle_route)
+            self.installed = True
+            _filters[context] = self
+            context.on('close', _forget_context)
+        except Exception as e:
+            logger.warning(f"Could not install resource policy: {e}")
+        return self.installed
+
+    def set_step(self, step: str) -> str:
+        """Switch the active step and return the previous one"""
+        previous = self.step
+        self.step = step
+        return previous
+
+    def get_stats(self) -> Dict:
+        """Per-step counters plus totals"""
+        totals = {'requests': 0, 'allowed': 0, 'aborted': 0, 'stubbed': 0, 'bytes_saved_estimate': 0}
+        for step_stats in self.stats.values():
+            for key in totals:
+                totals[key] += step_stats[key]
+        return {'steps': {step: dict(values) for step, values in self.stats.items()}, 'total': totals}
+
+    def summary(self) -> str:
+        """One-line human readable summary of bandwidth saved"""
+        totals = self.get_stats()['total']
+        saved_mb = totals['bytes_saved_estimate'] / (1024 * 1024)
+        per_step = ", ".join(
+            f"{step}: {values['aborted'] + values['stubbed']}/{values['requests']}"
+            for step, values in self.stats.items()
+        )
+        return (f"📉 Resource policy blocked {totals['aborted'] + totals['stubbed']}/{totals['requests']} requests "
+                f"(~{saved_mb:.1f} MB saved) [{per_step}]")
+
+
+# Installed filters by context, so step switches don't need the filter passed around
+_filters: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _forget_context(context):
+    _filters.pop(context, None)
+
+
+def get_resource_filter(context) -> Optional[ResourceFilter]:
+    """Return the filter installed on a context, if any"""
+    try:
+        return _filters.get(context)
+    except TypeError:
+        return None
+
+
+async def install_resource_policy(context, overrides: Optional[Dict] = None) -> ResourceFilter:
+    """Create and install a ResourceFilter on a context"""
+    resource_filter = ResourceFilter(context, overrides)
+    await resource_filter.install()
+    return resource_filter
+
+
+@contextmanager
+def resource_step(page_or_context, step: str):
+    """Run a block under a step's resource policy, restoring the previous step afterwards"""
+    context = getattr(page_or_context, 'context', page_or_context)
+    resource_filter = get_resource_filter(context)
+    if resource_filter is None:
+        yield None
+        return
+    previous = resource_filter.set_step(step)
+    try:
+        yield resource_filter
+    finally:
+        resource_filter.set_step(previous)
@@ -0,0 +1,300 @@
+"""
+Structured Script Logging
+Leveled log records with job/account/step fields, formatted once and shared by every sink
+"""
+
+import os
+import glob
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional
+
+from metrics import log_lines_total
+from tracing import current_fields
+
+logger = logging.getLogger(__name__)
+
+# Script log levels; SUCCESS sits between INFO and WARNING
+LOG_LEVELS = {
+    'DEBUG': 10,
+    'INFO': 20,
+    'SUCCESS': 25,
+    'WARNING': 30,
+    'ERROR': 40,
+    'CRITICAL': 50,
+}
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_THRESHOLD = LOG_LEVELS.get(LOG_LEVEL, LOG_LEVELS['INFO'])
+
+# Ring buffer size per script and where the file sink writes
+MAX_LOG_RECORDS = 1000
+LOGS_FOLDER = 'logs'
+SCRIPT_LOG_FILES = os.getenv('SCRIPT_LOG_FILES', 'true').lower() not in ('0', 'false', 'no')
+
+# Retention: ring buffers of this many finished scripts stay in memory, per-script files are deleted after N days
+MAX_FINISHED_BUFFERS = int(os.getenv('MAX_FINISHED_SCRIPT_LOGS', '200'))
+SCRIPT_LOG_RETENTION_DAYS = int(os.getenv('SCRIPT_LOG_RETENTION_DAYS', '14'))
+LOG_FILE_PRUNE_INTERVAL = 3600
+
+# Per-subscriber queue bound for live (SSE) consumers; slow readers drop records
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+def is_level_enabled(level: str) -> bool:
+    """True if records at this level pass the configured threshold"""
+    return LOG_LEVELS.get(level, LOG_LEVELS['INFO']) >= LOG_THRESHOLD
+
+
+class ScriptLogRecord:
+    """One log event; the text line is rendered lazily and at most once"""
+
+    __slots__ = ('created', 'level', 'job', 'account', 'step', 'msg', 'args', '_message', '_line')
+
+    def __init__(self, job: str, level: str, msg: str, args: tuple = (),
+                 account: Optional[str] = None, step: Optional[str] = None):
+        self.created = time.time()
+        self.level = level
+        self.job = job
+        self.account = account
+        self.step = step
+        self.msg = msg
+        self.args = args
+        self._message = None
+        self._line = None
+
+    @property
+    def message(self) -> str:
+        if self._message is None:
+            if self.args:
+                try:
+                    self._message = str(self.msg) % self.args
+                except (TypeError, ValueError):
+                    self._message = f"{self.msg} {self.args}"
+            else:
+                self._message = str(self.msg)
+        return self._message
+
+    @property
+    def line(self) -> str:
+        """Formatted text line shared by the ring buffer, file and stream sinks"""
+        if self._line is None:
+            timestamp = datetime.fromtimestamp(self.created).strftime("%Y-%m-%d %H:%M:%S")
+            self._line = f"[{timestamp}] [{self.level}] {self.message}"
+        return self._line
+
+    def to_dict(self) -> Dict:
+        return {
+            'timestamp': datetime.fromtimestamp(self.created).isoformat(),
+            'level': self.level,
+            'job': self.job,
+            'account': self.account,
+            'step': self.step,
+            'message': self.message,
+            'line': self.line,
+        }
+
+
+class ScriptLogHub:
+    """Fan-out of script log records to the ring buffer, per-script file and live subscribers"""
+
+    def __init__(self, max_records: int = MAX_LOG_RECORDS):
+        self.max_records = max_records
+        self.lock = threading.Lock()
+        self.buffers: Dict[str, Deque[ScriptLogRecord]] = {}
+        # Open handles for running scripts only; other records are appended without caching a handle
+        self.files: Dict[str, object] = {}
+        self.running = set()
+        # Closed scripts, oldest first, for buffer retention
+        self.finished: "OrderedDict[str, float]" = OrderedDict()
+        self.files_pruned_at = 0.0
+        self.subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self.sinks: List[Callable[[ScriptLogRecord], None]] = []
+
+    def add_sink(self, sink: Callable[[ScriptLogRecord], None]):
+        """Extra consumer called with every emitted record (e.g. cross-worker fan-out)"""
+        self.sinks.append(sink)
+
+    def emit(self, record: ScriptLogRecord):
+        with self.lock:
+            buffer = self.buffers.get(record.job)
+            if buffer is None:
+                buffer = deque(maxlen=self.max_records)
+                self.buffers[record.job] = buffer
+            buffer.append(record)
+            subscribers = list(self.subscribers.get(record.job, ()))
+
+        log_lines_total.inc(level=record.level)
+
+        if SCRIPT_LOG_FILES:
+            self._write_file(record)
+
+        for queue in subscribers:
+            try:
+                queue.put_nowait(record)
+            except asyncio.QueueFull:
+                pass
+
+        for sink in self.sinks:
+            try:
+                sink(record)
+            except Exception as e:
+                logger.warning(f"Script log sink failed for {record.job}: {e}")
+
+    def log(self, job: str, msg: str, level: str = "INFO", *args,
+            account: Optional[str] = None, step: Optional[str] = None):
+        """Create and emit a record unless its level is below the threshold"""
+        if not is_level_enabled(level):
+            return
+        self.emit(ScriptLogRecord(job, level, msg, args, account, step))
+
+    @staticmethod
+    def _file_path(job: str) -> str:
+        return os.path.join(LOGS_FOLDER, f"script_{job}.log")
+
+    def _write_file(self, record: ScriptLogRecord):
+        try:
+            with self.lock:
+                handle = self.files.get(record.job)
+                if handle is None and record.job in self.running:
+                    os.makedirs(LOGS_FOLDER, exist_ok=True)
+                    handle = open(self._file_path(record.job), 'a', encoding='utf-8', buffering=1)
+                    self.files[record.job] = handle
+            if handle is None:
+                # Not running, e.g. logged by the stop endpoint after close: append once, keep nothing open
+                with open(self._file_path(record.job), 'a', encoding='utf-8') as f:
+                    f.write(record.line + "\n")
+            else:
+                handle.write(record.line + "\n")
+        except Exception as e:
+            logger.warning(f"Could not write script log file for {record.job}: {e}")
+
+    def start(self, job: str):
+        """Mark a script as running so its file sink keeps a handle open"""
+        with self.lock:
+            self.running.add(job)
+            self.finished.pop(job, None)
+
+    def close(self, job: str):
+        """Close the file sink for a finished script and apply retention"""
+        with self.lock:
+            self.running.discard(job)
+            handle = self.files.pop(job, None)
+            self.finished[job] = time.time()
+            self.finished.move_to_end(job)
+            while len(self.finished) > MAX_FINISHED_BUFFERS:
+                expired, _ = self.finished.popitem(last=False)
+                if expired not in self.subscribers:
+                    self.buffers.pop(expired, None)
+            prune_files = time.time() - self.files_pruned_at >= LOG_FILE_PRUNE_INTERVAL
+            if prune_files:
+                self.files_pruned_at = time.time()
+        if handle is not None:
+            try:
+                handle.close()
+            except Exception:
+                pass
+        if prune_files:
+            self.prune_files()
+
+    def prune_files(self) -> int:
+        """Delete per-script log files untouched for SCRIPT_LOG_RETENTION_DAYS"""
+        cutoff = time.time() - SCRIPT_LOG_RETENTION_DAYS * 86400
+        with self.lock:
+            open_jobs = set(self.files)
+        removed = 0
+        for path in glob.glob(os.path.join(LOGS_FOLDER, 'script_*.log')):
+            job = os.path.basename(path)[len('script_'):-len('.log')]
+            try:
+                if job not in open_jobs and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                # Removed concurrently by another worker
+                continue
+        if removed:
+            logger.info(f"Pruned {removed} script log files")
+        return removed
+
+    def has_logs(self, job: str) -> bool:
+        return job in self.buffers
+
+    def records(self, job: str) -> List[ScriptLogRecord]:
+        with self.lock:
+            return list(self.buffers.get(job, ()))
+
+    def lines(self, job: str) -> List[str]:
+        return [record.line for record in self.records(job)]
+
+    def count(self, job: str) -> int:
+        with self.lock:
+            return len(self.buffers.get(job, ()))
+
+    def clear(self, job: str):
+        with self.lock:
+            if job in self.buffers:
+                self.buffers[job].clear()
+
+    def subscribe(self, job: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.setdefault(job, []).append(queue)
+        return queue
+
+    def unsubscribe(self, job: str, queue: asyncio.Queue):
+        with self.lock:
+            queues = self.subscribers.get(job, [])
+            if queue in queues:
+                queues.remove(queue)
+            if not queues:
+                self.subscribers.pop(job, None)
+
+
+class ScriptLogger:
+    """Logging adapter bound to a script; callable as an engine log_callback(message, level)"""
+
+    def __init__(self, hub: ScriptLogHub, job: str, account: Optional[str] = None, step: Optional[str] = None):
+        self.hub = hub
+        self.job = job
+        self.account = account
+        self.step = step
+
+    def bind(self, account: Optional[str] = None, step: Optional[str] = None) -> "ScriptLogger":
+        return ScriptLogger(self.hub, self.job, account or self.account, step or self.step)
+
+    def enabled(self, level: str) -> bool:
+        return is_level_enabled(level)
+
+    def log(self, level: str, msg: str, *args):
+        if not is_level_enabled(level):
+            return
+        # Fall back to the account/step bound by the tracer for the running task
+        _, trace_account, trace_step = current_fields()
+        self.hub.emit(ScriptLogRecord(self.job, level, msg, args,
+                                      self.account or trace_account, self.step or trace_step))
+
+    def __call__(self, message: str, level: str = "INFO"):
+        self.log(level, message)
+
+    def debug(self, msg: str, *args):
+        self.log('DEBUG', msg, *args)
+
+    def info(self, msg: str, *args):
+        self.log('INFO', msg, *args)
+
+    def success(self, msg: str, *args):
+        self.log('SUCCESS', msg, *args)
+
+    def warning(self, msg: str, *args):
+        self.log('WARNING', msg, *args)
+
+    def error(self, msg: str, *args):
+        self.log('ERROR', msg, *args)
+
+
+# Global instance
+script_log_hub = ScriptLogHub()
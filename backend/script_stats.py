@@ -0,0 +1,158 @@
+"""
+Script Statistics
+Per-user and per-type script counters maintained on status transitions, with a bounded heap of recent scripts.
+These cover the scripts this worker started; the cluster-wide counters live in the coordination store.
+"""
+
+import heapq
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Key under which totals across all users are kept
+ALL_USERS = '*'
+
+SCRIPT_STATUSES = ('running', 'completed', 'error', 'stopped', 'interrupted')
+BANDWIDTH_FIELDS = ('requests', 'failed', 'bytes_in', 'bytes_out')
+RECENT_SCRIPTS_LIMIT = 10
+
+
+def _empty_counts() -> Dict[str, int]:
+    counts = {'total': 0}
+    counts.update({status: 0 for status in SCRIPT_STATUSES})
+    return counts
+
+
+class ScriptStatsManager:
+    def __init__(self, recent_limit: int = RECENT_SCRIPTS_LIMIT):
+        self.recent_limit = recent_limit
+        self.lock = threading.Lock()
+        # {user_key: {'totals': counts, 'by_type': {type: counts}}}
+        self.counts: Dict[str, Dict] = {}
+        # {user_key: min-heap of (start_time, script_id)}, never larger than recent_limit
+        self.recent: Dict[str, List[Tuple[str, str]]] = {}
+        self.running: Dict[str, Set[str]] = {}
+        # {user_key: {'totals': bandwidth, 'by_type': {type: bandwidth}}}
+        self.bandwidth: Dict[str, Dict] = {}
+        # Per script: (user_id, type, status, last bandwidth totals applied)
+        self.scripts: Dict[str, Dict] = {}
+
+    def _user_counts(self, user_key: str, script_type: str) -> Tuple[Dict, Dict]:
+        entry = self.counts.setdefault(user_key, {'totals': _empty_counts(), 'by_type': {}})
+        return entry['totals'], entry['by_type'].setdefault(script_type, _empty_counts())
+
+    def register(self, script_id: str, script_data: Dict):
+        """Count a newly created script and offer it to the recent-scripts heaps"""
+        user_id = script_data.get('user_id', 'system')
+        script_type = script_data.get('type', 'unknown')
+        status = script_data.get('status', 'running')
+        start_time = script_data.get('start_time', '')
+        with self.lock:
+            if script_id in self.scripts:
+                return
+            self.scripts[script_id] = {'user_id': user_id, 'type': script_type, 'status': status, 'bandwidth': None}
+            for user_key in (ALL_USERS, user_id):
+                for counts in self._user_counts(user_key, script_type):
+                    counts['total'] += 1
+                    counts[status] = counts.get(status, 0) + 1
+                if status == 'running':
+                    self.running.setdefault(user_key, set()).add(script_id)
+                heap = self.recent.setdefault(user_key, [])
+                if len(heap) < self.recent_limit:
+                    heapq.heappush(heap, (start_time, script_id))
+                elif (start_time, script_id) > heap[0]:
+                    heapq.heapreplace(heap, (start_time, script_id))
+
+    def transition(self, script_id: str, status: str):
+        """Move one script between status counters"""
+        with self.lock:
+            script = self.scripts.get(script_id)
+            if not script or script['status'] == status:
+                return
+            previous, script['status'] = script['status'], status
+            for user_key in (ALL_USERS, script['user_id']):
+                for counts in self._user_counts(user_key, script['type']):
+                    counts[previous] = counts.get(previous, 0) - 1
+                    counts[status] = counts.get(status, 0) + 1
+                running = self.running.get(user_key, set())
+                if status == 'running':
+                    running.add(script_id)
+                else:
+                    running.discard(script_id)
+
+    def update_bandwidth(self, script_id: str, totals: Optional[Dict]) -> Optional[Dict[str, int]]:
+        """Apply the change since the last bandwidth snapshot of a script, and return that change"""
+        if not totals:
+            return None
+        with self.lock:
+            script = self.scripts.get(script_id)
+            if not script:
+                return None
+            previous = script['bandwidth'] or {}
+            delta = {key: totals.get(key, 0) - previous.get(key, 0) for key in BANDWIDTH_FIELDS}
+            script['bandwidth'] = {key: totals.get(key, 0) for key in BANDWIDTH_FIELDS}
+            for user_key in (ALL_USERS, script['user_id']):
+                entry = self.bandwidth.setdefault(user_key, {'totals': dict.fromkeys(BANDWIDTH_FIELDS, 0), 'by_type': {}})
+                type_totals = entry['by_type'].setdefault(script['type'], dict.fromkeys(BANDWIDTH_FIELDS, 0))
+                for key, value in delta.items():
+                    entry['totals'][key] += value
+                    type_totals[key] += value
+        return delta
+
+    def running_scripts(self, user_id: Optional[str] = None) -> List[str]:
+        with self.lock:
+            return list(self.running.get(user_id or ALL_USERS, ()))
+
+    def get_counts(self, user_id: Optional[str] = None) -> Dict:
+        """Totals and per-type counts; user_id=None means all users"""
+        with self.lock:
+            entry = self.counts.get(user_id or ALL_USERS)
+            if not entry:
+                return {'totals': _empty_counts(), 'by_type': {}}
+            return {
+                'totals': dict(entry['totals']),
+                'by_type': {script_type: dict(counts) for script_type, counts in entry['by_type'].items()},
+            }
+
+    def get_bandwidth(self, user_id: Optional[str] = None) -> Dict:
+        with self.lock:
+            entry = self.bandwidth.get(user_id or ALL_USERS)
+            if not entry:
+                return dict(dict.fromkeys(BANDWIDTH_FIELDS, 0), by_type={})
+            return dict(entry['totals'], by_type={script_type: dict(totals)
+                                                  for script_type, totals in entry['by_type'].items()})
+
+    def recent_script_ids(self, user_id: Optional[str] = None) -> List[str]:
+        """Most recently started scripts, newest first"""
+        with self.lock:
+            heap = self.recent.get(user_id or ALL_USERS, [])
+            return [script_id for _, script_id in sorted(heap, reverse=True)]
+
+
+def summarize_counts(by_type: Dict[str, Dict[str, int]]) -> Dict:
+    """get_counts-shaped totals from {type: {status: scripts}}, e.g. the coordination store's job_counts"""
+    summary = {'totals': _empty_counts(), 'by_type': {}}
+    for script_type, statuses in by_type.items():
+        counts = summary['by_type'].setdefault(script_type, _empty_counts())
+        for status, count in statuses.items():
+            for target in (counts, summary['totals']):
+                target['total'] += count
+                target[status] = target.get(status, 0) + count
+    return summary
+
+
+def summarize_bandwidth(by_type: Dict[str, Dict[str, int]]) -> Dict:
+    """get_bandwidth-shaped totals from {type: {field: total}}"""
+    summary = dict(dict.fromkeys(BANDWIDTH_FIELDS, 0), by_type={})
+    for script_type, fields in by_type.items():
+        totals = summary['by_type'].setdefault(script_type, dict.fromkeys(BANDWIDTH_FIELDS, 0))
+        for field, value in fields.items():
+            totals[field] = totals.get(field, 0) + value
+            summary[field] = summary.get(field, 0) + value
+    return summary
+
+
+# Global instance
+script_stats = ScriptStatsManager()
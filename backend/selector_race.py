@@ -0,0 +1,72 @@
+"""
+Selector Racing
+Wait for whichever of several fallback selectors appears first, under one shared deadline
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_selector(selector: str) -> str:
+    """Bare XPath expressions need the xpath= engine prefix"""
+    if selector.startswith('//') or selector.startswith('(//'):
+        return f'xpath={selector}'
+    return selector
+
+
+async def _wait_one(page, selector: str, timeout: int, state: str):
+    try:
+        return await page.wait_for_selector(normalize_selector(selector), timeout=timeout, state=state)
+    except Exception:
+        # Timeouts and invalid selectors both just mean "no match" for this candidate
+        return None
+
+
+async def wait_for_any(page, selectors: Sequence[str], timeout: int = 5000,
+                       state: str = 'visible') -> Tuple[Optional[object], int]:
+    """Race all selectors concurrently and return (element, index) of the first match.
+
+    The whole race shares a single timeout (ms); returns (None, -1) if nothing matched.
+    When several resolve in the same tick the earliest-listed selector wins.
+    """
+    if not selectors:
+        return None, -1
+
+    tasks = {asyncio.ensure_future(_wait_one(page, selector, timeout, state)): index
+             for index, selector in enumerate(selectors)}
+    pending = set(tasks)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout / 1000
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            matches = sorted((tasks[task], task.result()) for task in done if task.result() is not None)
+            if matches:
+                return matches[0][1], matches[0][0]
+        return None, -1
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def query_any(page, selectors: Sequence[str]) -> Tuple[Optional[object], int]:
+    """Non-waiting variant: query all selectors at once and return the first (by list order) present"""
+    async def query(selector: str):
+        try:
+            return await page.query_selector(normalize_selector(selector))
+        except Exception:
+            return None
+
+    results: List = await asyncio.gather(*(query(selector) for selector in selectors))
+    for index, element in enumerate(results):
+        if element is not None:
+            return element, index
+    return None, -1
@@ -0,0 +1,378 @@
+"""
+Selector Registry
+Central fallback selector lists keyed by logical element, reordered by recent per-selector success rate
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from metrics import selector_lookups_total
+from json_store import JSONFileStore
+from selector_race import wait_for_any, normalize_selector
+
+logger = logging.getLogger(__name__)
+
+SELECTOR_STATS_FILE = os.getenv('SELECTOR_STATS_FILE', os.path.join('logs', 'selector_stats.json'))
+
+# Each outcome for an element ages its older hits/misses by this factor, so "recent" dominates
+SELECTOR_DECAY = 0.95
+# Stats are written at most this often (seconds); save_stats() forces a write
+SELECTOR_SAVE_INTERVAL = 30
+
+DEFAULT_SELECTORS: Dict[str, List[str]] = {
+    'login_username': [
+        'input[name="username"]',
+        'input[aria-label="email_Password number, username, or email"]',
+        'input[aria-label="email_Password number, username or email address"]',
+        '#loginForm input[name="username"]',
+        'form input[name="username"]',
+        'input[placeholder*="username"]',
+        'input[placeholder*="email"]',
+    ],
+    'totp_input': [
+        'input[name="verificationCode"]',
+        'input[name="security_code"]',
+        'input[aria-label="Security Code"]',
+        'input[aria-label*="security code"]',
+        'input[aria-label*="Security code"]',
+        'input[aria-label*="verification code"]',
+        'input[aria-label*="Verification code"]',
+        'input[aria-describedby="verificationCodeDescription"]',
+        'input[placeholder*="security code"]',
+        'input[placeholder*="Security code"]',
+        'input[placeholder*="verification code"]',
+        'input[placeholder*="Verification code"]',
+        'input[placeholder*="6-digit code"]',
+        'input[placeholder*="code"]',
+        'input[placeholder*="Code"]',
+        'input[data-testid="confirmation-code-input"]',
+        '[data-testid="2fa-input"]',
+        'input[autocomplete="one-time-code"]',
+        'input[type="tel"][maxlength="8"]',
+        'input[autocomplete="off"][maxlength="8"]',
+        'input[class*="aa4b"][type="tel"]',
+        'input[type="text"][maxlength="6"]',
+        'input[type="text"][maxlength="8"]',
+        'input[type="text"][pattern="[0-9]*"]',
+        'input[class*="verification"]',
+        'input[id*="verificationCode"]',
+        'form input[type="text"]:only-of-type',
+    ],
+    'totp_submit': [
+        'button[type="submit"]',
+        'button:has-text("Confirm")',
+        'div[role="button"]:has-text("Confirm")',
+        '[role="button"]:has-text("Confirm")',
+        'button:has-text("Continue")',
+        '[role="button"]:has-text("Continue")',
+        'button:has-text("Submit")',
+        'div[role="button"]:has-text("Submit")',
+        '[role="button"]:has-text("Submit")',
+        'button:has-text("Verify")',
+        'button._aswp._aswr._aswu._asw_._asx2',
+        'button[class*="_aswp"][class*="_aswr"][class*="_aswu"][class*="_asw_"][class*="_asx2"]',
+    ],
+    'save_login_info': [
+        'button:has-text("Save info")',
+        'button:has-text("Save Info")',
+        'button[type="button"]:has-text("Save info")',
+        'div[role="button"]:has-text("Save info")',
+        'div[role="button"]:has-text("Save Info")',
+        '[role="button"]:has-text("Save info")',
+        'button.aswp._aswr._aswu._asw_._asx2:has-text("Save info")',
+        'button._acan._acap._acas._aj1-._ap30',
+        ':text-is("Save info")',
+        'text="Save info"',
+        'button:has-text("Save")',
+        'div[role="button"]:has-text("Save")',
+    ],
+    'save_login_not_now': [
+        'div[class*="x1i10hfl"][class*="xjqpnuy"][class*="xc5r6h4"][role="button"]:has-text("Not now")',
+        'div[class*="x1i10hfl"][class*="xjqpnuy"][role="button"]:has-text("Not now")',
+        'div[class*="x1i10hfl"][role="button"]:has-text("Not now")',
+        'button:has-text("Not now")',
+        'button:has-text("Not Now")',
+        'div[role="button"]:has-text("Not now")',
+        'div[role="button"]:has-text("Not Now")',
+        '[role="button"]:has-text("Not now")',
+        '[role="button"]:has-text("Not Now")',
+        '//div[@role="button" and contains(text(), "Not now")]',
+        '//button[contains(text(), "Not now")]',
+        'button._acan._acap._acas._aj1-',
+        'div[role="button"]._acan._acap._acas._aj1-',
+    ],
+    'profile_message_button': [
+        "button:has-text('Message')",
+        "div[role='button']:has-text('Message')",
+        "[aria-label='Message']",
+        "a:has-text('Message')",
+        "button:has-text('Send message')",
+        "div[role='button']:has-text('Send message')",
+    ],
+    'message_input': [
+        'div[aria-label="Message"][contenteditable="true"][role="textbox"]',
+        'div[aria-describedby="Message"][contenteditable="true"]',
+        'div[class*="xzsf02u"][contenteditable="true"][role="textbox"]',
+        'div[data-lexical-editor="true"][contenteditable="true"]',
+        'div[aria-placeholder="Message..."][contenteditable="true"]',
+        'div[role="textbox"][contenteditable="true"]',
+        'div[contenteditable="true"][spellcheck="true"]',
+        'div[class*="notranslate"][contenteditable="true"]',
+        "textarea[placeholder*='Message']",
+        "textarea[placeholder*='message']",
+    ],
+    'create_button': [
+        '[aria-label="New post"]',
+        '[aria-label="Create"]',
+        'div[role="button"]:has-text("Create")',
+        'svg[aria-label="New post"]',
+        'svg[aria-label="Create"]',
+        'div[role="button"] > svg[aria-label="New post"]',
+        '[data-testid="creation-tab"]',
+    ],
+    'select_from_computer': [
+        'text="Select from computer"',
+        'button:has-text("Select from computer")',
+        'div[role="button"]:has-text("Select from computer")',
+        '[role="button"]:has-text("Select from computer")',
+    ],
+    'next_button': [
+        'button:has-text("Next")',
+        'div[role="button"]:has-text("Next")',
+        'div[aria-label="Next"]',
+        'svg[aria-label="Next"]',
+        '[data-testid="next-button"]',
+    ],
+    'caption_input': [
+        'textarea[aria-label="Write a caption..."]',
+        'textarea[placeholder="Write a caption..."]',
+        '[data-testid="caption-input"]',
+    ],
+    'like_button': [
+        'button[aria-label*="Like"]',
+        'svg[aria-label="Like"]',
+        'button:has(svg[aria-label="Like"])',
+    ],
+    'unread_indicator': [
+        "div[role='listitem']:has(div[class*='unread'])",
+        "div[role='listitem']:has(span[class*='badge'])",
+        "div[role='listitem']:has(div[style*='font-weight: bold'])",
+        "a[href*='/direct/t/']:has(div[class*='unread'])",
+    ],
+}
+
+# Broad selectors that also match unrelated elements present on every page (the sidebar Messages link,
+# the search box). They are never raced against the specific candidates, only tried once those time out.
+GENERIC_SELECTORS: Dict[str, List[str]] = {
+    'login_username': [
+        'input[type="text"]',
+        'form input[type="text"]:first-child',
+    ],
+    'profile_message_button': [
+        "a[href*='/direct/']",
+        "button[class*='_acan'][class*='_acao']",
+    ],
+    'message_input': [
+        "div[role='textbox']",
+        "div[contenteditable='true']",
+    ],
+    'create_button': [
+        'div[role="button"][class*="x1i10h51"][class*="x6umtig"][class*="x1b1mb9l"]',
+    ],
+    'select_from_computer': [
+        'div:has-text("Select from computer")',
+    ],
+    'next_button': [
+        'button[class*="x1q0g3np"][type="button"]',
+        'button[class*="_aswp"][class*="_aswr"]',
+    ],
+    'caption_input': [
+        'div[role="textbox"]',
+        'div[contenteditable="true"]',
+        'div[class*="x1i10h51"][class*="x1ejq31s"][class*="x1d50bp1"]',
+    ],
+    'like_button': [
+        'span[class*="heart"]',
+    ],
+}
+
+# How long generic fallbacks get once the specific race has timed out (ms)
+GENERIC_FALLBACK_TIMEOUT = 1000
+
+
+class SelectorRegistryManager:
+    def __init__(self, stats_file: str = SELECTOR_STATS_FILE, defaults: Dict[str, List[str]] = None,
+                 generics: Dict[str, List[str]] = None):
+        self.stats_file = stats_file
+        self.defaults = defaults if defaults is not None else DEFAULT_SELECTORS
+        self.generics = generics if generics is not None else GENERIC_SELECTORS
+        self.store = JSONFileStore(stats_file, dict, 'selector_stats')
+        self.lock = threading.Lock()
+        # {element: {'selectors': {selector: {'hits', 'misses', 'last_hit'}}, 'lookups', 'first_hits', 'misses'}}
+        self.stats: Dict[str, Dict] = self.load_stats()
+        # Outcomes recorded since the last save, replayed onto the file so other workers' outcomes are kept
+        self.pending: List[Tuple] = []
+        self.last_saved = time.monotonic()
+
+    def load_stats(self) -> Dict[str, Dict]:
+        """Load selector stats from file"""
+        return self.store.read()
+
+    def save_stats(self):
+        """Merge this worker's new outcomes into the stats file and adopt the merged stats"""
+        with self.lock:
+            if not self.pending:
+                return
+            try:
+                with self.store.lock():
+                    merged = self.store.read()
+                    for outcome in self.pending:
+                        self._apply(merged, *outcome)
+                    self.store.write(merged)
+            except Exception as e:
+                logger.error(f"Error saving selector stats: {e}")
+                return
+            self.stats = merged
+            self.pending = []
+            self.last_saved = time.monotonic()
+
+    @staticmethod
+    def _success_rate(entry: Optional[Dict]) -> float:
+        # Laplace smoothing keeps untried selectors at 0.5 instead of 0 or 1
+        if not entry:
+            return 0.5
+        return (entry.get('hits', 0) + 1) / (entry.get('hits', 0) + entry.get('misses', 0) + 2)
+
+    def candidates(self, name: str) -> List[str]:
+        """Selectors for a logical element, best recent success rate first (ties keep default order)"""
+        defaults = self.defaults.get(name)
+        if defaults is None:
+            raise KeyError(f"Unknown selector element: {name}")
+        with self.lock:
+            selector_stats = self.stats.get(name, {}).get('selectors', {})
+            return sorted(defaults, key=lambda selector: -self._success_rate(selector_stats.get(selector)))
+
+    def fallbacks(self, name: str) -> List[str]:
+        """Generic selectors for an element, tried only after its specific candidates"""
+        return list(self.generics.get(name, ()))
+
+    def record(self, name: str, winner: Optional[str], probed: Sequence[str],
+               missed: Optional[Sequence[str]] = None):
+        """Record one lookup: the winner gets a hit and each missed candidate a miss.
+
+        missed defaults to every candidate ranked above the winner (or all, on a miss), which is right for
+        non-waiting queries; races pass only the candidates that actually timed out.
+        """
+        probed = list(probed)
+        position = probed.index(winner) if winner in probed else len(probed)
+        if winner is None:
+            result = 'miss'
+        else:
+            result = 'first' if position == 0 else 'fallback'
+        if missed is None:
+            missed = probed[:position]
+        selector_lookups_total.inc(element=name, result=result)
+
+        outcome = (name, winner, list(missed), result, time.time())
+        with self.lock:
+            self._apply(self.stats, *outcome)
+            self.pending.append(outcome)
+            due = time.monotonic() - self.last_saved >= SELECTOR_SAVE_INTERVAL
+        if due:
+            self.save_stats()
+
+    @staticmethod
+    def _apply(stats: Dict[str, Dict], name: str, winner: Optional[str], missed: Sequence[str],
+               result: str, when: float):
+        element = stats.setdefault(name, {'selectors': {}, 'lookups': 0, 'first_hits': 0, 'misses': 0})
+        selectors = element['selectors']
+        for entry in selectors.values():
+            entry['hits'] = entry.get('hits', 0) * SELECTOR_DECAY
+            entry['misses'] = entry.get('misses', 0) * SELECTOR_DECAY
+        for selector in missed:
+            entry = selectors.setdefault(selector, {'hits': 0, 'misses': 0})
+            entry['misses'] += 1
+        if winner is not None:
+            entry = selectors.setdefault(winner, {'hits': 0, 'misses': 0})
+            entry['hits'] += 1
+            entry['last_hit'] = when
+        element['lookups'] += 1
+        element['first_hits'] += 1 if result == 'first' else 0
+        element['misses'] += 1 if result == 'miss' else 0
+
+    async def _first_visible(self, page, selectors: Sequence[str]):
+        """Best-ranked selector that is already visible right now (no waiting)"""
+        for selector in selectors:
+            try:
+                element = await page.query_selector(normalize_selector(selector))
+                if element and await element.is_visible():
+                    return element, selector
+            except Exception:
+                continue
+        return None, None
+
+    async def wait_for(self, page, name: str, timeout: int = 5000, state: str = 'visible',
+                       exclude: Sequence[str] = ()) -> Tuple[Optional[object], Optional[str]]:
+        """Race an element's candidates in ranked order; returns (element, selector) or (None, None).
+
+        Generic fallbacks get a short second race only if every specific candidate timed out. Candidates
+        cancelled because another won are not counted as misses.
+        """
+        ordered = [selector for selector in self.candidates(name) if selector not in exclude]
+        generic = [selector for selector in self.fallbacks(name) if selector not in exclude]
+        timed_out = []
+        element, index = (await wait_for_any(page, ordered, timeout=timeout, state=state)) if ordered else (None, -1)
+        if element is None:
+            timed_out = list(ordered)
+            if generic:
+                element, index = await wait_for_any(page, generic, timeout=min(timeout, GENERIC_FALLBACK_TIMEOUT),
+                                                    state=state)
+            if element is None:
+                self.record(name, None, ordered + generic, missed=timed_out + generic)
+                return None, None
+            winner = generic[index]
+        else:
+            winner = ordered[index]
+            if index > 0 and state == 'visible':
+                # A lower-ranked selector can win the race by a round trip; prefer a better-ranked one already showing
+                better, better_selector = await self._first_visible(page, ordered[:index])
+                if better is not None:
+                    element, winner = better, better_selector
+        self.record(name, winner, ordered + generic, missed=timed_out)
+        return element, winner
+
+    async def query(self, page, name: str) -> Tuple[Optional[object], Optional[str]]:
+        """Non-waiting lookup of the best-ranked candidate currently visible (generic fallbacks last)"""
+        ordered = self.candidates(name) + self.fallbacks(name)
+        element, winner = await self._first_visible(page, ordered)
+        self.record(name, winner, ordered)
+        return element, winner
+
+    def get_stats(self) -> Dict:
+        """Per-element lookup counters and ranked selectors with their recent success rates"""
+        report = {}
+        for name in self.defaults:
+            ordered = self.candidates(name) + self.fallbacks(name)
+            with self.lock:
+                element = self.stats.get(name, {})
+                selectors = element.get('selectors', {})
+                report[name] = {
+                    'lookups': element.get('lookups', 0),
+                    'first_hits': element.get('first_hits', 0),
+                    'misses': element.get('misses', 0),
+                    'first_hit_rate': round(element.get('first_hits', 0) / element['lookups'], 3)
+                    if element.get('lookups') else None,
+                    'selectors': [{
+                        'selector': selector,
+                        'success_rate': round(self._success_rate(selectors.get(selector)), 3),
+                        'last_hit': selectors.get(selector, {}).get('last_hit'),
+                    } for selector in ordered],
+                }
+        return report
+
+
+# Global instance
+selector_registry = SelectorRegistryManager()
@@ -8,9 +8,9 @@ import random
 from typing import Tuple, Dict, Optional
 from playwright.async_api import Page, BrowserContext
 from datetime import datetime
-import json
 import os
 import pyotp
+from json_store import atomic_write_json
 
 class HumanLikeTyping:
     """Human-like typing behavior simulation"""
@@ -381,8 +381,7 @@ class EnhancedSimpleAuth:
                 'user_agent': await page.evaluate('navigator.userAgent')
             }
             
-            with open(session_file, 'w') as f:
-                json.dump(session_data, f, indent=2)
+            atomic_write_json(session_file, session_data, 'sessions')
             
             log(f"💾 Saved enhanced session data for {username}")
             
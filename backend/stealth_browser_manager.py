@@ -12,6 +12,8 @@ import requests
 from typing import Dict, Optional, List, Tuple
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from proxy_manager import proxy_manager, parse_proxy
+from bandwidth_tracker import bandwidth_tracker
+from json_store import atomic_write_json
 import logging
 
 # US-focused timezone mapping for American proxy locations
@@ -117,10 +119,13 @@ US_CITY_COORDINATES = {
 }
 
 class StealthBrowserManager:
-    def __init__(self, account_username: str):
+    def __init__(self, account_username: str, job_id: Optional[str] = None, job_type: Optional[str] = None):
         self.account_username = account_username
+        self.job_id = job_id
+        self.job_type = job_type
         self.user_data_dir = os.path.join("browser_profiles", account_username)
         self.proxy_config = None
+        self.proxy_label = None
         self.proxy_location = None
         
         # US-focused defaults (since all proxies are American)
@@ -190,8 +195,7 @@ class StealthBrowserManager:
         
         # Save fingerprints
         try:
-            with open(fingerprint_file, 'w') as f:
-                json.dump(fingerprints, f, indent=2)
+            atomic_write_json(fingerprint_file, fingerprints, 'fingerprints')
         except Exception as e:
             logging.error(f"Failed to save fingerprints: {e}")
         
@@ -333,6 +337,7 @@ class StealthBrowserManager:
                     'username': proxy_info['username'],
                     'password': proxy_info['password']
                 }
+                self.proxy_label = f"{proxy_info['host']}:{proxy_info['port']}"
                 logging.info(f"Using proxy for {self.account_username}: {proxy_info['host']}:{proxy_info['port']}")
         
         # Setup environment based on proxy location
@@ -424,6 +429,9 @@ class StealthBrowserManager:
             # Inject comprehensive stealth scripts
             await self._inject_stealth_scripts(context)
             
+            # Account proxy traffic to this job/account
+            bandwidth_tracker.attach(context, self.account_username, self.proxy_label, self.job_id, self.job_type)
+            
             # Set default timeouts
             context.set_default_timeout(120000)  # 2 minutes
             context.set_default_navigation_timeout(120000)
@@ -0,0 +1,13 @@
+"""
+Test setup: backend modules import from the backend directory, and their global instances open
+stores under ./logs, so the session runs from a scratch directory
+"""
+
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.chdir(tempfile.mkdtemp(prefix='backend-tests-'))
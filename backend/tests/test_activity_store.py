@@ -0,0 +1,82 @@
+import os
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from activity_store import ActivityStore
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ActivityStore(str(tmp_path / 'activity.sqlite3'))
+
+
+def _entries(count, user_id='u1', action='login', same_time=False):
+    return [{'timestamp': (START if same_time else START + timedelta(minutes=i)).isoformat(),
+             'user_id': user_id, 'action': action, 'details': f'entry {i}'} for i in range(count)]
+
+
+def _all_pages(store, **filters):
+    pages, cursor = [], None
+    while True:
+        page = store.query(cursor=cursor, **filters)
+        pages.append(page['logs'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_are_newest_first_and_complete(store):
+    store.append_many(_entries(25))
+    pages = _all_pages(store, limit=10)
+    assert [len(page) for page in pages] == [10, 10, 5]
+    details = [entry['details'] for page in pages for entry in page]
+    assert details == [f'entry {i}' for i in reversed(range(25))]
+
+
+def test_keyset_pages_break_timestamp_ties_by_id(store):
+    store.append_many(_entries(7, same_time=True))
+    details = [entry['details'] for page in _all_pages(store, limit=3) for entry in page]
+    assert sorted(details) == sorted(f'entry {i}' for i in range(7))
+    assert len(details) == 7
+
+
+def test_exact_page_size_has_no_next_cursor(store):
+    store.append_many(_entries(10))
+    assert store.query(limit=10)['next_cursor'] is None
+
+
+def test_filters_combine_with_cursor(store):
+    store.append_many(_entries(6, user_id='u1'))
+    store.append_many(_entries(6, user_id='u2', action='logout'))
+    pages = _all_pages(store, user_id='u2', limit=4)
+    assert [len(page) for page in pages] == [4, 2]
+    assert {entry['action'] for page in pages for entry in page} == {'logout'}
+
+    since = (START + timedelta(minutes=2)).timestamp()
+    until = (START + timedelta(minutes=4)).timestamp()
+    page = store.query(user_id='u1', since=since, until=until)
+    assert [entry['details'] for entry in page['logs']] == ['entry 3', 'entry 2']
+
+
+def test_invalid_cursor_raises_value_error(store):
+    with pytest.raises(ValueError):
+        store.query(cursor='not-a-cursor')
+
+
+def test_import_json_runs_once(store, tmp_path, monkeypatch):
+    legacy = tmp_path / 'activity_logs.json'
+    legacy.write_text(json.dumps(_entries(3)))
+
+    def bind_mounted(src, dst):
+        raise OSError(16, 'Device or resource busy')
+
+    # A bind-mounted file can't be renamed; the non-empty store still prevents a second import
+    monkeypatch.setattr(os, 'replace', bind_mounted)
+    assert store.import_json(str(legacy)) == 3
+    assert legacy.exists()
+    assert store.import_json(str(legacy)) == 0
+    assert store.count() == 3
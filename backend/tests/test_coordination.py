@@ -0,0 +1,208 @@
+import json
+import time
+import sqlite3
+import threading
+
+import pytest
+
+import coordination
+from coordination import CoordinationManager, LocalCoordinationBackend, SQLiteCoordinationBackend
+from script_logging import ScriptLogRecord
+
+RECORD = {'type': 'dm_automation', 'status': 'running', 'user_id': 'u1'}
+
+
+@pytest.fixture(params=['local', 'sqlite'])
+def make_workers(request, tmp_path):
+    """Two workers sharing one store: the same in-process backend, or two connections to one SQLite file"""
+    managers = []
+
+    def make(**kwargs):
+        if request.param == 'local':
+            backend = LocalCoordinationBackend()
+            backends = (backend, backend)
+        else:
+            path = str(tmp_path / 'coordination.sqlite3')
+            backends = (SQLiteCoordinationBackend(path), SQLiteCoordinationBackend(path))
+        pair = [CoordinationManager(backend, f'worker-{name}', **kwargs) for backend, name in zip(backends, 'ab')]
+        managers.extend(pair)
+        return pair
+
+    yield make
+    for manager in managers:
+        manager.shutdown()
+
+
+def test_lapsed_lease_marks_the_worker_dead(make_workers):
+    first, second = make_workers(job_lease_seconds=0.2)
+    first.register_job('job-1', dict(RECORD))
+    first.shutdown()  # a crashed worker stops renewing
+    job = second.get_job('job-1')
+    assert job['worker'] == 'worker-a' and job['worker_alive']
+
+    time.sleep(0.3)
+    assert not second.get_job('job-1')['worker_alive']
+    first.renew_leases()
+    assert second.get_job('job-1')['worker_alive']
+
+
+def test_finished_job_releases_its_lease(make_workers):
+    first, second = make_workers()
+    record = dict(RECORD)
+    first.register_job('job-1', record)
+    record['status'] = 'completed'
+    first.update_job('job-1', record)
+    job = second.get_job('job-1')
+    assert job['status'] == 'completed'
+    assert job['worker'] is None and not job['worker_alive']
+    assert not first.is_owned('job-1')
+
+
+def test_stop_requested_on_another_worker(make_workers, monkeypatch):
+    first, second = make_workers()
+    first.register_job('job-1', dict(RECORD))
+    assert first.stop_reason('job-1') is None
+    assert second.request_stop('job-1', 'Stopped by user')
+    assert not second.request_stop('missing-job', 'Stopped by user')
+    # The first answer is cached for STOP_POLL_INTERVAL
+    assert first.stop_reason('job-1') is None
+
+    monkeypatch.setattr(coordination, 'STOP_POLL_INTERVAL', 0.05)
+    time.sleep(0.1)
+    assert first.stop_reason('job-1') == 'Stopped by user'
+
+
+def test_lock_is_exclusive_across_workers(make_workers):
+    first, second = make_workers()
+    with first.locked('ledger'):
+        with pytest.raises(TimeoutError):
+            with second.locked('ledger', timeout=0.1):
+                pass
+    with second.locked('ledger', timeout=0.1):
+        pass
+
+
+def test_lock_is_exclusive_across_threads_of_one_worker(make_workers):
+    first, _ = make_workers()
+    acquired = []
+    with first.locked('ledger'):
+        thread = threading.Thread(target=lambda: acquired.append(_try_lock(first, 'ledger')))
+        thread.start()
+        thread.join()
+    assert acquired == [False]
+
+
+def _try_lock(manager, name):
+    try:
+        with manager.locked(name, timeout=0.1):
+            return True
+    except TimeoutError:
+        return False
+
+
+def test_expired_lock_is_taken_over(make_workers):
+    first, second = make_workers()
+    with first.locked('ledger', lease_seconds=0.05):
+        # The holder is stuck (or dead) past its lease
+        time.sleep(0.1)
+        with second.locked('ledger', timeout=0.5):
+            pass
+
+
+def _publish(manager, job_id, count):
+    for index in range(count):
+        manager.publish_log(ScriptLogRecord(job_id, 'INFO', 'message %d', (index,)))
+    manager.flush_logs()
+
+
+def test_logs_are_read_in_order_and_paged(make_workers):
+    first, second = make_workers()
+    _publish(first, 'job-1', 5)
+    _publish(second, 'job-2', 2)
+    _publish(second, 'job-1', 1)
+
+    logs = first.read_logs('job-1')
+    assert [record['message'] for _, record in logs] == [f'message {index}' for index in range(5)] + ['message 0']
+    ids = [log_id for log_id, _ in logs]
+    assert ids == sorted(ids)
+
+    page = second.read_logs('job-1', after_id=ids[1], limit=2)
+    assert [log_id for log_id, _ in page] == ids[2:4]
+    assert second.read_logs('job-1', after_id=ids[-1]) == []
+
+
+def test_old_logs_are_pruned(make_workers, monkeypatch):
+    monkeypatch.setattr(coordination, 'LOG_MAX_ROWS', 10)
+    monkeypatch.setattr(coordination, 'LOG_PRUNE_EVERY', 5)
+    first, second = make_workers()
+    _publish(first, 'job-1', 30)
+    messages = [record['message'] for _, record in second.read_logs('job-1')]
+    assert messages == [f'message {index}' for index in range(20, 30)]
+
+
+def test_finished_jobs_are_pruned_and_running_jobs_kept(make_workers):
+    first, second = make_workers()
+    first.register_job('running', dict(RECORD))
+    for index in range(4):
+        first.update_job(f'done-{index}', dict(RECORD, status='completed'))
+        time.sleep(0.01)
+
+    assert set(second.list_jobs(status='running')) == {'running'}
+    assert len(second.list_jobs(status='completed')) == 4
+
+    assert first.backend.prune_jobs(older_than=0, keep=2) == 2
+    assert set(second.list_jobs()) == {'running', 'done-2', 'done-3'}
+    assert first.backend.prune_jobs(older_than=time.time() + 1, keep=10) == 2
+    assert set(second.list_jobs()) == {'running'}
+
+
+def test_job_counters_are_shared_and_follow_status_changes(make_workers):
+    first, second = make_workers()
+    record = dict(RECORD)
+    first.register_job('job-1', record)
+    second.register_job('job-2', dict(RECORD, user_id='u2', type='daily_post'))
+    record['status'] = 'stopped'
+    first.update_job('job-1', record)
+    # The engine finishing after a stop moves the job, it does not count it twice
+    record['status'] = 'completed'
+    first.update_job('job-1', record)
+    first.renew_leases()
+
+    assert second.job_counts() == {'dm_automation': {'running': 0, 'stopped': 0, 'completed': 1},
+                                   'daily_post': {'running': 1}}
+    assert first.job_counts('u2') == {'daily_post': {'running': 1}}
+    # Counters outlive the pruned job rows
+    first.backend.prune_jobs(older_than=time.time() + 1, keep=0)
+    assert second.job_counts('u1')['dm_automation']['completed'] == 1
+
+    first.add_bandwidth('u1', 'dm_automation', {'requests': 2, 'bytes_in': 10})
+    second.add_bandwidth('u1', 'dm_automation', {'requests': 1, 'bytes_in': 0})
+    assert first.job_bandwidth('u1') == {'dm_automation': {'requests': 3, 'bytes_in': 10}}
+    assert second.job_bandwidth('u2') == {}
+
+
+def test_recent_jobs_are_newest_first_and_bounded(make_workers):
+    first, second = make_workers()
+    for index in (3, 0, 4, 1, 2):
+        first.update_job(f'job-{index}', dict(RECORD, status='completed', user_id=f'u{index % 2}',
+                                              start_time=f'2026-01-0{index + 1}T00:00:00'))
+    assert list(second.recent_jobs(limit=3)) == ['job-4', 'job-3', 'job-2']
+    assert list(second.recent_jobs('u1', limit=3)) == ['job-3', 'job-1']
+    assert second.recent_jobs('u1')['job-3']['worker_alive'] is False
+
+
+def test_existing_store_is_migrated_with_counters(tmp_path):
+    path = str(tmp_path / 'coordination.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (job_id TEXT PRIMARY KEY, record TEXT NOT NULL, owner TEXT, "
+                 "lease_expires REAL NOT NULL DEFAULT 0, stop_reason TEXT, updated REAL NOT NULL)")
+    for job_id, status in (('job-1', 'completed'), ('job-2', 'running')):
+        record = dict(RECORD, status=status, bandwidth={'totals': {'requests': 2}})
+        conn.execute("INSERT INTO jobs VALUES (?, ?, NULL, 0, NULL, ?)", (job_id, json.dumps(record), time.time()))
+    conn.commit()
+    conn.close()
+
+    manager = CoordinationManager(SQLiteCoordinationBackend(path), 'worker-a')
+    assert set(manager.list_jobs(status='running')) == {'job-2'}
+    assert manager.job_counts('u1') == {'dm_automation': {'completed': 1, 'running': 1}}
+    assert manager.job_bandwidth() == {'dm_automation': {'requests': 4}}
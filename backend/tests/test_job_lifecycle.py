@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+from job_lifecycle import JobLifecycleManager
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'checkpoints.sqlite3'), str(tmp_path / 'job_inputs')
+
+
+@pytest.fixture
+def lifecycle(paths):
+    return JobLifecycleManager(*paths)
+
+
+RECORD = {'type': 'dm_automation', 'status': 'running', 'config': {'selected_account_ids': ['a1', 'a2', 'a3']}}
+
+
+def test_drained_job_is_resumable_by_the_next_worker(paths):
+    old_worker = JobLifecycleManager(*paths)
+    old_worker.track('job-1', RECORD, 'worker-a')
+    old_worker.record_progress('job-1', 'alice', 'completed')
+    old_worker.record_progress('job-1', 'bob', 'failed')
+    old_worker.mark_draining('job-1', RECORD, 'worker-a')
+    old_worker.mark_interrupted('job-1', dict(RECORD, status='interrupted'))
+
+    new_worker = JobLifecycleManager(*paths)
+    [checkpoint] = new_worker.unfinished()
+    assert checkpoint['job_id'] == 'job-1'
+    assert checkpoint['state'] == 'interrupted'
+    assert checkpoint['owner'] is None
+    assert checkpoint['record']['status'] == 'interrupted'
+    # Only completed accounts are skipped; failed ones are retried
+    assert new_worker.completed_accounts('job-1') == {'alice'}
+
+    assert new_worker.claim('job-1', 'worker-b', checkpoint['owner'])
+    assert new_worker.unfinished() == []
+
+
+def test_only_one_worker_claims_a_job(paths):
+    first, second = JobLifecycleManager(*paths), JobLifecycleManager(*paths)
+    first.track('job-1', RECORD, 'crashed-worker')
+    assert first.claim('job-1', 'worker-a', 'crashed-worker')
+    assert not second.claim('job-1', 'worker-b', 'crashed-worker')
+    assert not second.claim('job-1', 'worker-b', 'worker-a')
+
+
+def test_claim_requires_the_expected_owner(lifecycle):
+    lifecycle.track('job-1', RECORD, 'worker-a')
+    assert not lifecycle.claim('job-1', 'worker-b', 'worker-c')
+    assert lifecycle.claim('job-1', 'worker-b', 'worker-a')
+
+
+def test_finish_drops_checkpoint_progress_and_inputs(lifecycle, tmp_path):
+    target = tmp_path / 'targets.csv'
+    target.write_text('username\nalice\n')
+    lifecycle.track('job-1', RECORD, 'worker-a')
+    lifecycle.record_progress('job-1', 'alice', 'completed')
+    config = lifecycle.preserve_inputs('job-1', {'target_file': str(target), 'prompt_file': None})
+    assert config['target_file'] != str(target)
+    assert open(config['target_file']).read() == 'username\nalice\n'
+    # Preserving again is a no-op once the inputs live in the job's directory
+    assert lifecycle.preserve_inputs('job-1', config) == config
+
+    lifecycle.finish('job-1')
+    assert lifecycle.unfinished() == []
+    assert lifecycle.completed_accounts('job-1') == set()
+    assert not os.path.exists(config['target_file'])
+
+
+def test_reset_progress_starts_a_new_pass(lifecycle):
+    lifecycle.track('job-1', RECORD, 'worker-a')
+    lifecycle.record_progress('job-1', 'alice', 'completed')
+    lifecycle.reset_progress('job-1')
+    assert lifecycle.completed_accounts('job-1') == set()
+
+
+def test_begin_drain_runs_callbacks_once(lifecycle):
+    calls = []
+    lifecycle.on_drain(lambda: calls.append('first'))
+    lifecycle.on_drain(lambda: 1 / 0)
+    lifecycle.on_drain(lambda: calls.append('after failure'))
+    lifecycle.begin_drain('test')
+    lifecycle.begin_drain('test again')
+    assert lifecycle.draining.is_set()
+    assert calls == ['first', 'after failure']
@@ -0,0 +1,75 @@
+import threading
+import multiprocessing
+
+from json_store import JSONFileStore
+from selector_registry import SelectorRegistryManager
+
+PROCESSES = 4
+THREADS = 3
+INCREMENTS = 50
+
+
+def _increment(path, results):
+    store = JSONFileStore(path, dict)
+    torn = 0
+
+    def worker():
+        nonlocal torn
+        for _ in range(INCREMENTS):
+            with store.lock():
+                data = store.read()
+                data['count'] = data.get('count', 0) + 1
+                data['padding'] = 'x' * (data['count'] % 997)
+                store.write(data)
+            # Unlocked readers must see either the old or the new document, never a partial one
+            if 'count' not in JSONFileStore(path, dict).read():
+                torn += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(torn)
+
+
+def test_concurrent_read_modify_write_across_processes(tmp_path):
+    path = str(tmp_path / 'counter.json')
+    JSONFileStore(path, dict).write({'count': 0})
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [context.Process(target=_increment, args=(path, results)) for _ in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    assert sum(results.get(timeout=5) for _ in processes) == 0
+    assert JSONFileStore(path, dict).read()['count'] == PROCESSES * THREADS * INCREMENTS
+
+
+def test_cached_reads_see_other_writers(tmp_path):
+    path = str(tmp_path / 'doc.json')
+    reader, writer = JSONFileStore(path, dict, cache=True), JSONFileStore(path, dict)
+    writer.write({'version': 1})
+    assert reader.read() == {'version': 1}
+    writer.write({'version': 2, 'extra': True})
+    assert reader.read() == {'version': 2, 'extra': True}
+
+
+def test_selector_stats_from_several_workers_are_merged(tmp_path):
+    path = str(tmp_path / 'selector_stats.json')
+    first, second = SelectorRegistryManager(path), SelectorRegistryManager(path)
+    selector = 'button[type="submit"]'
+    first.record('totp_submit', selector, [selector])
+    second.record('totp_submit', None, [selector])
+    second.record('totp_submit', None, [selector])
+    first.save_stats()
+    second.save_stats()
+
+    merged = SelectorRegistryManager(path).stats['totp_submit']
+    assert merged['lookups'] == 3
+    assert merged['first_hits'] == 1
+    assert merged['misses'] == 2
+    assert second.stats['totp_submit'] == merged
@@ -0,0 +1,75 @@
+import io
+import os
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiofiles')
+
+from media_cache import MediaCacheManager  # noqa: E402
+from upload_utils import UploadTooLargeError  # noqa: E402
+
+SHA_A = 'a' * 64
+SHA_B = 'b' * 64
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    path = tmp_path / 'media_cache'
+    path.mkdir()
+    for sha, last_used in ((SHA_A, '2025-01-01'), (SHA_B, '2025-01-02')):
+        (path / f'{sha}.jpg').write_bytes(b'x' * 8)
+    store = MediaCacheManager(str(path), quota_bytes=10).store
+    store.write({sha: {'size': 8, 'ext': '.jpg', 'last_used': last_used, 'refs': []}
+                 for sha, last_used in ((SHA_A, '2025-01-01'), (SHA_B, '2025-01-02'))})
+    return str(path)
+
+
+def test_new_worker_keeps_other_workers_refs(cache_dir):
+    first = MediaCacheManager(cache_dir, quota_bytes=10)
+    assert first.acquire(SHA_A, 'job-1')
+    second = MediaCacheManager(cache_dir, quota_bytes=10)
+    assert second.lookup(SHA_A)['refs'] == ['job-1']
+
+
+def test_eviction_skips_blobs_referenced_by_another_worker(cache_dir):
+    first, second = MediaCacheManager(cache_dir, quota_bytes=10), MediaCacheManager(cache_dir, quota_bytes=10)
+    first.acquire(SHA_A, 'job-1')
+    assert second.evict() == [SHA_B]
+    assert os.path.exists(os.path.join(cache_dir, f'{SHA_A}.jpg'))
+    assert first.lookup(SHA_B) is None
+
+
+def test_refs_of_finished_jobs_do_not_pin_blobs(cache_dir):
+    cache = MediaCacheManager(cache_dir, quota_bytes=10)
+    cache.acquire(SHA_A, 'crashed-job')
+    cache.acquire(SHA_B, 'running-job')
+    cache.set_ref_check(lambda job_id: job_id == 'running-job')
+    assert cache.evict() == [SHA_A]
+    assert cache.lookup(SHA_B)['refs'] == ['running-job']
+
+
+class FakeUpload:
+    def __init__(self, content: bytes):
+        self.file = io.BytesIO(content)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+
+def test_new_upload_is_not_evicted_to_make_room_for_itself(cache_dir):
+    cache = MediaCacheManager(cache_dir, quota_bytes=10)
+    cache.acquire(SHA_A, 'running-job')
+    entry = asyncio.run(cache.ingest_upload(FakeUpload(b'y' * 8), 'photo.jpg'))
+    # Still over quota once the other unreferenced blob is gone, but the upload stays until its job acquires it
+    assert entry and entry['size'] == 8 and os.path.exists(entry['path'])
+    assert cache.lookup(SHA_B) is None
+    assert cache.lookup(SHA_A)['refs'] == ['running-job']
+
+
+def test_upload_larger_than_the_quota_is_rejected(cache_dir):
+    cache = MediaCacheManager(cache_dir, quota_bytes=10)
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(cache.ingest_upload(FakeUpload(b'y' * 11), 'photo.jpg'))
+    assert not [name for name in os.listdir(cache_dir) if name.startswith('.incoming_')]
+    assert cache.lookup(SHA_A) and cache.lookup(SHA_B)
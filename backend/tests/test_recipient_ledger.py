@@ -0,0 +1,50 @@
+import pytest
+
+from recipient_ledger import RecipientLedgerManager, normalize_username
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'ledger.sqlite3')
+
+
+def test_normalize_username():
+    assert normalize_username('@Alice ') == 'alice'
+    assert normalize_username('https://www.instagram.com/Alice/?hl=en') == 'alice'
+
+
+def test_claim_is_exclusive_across_workers(db_path):
+    first, second = RecipientLedgerManager(db_path), RecipientLedgerManager(db_path)
+    assert first.claim('alice', 'job-1', 'sender')
+    assert not second.claim('@ALICE', 'job-2', 'other')
+    assert first.was_contacted('alice')
+
+
+def test_release_allows_a_new_claim(db_path):
+    ledger = RecipientLedgerManager(db_path)
+    assert ledger.claim('alice', 'job-1')
+    ledger.release('alice', 'job-2')
+    assert not ledger.claim('alice', 'job-3')
+    ledger.release('alice', 'job-1')
+    assert ledger.claim('alice', 'job-3')
+
+
+def test_suppression_added_by_another_worker_blocks_claim(db_path):
+    worker, admin = RecipientLedgerManager(db_path), RecipientLedgerManager(db_path)
+    admin.add_suppressions(['@Bob'], reason='opted out', added_by='admin')
+    assert worker.is_suppressed('bob')
+    assert not worker.claim('bob', 'job-1')
+    assert worker.get_stats()['recipients'] == 0
+
+    assert admin.remove_suppression('bob')
+    assert not worker.is_suppressed('bob')
+    assert worker.claim('bob', 'job-1')
+
+
+def test_filter_targets(db_path):
+    ledger = RecipientLedgerManager(db_path)
+    ledger.add_suppressions(['carol'])
+    ledger.claim('dave')
+    result = ledger.filter_targets([{'username': name} for name in ('alice', '@Alice', 'carol', 'dave', 'erin', '')])
+    assert [user['username'] for user in result['users']] == ['alice', 'erin']
+    assert result['stats'] == {'duplicates': 1, 'suppressed': 1, 'already_contacted': 1, 'kept': 2}
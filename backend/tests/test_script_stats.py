@@ -0,0 +1,69 @@
+from script_stats import ScriptStatsManager, summarize_counts, summarize_bandwidth
+
+
+def _script(user_id='u1', script_type='dm_automation', start_time='2026-01-01T00:00:00', status='running'):
+    return {'user_id': user_id, 'type': script_type, 'status': status, 'start_time': start_time}
+
+
+def test_register_counts_for_the_user_and_all_users():
+    stats = ScriptStatsManager()
+    stats.register('s1', _script())
+    stats.register('s2', _script(user_id='u2', script_type='daily_post'))
+    stats.register('s1', _script())  # registering again is a no-op
+
+    totals = stats.get_counts()['totals']
+    assert totals['total'] == 2 and totals['running'] == 2
+    counts = stats.get_counts('u1')
+    assert counts['totals']['total'] == 1
+    assert set(counts['by_type']) == {'dm_automation'}
+    assert stats.running_scripts('u2') == ['s2']
+    assert stats.get_counts('nobody')['totals']['total'] == 0
+
+
+def test_stopped_then_completed_is_counted_once_under_the_last_status():
+    stats = ScriptStatsManager()
+    stats.register('s1', _script())
+    stats.transition('s1', 'stopped')
+    stats.transition('s1', 'completed')
+    stats.transition('s1', 'completed')
+    stats.transition('unknown', 'completed')
+
+    for user_id in (None, 'u1'):
+        counts = stats.get_counts(user_id)
+        for scope in (counts['totals'], counts['by_type']['dm_automation']):
+            assert scope['total'] == 1
+            assert (scope['running'], scope['stopped'], scope['completed']) == (0, 0, 1)
+    assert stats.running_scripts() == []
+
+
+def test_recent_heap_keeps_only_the_newest_scripts():
+    stats = ScriptStatsManager(recent_limit=3)
+    for index in (4, 1, 5, 0, 3, 2):
+        stats.register(f's{index}', _script(user_id=f'u{index % 2}', start_time=f'2026-01-0{index + 1}T00:00:00'))
+
+    assert stats.recent_script_ids() == ['s5', 's4', 's3']
+    assert stats.recent_script_ids('u0') == ['s4', 's2', 's0']
+    assert all(len(heap) <= 3 for heap in stats.recent.values())
+
+
+def test_bandwidth_applies_only_the_change_since_the_last_snapshot():
+    stats = ScriptStatsManager()
+    stats.register('s1', _script())
+    assert stats.update_bandwidth('s1', {'requests': 3, 'bytes_in': 100}) == {
+        'requests': 3, 'failed': 0, 'bytes_in': 100, 'bytes_out': 0}
+    assert stats.update_bandwidth('s1', {'requests': 5, 'bytes_in': 150})['bytes_in'] == 50
+    assert stats.update_bandwidth('unknown', {'requests': 1}) is None
+    bandwidth = stats.get_bandwidth('u1')
+    assert (bandwidth['requests'], bandwidth['bytes_in']) == (5, 150)
+    assert bandwidth['by_type']['dm_automation']['requests'] == 5
+
+
+def test_summaries_match_the_manager_shape():
+    counts = summarize_counts({'dm_automation': {'running': 1, 'completed': 2}, 'daily_post': {'error': 1}})
+    assert counts['totals']['total'] == 4
+    assert (counts['totals']['completed'], counts['totals']['error']) == (2, 1)
+    assert counts['by_type']['daily_post']['total'] == 1
+
+    bandwidth = summarize_bandwidth({'dm_automation': {'requests': 2}, 'daily_post': {'requests': 1, 'bytes_out': 9}})
+    assert (bandwidth['requests'], bandwidth['bytes_out']) == (3, 9)
+    assert bandwidth['by_type']['dm_automation']['bytes_out'] == 0
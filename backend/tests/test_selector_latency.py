@@ -0,0 +1,107 @@
+"""
+Worst-case step latency of selector lookups: a race over N fallbacks must cost one timeout, not N
+"""
+
+import os
+import time
+import asyncio
+
+import pytest
+
+from selector_race import wait_for_any, query_any
+from selector_registry import DEFAULT_SELECTORS, SelectorRegistryManager
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+TIMEOUT_MS = 200
+# Scheduling slack on top of the single shared deadline
+SLACK_SECONDS = 0.15
+
+
+class FakePage:
+    """wait_for_selector resolves after `delay` for present selectors and times out for the rest"""
+
+    def __init__(self, present=(), delay=0.01):
+        self.present = set(present)
+        self.delay = delay
+        self.waits = 0
+
+    async def wait_for_selector(self, selector, timeout, state):
+        self.waits += 1
+        if selector in self.present:
+            await asyncio.sleep(self.delay)
+            return selector
+        await asyncio.sleep(timeout / 1000)
+        raise TimeoutError(selector)
+
+    async def query_selector(self, selector):
+        return selector if selector in self.present else None
+
+
+def _timed(coro):
+    start = time.perf_counter()
+    result = asyncio.run(coro)
+    return result, time.perf_counter() - start
+
+
+def test_miss_costs_one_timeout_not_one_per_selector():
+    selectors = DEFAULT_SELECTORS['totp_input']
+    (element, index), elapsed = _timed(wait_for_any(FakePage(), selectors, timeout=TIMEOUT_MS))
+    assert (element, index) == (None, -1)
+    assert elapsed < TIMEOUT_MS / 1000 + SLACK_SECONDS
+    assert len(selectors) * TIMEOUT_MS / 1000 > 10 * elapsed
+
+
+def test_last_listed_match_is_found_without_waiting_for_the_others():
+    selectors = DEFAULT_SELECTORS['totp_input']
+    page = FakePage(present=[selectors[-1]])
+    (element, index), elapsed = _timed(wait_for_any(page, selectors, timeout=TIMEOUT_MS))
+    assert (element, index) == (selectors[-1], len(selectors) - 1)
+    assert elapsed < TIMEOUT_MS / 1000
+    assert page.waits == len(selectors)
+
+
+def test_earliest_listed_selector_wins_a_tie():
+    selectors = ['#first', '#second', '#third']
+    page = FakePage(present=['#second', '#third'])
+    assert asyncio.run(wait_for_any(page, selectors, timeout=TIMEOUT_MS)) == ('#second', 1)
+    assert asyncio.run(query_any(page, selectors)) == ('#second', 1)
+
+
+def test_registry_miss_with_generic_fallbacks_stays_bounded(tmp_path):
+    registry = SelectorRegistryManager(str(tmp_path / 'selector_stats.json'))
+    (element, selector), elapsed = _timed(registry.wait_for(FakePage(), 'message_input', timeout=TIMEOUT_MS))
+    assert element is None and selector is None
+    # Specific race, then a fallback race capped at GENERIC_FALLBACK_TIMEOUT
+    assert elapsed < 2 * TIMEOUT_MS / 1000 + SLACK_SECONDS
+
+
+async def _browser_latency(fixture, selectors, timeout):
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as playwright:
+        try:
+            browser = await playwright.chromium.launch()
+        except Exception as e:
+            pytest.skip(f"Chromium is not installed: {e}")
+        try:
+            page = await browser.new_page()
+            with open(os.path.join(FIXTURES_DIR, fixture), 'r', encoding='utf-8') as f:
+                await page.set_content(f.read())
+            start = time.perf_counter()
+            _, index = await wait_for_any(page, selectors, timeout=timeout)
+            return index, time.perf_counter() - start
+        finally:
+            await browser.close()
+
+
+@pytest.mark.parametrize('fixture, element, found', [
+    ('totp_challenge.html', 'totp_input', True),
+    ('no_dialog.html', 'save_login_not_now', False),
+    ('no_dialog.html', 'totp_input', False),
+])
+def test_browser_step_latency_on_static_pages(fixture, element, found):
+    pytest.importorskip('playwright.async_api')
+    timeout = 1000
+    index, elapsed = asyncio.run(_browser_latency(fixture, DEFAULT_SELECTORS[element], timeout))
+    assert (index >= 0) == found
+    assert elapsed < (0.5 if found else timeout / 1000 + 0.5)
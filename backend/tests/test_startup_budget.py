@@ -0,0 +1,75 @@
+"""
+Cold-start budget: importing app must not pull in the engines or heavy libraries
+"""
+
+import os
+import ast
+import sys
+import subprocess
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Engines and libraries that load when the first job of a type starts, never at import
+LAZY_MODULES = ('instagram_daily_post', 'instagram_dm_automation', 'instagram_warmup', 'pandas', 'playwright')
+IMPORT_TIME_BUDGET = float(os.getenv('IMPORT_TIME_BUDGET', '3.0'))
+
+
+def _module_level_imports(module: str):
+    """Top-level names imported when a backend module is imported (function-level imports excluded)"""
+    with open(os.path.join(BACKEND_DIR, f'{module}.py'), 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in tree.body:
+        nodes = [node]
+        if isinstance(node, ast.Try):
+            nodes = node.body + [child for handler in node.handlers for child in handler.body]
+        for child in nodes:
+            if isinstance(child, ast.Import):
+                names.update(alias.name.split('.')[0] for alias in child.names)
+            elif isinstance(child, ast.ImportFrom) and child.module and child.level == 0:
+                names.add(child.module.split('.')[0])
+    return names
+
+
+def _import_closure(root: str):
+    local = {name[:-3] for name in os.listdir(BACKEND_DIR) if name.endswith('.py')}
+    seen, external, stack = set(), set(), [root]
+    while stack:
+        module = stack.pop()
+        if module in seen:
+            continue
+        seen.add(module)
+        for name in _module_level_imports(module):
+            if name in local:
+                stack.append(name)
+            else:
+                external.add(name)
+    return seen | external
+
+
+def test_app_import_graph_excludes_lazy_modules():
+    imported = _import_closure('app')
+    assert 'auth' in imported
+    assert not imported & set(LAZY_MODULES)
+
+
+def test_app_cold_import_time(tmp_path):
+    pytest.importorskip('fastapi')
+    pytest.importorskip('aiofiles')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=str(tmp_path),
+                            env=dict(os.environ, PYTHONPATH=BACKEND_DIR), capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    # "import time: self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = [part.strip() for part in line[len('import time:'):].split('|')]
+        if parts[1].isdigit():
+            cumulative[parts[2]] = int(parts[1])
+    loaded = {name.split('.')[0] for name in cumulative}
+    assert not loaded & set(LAZY_MODULES)
+    assert cumulative['app'] / 1e6 < IMPORT_TIME_BUDGET
@@ -0,0 +1,179 @@
+"""
+Lightweight Tracing
+Context-manager spans with monotonic timers, recorded per job and account
+"""
+
+import math
+import time
+import logging
+import functools
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bounds for in-memory trace retention
+MAX_TRACED_JOBS = 100
+MAX_SPANS_PER_JOB = 20000
+
+# Job/account of the running task; asyncio tasks inherit a copy on creation
+_current_job: contextvars.ContextVar = contextvars.ContextVar('trace_job', default=None)
+_current_account: contextvars.ContextVar = contextvars.ContextVar('trace_account', default=None)
+_current_step: contextvars.ContextVar = contextvars.ContextVar('trace_step', default=None)
+
+
+def current_fields():
+    """(job, account, step) bound to the running task"""
+    return _current_job.get(), _current_account.get(), _current_step.get()
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _summarize(spans: List[Dict]) -> Dict[str, Dict]:
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for span in spans:
+        durations.setdefault(span['step'], []).append(span['duration_ms'])
+        if span['status'] != 'ok':
+            errors[span['step']] = errors.get(span['step'], 0) + 1
+
+    summary = {}
+    for step, values in durations.items():
+        values.sort()
+        summary[step] = {
+            'count': len(values),
+            'p50_ms': round(_percentile(values, 50), 1),
+            'p95_ms': round(_percentile(values, 95), 1),
+            'max_ms': round(values[-1], 1),
+            'total_ms': round(sum(values), 1),
+            'failures': errors.get(step, 0),
+        }
+    return summary
+
+
+class Tracer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # job_id -> list of span dicts
+        self.jobs: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self.dropped: Dict[str, int] = {}
+
+    def start_context(self, job_id: Optional[str], account: Optional[str] = None):
+        """Bind job/account for spans in the current task; returns a token for end_context"""
+        return _current_job.set(job_id), _current_account.set(account)
+
+    def end_context(self, tokens):
+        job_token, account_token = tokens
+        _current_account.reset(account_token)
+        _current_job.reset(job_token)
+
+    @contextmanager
+    def job_context(self, job_id: Optional[str], account: Optional[str] = None):
+        """Bind job/account for spans opened inside the block"""
+        tokens = self.start_context(job_id, account)
+        try:
+            yield
+        finally:
+            self.end_context(tokens)
+
+    def _record(self, job_id: str, span: Dict):
+        with self.lock:
+            spans = self.jobs.get(job_id)
+            if spans is None:
+                spans = []
+                self.jobs[job_id] = spans
+                while len(self.jobs) > MAX_TRACED_JOBS:
+                    old_job, _ = self.jobs.popitem(last=False)
+                    self.dropped.pop(old_job, None)
+            if len(spans) >= MAX_SPANS_PER_JOB:
+                self.dropped[job_id] = self.dropped.get(job_id, 0) + 1
+                return
+            spans.append(span)
+
+    @contextmanager
+    def span(self, step: str, job_id: Optional[str] = None, account: Optional[str] = None):
+        """Time a block; yields a dict whose 'status' may be set to mark soft failures"""
+        job_id = job_id or _current_job.get()
+        account = account or _current_account.get()
+        info = {'status': 'ok'}
+        started_at = datetime.now().isoformat()
+        step_token = _current_step.set(step)
+        start = time.monotonic()
+        try:
+            yield info
+        except BaseException as e:
+            info['status'] = 'error'
+            info['error'] = f"{type(e).__name__}: {str(e)[:200]}"
+            raise
+        finally:
+            _current_step.reset(step_token)
+            if job_id:
+                span = {
+                    'step': step,
+                    'account': account,
+                    'started_at': started_at,
+                    'duration_ms': round((time.monotonic() - start) * 1000, 1),
+                    'status': info['status'],
+                }
+                if 'error' in info:
+                    span['error'] = info['error']
+                self._record(job_id, span)
+
+    def traced(self, step: str, failed_if=None):
+        """Decorator recording a span around an async function.
+
+        A False return counts as a failure unless failed_if(result) says otherwise.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(step) as info:
+                    result = await func(*args, **kwargs)
+                    if (failed_if(result) if failed_if else result is False):
+                        info['status'] = 'failed'
+                    return result
+            return wrapper
+        return decorator
+
+    def get_summary(self, job_id: str) -> Optional[Dict]:
+        """Per-step and per-account p50/p95 durations for a job"""
+        with self.lock:
+            spans = list(self.jobs.get(job_id, []))
+            dropped = self.dropped.get(job_id, 0)
+        if not spans:
+            return None
+
+        by_account: Dict[str, List[Dict]] = {}
+        for span in spans:
+            by_account.setdefault(span['account'] or 'job', []).append(span)
+
+        return {
+            'job_id': job_id,
+            'span_count': len(spans),
+            'dropped_spans': dropped,
+            'steps': _summarize(spans),
+            'accounts': {account: _summarize(account_spans) for account, account_spans in by_account.items()},
+        }
+
+    def export(self, job_id: str) -> Optional[Dict]:
+        """Summary plus raw spans, for JSON download"""
+        summary = self.get_summary(job_id)
+        if summary is None:
+            return None
+        with self.lock:
+            summary['spans'] = list(self.jobs.get(job_id, []))
+        return summary
+
+
+# Global instance
+tracer = Tracer()
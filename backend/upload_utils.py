@@ -0,0 +1,85 @@
+"""
+Upload Utilities
+Chunked, size-capped async copying of uploaded files with streaming SHA-256
+"""
+
+import os
+import re
+import hashlib
+import logging
+from typing import Dict
+
+import aiofiles
+
+logger = logging.getLogger(__name__)
+
+# Copy uploads in fixed-size chunks so peak memory stays small regardless of file size
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+_SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+def parse_size(value: str, default: int) -> int:
+    """Parse sizes like '100MB', '512kb' or '1048576' into bytes"""
+    if not value:
+        return default
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*', value.upper())
+    if not match:
+        logger.warning(f"Invalid size value '{value}', using default")
+        return default
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+MAX_FILE_SIZE = parse_size(os.getenv('MAX_FILE_SIZE', '100MB'), 100 * 1024 ** 2)
+# Whole multipart request bodies larger than this are refused from Content-Length, before Starlette
+# spools them; allows one full-size file plus form fields (nginx enforces the same 100M in front)
+MAX_UPLOAD_REQUEST_SIZE = parse_size(os.getenv('MAX_UPLOAD_REQUEST_SIZE', ''), MAX_FILE_SIZE + 1024 ** 2)
+
+
+def upload_too_large(content_type: str, content_length) -> bool:
+    """True if a multipart request announces a body over MAX_UPLOAD_REQUEST_SIZE"""
+    if not content_type.lower().startswith('multipart/form-data') or not content_length:
+        return False
+    try:
+        return int(content_length) > MAX_UPLOAD_REQUEST_SIZE
+    except ValueError:
+        return False
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size cap mid-stream"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"File exceeds maximum size of {max_bytes // (1024 * 1024)} MB")
+
+
+async def stream_upload_to_path(upload, dest_path: str, max_bytes: int = MAX_FILE_SIZE) -> Dict:
+    """Copy an UploadFile to dest_path in chunks, enforcing max_bytes and hashing as it goes.
+
+    By the time this runs Starlette has already spooled the multipart body to its own temp file,
+    so this cap only bounds what we copy; oversized requests are refused earlier from Content-Length
+    (see upload_too_large). Chunked bodies without a Content-Length are still spooled in full.
+
+    Returns {'size': bytes_written, 'sha256': hex_digest}. The partial file is removed on failure.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(dest_path, 'wb') as out:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        try:
+            os.remove(dest_path)
+        except OSError:
+            pass
+        raise
+    return {'size': size, 'sha256': digest.hexdigest()}
@@ -21,6 +21,8 @@ const DMAutomationPage: React.FC = () => {
   const [isPaused] = useState(false); // Removing unused setter
   const [showResponsesModal, setShowResponsesModal] = useState(false);
   const [responses, setResponses] = useState<any[]>([]);
+  const [responsesCursor, setResponsesCursor] = useState<string | null>(null);
+  const [totalResponses, setTotalResponses] = useState(0);
   const [availableAccounts, setAvailableAccounts] = useState<InstagramAccount[]>([]);
   const [selectedAccountIds, setSelectedAccountIds] = useState<string[]>([]);
   const [formData, setFormData] = useState({
@@ -357,15 +359,19 @@ const DMAutomationPage: React.FC = () => {
     }
   };
 
-  const viewPositiveResponses = async () => {
+  const viewPositiveResponses = async (cursor: string | null = null) => {
     if (!scriptId) return;
 
     try {
       const response = await axios.get(getApiUrl(`/script/${scriptId}/responses`), {
-        headers: getApiHeaders()
+        headers: getApiHeaders(),
+        params: cursor ? { cursor } : {}
       });
       
-      setResponses(response.data.responses || []);
+      const page = response.data.responses || [];
+      setResponses(prev => (cursor ? [...prev, ...page] : page));
+      setResponsesCursor(response.data.next_cursor || null);
+      setTotalResponses(response.data.total_responses || 0);
       setShowResponsesModal(true);
     } catch (error) {
       console.error('Error fetching responses:', error);
@@ -373,6 +379,30 @@ const DMAutomationPage: React.FC = () => {
     }
   };
 
+  const exportResponses = async () => {
+    if (!scriptId) return;
+
+    try {
+      const response = await axios.get(getApiUrl(`/script/${scriptId}/responses/export`), {
+        headers: getApiHeaders(),
+        responseType: 'blob'
+      });
+
+      const blob = new Blob([response.data], { type: 'text/csv' });
+      const url = window.URL.createObjectURL(blob);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `dm_responses_${scriptId}.csv`;
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      window.URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error exporting responses:', error);
+      alert('Error exporting responses');
+    }
+  };
+
   const defaultPrompt = `Create a personalized Instagram DM for {first_name} in {city} who works in {bio}. 
 The message should be about offering virtual assistant services to help with business tasks. 
 Keep it friendly, professional, and under 500 characters. 
@@ -603,7 +633,7 @@ Make it feel personal and not like spam.`;
           {/* Positive Responses Button - Under the logs */}
           <div className="logs-footer">
             <button 
-              onClick={viewPositiveResponses}
+              onClick={() => viewPositiveResponses()}
               className={`btn btn-success btn-small ${(!scriptStatus || scriptStatus.status !== 'completed') ? 'disabled' : ''}`}
               title="View responses from DM recipients"
               disabled={!scriptStatus || scriptStatus.status !== 'completed'}
@@ -782,7 +812,10 @@ Make it feel personal and not like spam.`;
               {responses.length > 0 ? (
                 <div className="responses-container">
                   <div className="responses-summary">
-                    <p><strong>Total Responses:</strong> {responses.length}</p>
+                    <p><strong>Total Responses:</strong> {totalResponses}</p>
+                    <button className="btn btn-secondary" onClick={exportResponses}>
+                      Export CSV
+                    </button>
                   </div>
                   <div className="responses-table">
                     <div className="table-header">
@@ -808,6 +841,11 @@ Make it feel personal and not like spam.`;
                       </div>
                     ))}
                   </div>
+                  {responsesCursor && (
+                    <button className="btn btn-secondary" onClick={() => viewPositiveResponses(responsesCursor)}>
+                      Load more ({responses.length} of {totalResponses})
+                    </button>
+                  )}
                 </div>
               ) : (
                 <div className="no-responses">
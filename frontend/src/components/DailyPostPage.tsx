@@ -13,6 +13,19 @@ interface ScriptStatus {
   error?: string;
 }
 
+// SHA-256 of a file as hex, or null where Web Crypto is unavailable (e.g. plain http)
+const hashFile = async (file: File): Promise<string | null> => {
+  if (!window.crypto?.subtle) {
+    return null;
+  }
+  try {
+    const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+  } catch (error) {
+    return null;
+  }
+};
+
 const DailyPostPage: React.FC = () => {
   const [isRunning, setIsRunning] = useState(false);
   const [scriptId, setScriptId] = useState<string | null>(null);
@@ -151,7 +164,21 @@ const DailyPostPage: React.FC = () => {
 
     const data = new FormData();
     data.append('account_ids', JSON.stringify(selectedAccountIds));
-    data.append('media_file', formData.mediaFile);
+    // Skip re-uploading media the server already has cached
+    const mediaHash = await hashFile(formData.mediaFile);
+    let mediaCached = false;
+    if (mediaHash) {
+      try {
+        const check = await axios.get(getApiUrl(`/media/${mediaHash}`), { headers: getApiHeaders() });
+        mediaCached = Boolean(check.data.exists);
+      } catch (error) {
+        mediaCached = false;
+      }
+      data.append('media_sha256', mediaHash);
+    }
+    if (!mediaCached) {
+      data.append('media_file', formData.mediaFile);
+    }
     data.append('caption', formData.caption);
 
     try {
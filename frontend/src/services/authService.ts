@@ -52,6 +52,21 @@ export interface ActivityLog {
   country_code: string;
 }
 
+export interface ActivityLogFilters {
+  action?: string;
+  since?: string;
+  until?: string;
+  cursor?: string;
+}
+
+export interface ScriptLogFilters {
+  scriptType?: string;
+  status?: string;
+  since?: string;
+  until?: string;
+  cursor?: string;
+}
+
 export interface ScriptLog {
   script_id: string;
   user_id: string;
@@ -286,11 +301,19 @@ class AuthService {
     }
   }
 
-  async getActivityLogs(userId?: string, limit: number = 100): Promise<{ success: boolean; logs?: ActivityLog[]; message?: string }> {
+  async getActivityLogs(
+    userId?: string,
+    limit: number = 100,
+    filters: ActivityLogFilters = {}
+  ): Promise<{ success: boolean; logs?: ActivityLog[]; next_cursor?: string | null; message?: string }> {
     try {
       const params = new URLSearchParams();
       if (userId) params.append('user_id', userId);
       params.append('limit', limit.toString());
+      if (filters.action) params.append('action', filters.action);
+      if (filters.since) params.append('since', filters.since);
+      if (filters.until) params.append('until', filters.until);
+      if (filters.cursor) params.append('cursor', filters.cursor);
 
       const response = await fetch(`${API_BASE_URL}/admin/activity-logs?${params}`, {
         headers: this.getAuthHeaders(),
@@ -303,11 +326,20 @@ class AuthService {
     }
   }
 
-  async getScriptLogs(userId?: string, limit: number = 100): Promise<{ success: boolean; script_logs?: ScriptLog[]; message?: string }> {
+  async getScriptLogs(
+    userId?: string,
+    limit: number = 100,
+    filters: ScriptLogFilters = {}
+  ): Promise<{ success: boolean; script_logs?: ScriptLog[]; next_cursor?: string | null; message?: string }> {
     try {
       const params = new URLSearchParams();
       if (userId) params.append('user_id', userId);
       if (limit) params.append('limit', limit.toString());
+      if (filters.scriptType) params.append('script_type', filters.scriptType);
+      if (filters.status) params.append('status', filters.status);
+      if (filters.since) params.append('since', filters.since);
+      if (filters.until) params.append('until', filters.until);
+      if (filters.cursor) params.append('cursor', filters.cursor);
 
       const response = await fetch(`${API_BASE_URL}/admin/script-logs?${params}`, {
         headers: this.getAuthHeaders(),